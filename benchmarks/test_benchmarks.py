@@ -0,0 +1,107 @@
+"""
+Benchmarks pytest-benchmark (mêmes scénarios que python manage.py run_benchmarks)
+
+    DJANGO_SETTINGS_MODULE=site_trading_v3.settings.development \
+        pytest benchmarks/ --benchmark-json=benchmarks.json
+
+Nécessite pytest-django et pytest-benchmark ; ignoré sinon.
+"""
+
+import contextlib
+import io
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+pytest.importorskip('pytest_django')
+
+from django.urls import reverse  # noqa: E402
+
+from trading_app import benchmarks  # noqa: E402
+from trading_app.algorithms import AlgorithmFactory  # noqa: E402
+from trading_app.market_data.local import LocalDataStore  # noqa: E402
+from trading_app.models import AssetTradable  # noqa: E402
+
+
+@pytest.mark.parametrize('length', [100, 1000, 10000])
+@pytest.mark.parametrize('algorithm_type', sorted(AlgorithmFactory._algorithms))
+def test_algorithm_signals(benchmark, algorithm_type, length):
+    price_data = LocalDataStore(seed=42).synthetic_ohlcv('BENCH', length, '1d')
+    algorithm = AlgorithmFactory.create_algorithm(
+        algorithm_type, AlgorithmFactory.get_algorithm_parameters(algorithm_type)
+    )
+    result = benchmark(algorithm.calculate_signals, price_data)
+    assert result['signal'] in ('BUY', 'SELL', 'HOLD')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('size', [1000, 10000])
+def test_find_matching_all_asset(benchmark, size):
+    catalogue = benchmarks.seed_catalogue(size)
+    match = benchmark(AssetTradable.find_matching_all_asset, catalogue[-1].symbol, 'binance')
+    assert match is not None
+
+
+@pytest.fixture
+def fake_broker():
+    server = benchmarks.start_fake_broker(symbols=20, positions=1000, trades=20000)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('operation', ['positions', 'trades'])
+@pytest.mark.parametrize('broker_type', ['binance', 'saxo'])
+def test_sync_from_broker(benchmark, fake_broker, django_user_model, broker_type, operation):
+    from trading_app.models import BrokerCredentials
+    from trading_app.services import BrokerService
+
+    user = django_user_model.objects.create_user(username='bench')
+    benchmarks.seed_catalogue(20)
+    credentials = BrokerCredentials.objects.create(
+        user=user, broker_type=broker_type, name='Bench', base_url=fake_broker.base_url,
+        binance_api_key='bench', binance_api_secret='bench',
+        # Token 24h (access == refresh) : pas de rafraîchissement OAuth
+        saxo_access_token='bench-token', saxo_refresh_token='bench-token',
+    )
+    service = BrokerService(user)
+    if operation == 'positions':
+        sync, kwargs = service.sync_positions_from_broker, {}
+    else:
+        sync, kwargs = service.sync_trades_from_broker, {'limit': 1000}
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = benchmark.pedantic(sync, args=(credentials,), kwargs=kwargs, rounds=3)
+    assert result is not None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('view_name', benchmarks.TABULATOR_VIEWS)
+def test_tabulator_views(benchmark, client, view_name):
+    users = benchmarks.seed_tabulator_data(users=3, assets=100, trades_per_asset=10)
+    client.force_login(users[0])
+    url = reverse(view_name)
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = benchmark(client.get, url, HTTP_HOST='localhost')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('size', [100, 500])
+def test_bulk_refresh_cold(benchmark, settings, size):
+    from trading_app.market_data import cache as market_cache
+    from trading_app.market_data.bulk import refresh_assets, refresh_metadata
+
+    settings.MARKET_DATA_BACKEND = 'local'
+    assets = benchmarks.seed_assets(size)
+
+    def cold_refresh():
+        # Premier passage d'une commande : cache des métadonnées vide
+        for asset in assets:
+            asset.name, asset.sector = '', 'xxxx'
+            market_cache.invalidate(f"local-yahoo:metadata:{asset.symbol}")
+        return refresh_assets(assets), refresh_metadata(assets, limit=size)
+
+    histories, metadata = benchmark.pedantic(cold_refresh, rounds=1, iterations=1)
+    assert histories['updated'] == size
+    assert metadata['updated'] == size
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "trading_app.instrumentation.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -121,4 +122,139 @@ DATABASES = {
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
-DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField" 
\ No newline at end of file
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Recherche d'actifs (trading_app.asset_search)
+# 'auto' : pg_trgm si la base est PostgreSQL avec l'extension installée, sinon index en mémoire
+# 'memory' : toujours l'index en mémoire
+ASSET_SEARCH_BACKEND = os.environ.get('ASSET_SEARCH_BACKEND', 'auto')
+
+# Caches Django
+# 'default' : cache du processus (réponses, données de marché) ; SHARED_CACHE_ALIAS : cache partagé
+# entre processus (gunicorn, run_price_feed, refresh_broker_tokens, commandes cron) pour les
+# cotations streaming, les tokens Saxo et les versions du catalogue et des prix.
+# Redis si REDIS_URL est défini, sinon la table trading_app_shared_cache de la base
+# (créée par la migration 0023 ou python manage.py createcachetable)
+SHARED_CACHE_ALIAS = 'shared'
+if os.environ.get('REDIS_URL'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'trading_app_shared_cache',
+    }
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    SHARED_CACHE_ALIAS: SHARED_CACHE,
+}
+
+# Cache des réponses (trading_app.response_cache)
+# Alias d'un backend défini dans CACHES (locmem, fichier, Redis...) et durée de vie en secondes
+RESPONSE_CACHE_ALIAS = os.environ.get('RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 600))
+# Versions du catalogue et des prix : cache partagé, pour invalider les réponses de tous les processus
+RESPONSE_VERSION_CACHE_ALIAS = os.environ.get('RESPONSE_VERSION_CACHE_ALIAS', SHARED_CACHE_ALIAS)
+
+# Données de marché (trading_app.market_data)
+# Durées de fraîcheur en secondes : cotations/historiques, métadonnées (nom, secteur...),
+# conservation des valeurs périmées servies en secours, pause après une limite de débit (429)
+MARKET_DATA_QUOTE_TTL = int(os.environ.get('MARKET_DATA_QUOTE_TTL', 300))
+MARKET_DATA_METADATA_TTL = int(os.environ.get('MARKET_DATA_METADATA_TTL', 86400))
+MARKET_DATA_STALE_TTL = int(os.environ.get('MARKET_DATA_STALE_TTL', 86400))
+MARKET_DATA_COOLDOWN = int(os.environ.get('MARKET_DATA_COOLDOWN', 60))
+# Nombre de jours avant de réessayer un symbole qu'aucun fournisseur n'a pu résoudre (SymbolResolution)
+MARKET_DATA_RESOLUTION_RETRY_DAYS = int(os.environ.get('MARKET_DATA_RESOLUTION_RETRY_DAYS', 30))
+# Passe des métadonnées (bulk.refresh_metadata) : Assets traités par passage, pause entre deux Ticker.info
+MARKET_DATA_METADATA_BATCH = int(os.environ.get('MARKET_DATA_METADATA_BATCH', 50))
+MARKET_DATA_METADATA_INTERVAL = float(os.environ.get('MARKET_DATA_METADATA_INTERVAL', 0.5))
+
+# Backend des données de marché : 'live' (Yahoo, CoinGecko) ou 'local' (fichiers/synthétique, hors ligne)
+# Le backend local sert des données déterministes pour les tests et benchmarks
+MARKET_DATA_BACKEND = os.environ.get('MARKET_DATA_BACKEND', 'live')
+MARKET_DATA_LOCAL_ROOT = os.environ.get('MARKET_DATA_LOCAL_ROOT', str(BASE_DIR / 'market_data_local'))
+MARKET_DATA_LOCAL_SEED = int(os.environ.get('MARKET_DATA_LOCAL_SEED', 42))
+MARKET_DATA_LOCAL_END_DATE = os.environ.get('MARKET_DATA_LOCAL_END_DATE', '2025-01-03')
+MARKET_DATA_LOCAL_CATALOGUE_SIZE = int(os.environ.get('MARKET_DATA_LOCAL_CATALOGUE_SIZE', 1000))
+
+# URLs des APIs courtiers (serveur de test local : python manage.py run_fake_broker)
+# Vide = API officielle ; BrokerCredentials.base_url est prioritaire
+BROKER_BASE_URLS = {
+    'binance': os.environ.get('BINANCE_BASE_URL', ''),
+    'saxo': os.environ.get('SAXO_BASE_URL', ''),
+}
+
+# Instrumentation des requêtes (trading_app.instrumentation)
+# En-tête Server-Timing + histogramme glissant par vue sur /metrics/requests/ (staff)
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'True').lower() == 'true'
+REQUEST_METRICS_WINDOW = int(os.environ.get('REQUEST_METRICS_WINDOW', 500))
+# Nombre de requêtes SQL au-delà duquel une vue est signalée (N+1 probable), 0 = désactivé
+REQUEST_METRICS_QUERY_WARNING = int(os.environ.get('REQUEST_METRICS_QUERY_WARNING', 100))
+
+# Cycle de vie des tokens Saxo (trading_app.token_lifecycle, refresh_broker_tokens --loop)
+# Rafraîchissement TOKEN_REFRESH_MARGIN secondes avant expiration ; tokens et verrous dans le
+# cache TOKEN_CACHE_ALIAS, partagé entre processus (refresh_broker_tokens refuse un cache locmem)
+TOKEN_CACHE_ALIAS = os.environ.get('TOKEN_CACHE_ALIAS', SHARED_CACHE_ALIAS)
+TOKEN_REFRESH_MARGIN = int(os.environ.get('TOKEN_REFRESH_MARGIN', 300))
+TOKEN_REFRESH_LOCK_TIMEOUT = int(os.environ.get('TOKEN_REFRESH_LOCK_TIMEOUT', 60))
+# Délai avant nouvel essai après un échec, attente maximale d'un refresh mené par un autre processus
+TOKEN_REFRESH_RETRY = int(os.environ.get('TOKEN_REFRESH_RETRY', 60))
+TOKEN_REFRESH_WAIT = float(os.environ.get('TOKEN_REFRESH_WAIT', 5))
+
+# Durée (secondes) de réutilisation d'une instance de courtier authentifiée (trading_app.brokers.registry)
+# L'instance est reconstruite plus tôt si les tokens ou les clés des credentials changent
+BROKER_INSTANCE_TTL = int(os.environ.get('BROKER_INSTANCE_TTL', 600))
+
+# Flux de prix temps réel (trading_app.price_feed, python manage.py run_price_feed)
+# Cotations streaming conservées PRICE_FEED_TTL secondes dans le cache PRICE_FEED_CACHE_ALIAS
+# (partagé : run_price_feed refuse de démarrer sur un cache propre au processus) ;
+# au-delà de PRICE_FEED_MAX_AGE secondes, get_asset_price revient à l'API REST du courtier
+PRICE_FEED_CACHE_ALIAS = os.environ.get('PRICE_FEED_CACHE_ALIAS', SHARED_CACHE_ALIAS)
+PRICE_FEED_TTL = int(os.environ.get('PRICE_FEED_TTL', 300))
+PRICE_FEED_MAX_AGE = float(os.environ.get('PRICE_FEED_MAX_AGE', 60))
+# Streaming Saxo : hôte (vide = déduit de la passerelle REST), cadence et taille des abonnements
+SAXO_STREAMING_URL = os.environ.get('SAXO_STREAMING_URL', '')
+PRICE_FEED_REFRESH_RATE_MS = int(os.environ.get('PRICE_FEED_REFRESH_RATE_MS', 1000))
+PRICE_FEED_SUBSCRIPTION_CHUNK = int(os.environ.get('PRICE_FEED_SUBSCRIPTION_CHUNK', 100))
+# Silence maximal avant reconnexion, attente maximale entre deux reconnexions (secondes)
+PRICE_FEED_READ_TIMEOUT = float(os.environ.get('PRICE_FEED_READ_TIMEOUT', 60))
+PRICE_FEED_MAX_BACKOFF = float(os.environ.get('PRICE_FEED_MAX_BACKOFF', 60))
+
+# Flux websocket Binance (trading_app.brokers.binance_streaming, run_price_feed)
+# Hôte (vide = déduit de l'API REST), intervalle des bougies suivies et fréquence d'écriture de la bougie en cours
+BINANCE_STREAM_URL = os.environ.get('BINANCE_STREAM_URL', '')
+BINANCE_STREAM_KLINE_INTERVAL = os.environ.get('BINANCE_STREAM_KLINE_INTERVAL', '1d')
+BINANCE_STREAM_CANDLE_FLUSH = float(os.environ.get('BINANCE_STREAM_CANDLE_FLUSH', 60))
+BINANCE_STREAM_READ_TIMEOUT = float(os.environ.get('BINANCE_STREAM_READ_TIMEOUT', 600))
+BINANCE_STREAM_MAX_BACKOFF = float(os.environ.get('BINANCE_STREAM_MAX_BACKOFF', 60))
+# Keepalive du listenKey (expire après 60 min) et réconciliation REST des positions/ordres (secondes)
+BINANCE_LISTEN_KEY_KEEPALIVE = int(os.environ.get('BINANCE_LISTEN_KEY_KEEPALIVE', 1800))
+BINANCE_RECONCILE_INTERVAL = int(os.environ.get('BINANCE_RECONCILE_INTERVAL', 300))
+
+# Index des paires Binance (trading_app.brokers.binance_exchange) : durée de validité de exchangeInfo (secondes)
+BINANCE_EXCHANGE_INFO_TTL = int(os.environ.get('BINANCE_EXCHANGE_INFO_TTL', 3600))
+# Devises de cotation tradées (ex: "EUR,USDT") pour la découverte des paires ; vide = devises de cotation détenues
+BINANCE_QUOTE_ASSETS = os.environ.get('BINANCE_QUOTE_ASSETS', '')
+# Copie disque de l'index exchangeInfo (filtres d'ordre compris) : rechargée au démarrage sans téléchargement
+BINANCE_EXCHANGE_INFO_PATH = os.environ.get('BINANCE_EXCHANGE_INFO_PATH', os.path.join(BASE_DIR, 'exchange_info'))
+
+# Exécution des ordres des stratégies (trading_app.order_execution)
+# Threads d'envoi aux courtiers et ordres en attente au-delà desquels une intention est refusée
+ORDER_EXECUTION_WORKERS = int(os.environ.get('ORDER_EXECUTION_WORKERS', 4))
+ORDER_EXECUTION_QUEUE_SIZE = int(os.environ.get('ORDER_EXECUTION_QUEUE_SIZE', 100))
+# Timeout HTTP d'un envoi d'ordre (secondes) ; au-delà, l'ordre est recherché par son identifiant client
+ORDER_EXECUTION_TIMEOUT = float(os.environ.get('ORDER_EXECUTION_TIMEOUT', 10))
+ORDER_EXECUTION_MAX_ATTEMPTS = int(os.environ.get('ORDER_EXECUTION_MAX_ATTEMPTS', 3))
+ORDER_EXECUTION_RETRY_DELAY = float(os.environ.get('ORDER_EXECUTION_RETRY_DELAY', 1.0))
+# Un ordre PENDING plus récent bloque les nouvelles intentions de la stratégie (secondes)
+ORDER_EXECUTION_INFLIGHT_WINDOW = int(os.environ.get('ORDER_EXECUTION_INFLIGHT_WINDOW', 600))
+# Cache de résolution Asset -> AssetTradable / symbole / UIC (secondes)
+ORDER_EXECUTION_RESOLVE_TTL = int(os.environ.get('ORDER_EXECUTION_RESOLVE_TTL', 300))
+# Plafond du montant d'un ordre de stratégie (devise de cotation, 0 = pas de plafond)
+ORDER_MAX_NOTIONAL = float(os.environ.get('ORDER_MAX_NOTIONAL', 0))
+# Stratégies évaluées en parallèle par StrategyRunner.run_many (commande run_strategies)
+STRATEGY_RUNNER_WORKERS = int(os.environ.get('STRATEGY_RUNNER_WORKERS', 4))
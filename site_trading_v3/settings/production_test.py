@@ -54,7 +54,8 @@ CORS_ALLOW_CREDENTIALS = True
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    SHARED_CACHE_ALIAS: SHARED_CACHE,
 }
 
 # Session settings for development
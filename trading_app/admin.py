@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AssetType, Market, AssetTradable, Asset, Position, Trade, Strategy, BrokerCredentials, AllAssets, PendingOrder, TokenRefreshHistory, AutomationConfig, AutomationExecutionLog
+from .models import AssetType, Market, AssetTradable, Asset, Position, Trade, Strategy, BrokerCredentials, AllAssets, PendingOrder, TokenRefreshHistory, AutomationConfig, AutomationExecutionLog, TradeAggregate, PnLCheckpoint, PriceSeries, SymbolResolution, BinanceSymbolFilter
 
 admin.site.register(AssetType)
 admin.site.register(Market)
@@ -10,6 +10,41 @@ admin.site.register(Trade)
 admin.site.register(Strategy)
 admin.site.register(PendingOrder)
 
+@admin.register(TradeAggregate)
+class TradeAggregateAdmin(admin.ModelAdmin):
+    list_display = ['user', 'base_symbol', 'platform', 'buy_quantity', 'sell_quantity', 'buy_count', 'sell_count', 'last_trade_at']
+    list_filter = ['platform', 'user']
+    search_fields = ['base_symbol']
+    readonly_fields = ['updated_at']
+
+@admin.register(PriceSeries)
+class PriceSeriesAdmin(admin.ModelAdmin):
+    list_display = ['asset', 'candle_count', 'first_candle_at', 'last_candle_at', 'last_close', 'updated_at']
+    search_fields = ['asset__symbol', 'asset__symbol_clean']
+    exclude = ['candles']
+
+@admin.register(SymbolResolution)
+class SymbolResolutionAdmin(admin.ModelAdmin):
+    list_display = ['symbol', 'provider', 'provider_symbol', 'is_resolved', 'is_manual', 'attempts', 'last_checked_at']
+    list_filter = ['provider', 'is_resolved', 'is_manual']
+    search_fields = ['symbol', 'provider_symbol']
+    list_editable = ['provider_symbol', 'is_resolved', 'is_manual']
+    readonly_fields = ['attempts', 'last_error', 'last_checked_at', 'created_at', 'updated_at']
+
+@admin.register(BinanceSymbolFilter)
+class BinanceSymbolFilterAdmin(admin.ModelAdmin):
+    list_display = ['symbol', 'source', 'status', 'step_size', 'tick_size', 'min_qty', 'min_notional', 'updated_at']
+    list_filter = ['source', 'status', 'quote_asset']
+    search_fields = ['symbol', 'base_asset']
+    readonly_fields = ['updated_at']
+
+@admin.register(PnLCheckpoint)
+class PnLCheckpointAdmin(admin.ModelAdmin):
+    list_display = ['user', 'asset_tradable', 'position_quantity', 'realized_pnl', 'unrealized_pnl', 'processed_fills', 'last_trade_at']
+    list_filter = ['user']
+    search_fields = ['asset_tradable__symbol']
+    readonly_fields = ['updated_at']
+
 @admin.register(AllAssets)
 class AllAssetsAdmin(admin.ModelAdmin):
     list_display = ['symbol', 'name', 'platform', 'asset_type', 'market', 'currency', 'is_tradable', 'last_updated']
@@ -51,7 +86,7 @@ class BrokerCredentialsAdmin(admin.ModelAdmin):
             'description': 'Configuration OAuth2 pour Saxo Bank'
         }),
         ('Tokens Saxo Bank', {
-            'fields': ('saxo_access_token', 'saxo_refresh_token', 'saxo_token_expires_at'),
+            'fields': ('saxo_access_token', 'saxo_refresh_token', 'saxo_token_expires_at', 'saxo_account_key', 'saxo_client_key'),
             'classes': ('collapse',),
             'description': 'Tokens d\'authentification Saxo Bank'
         }),
@@ -91,8 +126,8 @@ class AutomationConfigAdmin(admin.ModelAdmin):
 @admin.register(AutomationExecutionLog)
 class AutomationExecutionLogAdmin(admin.ModelAdmin):
     """Admin pour l'historique des exécutions d'automatisation"""
-    list_display = ['user', 'execution_time', 'status', 'execution_duration']
-    list_filter = ['status', 'user', 'execution_time']
+    list_display = ['user', 'execution_time', 'status', 'execution_duration', 'dominant_stage']
+    list_filter = ['status', 'dominant_stage', 'user', 'execution_time']
     search_fields = ['user__username', 'summary', 'errors']
     readonly_fields = ['execution_time']
     ordering = ['-execution_time']
@@ -104,5 +139,9 @@ class AutomationExecutionLogAdmin(admin.ModelAdmin):
         ('Résultats', {
             'fields': ('summary', 'api_responses', 'errors'),
             'classes': ('collapse',)
+        }),
+        ('Durées par étape', {
+            'fields': ('dominant_stage', 'stage_timings'),
+            'classes': ('collapse',)
         })
     )
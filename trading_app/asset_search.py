@@ -0,0 +1,263 @@
+"""
+Recherche dans le catalogue AllAssets
+
+Deux backends :
+- un index en mémoire (tableau trié des symboles + postings de n-grammes sur les noms),
+  reconstruit quand la version du catalogue change (après chaque synchronisation) ;
+- PostgreSQL avec l'extension pg_trgm (index GIN trigrammes) quand elle est disponible.
+
+Le classement est identique dans les deux cas : symbole exact, préfixe de symbole,
+préfixe d'un mot du nom, puis sous-chaîne du symbole ou du nom.
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.db import connection
+
+from .models import AllAssets
+from .response_cache import CATALOGUE, bump_catalogue_version, get_version
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZE = 3
+
+# Rangs de pertinence (plus petit = meilleur)
+RANK_EXACT_SYMBOL = 0
+RANK_SYMBOL_PREFIX = 1
+RANK_NAME_WORD_PREFIX = 2
+RANK_SUBSTRING = 3
+
+_WORD_RE = re.compile(r'[A-Z0-9]+')
+
+
+def _ngrams(text):
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class AssetSearchIndex:
+    """Index en mémoire du catalogue AllAssets"""
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.ids = array('q')
+        self.symbols = []
+        self.clean_symbols = []
+        self.names = []
+        self.names_upper = []
+        self.platforms = []
+        self.asset_types = []
+        self.markets = []
+        self.tradable = bytearray()
+
+        symbol_keys = []
+        word_keys = []
+        postings = {}
+
+        # Les positions suivent l'ordre (longueur du symbole, symbole) : à rang égal,
+        # la plus petite position est le meilleur résultat
+        rows = sorted(rows, key=lambda row: (len(row[1] or ''), (row[1] or '').upper()))
+
+        for position, (asset_id, symbol, name, platform, asset_type, market, is_tradable) in enumerate(rows):
+            symbol = (symbol or '').upper()
+            name = name or ''
+            name_upper = name.upper()
+
+            self.ids.append(asset_id)
+            self.symbols.append(symbol)
+            self.clean_symbols.append(symbol.split(':')[0].split('_')[0])
+            self.names.append(name)
+            self.names_upper.append(name_upper)
+            self.platforms.append(platform)
+            self.asset_types.append(asset_type)
+            self.markets.append(market)
+            self.tradable.append(1 if is_tradable else 0)
+
+            symbol_keys.append((symbol, position))
+            for word in set(_WORD_RE.findall(name_upper)):
+                word_keys.append((word, position))
+            for gram in _ngrams(symbol) | _ngrams(name_upper):
+                postings.setdefault(gram, array('I')).append(position)
+
+        symbol_keys.sort()
+        word_keys.sort()
+        self.sorted_symbols = [key for key, _ in symbol_keys]
+        self.sorted_symbol_positions = array('I', (position for _, position in symbol_keys))
+        self.sorted_words = [key for key, _ in word_keys]
+        self.sorted_word_positions = array('I', (position for _, position in word_keys))
+        self.postings = postings
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, version=None):
+        started = time.perf_counter()
+        rows = AllAssets.objects.values_list(
+            'id', 'symbol', 'name', 'platform', 'asset_type', 'market', 'is_tradable'
+        ).order_by('id').iterator(chunk_size=5000)
+        index = cls(rows, version=version)
+        logger.info(f"Index de recherche construit: {len(index)} actifs en {time.perf_counter() - started:.2f}s")
+        return index
+
+    @staticmethod
+    def _prefix_candidates(sorted_keys, positions, prefix, accept, need):
+        """
+        Positions dont la clé commence par prefix.
+
+        Pour une même clé, les positions sont croissantes (donc déjà classées) :
+        seules les `need` premières acceptées de chaque clé sont utiles.
+        """
+        i = bisect_left(sorted_keys, prefix)
+        count = len(sorted_keys)
+        while i < count and sorted_keys[i].startswith(prefix):
+            end = bisect_right(sorted_keys, sorted_keys[i], i)
+            taken = 0
+            for j in range(i, end):
+                if accept(positions[j]):
+                    yield positions[j]
+                    taken += 1
+                    if taken >= need:
+                        break
+            i = end
+
+    def search(self, query, platform=None, tradable_only=False, limit=10):
+        """Retourne les meilleurs résultats sous forme de dicts"""
+        query = (query or '').strip().upper()
+        if not query or limit <= 0:
+            return []
+
+        selected = []
+        seen = set()
+
+        def accept(position):
+            return (
+                position not in seen
+                and (not platform or self.platforms[position] == platform)
+                and (not tradable_only or self.tradable[position])
+            )
+
+        def take(candidates, rank):
+            for position in heapq.nsmallest(limit - len(selected), set(candidates)):
+                selected.append((position, rank))
+                seen.add(position)
+
+        take((p for p in self._prefix_candidates(self.sorted_symbols, self.sorted_symbol_positions, query, accept, limit)
+              if self.symbols[p] == query or self.clean_symbols[p] == query), RANK_EXACT_SYMBOL)
+        if len(selected) < limit:
+            take(self._prefix_candidates(self.sorted_symbols, self.sorted_symbol_positions, query, accept,
+                                         limit - len(selected)), RANK_SYMBOL_PREFIX)
+        if len(selected) < limit:
+            take(self._prefix_candidates(self.sorted_words, self.sorted_word_positions, query, accept,
+                                         limit - len(selected)), RANK_NAME_WORD_PREFIX)
+
+        if len(selected) < limit and len(query) >= NGRAM_SIZE:
+            # Sous-chaîne : partir de la liste de postings la plus courte puis vérifier
+            gram_lists = [self.postings.get(gram) for gram in _ngrams(query)]
+            if all(gram_lists):
+                take(
+                    (p for p in min(gram_lists, key=len)
+                     if accept(p) and (query in self.symbols[p] or query in self.names_upper[p])),
+                    RANK_SUBSTRING,
+                )
+
+        return [self._as_dict(position, rank) for position, rank in selected]
+
+    def _as_dict(self, position, rank):
+        return {
+            'id': self.ids[position],
+            'symbol': self.symbols[position],
+            'name': self.names[position],
+            'platform': self.platforms[position],
+            'asset_type': self.asset_types[position],
+            'market': self.markets[position],
+            'is_tradable': bool(self.tradable[position]),
+            'rank': rank,
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+_pg_trgm_available = None
+
+
+def get_search_index():
+    """Index du processus courant, reconstruit si la version partagée du catalogue a changé"""
+    global _index
+    version = get_version(CATALOGUE)
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = AssetSearchIndex.build(version=version)
+    return _index
+
+
+def rebuild_search_index():
+    """À appeler après une synchronisation du catalogue"""
+    global _index
+    version = bump_catalogue_version()
+    if _use_postgres():
+        return None
+    with _index_lock:
+        _index = AssetSearchIndex.build(version=version)
+    return _index
+
+
+def _use_postgres():
+    """Backend pg_trgm si configuré (ou 'auto') et si l'extension est installée"""
+    global _pg_trgm_available
+    backend = getattr(settings, 'ASSET_SEARCH_BACKEND', 'auto')
+    if backend == 'memory' or connection.vendor != 'postgresql':
+        return False
+    if _pg_trgm_available is None:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _pg_trgm_available = cursor.fetchone() is not None
+        except Exception as e:
+            logger.warning(f"Détection pg_trgm impossible: {e}")
+            _pg_trgm_available = False
+    return _pg_trgm_available
+
+
+def _search_postgres(query, platform=None, tradable_only=False, limit=10):
+    """Recherche servie par les index GIN pg_trgm (ILIKE '%q%')"""
+    from django.contrib.postgres.search import TrigramWordSimilarity
+    from django.db.models import Case, IntegerField, Q, Value, When
+    from django.db.models.functions import Greatest
+
+    query = query.strip().upper()
+    queryset = AllAssets.objects.all()
+    if platform:
+        queryset = queryset.filter(platform=platform)
+    if tradable_only:
+        queryset = queryset.filter(is_tradable=True)
+
+    rows = queryset.filter(
+        Q(symbol__icontains=query) | Q(name__icontains=query)
+    ).annotate(
+        rank=Case(
+            When(Q(symbol=query) | Q(symbol__startswith=f"{query}:") | Q(symbol__startswith=f"{query}_"),
+                 then=Value(RANK_EXACT_SYMBOL)),
+            When(symbol__startswith=query, then=Value(RANK_SYMBOL_PREFIX)),
+            When(Q(name__istartswith=query) | Q(name__icontains=f" {query}"), then=Value(RANK_NAME_WORD_PREFIX)),
+            default=Value(RANK_SUBSTRING),
+            output_field=IntegerField(),
+        ),
+        similarity=Greatest(TrigramWordSimilarity(query, 'symbol'), TrigramWordSimilarity(query, 'name')),
+    ).order_by('rank', '-similarity', 'symbol').values(
+        'id', 'symbol', 'name', 'platform', 'asset_type', 'market', 'is_tradable', 'rank'
+    )[:limit]
+    return list(rows)
+
+
+def search_assets(query, platform=None, tradable_only=False, limit=10):
+    """Point d'entrée unique de la recherche d'actifs"""
+    if _use_postgres():
+        return _search_postgres(query, platform=platform, tradable_only=tradable_only, limit=limit)
+    return get_search_index().search(query, platform=platform, tradable_only=tradable_only, limit=limit)
@@ -5,16 +5,36 @@ from django.contrib.auth.models import User
 from .models import AutomationConfig, AutomationExecutionLog, BrokerCredentials, Strategy
 from .services import BrokerService
 from .telegram_notifications import TelegramNotifier
+from .instrumentation import StageTimings, stage
+from .brokers.binance_streaming import user_stream_alive
+from .strategy_runner import strategy_runner
 
 logger = logging.getLogger(__name__)
 
+class _TimedNotifier:
+    """Compte les envois Telegram dans l'étape 'notifications' du cycle"""
+    
+    def __init__(self, notifier):
+        self._notifier = notifier
+    
+    def __getattr__(self, name):
+        attr = getattr(self._notifier, name)
+        if not callable(attr):
+            return attr
+        
+        def timed(*args, **kwargs):
+            with stage('notifications'):
+                return attr(*args, **kwargs)
+        return timed
+
 class AutomationService:
     """Service d'automatisation des tâches de trading"""
     
     def __init__(self, user: User):
         self.user = user
         self.broker_service = BrokerService(user)
-        self.telegram_notifier = TelegramNotifier()
+        self.telegram_notifier = _TimedNotifier(TelegramNotifier())
+        self.timings = StageTimings()
         self.config = self._get_or_create_config()
     
     def _get_or_create_config(self) -> AutomationConfig:
@@ -31,7 +51,12 @@ class AutomationService:
         return config
     
     def execute_automation_cycle(self) -> dict:
-        """Exécute un cycle complet d'automatisation"""
+        """Exécute un cycle complet d'automatisation (durées, requêtes et appels HTTP mesurés par étape)"""
+        self.timings = StageTimings()
+        with self.timings.activate():
+            return self._run_automation_cycle()
+    
+    def _run_automation_cycle(self) -> dict:
         start_time = timezone.now()
         logger.info(f"🚀 Début du cycle d'automatisation pour {self.user.username}")
         
@@ -53,13 +78,16 @@ class AutomationService:
         
         try:
             # 1. Synchronisation Binance
-            results.update(self._sync_binance())
+            with stage('binance_sync'):
+                results.update(self._sync_binance())
             
             # 2. Synchronisation Saxo
-            results.update(self._sync_saxo())
+            with stage('saxo_sync'):
+                results.update(self._sync_saxo())
             
             # 3. Exécution des stratégies actives
-            results.update(self._execute_active_strategies())
+            with stage('strategies'):
+                results.update(self._execute_active_strategies())
             
             # 4. Mettre à jour la configuration
             self._update_execution_time()
@@ -68,12 +96,12 @@ class AutomationService:
             if results['errors']:
                 results['status'] = 'PARTIAL' if results['summary'] else 'FAILED'
             
-            # 6. Enregistrer le log
-            self._save_execution_log(results, start_time)
-            
-            # 7. Envoyer les notifications Telegram
+            # 6. Envoyer les notifications Telegram
             self._send_telegram_notifications(results)
             
+            # 7. Enregistrer le log (après les notifications pour inclure leur durée)
+            self._save_execution_log(results, start_time)
+            
             # Notification de fin de cycle
             duration = timezone.now() - start_time
             duration_seconds = int(duration.total_seconds())
@@ -127,30 +155,33 @@ class AutomationService:
             
             logger.info(f"🔄 Synchronisation Binance pour {self.user.username}")
             
-            # Synchroniser les positions
-            try:
-                positions = self.broker_service.sync_positions_from_broker(binance_creds)
-                results['summary'].append(f"✅ {len(positions)} positions Binance synchronisées")
-                results['api_responses'].append(f"Positions Binance: {len(positions)} récupérées")
-                
-                # Notification immédiate pour les positions
-                self.telegram_notifier.send_message(
-                    f"🔄 **Synchronisation Binance - Positions**\n"
-                    f"✅ {len(positions)} positions synchronisées\n"
-                    f"⏰ {timezone.now().strftime('%H:%M:%S')}"
-                )
-                
-            except Exception as e:
-                error_msg = f"Erreur synchronisation positions Binance: {str(e)}"
-                results['errors'].append(error_msg)
-                logger.error(error_msg)
-                
-                # Notification d'erreur immédiate
-                self.telegram_notifier.send_message(
-                    f"❌ **Erreur Synchronisation Binance - Positions**\n"
-                    f"🔍 {error_msg}\n"
-                    f"⏰ {timezone.now().strftime('%H:%M:%S')}"
-                )
+            # Synchroniser les positions (le flux utilisateur Binance les tient déjà à jour s'il est actif)
+            if user_stream_alive(binance_creds.pk):
+                results['summary'].append("📡 Positions Binance à jour via le flux temps réel")
+            else:
+                try:
+                    positions = self.broker_service.sync_positions_from_broker(binance_creds)
+                    results['summary'].append(f"✅ {len(positions)} positions Binance synchronisées")
+                    results['api_responses'].append(f"Positions Binance: {len(positions)} récupérées")
+                    
+                    # Notification immédiate pour les positions
+                    self.telegram_notifier.send_message(
+                        f"🔄 **Synchronisation Binance - Positions**\n"
+                        f"✅ {len(positions)} positions synchronisées\n"
+                        f"⏰ {timezone.now().strftime('%H:%M:%S')}"
+                    )
+                    
+                except Exception as e:
+                    error_msg = f"Erreur synchronisation positions Binance: {str(e)}"
+                    results['errors'].append(error_msg)
+                    logger.error(error_msg)
+                    
+                    # Notification d'erreur immédiate
+                    self.telegram_notifier.send_message(
+                        f"❌ **Erreur Synchronisation Binance - Positions**\n"
+                        f"🔍 {error_msg}\n"
+                        f"⏰ {timezone.now().strftime('%H:%M:%S')}"
+                    )
             
             # Synchroniser les trades
             try:
@@ -274,8 +305,9 @@ class AutomationService:
             # Auto-refresh des tokens Saxo (si activé)
             if self.config.auto_refresh_tokens:
                 try:
-                    # Refresh systématique des tokens Saxo à chaque cycle
-                    success = self.broker_service.refresh_saxo_tokens(saxo_creds)
+                    # Refresh seulement à l'approche de l'expiration (un seul à la fois entre processus)
+                    with stage('token_refresh'):
+                        success = self.broker_service.refresh_saxo_tokens(saxo_creds, force=False)
                     if success:
                         results['summary'].append("✅ Tokens Saxo rafraîchis")
                         results['api_responses'].append("Refresh tokens Saxo: Succès")
@@ -324,66 +356,62 @@ class AutomationService:
         return results
     
     def _execute_active_strategies(self) -> dict:
-        """Exécute les stratégies actives"""
+        """Exécute les stratégies actives (StrategyRunner : un chargement de prix par asset)"""
         results = {'summary': [], 'api_responses': [], 'errors': []}
         
         try:
-            # Récupérer les stratégies actives (status = 'ACTIVE')
-            active_strategies = Strategy.objects.filter(
+            # Récupérer les stratégies actives (statut 'active' du modèle Strategy)
+            active_strategies = list(Strategy.objects.filter(
                 user=self.user,
-                status='ACTIVE'
-            )
+                status='active'
+            ).select_related('asset', 'broker'))
             
-            if not active_strategies.exists():
+            if not active_strategies:
                 results['summary'].append("ℹ️ Aucune stratégie active trouvée")
                 return results
             
-            logger.info(f"🚀 Exécution de {active_strategies.count()} stratégies actives pour {self.user.username}")
+            logger.info(f"🚀 Exécution de {len(active_strategies)} stratégies actives pour {self.user.username}")
             
+            # Séquentiel : les étapes (prix, signaux, ordres) restent mesurées dans StageTimings
+            with stage('strategy_execution'):
+                strategy_results = strategy_runner.run_many(active_strategies, workers=1)
+            
+            strategies_by_id = {strategy.id: strategy for strategy in active_strategies}
             executed_count = 0
-            for strategy in active_strategies:
-                try:
-                    # Exécuter la stratégie
-                    from .views import execute_strategy
-                    result = execute_strategy(strategy.id)
+            for result in strategy_results:
+                name = result['strategy']
+                if result.get('success'):
+                    executed_count += 1
+                    order = result.get('order')
+                    message = f"Signal {result['signal']} ({result['strength']:.2f}) à {result['current_price']}"
+                    if order:
+                        message += f" - ordre {order['status']}"
+                        if order.get('error'):
+                            message += f": {order['error']}"
+                    results['summary'].append(f"✅ Stratégie {name} exécutée")
+                    results['api_responses'].append(f"Stratégie {name}: {message}")
                     
-                    if result.get('success'):
-                        executed_count += 1
-                        results['summary'].append(f"✅ Stratégie {strategy.name} exécutée")
-                        results['api_responses'].append(f"Stratégie {strategy.name}: {result.get('message', 'Succès')}")
-                        
-                        # Notification immédiate pour l'exécution réussie
-                        self.telegram_notifier.send_message(
-                            f"🚀 **Exécution Stratégie**\n"
-                            f"✅ {strategy.name} exécutée avec succès\n"
-                            f"📊 {result.get('message', 'Succès')}\n"
-                            f"⏰ {timezone.now().strftime('%H:%M:%S')}"
-                        )
-                    else:
-                        results['errors'].append(f"Échec exécution stratégie {strategy.name}: {result.get('error', 'Erreur inconnue')}")
-                        
-                        # Notification d'erreur immédiate
-                        self.telegram_notifier.send_error_notification(
-                            f"❌ **Erreur Exécution Stratégie**\n"
-                            f"🔍 {strategy.name}: {result.get('error', 'Erreur inconnue')}\n"
-                            f"⏰ {timezone.now().strftime('%H:%M:%S')}"
-                        )
-                        
-                except Exception as e:
-                    error_msg = f"Erreur exécution stratégie {strategy.name}: {str(e)}"
-                    results['errors'].append(error_msg)
-                    logger.error(error_msg)
-                    
-                    # Notification d'erreur immédiate
-                    self.telegram_notifier.send_error_notification(
-                        f"❌ **Erreur Critique Exécution Stratégie**\n"
-                        f"🔍 {strategy.name}: {error_msg}\n"
+                    # Notification immédiate pour l'exécution réussie
+                    self.telegram_notifier.send_message(
+                        f"🚀 **Exécution Stratégie**\n"
+                        f"✅ {name} exécutée avec succès\n"
+                        f"📊 {message}\n"
                         f"⏰ {timezone.now().strftime('%H:%M:%S')}"
                     )
-                    continue  # Continuer avec les autres stratégies
+                else:
+                    results['errors'].append(f"Échec exécution stratégie {name}: {result.get('error', 'Erreur inconnue')}")
+                    
+                    # Notification d'erreur immédiate
+                    strategy = strategies_by_id[result['strategy_id']]
+                    self.telegram_notifier.send_error_notification({
+                        'symbol': strategy.asset.symbol_clean or strategy.asset.symbol,
+                        'broker': strategy.broker.broker_type.upper(),
+                        'strategy': name,
+                        'error_message': result.get('error', 'Erreur inconnue'),
+                    })
             
             if executed_count > 0:
-                results['summary'].append(f"✅ {executed_count}/{active_strategies.count()} stratégies exécutées avec succès")
+                results['summary'].append(f"✅ {executed_count}/{len(active_strategies)} stratégies exécutées avec succès")
             else:
                 results['summary'].append("⚠️ Aucune stratégie n'a pu être exécutée")
                 
@@ -412,7 +440,9 @@ class AutomationService:
                 summary='\n'.join(results['summary']) if results['summary'] else 'Aucune action effectuée',
                 api_responses='\n'.join(results['api_responses']) if results['api_responses'] else 'Aucune réponse API',
                 errors='\n'.join(results['errors']) if results['errors'] else '',
-                execution_duration=execution_duration
+                execution_duration=execution_duration,
+                stage_timings=self.timings.to_dict(),
+                dominant_stage=self.timings.dominant_stage()
             )
             
             logger.info(f"Log d'exécution sauvegardé pour {self.user.username}")
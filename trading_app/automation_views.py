@@ -161,13 +161,16 @@ def automation_logs(request):
                 'summary': log.summary,
                 'api_responses': log.api_responses,
                 'errors': log.errors,
-                'execution_duration': str(log.execution_duration) if log.execution_duration else None
+                'execution_duration': str(log.execution_duration) if log.execution_duration else None,
+                'stage_timings': log.stage_timings,
+                'dominant_stage': log.dominant_stage
             })
         
         return JsonResponse({
             'success': True,
             'logs': formatted_logs,
-            'count': len(formatted_logs)
+            'count': len(formatted_logs),
+            'stages': _stage_summary(logs)
         })
     except Exception as e:
         return JsonResponse({
@@ -175,6 +178,33 @@ def automation_logs(request):
             'error': str(e)
         })
 
+def _stage_summary(logs):
+    """Part de chaque étape dans les cycles et évolution de sa durée (du plus ancien au plus récent)"""
+    logs = [log for log in reversed(logs) if log.stage_timings]
+    total_ms = sum(stage['duration_ms'] for log in logs for stage in log.stage_timings.values()) or 1
+    
+    stages = {}
+    for log in logs:
+        for name, timing in log.stage_timings.items():
+            summary = stages.setdefault(name, {'total_ms': 0, 'max_ms': 0, 'queries': 0, 'http_count': 0, 'dominant_count': 0, 'trend': []})
+            summary['total_ms'] += timing['duration_ms']
+            summary['max_ms'] = max(summary['max_ms'], timing['duration_ms'])
+            summary['queries'] += timing['queries']
+            summary['http_count'] += timing['http_count']
+            summary['trend'].append({'execution_time': log.execution_time.isoformat(), 'duration_ms': timing['duration_ms']})
+        if log.dominant_stage in stages:
+            stages[log.dominant_stage]['dominant_count'] += 1
+    
+    for summary in stages.values():
+        cycles = len(summary['trend'])
+        summary['avg_ms'] = round(summary['total_ms'] / cycles, 2)
+        summary['avg_queries'] = round(summary['queries'] / cycles, 1)
+        summary['avg_http_count'] = round(summary['http_count'] / cycles, 1)
+        summary['share'] = round(summary['total_ms'] / total_ms, 3)
+        summary['total_ms'] = round(summary['total_ms'], 2)
+    
+    return dict(sorted(stages.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
 @login_required
 @csrf_exempt
 def toggle_auto_refresh_tokens(request):
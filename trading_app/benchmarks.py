@@ -0,0 +1,260 @@
+"""
+Benchmarks des chemins critiques : signaux des stratégies, rapprochement du catalogue,
+synchronisation broker, vues Tabulator et rafraîchissement groupé des historiques
+
+Chaque scénario renvoie un dictionnaire sérialisable en JSON (durées en millisecondes,
+nombre de requêtes SQL) pour suivre les régressions d'une version à l'autre :
+
+    python manage.py run_benchmarks --output benchmarks.json
+
+Les données nécessaires sont créées dans une transaction annulée à la fin : la base
+n'est pas modifiée. La synchronisation utilise le faux courtier (brokers.fake_server)
+et les historiques le fournisseur local (market_data.local), sans accès réseau.
+"""
+
+import contextlib
+import io
+import logging
+import platform
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .algorithms import AlgorithmFactory
+from .brokers.fake_server import start_fake_broker
+from .market_data.local import LocalDataStore
+from .models import AllAssets, Asset, AssetTradable, BrokerCredentials
+from .synthetic_data import SyntheticDataset
+
+logger = logging.getLogger(__name__)
+
+SCENARIOS = ['algorithms', 'matching', 'sync', 'views', 'bulk_refresh']
+
+TABULATOR_VIEWS = [
+    'asset_tabulator',
+    'asset_tradable_tabulator',
+    'position_tabulator',
+    'positions_overview_tabulator',
+    'pending_orders_tabulator',
+    'strategy_tabulator',
+    'trade_tabulator_groups',
+]
+
+
+class _Rollback(Exception):
+    """Annule la transaction des benchmarks"""
+
+
+def measure(fn: Callable, repeat: int = 5, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Chronomètre `fn` (sortie standard masquée : les services sont très bavards)
+
+    Returns:
+        dict: min/median/mean/max en ms, nombre d'exécutions et de requêtes SQL par exécution
+    """
+    durations = []
+    queries = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            fn()
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                fn()
+                durations.append((time.perf_counter() - started) * 1000)
+            queries = len(captured.captured_queries)
+    return {
+        'min_ms': round(min(durations), 3),
+        'median_ms': round(statistics.median(durations), 3),
+        'mean_ms': round(statistics.mean(durations), 3),
+        'max_ms': round(max(durations), 3),
+        'runs': repeat,
+        'queries': queries,
+    }
+
+
+# --- Scénarios ---
+
+def bench_algorithms(lengths: Iterable[int] = (100, 1000, 10000), repeat: int = 5) -> Dict[str, Any]:
+    """Calcul des signaux de chaque algorithme selon la longueur de l'historique"""
+    store = LocalDataStore()
+    results = {}
+    for length in lengths:
+        price_data = store.synthetic_ohlcv('BENCH', length, '1d')
+        for algorithm_type in AlgorithmFactory._algorithms:
+            parameters = AlgorithmFactory.get_algorithm_parameters(algorithm_type)
+            algorithm = AlgorithmFactory.create_algorithm(algorithm_type, parameters)
+            results[f"{algorithm_type}[{length}]"] = measure(lambda: algorithm.calculate_signals(price_data), repeat)
+    return results
+
+
+def seed_catalogue(size: int) -> List[AllAssets]:
+    """Catalogue Binance de `size` paires (format exchangeInfo du fournisseur local)"""
+    AllAssets.objects.filter(platform='binance').delete()
+    instruments = LocalDataStore().instruments('binance', size)
+    return AllAssets.objects.bulk_create([
+        AllAssets(
+            symbol=info['symbol'], name=info['symbol'], platform='binance', asset_type='Crypto',
+            market='SPOT', currency=info['quoteAsset'], binance_base_asset=info['baseAsset'],
+            binance_quote_asset=info['quoteAsset'], binance_status=info['status'],
+        )
+        for info in instruments
+    ], batch_size=1000)
+
+
+def bench_matching(sizes: Iterable[int] = (1000, 10000), repeat: int = 5) -> Dict[str, Any]:
+    """find_matching_all_asset selon la taille du catalogue (premier, dernier et absent)"""
+    results = {}
+    for size in sizes:
+        catalogue = seed_catalogue(size)
+        lookups = {'first': catalogue[0].symbol, 'last': catalogue[-1].symbol, 'missing': 'NOTLISTED'}
+        for label, symbol in lookups.items():
+            results[f"{label}[{size}]"] = measure(
+                lambda: AssetTradable.find_matching_all_asset(symbol, 'binance'), repeat
+            )
+    return results
+
+
+def bench_sync(positions: int = 1000, trades: int = 100000, symbols: int = 50,
+               latency_ms: float = 0, repeat: int = 3) -> Dict[str, Any]:
+    """sync_positions_from_broker / sync_trades_from_broker contre le faux courtier"""
+    from .services import BrokerService
+
+    server = start_fake_broker(symbols=symbols, positions=positions, trades=trades, latency_ms=latency_ms)
+    try:
+        user = User.objects.create_user(username='bench-sync')
+        seed_catalogue(symbols)
+        binance = BrokerCredentials.objects.create(
+            user=user, broker_type='binance', name='Bench Binance',
+            binance_api_key='bench', binance_api_secret='bench', base_url=server.base_url,
+        )
+        saxo = BrokerCredentials.objects.create(
+            user=user, broker_type='saxo', name='Bench Saxo',
+            saxo_client_id='bench', saxo_client_secret='bench',
+            # Token 24h (access == refresh) : pas de rafraîchissement OAuth
+            saxo_access_token='bench-token', saxo_refresh_token='bench-token', base_url=server.base_url,
+        )
+        service = BrokerService(user)
+        results = {}
+        for credentials in (binance, saxo):
+            results[f"positions[{credentials.broker_type}]"] = measure(
+                lambda: service.sync_positions_from_broker(credentials), repeat, warmup=0
+            )
+            results[f"trades[{credentials.broker_type}]"] = measure(
+                lambda: service.sync_trades_from_broker(credentials, limit=1000), repeat, warmup=0
+            )
+        results['requests'] = dict(server.stats)
+        return results
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def seed_tabulator_data(users: int = 5, assets: int = 200, trades_per_asset: int = 20) -> List[User]:
+    """N utilisateurs × M assets avec positions, trades, ordres et stratégies (jeu synthétique réduit)"""
+    dataset = SyntheticDataset(prefix='bench', progress=logger.debug).generate(
+        users=users, binance_pairs=assets, saxo_instruments=assets, tradables=assets,
+        candle_assets=min(assets, 50), years=2, positions=users * assets, pending_orders=users * 50,
+        trades=users * assets * trades_per_asset, strategies=20, executions=20,
+    )
+    return dataset['users']
+
+
+def bench_views(users: int = 5, assets: int = 200, trades_per_asset: int = 20, repeat: int = 3) -> Dict[str, Any]:
+    """Vues Tabulator pour un utilisateur d'une base de N utilisateurs × M assets"""
+    seeded_users = seed_tabulator_data(users, assets, trades_per_asset)
+    client = Client(HTTP_HOST='localhost')
+    client.force_login(seeded_users[0])
+
+    results = {}
+    for name in TABULATOR_VIEWS:
+        url = reverse(name)
+        results[name] = measure(lambda: client.get(url), repeat)
+        results[name]['status'] = client.get(url).status_code
+    return results
+
+
+def seed_assets(size: int) -> List[Asset]:
+    """`size` Assets actions sans historique ni métadonnées (nom et secteur vides)"""
+    return Asset.objects.bulk_create([
+        Asset(symbol=f"BENCH{n:05d}", symbol_clean=f"BENCH{n:05d}", name='', sector='xxxx')
+        for n in range(size)
+    ], batch_size=1000)
+
+
+def bench_bulk_refresh(sizes: Iterable[int] = (100, 500)) -> Dict[str, Any]:
+    """
+    refresh_assets puis refresh_metadata à froid (fournisseur local, cache des métadonnées vidé)
+
+    Une seule mesure par taille : le premier passage d'une commande ou d'un cron. calls :
+    appels au fournisseur, soit les Ticker.info qu'une passe de métadonnées enverrait à Yahoo.
+    """
+    from .market_data import cache as market_cache
+    from .market_data.bulk import refresh_assets, refresh_metadata
+    from .market_data.factory import MarketDataFactory
+
+    results = {}
+    with override_settings(MARKET_DATA_BACKEND='local'):
+        provider = MarketDataFactory.get_provider('yahoo')
+        for size in sizes:
+            assets = seed_assets(size)
+            for asset in assets:
+                market_cache.invalidate(f"{provider.name}:metadata:{asset.symbol}")
+            results[f"histories[{size}]"] = measure(lambda: refresh_assets(assets), repeat=1, warmup=0)
+
+            calls = market_cache.call_counts[provider.name]
+            results[f"metadata[{size}]"] = measure(lambda: refresh_metadata(assets, limit=size), repeat=1, warmup=0)
+            results[f"metadata[{size}]"]['calls'] = market_cache.call_counts[provider.name] - calls
+            Asset.objects.filter(pk__in=[asset.pk for asset in assets]).delete()
+    return results
+
+
+def run_benchmarks(scenarios: Iterable[str] = SCENARIOS, **options) -> Dict[str, Any]:
+    """
+    Exécute les scénarios demandés dans une transaction annulée
+
+    Args:
+        scenarios: sous-ensemble de SCENARIOS
+        options: repeat, lengths, sizes, positions, trades, users, assets, latency_ms, bulk_sizes
+
+    Returns:
+        dict: {'generated_at', 'environment', 'results': {scénario: {cas: mesures}}}
+    """
+    repeat = options.get('repeat', 5)
+    runners = {
+        'algorithms': lambda: bench_algorithms(options.get('lengths', (100, 1000, 10000)), repeat),
+        'matching': lambda: bench_matching(options.get('sizes', (1000, 10000)), repeat),
+        'sync': lambda: bench_sync(options.get('positions', 1000), options.get('trades', 100000),
+                                   latency_ms=options.get('latency_ms', 0), repeat=max(1, repeat // 2)),
+        'views': lambda: bench_views(options.get('users', 5), options.get('assets', 200),
+                                     repeat=max(1, repeat // 2)),
+        'bulk_refresh': lambda: bench_bulk_refresh(options.get('bulk_sizes', (100, 500))),
+    }
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'database': connection.vendor,
+        },
+        'results': {},
+    }
+    for scenario in scenarios:
+        logger.info(f"⏱️ Benchmark {scenario}")
+        try:
+            with transaction.atomic():
+                report['results'][scenario] = runners[scenario]()
+                raise _Rollback()
+        except _Rollback:
+            pass
+        except Exception as e:
+            logger.error(f"❌ Benchmark {scenario} en échec: {e}")
+            report['results'][scenario] = {'error': str(e)}
+    return report
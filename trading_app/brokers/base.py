@@ -56,8 +56,9 @@ class BrokerBase(ABC):
     
     @abstractmethod
     def place_order(self, symbol: str, side: str, size: Decimal, 
-                   order_type: str = "MARKET", price: Optional[Decimal] = None) -> Dict[str, Any]:
-        """Placer un ordre"""
+                   order_type: str = "MARKET", price: Optional[Decimal] = None,
+                   client_order_id: Optional[str] = None) -> Dict[str, Any]:
+        """Placer un ordre (client_order_id : identifiant d'idempotence transmis au broker)"""
         pass
     
     @abstractmethod
@@ -11,12 +11,16 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from decimal import Decimal
 from urllib.parse import urlencode
+from django.conf import settings
 from .base import BrokerBase
 
 
 class BinanceBroker(BrokerBase):
     """Client pour l'API Binance"""
     
+    # Durée de validité (secondes) du décalage d'horloge mesuré avec le serveur
+    TIME_SYNC_INTERVAL = 600
+    
     def __init__(self, user, credentials: Dict[str, Any]):
         super().__init__(user, credentials)
         self.api_key = credentials.get('api_key')
@@ -24,19 +28,33 @@ class BinanceBroker(BrokerBase):
         self.base_url = "https://api.binance.com"  # ou "https://testnet.binance.vision" pour test
         self.is_testnet = credentials.get('testnet', False)
         self._authenticated = False  # Flag pour l'authentification
+        self._time_offset = None  # Décalage serveur - local en ms
+        self._time_synced_at = 0.0
         
         if self.is_testnet:
             self.base_url = "https://testnet.binance.vision"
+        
+        # Surcharge (serveur de test local) : credentials puis settings.BROKER_BASE_URLS
+        override = credentials.get('base_url') or getattr(settings, 'BROKER_BASE_URLS', {}).get('binance')
+        if override:
+            self.base_url = override.rstrip('/')
     
     def _get_server_time(self):
-        """Récupérer le timestamp du serveur Binance"""
-        try:
-            url = f"{self.base_url}/api/v3/time"
-            response = requests.get(url)
-            return response.json()['serverTime']
-        except Exception as e:
-            print(f"Erreur récupération server time: {e}")
-            return int(time.time() * 1000)
+        """Récupérer le timestamp du serveur Binance
+        
+        Le décalage d'horloge est mesuré une fois puis réutilisé pendant TIME_SYNC_INTERVAL
+        secondes : une requête signée ne coûte plus d'appel /api/v3/time supplémentaire.
+        """
+        if self._time_offset is None or time.monotonic() - self._time_synced_at > self.TIME_SYNC_INTERVAL:
+            try:
+                url = f"{self.base_url}/api/v3/time"
+                response = requests.get(url)
+                self._time_offset = response.json()['serverTime'] - int(time.time() * 1000)
+                self._time_synced_at = time.monotonic()
+            except Exception as e:
+                print(f"Erreur récupération server time: {e}")
+                return int(time.time() * 1000)
+        return int(time.time() * 1000) + self._time_offset
     
     def _sign_payload(self, params):
         """Signer les paramètres avec HMAC SHA256"""
@@ -271,34 +289,38 @@ class BinanceBroker(BrokerBase):
             print(f"❌ Erreur récupération positions Binance: {e}")
             return []
 
-    def get_traded_symbols(self):
-        """1️⃣ Récupérer tous les symboles tradés (Spot)"""
+    def get_traded_symbols(self, quote_assets=None):
+        """1️⃣ Récupérer les paires Spot des actifs détenus
+        
+        Index exchangeInfo en cache (base -> paires) : seules les vraies paires dont
+        l'actif de base est détenu sont retenues (ETH ne correspond plus à ETHW… ni à …ETH).
+        quote_assets limite aux devises de cotation tradées par l'utilisateur (défaut :
+        settings.BINANCE_QUOTE_ASSETS, sinon les devises de cotation détenues).
+        """
         try:
             account_info = self._make_request('GET', '/api/v3/account', {}, signed=True)
             if not account_info:
                 return []
-                
-            symbols_traded = set()
             
-            # Récupérer tous les tickers disponibles
-            all_tickers = self._make_request('GET', '/api/v3/ticker/24hr')
-            if not all_tickers:
+            held_assets = {
+                balance['asset'] for balance in account_info.get('balances', [])
+                if float(balance['free']) > 0 or float(balance['locked']) > 0
+            }
+            
+            from .binance_exchange import exchange_index
+            index = exchange_index(self)
+            if index is None:
                 return []
-
-            # Créer un set de tous les symboles disponibles
-            available_symbols = {ticker['symbol'] for ticker in all_tickers}
             
-            # Pour chaque balance non-nulle, chercher les paires correspondantes
-            for balance in account_info.get('balances', []):
-                if float(balance['free']) > 0 or float(balance['locked']) > 0:
-                    asset = balance['asset']
-                    # Chercher toutes les paires contenant cet asset
-                    for symbol in available_symbols:
-                        if asset in symbol:
-                            symbols_traded.add(symbol)
+            if quote_assets is None:
+                configured = getattr(settings, 'BINANCE_QUOTE_ASSETS', '')
+                quote_assets = {asset.strip().upper() for asset in configured.split(',') if asset.strip()}
+                quote_assets = quote_assets or (held_assets & index.quote_assets())
             
-            print(f"🔍 {len(symbols_traded)} symboles tradés trouvés")
-            return list(symbols_traded)
+            symbols_traded = index.pairs_for_assets(held_assets, quote_assets)
+            
+            print(f"🔍 {len(symbols_traded)} symboles tradés trouvés ({len(held_assets)} actifs détenus, cotations {sorted(quote_assets)})")
+            return sorted(symbols_traded)
             
         except Exception as e:
             print(f"❌ Erreur récupération symboles tradés: {e}")
@@ -474,21 +496,22 @@ class BinanceBroker(BrokerBase):
         return formatted_trades
     
     def get_assets(self, asset_type: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Récupérer les informations sur les paires de trading"""
+        """Récupérer les informations sur les paires de trading (index exchangeInfo en cache)"""
         try:
-            response = requests.get(f"{self.base_url}/api/v3/exchangeInfo")
-            response.raise_for_status()
-            data = response.json()
+            from .binance_exchange import exchange_index
+            index = exchange_index(self)
+            if index is None:
+                return []
             
             assets = []
-            for symbol_info in data.get("symbols", []):
-                if symbol_info.get("status") == "TRADING":
+            for record in index.to_records():
+                if record["status"] == "TRADING":
                     assets.append({
-                        "symbol": symbol_info.get("symbol"),
-                        "baseAsset": symbol_info.get("baseAsset"),
-                        "quoteAsset": symbol_info.get("quoteAsset"),
-                        "status": symbol_info.get("status"),
-                        "permissions": symbol_info.get("permissions")
+                        "symbol": record["symbol"],
+                        "baseAsset": record["baseAsset"],
+                        "quoteAsset": record["quoteAsset"],
+                        "status": record["status"],
+                        "permissions": ["SPOT"] if record["isSpotTradingAllowed"] else []
                     })
             
             return assets
@@ -498,6 +521,12 @@ class BinanceBroker(BrokerBase):
     
     def get_asset_price(self, symbol: str) -> Optional[Decimal]:
         """Récupérer le prix d'un actif"""
+        # Dernier miniTicker reçu par le flux websocket (run_price_feed) : pas d'appel réseau
+        from ..price_feed import price_store
+        live_price = price_store.price('binance', symbol)
+        if live_price is not None:
+            return live_price
+        
         try:
             response = requests.get(f"{self.base_url}/api/v3/ticker/price", 
                               params={"symbol": symbol})
@@ -514,13 +543,40 @@ class BinanceBroker(BrokerBase):
             return None
     
     def place_order(self, symbol: str, side: str, size: Decimal, 
-                   order_type: str = "MARKET", price: Optional[Decimal] = None) -> Dict[str, Any]:
-        """Placer un ordre"""
+                   order_type: str = "MARKET", price: Optional[Decimal] = None,
+                   client_order_id: Optional[str] = None,
+                   reference_price: Optional[Decimal] = None) -> Dict[str, Any]:
+        """Placer un ordre
+        
+        client_order_id (newClientOrderId) permet de retrouver l'ordre après un timeout
+        (get_order_by_client_id) au lieu de le renvoyer à l'aveugle. Timeout ou connexion
+        coupée : {"error", "uncertain": True}, l'ordre a pu être reçu.
+        
+        reference_price : prix connu de l'appelant pour le contrôle du notionnel d'un ordre
+        MARKET ; à défaut, dernière cotation du flux (price_store), sinon contrôle ignoré.
+        """
         print(f"🔐 Placement ordre Binance: {symbol} {side} {size} {order_type}")
         
         if not self.is_authenticated():
             print("❌ Non authentifié")
             return {"error": "Non authentifié"}
+        
+        # Arrondis et filtres de la paire (LOT_SIZE, PRICE_FILTER, NOTIONAL) vérifiés
+        # localement : un ordre qui serait rejeté ne part pas
+        # (dernière copie de l'index, aucun appel réseau avant l'envoi)
+        from .binance_exchange import cached_exchange_index, OrderValidationError
+        index = cached_exchange_index(self.base_url)
+        if index is not None and symbol in index:
+            try:
+                if order_type.upper() != "MARKET":
+                    reference_price = None
+                elif reference_price is None:
+                    from ..price_feed import price_store
+                    reference_price = price_store.price('binance', symbol)
+                size, price = index.prepare_order(symbol, side, size, order_type, price, reference_price)
+            except OrderValidationError as e:
+                print(f"❌ Ordre refusé localement: {e}")
+                return {"error": str(e), "rejected_locally": True}
             
         try:
             endpoint = "/api/v3/order"
@@ -539,6 +595,9 @@ class BinanceBroker(BrokerBase):
                 params["price"] = str(price)
                 params["timeInForce"] = "GTC"
             
+            if client_order_id:
+                params["newClientOrderId"] = client_order_id
+            
             print(f"📋 Paramètres ordre: {params}")
             
             signed_params = self._sign_payload(params)
@@ -548,7 +607,8 @@ class BinanceBroker(BrokerBase):
             print(f"📋 Headers: {self._get_headers()}")
             print(f"📋 Params signés: {signed_params}")
             
-            response = requests.post(url, headers=self._get_headers(), params=signed_params)
+            response = requests.post(url, headers=self._get_headers(), params=signed_params,
+                                     timeout=getattr(settings, 'ORDER_EXECUTION_TIMEOUT', 10))
             
             print(f"📊 Status Code: {response.status_code}")
             print(f"📊 Réponse: {response.text}")
@@ -562,11 +622,37 @@ class BinanceBroker(BrokerBase):
                 print(f"❌ {error_msg}")
                 return {"error": error_msg}
                 
+        except (requests.Timeout, requests.ConnectionError) as e:
+            error_msg = f"Réponse Binance non reçue, ordre incertain: {e}"
+            print(f"⚠️ {error_msg}")
+            return {"error": error_msg, "uncertain": True}
         except Exception as e:
             error_msg = f"Erreur placement ordre Binance: {e}"
             print(f"❌ {error_msg}")
             return {"error": error_msg}
     
+    def get_order_by_client_id(self, symbol: str, client_order_id: str) -> Optional[Dict[str, Any]]:
+        """Ordre retrouvé par son newClientOrderId (None s'il n'a jamais été reçu)"""
+        try:
+            params = self._sign_payload({
+                "symbol": symbol,
+                "origClientOrderId": client_order_id,
+                "timestamp": self._get_server_time(),
+                "recvWindow": 5000,
+            })
+            response = requests.get(f"{self.base_url}/api/v3/order", headers=self._get_headers(), params=params,
+                                    timeout=getattr(settings, 'ORDER_EXECUTION_TIMEOUT', 10))
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code == 400 and response.json().get("code") == -2013:
+                # Order does not exist
+                return None
+            response.raise_for_status()
+        except Exception as e:
+            print(f"❌ Erreur recherche ordre Binance {client_order_id}: {e}")
+            raise
+        return None
+    
     def cancel_order(self, order_id: str, symbol: str) -> bool:
         """Annuler un ordre"""
         if not self.is_authenticated():
@@ -674,6 +760,36 @@ class BinanceBroker(BrokerBase):
             print(f"Erreur récupération ordres en cours Binance: {e}")
             return []
 
+    def create_listen_key(self) -> Optional[str]:
+        """Ouvrir un flux de données utilisateur (listenKey valable 60 min sans keepalive)"""
+        try:
+            response = requests.post(f"{self.base_url}/api/v3/userDataStream", headers=self._get_headers(), timeout=10)
+            response.raise_for_status()
+            return response.json().get('listenKey')
+        except Exception as e:
+            print(f"❌ Erreur création listenKey Binance: {e}")
+            return None
+    
+    def keepalive_listen_key(self, listen_key: str) -> bool:
+        """Prolonger la validité du listenKey (à appeler toutes les 30 min)"""
+        try:
+            response = requests.put(f"{self.base_url}/api/v3/userDataStream", headers=self._get_headers(),
+                                    params={'listenKey': listen_key}, timeout=10)
+            return response.status_code == 200
+        except Exception as e:
+            print(f"❌ Erreur keepalive listenKey Binance: {e}")
+            return False
+    
+    def close_listen_key(self, listen_key: str) -> bool:
+        """Fermer le flux de données utilisateur"""
+        try:
+            response = requests.delete(f"{self.base_url}/api/v3/userDataStream", headers=self._get_headers(),
+                                       params={'listenKey': listen_key}, timeout=10)
+            return response.status_code == 200
+        except Exception as e:
+            print(f"❌ Erreur fermeture listenKey Binance: {e}")
+            return False
+    
     def _convert_timestamp(self, timestamp_ms: int) -> str:
         """Convertit un timestamp millisecondes en string datetime"""
         try:
@@ -687,15 +803,10 @@ class BinanceBroker(BrokerBase):
         try:
             print("🔄 Récupération des actifs Binance")
             
-            # Utiliser get_exchange_info() pour récupérer tous les symboles
-            exchange_info = self._make_request('GET', '/api/v3/exchangeInfo', {}, signed=False)
-            symbols = exchange_info.get('symbols', [])
-            
-            # Filtrer seulement les symboles SPOT qui sont en trading
-            spot_symbols = [
-                symbol for symbol in symbols 
-                if symbol.get('status') == 'TRADING' and symbol.get('isSpotTradingAllowed', False)
-            ]
+            # Index exchangeInfo en cache (mémoire, disque, base) : pas de téléchargement complet
+            from .binance_exchange import exchange_index
+            index = exchange_index(self)
+            spot_symbols = index.spot_symbols() if index is not None else []
             
             print(f"✅ {len(spot_symbols)} actifs SPOT récupérés depuis Binance")
             return spot_symbols
@@ -0,0 +1,421 @@
+"""
+Métadonnées d'échange Binance : index des paires et filtres d'ordre
+
+exchangeInfo (plusieurs Mo) n'est plus téléchargé par get_assets, get_all_assets ni à
+chaque découverte de symboles. Il est réduit à un enregistrement compact par paire
+(base, quote, statut, filtres PRICE_FILTER / LOT_SIZE / NOTIONAL), conservé :
+
+- dans le processus et le cache Django ;
+- sur disque (BINANCE_EXCHANGE_INFO_PATH) : un redémarrage ne retélécharge rien ;
+- en base (BinanceSymbolFilter) : partagé entre machines, consultable dans l'admin.
+
+Il est revalidé après BINANCE_EXCHANGE_INFO_TTL secondes par une requête conditionnelle
+(If-None-Match / If-Modified-Since : 304 = rien à retélécharger), ou sur planification
+(python manage.py refresh_exchange_info). Les chemins sensibles à la latence (ordres,
+flux de prix) lisent cached_exchange_index : dernière copie connue, même périmée, la
+revalidation se faisant dans un thread d'arrière-plan.
+
+    index = exchange_index(broker)
+    index = cached_exchange_index(broker.base_url)   # jamais d'appel réseau
+    index.pairs_for_assets({'ETH', 'BTC'}, quote_assets={'EUR', 'USDT'})
+    quantity, price = index.prepare_order('BTCUSDT', 'BUY', Decimal('0.0123456'), 'LIMIT', Decimal('43000.123'))
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal, ROUND_DOWN, ROUND_UP
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_INDEX_KEY = 'trading_app:binance_exchange_index:{}'
+
+# Champs de filtre des enregistrements compacts (chaînes décimales Binance, None = filtre absent)
+FILTER_FIELDS = ('tickSize', 'minPrice', 'maxPrice', 'stepSize', 'minQty', 'maxQty', 'minNotional', 'maxNotional')
+
+# Colonnes BinanceSymbolFilter correspondantes
+_MODEL_FIELDS = {
+    'tickSize': 'tick_size', 'minPrice': 'min_price', 'maxPrice': 'max_price',
+    'stepSize': 'step_size', 'minQty': 'min_qty', 'maxQty': 'max_qty',
+    'minNotional': 'min_notional', 'maxNotional': 'max_notional',
+}
+
+
+class OrderValidationError(ValueError):
+    """Ordre refusé localement par les filtres de la paire (pas d'envoi à Binance)"""
+
+
+def _positive(value) -> Optional[str]:
+    """Binance indique un filtre inactif par 0 : conservé comme None"""
+    if value is None or Decimal(str(value)) == 0:
+        return None
+    return str(value)
+
+
+def symbol_record(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Enregistrement compact d'un symbole exchangeInfo (quelques centaines d'octets)"""
+    record = {
+        'symbol': info['symbol'],
+        'baseAsset': info['baseAsset'],
+        'quoteAsset': info['quoteAsset'],
+        'status': info.get('status', 'TRADING'),
+        'isSpotTradingAllowed': info.get('isSpotTradingAllowed', True),
+        'applyMinToMarket': True,
+        **{field: None for field in FILTER_FIELDS},
+    }
+    for exchange_filter in info.get('filters', []):
+        filter_type = exchange_filter.get('filterType')
+        if filter_type == 'PRICE_FILTER':
+            record['tickSize'] = _positive(exchange_filter.get('tickSize'))
+            record['minPrice'] = _positive(exchange_filter.get('minPrice'))
+            record['maxPrice'] = _positive(exchange_filter.get('maxPrice'))
+        elif filter_type == 'LOT_SIZE':
+            record['stepSize'] = _positive(exchange_filter.get('stepSize'))
+            record['minQty'] = _positive(exchange_filter.get('minQty'))
+            record['maxQty'] = _positive(exchange_filter.get('maxQty'))
+        elif filter_type == 'NOTIONAL':
+            record['minNotional'] = _positive(exchange_filter.get('minNotional'))
+            record['maxNotional'] = _positive(exchange_filter.get('maxNotional'))
+            record['applyMinToMarket'] = exchange_filter.get('applyMinToMarket', True)
+        elif filter_type == 'MIN_NOTIONAL':
+            # Ancien filtre, remplacé par NOTIONAL sur la plupart des paires
+            record['minNotional'] = record['minNotional'] or _positive(exchange_filter.get('minNotional'))
+            record['applyMinToMarket'] = exchange_filter.get('applyToMarket', True)
+    return record
+
+
+def _round_to_step(value: Decimal, step: Optional[str], rounding=ROUND_DOWN) -> Decimal:
+    if not step:
+        return value
+    step = Decimal(step)
+    # Autant de décimales que le pas (jamais de notation scientifique dans la requête)
+    exponent = min(step.normalize().as_tuple().exponent, 0)
+    return ((value / step).to_integral_value(rounding=rounding) * step).quantize(Decimal(1).scaleb(exponent))
+
+
+class ExchangeInfoIndex:
+    """Paires Binance indexées par actif de base et de cotation, avec leurs filtres d'ordre"""
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.by_base: Dict[str, Set[str]] = defaultdict(set)
+        self.by_quote: Dict[str, Set[str]] = defaultdict(set)
+        for record in records:
+            symbol = record['symbol']
+            self.records[symbol] = record
+            self.by_base[record['baseAsset']].add(symbol)
+            self.by_quote[record['quoteAsset']].add(symbol)
+
+    @classmethod
+    def from_exchange_info(cls, data: Dict[str, Any]) -> 'ExchangeInfoIndex':
+        return cls(symbol_record(info) for info in data.get('symbols', []))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return list(self.records.values())
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, symbol):
+        return symbol in self.records
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self.records.get(symbol)
+
+    def split(self, symbol: str) -> Optional[Tuple[str, str]]:
+        """(base, quote) d'une paire, None si inconnue"""
+        record = self.records.get(symbol)
+        return (record['baseAsset'], record['quoteAsset']) if record else None
+
+    def quote_assets(self) -> Set[str]:
+        return set(self.by_quote)
+
+    def spot_symbols(self) -> List[Dict[str, Any]]:
+        """Paires SPOT en trading (équivalent filtré de exchangeInfo['symbols'])"""
+        return [record for record in self.records.values()
+                if record['status'] == 'TRADING' and record['isSpotTradingAllowed']]
+
+    def pairs_for_assets(self, assets: Iterable[str], quote_assets: Optional[Iterable[str]] = None,
+                         include_delisted: bool = True) -> Set[str]:
+        """
+        Paires dont l'actif de base est détenu, cotées dans l'une des quote_assets
+
+        Les paires délistées (statut BREAK) sont conservées par défaut : leur historique
+        de trades reste consultable.
+        """
+        quotes = set(quote_assets) if quote_assets is not None else None
+        pairs = set()
+        for asset in assets:
+            for symbol in self.by_base.get(asset, ()):
+                record = self.records[symbol]
+                if quotes is not None and record['quoteAsset'] not in quotes:
+                    continue
+                if not include_delisted and record['status'] != 'TRADING':
+                    continue
+                pairs.add(symbol)
+        return pairs
+
+    def prepare_order(self, symbol: str, side: str, quantity: Decimal, order_type: str = 'MARKET',
+                      price: Optional[Decimal] = None,
+                      reference_price: Optional[Decimal] = None) -> Tuple[Decimal, Optional[Decimal]]:
+        """
+        Arrondit quantité (LOT_SIZE, vers le bas) et prix (PRICE_FILTER, jamais plus
+        défavorable : vers le bas à l'achat, vers le haut à la vente) puis vérifie les
+        bornes et le notionnel. reference_price sert au notionnel des ordres MARKET.
+
+        Raises:
+            OrderValidationError: l'ordre serait rejeté par Binance
+        """
+        record = self.records.get(symbol)
+        if record is None:
+            raise OrderValidationError(f"Paire {symbol} inconnue")
+        if record['status'] != 'TRADING':
+            raise OrderValidationError(f"Paire {symbol} non négociable (statut {record['status']})")
+
+        quantity = _round_to_step(Decimal(str(quantity)), record['stepSize'])
+        if quantity <= 0:
+            raise OrderValidationError(f"Quantité nulle après arrondi au pas {record['stepSize']}")
+        if record['minQty'] and quantity < Decimal(record['minQty']):
+            raise OrderValidationError(f"Quantité {quantity} inférieure au minimum {record['minQty']}")
+        if record['maxQty'] and quantity > Decimal(record['maxQty']):
+            raise OrderValidationError(f"Quantité {quantity} supérieure au maximum {record['maxQty']}")
+
+        is_market = order_type.upper() == 'MARKET'
+        if price is not None and not is_market:
+            rounding = ROUND_DOWN if side.upper() == 'BUY' else ROUND_UP
+            price = _round_to_step(Decimal(str(price)), record['tickSize'], rounding)
+            if record['minPrice'] and price < Decimal(record['minPrice']):
+                raise OrderValidationError(f"Prix {price} inférieur au minimum {record['minPrice']}")
+            if record['maxPrice'] and price > Decimal(record['maxPrice']):
+                raise OrderValidationError(f"Prix {price} supérieur au maximum {record['maxPrice']}")
+
+        notional_price = reference_price if is_market else price
+        if notional_price is not None:
+            notional = quantity * Decimal(str(notional_price))
+            check_min = record['minNotional'] and (not is_market or record['applyMinToMarket'])
+            if check_min and notional < Decimal(record['minNotional']):
+                raise OrderValidationError(f"Montant {notional:.8f} inférieur au minimum {record['minNotional']} {record['quoteAsset']}")
+            if record['maxNotional'] and notional > Decimal(record['maxNotional']):
+                raise OrderValidationError(f"Montant {notional:.8f} supérieur au maximum {record['maxNotional']} {record['quoteAsset']}")
+
+        return quantity, price
+
+
+class _IndexCache:
+    """Un index par URL d'API : processus, cache Django, disque, base, puis API (conditionnelle)"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[ExchangeInfoIndex, float]] = {}
+        self._lock = threading.Lock()
+        self._threads: Dict[str, threading.Thread] = {}
+        self._threads_lock = threading.Lock()
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, 'BINANCE_EXCHANGE_INFO_TTL', 3600)
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'PRICE_FEED_CACHE_ALIAS', 'shared')]
+
+    @staticmethod
+    def _path(base_url: str) -> str:
+        directory = getattr(settings, 'BINANCE_EXCHANGE_INFO_PATH', '') or os.path.join(str(settings.BASE_DIR), 'exchange_info')
+        name = ''.join(char if char.isalnum() else '_' for char in base_url.split('://')[-1]).strip('_')
+        return os.path.join(directory, f"binance_{name}.json")
+
+    def get(self, base_url: str, refresh: bool = False) -> Optional[ExchangeInfoIndex]:
+        with self._lock:
+            entry = self._entries.get(base_url)
+            if entry and not refresh and time.time() - entry[1] < self.ttl:
+                return entry[0]
+
+            snapshot = None
+            if not refresh:
+                snapshot = self.cache.get(_INDEX_KEY.format(base_url))
+                if snapshot is None or time.time() - snapshot['fetched_at'] >= self.ttl:
+                    snapshot = self._read_disk(base_url) or snapshot
+                if snapshot is None or time.time() - snapshot['fetched_at'] >= self.ttl:
+                    snapshot = self._read_db(base_url) or snapshot
+
+            if snapshot is None or time.time() - snapshot['fetched_at'] >= self.ttl:
+                snapshot = self._revalidate(base_url, snapshot or self._read_disk(base_url))
+
+            if snapshot is None:
+                # API indisponible et aucune copie : pas d'index
+                return entry[0] if entry else None
+
+            self.cache.set(_INDEX_KEY.format(base_url), snapshot, self.ttl)
+            index = ExchangeInfoIndex(snapshot['records'])
+            self._entries[base_url] = (index, snapshot['fetched_at'])
+            return index
+
+    def snapshot(self, base_url: str) -> Optional[ExchangeInfoIndex]:
+        """Dernier index connu (périmé accepté) sans réseau ni attente de _lock"""
+        entry = self._entries.get(base_url)
+        if entry is None:
+            data = self.cache.get(_INDEX_KEY.format(base_url)) or self._read_disk(base_url) or self._read_db(base_url)
+            if data is not None:
+                entry = self._entries.setdefault(base_url, (ExchangeInfoIndex(data['records']), data['fetched_at']))
+        if entry is None or time.time() - entry[1] >= self.ttl:
+            self._revalidate_in_background(base_url)
+        return entry[0] if entry else None
+
+    def _revalidate_in_background(self, base_url: str):
+        """Un seul thread de revalidation par URL"""
+        with self._threads_lock:
+            thread = self._threads.get(base_url)
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._background_get, args=(base_url,),
+                                      name='binance-exchange-info', daemon=True)
+            self._threads[base_url] = thread
+        thread.start()
+
+    def _background_get(self, base_url: str):
+        try:
+            self.get(base_url)
+        except Exception:
+            logger.exception(f"❌ Revalidation exchangeInfo Binance en arrière-plan ({base_url})")
+        finally:
+            # Connexion DB propre au thread
+            connection.close()
+
+    def _revalidate(self, base_url: str, snapshot: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Requête conditionnelle : 304 prolonge la copie existante, 200 la remplace"""
+        headers = {}
+        if snapshot and snapshot.get('etag'):
+            headers['If-None-Match'] = snapshot['etag']
+        if snapshot and snapshot.get('last_modified'):
+            headers['If-Modified-Since'] = snapshot['last_modified']
+        try:
+            response = requests.get(f"{base_url}/api/v3/exchangeInfo", headers=headers, timeout=30)
+            if response.status_code == 304 and snapshot:
+                snapshot = {**snapshot, 'fetched_at': time.time()}
+                self._write_disk(base_url, snapshot)
+                self._touch_db(base_url)
+                logger.info(f"📚 exchangeInfo Binance inchangé (304), {len(snapshot['records'])} paires")
+                return snapshot
+            response.raise_for_status()
+            index = ExchangeInfoIndex.from_exchange_info(response.json())
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.error(f"❌ Erreur chargement exchangeInfo Binance: {e}")
+            # Copie périmée conservée plutôt qu'aucune validation
+            return snapshot
+
+        snapshot = {
+            'base_url': base_url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+            'records': index.to_records(),
+        }
+        self._write_disk(base_url, snapshot)
+        self._write_db(base_url, index)
+        logger.info(f"📚 exchangeInfo Binance téléchargé: {len(index)} paires")
+        return snapshot
+
+    # --- Disque ---
+
+    def _read_disk(self, base_url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(base_url), encoding='utf-8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, base_url: str, snapshot: Dict[str, Any]):
+        path = self._path(base_url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as handle:
+                json.dump(snapshot, handle, separators=(',', ':'))
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(f"⚠️ exchangeInfo Binance non écrit sur disque ({path}): {e}")
+
+    # --- Base ---
+
+    def _read_db(self, base_url: str) -> Optional[Dict[str, Any]]:
+        from ..models import BinanceSymbolFilter
+        try:
+            rows = list(BinanceSymbolFilter.objects.filter(source=base_url))
+        except DatabaseError as e:
+            logger.warning(f"⚠️ Filtres Binance non lus en base: {e}")
+            return None
+        if not rows:
+            return None
+        records = []
+        for row in rows:
+            record = {
+                'symbol': row.symbol, 'baseAsset': row.base_asset, 'quoteAsset': row.quote_asset,
+                'status': row.status, 'isSpotTradingAllowed': row.is_spot_trading_allowed,
+                'applyMinToMarket': row.apply_min_to_market,
+            }
+            for field, column in _MODEL_FIELDS.items():
+                value = getattr(row, column)
+                record[field] = str(value.normalize()) if value is not None else None
+            records.append(record)
+        fetched_at = min(row.updated_at for row in rows).timestamp()
+        return {'base_url': base_url, 'etag': None, 'last_modified': None, 'fetched_at': fetched_at, 'records': records}
+
+    def _write_db(self, base_url: str, index: ExchangeInfoIndex):
+        from ..models import BinanceSymbolFilter
+        rows = []
+        for record in index.to_records():
+            values = {column: record[field] for field, column in _MODEL_FIELDS.items()}
+            rows.append(BinanceSymbolFilter(
+                source=base_url, symbol=record['symbol'], base_asset=record['baseAsset'],
+                quote_asset=record['quoteAsset'], status=record['status'],
+                is_spot_trading_allowed=record['isSpotTradingAllowed'],
+                apply_min_to_market=record['applyMinToMarket'], **values,
+            ))
+        try:
+            with transaction.atomic():
+                BinanceSymbolFilter.objects.bulk_create(
+                    rows,
+                    batch_size=500,
+                    update_conflicts=True,
+                    unique_fields=['source', 'symbol'],
+                    update_fields=['base_asset', 'quote_asset', 'status', 'is_spot_trading_allowed',
+                                   'apply_min_to_market', 'updated_at', *_MODEL_FIELDS.values()],
+                )
+                # Paires retirées de l'échange
+                BinanceSymbolFilter.objects.filter(source=base_url).exclude(symbol__in=list(index.records)).delete()
+        except DatabaseError as e:
+            logger.warning(f"⚠️ Filtres Binance non enregistrés en base: {e}")
+
+    def _touch_db(self, base_url: str):
+        from django.utils import timezone
+        from ..models import BinanceSymbolFilter
+        try:
+            BinanceSymbolFilter.objects.filter(source=base_url).update(updated_at=timezone.now())
+        except DatabaseError as e:
+            logger.warning(f"⚠️ Filtres Binance non revalidés en base: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_index_cache = _IndexCache()
+
+
+def exchange_index(broker, refresh: bool = False) -> Optional[ExchangeInfoIndex]:
+    """Index des paires pour l'API du broker (revalidé au plus une fois par TTL)"""
+    return _index_cache.get(broker.base_url, refresh=refresh)
+
+
+def cached_exchange_index(base_url: str) -> Optional[ExchangeInfoIndex]:
+    """Index sans appel réseau (dernière copie, même périmée) ; None tant qu'aucune copie n'existe"""
+    return _index_cache.snapshot(base_url)
@@ -0,0 +1,372 @@
+"""
+Flux websocket Binance : marché (miniTicker, kline) et données utilisateur (listenKey)
+
+Remplace le polling REST (/api/v3/account, /ticker/price, /api/v3/order) par des
+événements poussés :
+
+    market = BinanceMarketStream(broker)
+    market.watch(watched_binance_symbols(user))   # paire -> Asset des bougies
+    market.start()                                # miniTicker -> price_store, kline -> PriceSeries
+
+    user_stream = BinanceUserStream(broker, credentials).start()
+    user_stream.maintain()   # à appeler périodiquement : keepalive du listenKey, réconciliation REST
+
+Les exécutions (executionReport) et balances (outboundAccountPosition, balanceUpdate)
+mettent à jour PendingOrder et Position dès réception. La synchronisation REST reste
+le filet de sécurité : après chaque (re)connexion, pour un actif ou un ordre inconnu,
+et toutes les BINANCE_RECONCILE_INTERVAL secondes.
+"""
+
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import websocket
+
+logger = logging.getLogger(__name__)
+
+_ALIVE_KEY = 'trading_app:binance_user_stream:{}'
+
+# Binance : 1024 flux par connexion combinée
+MAX_STREAMS = 1024
+
+# Coupures réseau et trames invalides : reconnexion sans trace complète
+CONNECTION_ERRORS = (websocket.WebSocketError, OSError, ValueError, KeyError, requests.RequestException)
+
+
+def stream_base_url(broker) -> str:
+    """Hôte websocket : BINANCE_STREAM_URL, sinon déduit de l'API REST (faux courtier : même serveur)"""
+    configured = getattr(settings, 'BINANCE_STREAM_URL', '')
+    if configured:
+        return configured.rstrip('/')
+    if broker.base_url == 'https://api.binance.com':
+        return 'wss://stream.binance.com:9443'
+    if broker.base_url == 'https://testnet.binance.vision':
+        return 'wss://stream.testnet.binance.vision'
+    return broker.base_url.replace('https://', 'wss://').replace('http://', 'ws://')
+
+
+def user_stream_alive(credentials_id) -> bool:
+    """Flux utilisateur actif pour ces credentials (positions tenues à jour sans polling)"""
+    return caches[getattr(settings, 'PRICE_FEED_CACHE_ALIAS', 'shared')].get(_ALIVE_KEY.format(credentials_id)) is not None
+
+
+class _BinanceStream(ABC):
+    """Connexion websocket Binance avec reconnexion (attente exponentielle) dans un thread"""
+
+    name = 'binance'
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.connection = None
+        self.stats = Counter()
+        self.last_message_at = None
+        self._stop = threading.Event()
+        self._reconnect = threading.Event()
+        self._thread = None
+
+    @property
+    def read_timeout(self) -> float:
+        # Binance envoie un ping toutes les quelques minutes, même sans données
+        return getattr(settings, 'BINANCE_STREAM_READ_TIMEOUT', 600)
+
+    @abstractmethod
+    def url(self) -> Optional[str]:
+        """URL websocket à ouvrir (None : rien à suivre pour l'instant)"""
+        pass
+
+    @abstractmethod
+    def handle_event(self, event: Dict[str, Any]):
+        """Traite un événement décodé (contenu de "data" pour un flux combiné)"""
+        pass
+
+    def on_connected(self):
+        pass
+
+    def on_stopped(self):
+        pass
+
+    def reconnect(self):
+        """Ferme la connexion courante : la boucle se reconnecte aussitôt (sans attente)"""
+        self._reconnect.set()
+        self._close()
+
+    def _close(self):
+        connection, self.connection = self.connection, None
+        if connection:
+            connection.close()
+
+    def _consume(self):
+        while not self._stop.is_set() and not self._reconnect.is_set():
+            opcode, data = self.connection.recv()
+            if opcode != websocket.OP_TEXT:
+                continue
+            message = json.loads(data)
+            self.last_message_at = time.time()
+            self.stats['messages'] += 1
+            # Connexion DB expirée ou en erreur depuis le dernier événement (thread de longue durée)
+            close_old_connections()
+            # Flux combiné : {"stream": "btcusdt@miniTicker", "data": {...}}
+            self.handle_event(message.get('data', message))
+
+    def run(self):
+        backoff = 1
+        max_backoff = getattr(settings, 'BINANCE_STREAM_MAX_BACKOFF', 60)
+        while not self._stop.is_set():
+            self._reconnect.clear()
+            try:
+                url = self.url()
+                if url is None:
+                    # Rien à suivre : attendre watch() ou stop()
+                    self._reconnect.wait(1)
+                    continue
+                close_old_connections()
+                self.connection = websocket.connect(url, timeout=getattr(settings, 'PRICE_FEED_CONNECT_TIMEOUT', 10))
+                self.connection.settimeout(self.read_timeout)
+                self.stats['connections'] += 1
+                self.on_connected()
+                backoff = 1
+                self._consume()
+            except Exception as e:
+                if self._stop.is_set() or self._reconnect.is_set():
+                    continue
+                self.stats['reconnects'] += 1
+                if isinstance(e, CONNECTION_ERRORS):
+                    logger.warning(f"⚠️ Flux {self.name} interrompu ({e}), reconnexion dans {backoff}s")
+                else:
+                    # Erreur de traitement (base, bug) : le thread du flux ne doit pas s'arrêter
+                    self.stats['errors'] += 1
+                    logger.exception(f"❌ Erreur du flux {self.name}, reconnexion dans {backoff}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, max_backoff)
+            finally:
+                self._close()
+        self.on_stopped()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name=f"{self.name}-{id(self)}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._reconnect.set()
+        self._close()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'connected': self.connection is not None and not self.connection.closed,
+            'last_message_at': self.last_message_at,
+            **self.stats,
+        }
+
+
+class BinanceMarketStream(_BinanceStream):
+    """Flux combiné <paire>@miniTicker et <paire>@kline_<intervalle> des paires suivies"""
+
+    name = 'binance-market'
+
+    def __init__(self, broker, store=None, kline_interval: Optional[str] = None):
+        super().__init__(broker)
+        if store is None:
+            from ..price_feed import price_store
+            store = price_store
+        self.store = store
+        self.kline_interval = kline_interval or getattr(settings, 'BINANCE_STREAM_KLINE_INTERVAL', '1d')
+        self.symbols: Dict[str, Optional[int]] = {}
+        self._pending_candles: Dict[str, Dict[str, Any]] = {}
+        self._flushed_at: Dict[str, float] = {}
+
+    def watch(self, symbols: Dict[str, Optional[int]]):
+        """Paires à suivre (paire -> id d'Asset pour les bougies) ; reconnexion si la liste change"""
+        symbols = {symbol.upper(): asset_id for symbol, asset_id in symbols.items()}
+        changed = set(symbols) != set(self.symbols)
+        self.symbols = symbols
+        if changed:
+            self.reconnect()
+
+    def url(self) -> Optional[str]:
+        if not self.symbols:
+            return None
+        streams = []
+        for symbol in sorted(self.symbols):
+            streams += [f"{symbol.lower()}@miniTicker", f"{symbol.lower()}@kline_{self.kline_interval}"]
+        if len(streams) > MAX_STREAMS:
+            logger.warning(f"⚠️ {len(streams)} flux Binance demandés, limités à {MAX_STREAMS}")
+            streams = streams[:MAX_STREAMS]
+        return f"{stream_base_url(self.broker)}/stream?streams={'/'.join(streams)}"
+
+    def handle_event(self, event: Dict[str, Any]):
+        event_type = event.get('e')
+        if event_type == '24hrMiniTicker':
+            close = float(event['c'])
+            self.store.update('binance', event['s'], mid=close, last=close, source='binance_stream',
+                              open=float(event['o']), high=float(event['h']), low=float(event['l']),
+                              volume=float(event['v']), event_time=event.get('E'))
+            self.stats['tickers'] += 1
+        elif event_type == 'kline':
+            symbol = event['s']
+            self._pending_candles[symbol] = event['k']
+            # Bougie en cours écrite au plus toutes les BINANCE_STREAM_CANDLE_FLUSH secondes, toujours à la clôture
+            flush_every = getattr(settings, 'BINANCE_STREAM_CANDLE_FLUSH', 60)
+            if event['k'].get('x') or time.monotonic() - self._flushed_at.get(symbol, 0) >= flush_every:
+                self._flush_candle(symbol)
+
+    def _flush_candle(self, symbol: str):
+        kline = self._pending_candles.pop(symbol, None)
+        asset_id = self.symbols.get(symbol)
+        if kline is None or asset_id is None:
+            return
+        from ..chart_data import upsert_candle
+        if upsert_candle(asset_id, kline['t'], kline['o'], kline['h'], kline['l'], kline['c'], kline['v']) is not None:
+            self.stats['candles'] += 1
+        self._flushed_at[symbol] = time.monotonic()
+
+    def on_stopped(self):
+        for symbol in list(self._pending_candles):
+            self._flush_candle(symbol)
+
+
+class BinanceUserStream(_BinanceStream):
+    """Flux de données utilisateur : balances et exécutions d'ordres d'un credential Binance"""
+
+    name = 'binance-user'
+
+    def __init__(self, broker, credentials):
+        super().__init__(broker)
+        self.credentials = credentials
+        self.listen_key = None
+        self.reconcile_needed = True
+        self._keepalive_at = 0.0
+        self._reconciled_at = 0.0
+
+    def url(self) -> Optional[str]:
+        self.listen_key = self.broker.create_listen_key()
+        if not self.listen_key:
+            raise websocket.WebSocketError('listenKey Binance indisponible')
+        self._keepalive_at = time.monotonic()
+        return f"{stream_base_url(self.broker)}/ws/{self.listen_key}"
+
+    def on_connected(self):
+        # Événements éventuellement manqués pendant la coupure : rattrapage par REST
+        self.reconcile_needed = True
+        self._mark_alive()
+        logger.info(f"📡 Flux utilisateur Binance connecté ({self.credentials.name})")
+
+    def on_stopped(self):
+        if self.listen_key:
+            self.broker.close_listen_key(self.listen_key)
+            self.listen_key = None
+        caches[getattr(settings, 'PRICE_FEED_CACHE_ALIAS', 'shared')].delete(_ALIVE_KEY.format(self.credentials.pk))
+
+    def _mark_alive(self):
+        caches[getattr(settings, 'PRICE_FEED_CACHE_ALIAS', 'shared')].set(
+            _ALIVE_KEY.format(self.credentials.pk), time.time(), getattr(settings, 'BINANCE_RECONCILE_INTERVAL', 300) * 2
+        )
+
+    # --- Entretien (thread appelant) ---
+
+    def maintain(self) -> Dict[str, Any]:
+        """Keepalive du listenKey (toutes les BINANCE_LISTEN_KEY_KEEPALIVE s) et réconciliation REST si due"""
+        now = time.monotonic()
+        if self.listen_key and now - self._keepalive_at >= getattr(settings, 'BINANCE_LISTEN_KEY_KEEPALIVE', 1800):
+            if self.broker.keepalive_listen_key(self.listen_key):
+                self._keepalive_at = now
+            else:
+                logger.warning(f"⚠️ Keepalive listenKey Binance refusé ({self.credentials.name}), nouveau flux")
+                self.reconnect()
+
+        connected = self.connection is not None and not self.connection.closed
+        if connected:
+            self._mark_alive()
+        interval = getattr(settings, 'BINANCE_RECONCILE_INTERVAL', 300)
+        if self.reconcile_needed or now - self._reconciled_at >= interval:
+            return self.reconcile()
+        return {}
+
+    def reconcile(self) -> Dict[str, Any]:
+        """Synchronisation REST des positions et ordres en cours (filet de sécurité du flux)"""
+        from ..services import BrokerService
+        self.reconcile_needed = False
+        self._reconciled_at = time.monotonic()
+        service = BrokerService(self.credentials.user)
+        positions = service.sync_positions_from_broker(self.credentials)
+        orders = service.sync_pending_orders_from_broker(self.credentials)
+        self.stats['reconciliations'] += 1
+        return {'positions': len(positions), 'orders': orders.get('message')}
+
+    # --- Événements (thread du flux) ---
+
+    def handle_event(self, event: Dict[str, Any]):
+        event_type = event.get('e')
+        if event_type == 'outboundAccountPosition':
+            self._apply_balances(event.get('B', []))
+        elif event_type == 'balanceUpdate':
+            self._apply_balance_delta(event['a'], Decimal(event['d']))
+        elif event_type == 'executionReport':
+            self._apply_execution(event)
+        elif event_type == 'listenKeyExpired':
+            raise websocket.WebSocketClosed('listenKey expiré')
+
+    def _positions(self, asset: str):
+        from ..models import Position
+        return Position.objects.filter(
+            user=self.credentials.user, broker_position_id=asset, asset_tradable__platform='binance',
+        )
+
+    def _apply_balances(self, balances):
+        for balance in balances:
+            total = Decimal(balance['f']) + Decimal(balance['l'])
+            updated = self._positions(balance['a']).update(
+                size=total, status='OPEN' if total > 0 else 'CLOSED', updated_at=timezone.now(),
+            )
+            if not updated and total > 0:
+                # Nouvel actif : la position est créée par la synchronisation REST
+                self.reconcile_needed = True
+            self.stats['balances'] += 1
+
+    def _apply_balance_delta(self, asset: str, delta: Decimal):
+        if not self._positions(asset).update(size=F('size') + delta, updated_at=timezone.now()):
+            self.reconcile_needed = True
+        self.stats['balances'] += 1
+
+    def _apply_execution(self, event: Dict[str, Any]):
+        from ..models import PendingOrder
+        from ..order_execution import merge_broker_data
+        original = Decimal(event['q'])
+        executed = Decimal(event['z'])
+        # Ordre du pipeline encore identifié par son newClientOrderId (réponse de l'envoi pas encore reçue)
+        match = Q(order_id=str(event['i']))
+        if event.get('c'):
+            match |= Q(client_order_id=event['c'])
+        with transaction.atomic():
+            orders = list(PendingOrder.objects.select_for_update().filter(match, broker_credentials=self.credentials))
+            for order in orders:
+                # Même statut brut que get_pending_orders (NEW, PARTIALLY_FILLED, FILLED, CANCELED...)
+                order.status = event['X']
+                order.executed_quantity = executed
+                order.remaining_quantity = original - executed
+                order.broker_data = merge_broker_data(order.broker_data, event)
+                order.save(update_fields=['status', 'executed_quantity', 'remaining_quantity', 'broker_data', 'updated_at'])
+        updated = len(orders)
+        if not updated and event['X'] in ('NEW', 'PARTIALLY_FILLED'):
+            # Ordre passé hors application : créé par la synchronisation REST
+            self.reconcile_needed = True
+        self.stats['orders'] += 1
+        logger.info(f"📬 Ordre Binance {event['i']} {event['S']} {event['s']}: {event['X']} ({executed}/{original})")
@@ -0,0 +1,814 @@
+"""
+Serveur HTTP local émulant les APIs Binance et Saxo utilisées par les clients courtiers
+
+Destiné aux tests de charge et benchmarks : synchronisation des positions et des trades,
+réconciliation et passage d'ordres sans credentials ni réseau. Les clients y sont dirigés
+via BrokerCredentials.base_url ou BROKER_BASE_URLS. Les websockets sont émulés sur le
+même port : streaming Saxo (/streamingws, cotations des abonnements infoprices) et
+Binance (/stream combiné miniTicker/kline, /ws/<listenKey> pour les exécutions d'ordres),
+poussés toutes les `stream_interval` secondes.
+
+Le jeu de données (instruments, positions, trades) est déterministe et généré à la
+demande : 1M de trades ne sont jamais matérialisés en mémoire, seule la page demandée
+est calculée. Latence, gigue et limite de débit (requêtes/minute) sont configurables.
+"""
+
+import json
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from ..market_data.local import LocalDataStore
+from .saxo_streaming import HEARTBEAT, encode_message
+from .websocket import WebSocketError, server_handshake
+
+EPOCH_END = datetime(2025, 1, 3, tzinfo=timezone.utc)
+
+# Clés du compte Saxo simulé (les autres valeurs sont rejetées comme par l'API réelle)
+FAKE_SAXO_ACCOUNT_KEY = 'fake-account-key'
+FAKE_SAXO_CLIENT_KEY = 'fake-client-key'
+
+
+class FakeBrokerDataset:
+    """Jeu de données déterministe partagé par les endpoints Binance et Saxo"""
+
+    def __init__(self, symbols=200, positions=10000, trades=1000000, seed=42, store=None):
+        self.seed = seed
+        self.store = store or LocalDataStore(seed=seed)
+        self.binance_symbols = self.store.instruments('binance', symbols)
+        self.saxo_instruments = self.store.instruments('saxo', max(symbols, 1))
+        self.positions = positions
+        self.trades = trades
+        self.trades_per_symbol = max(1, trades // max(1, len(self.binance_symbols)))
+        self._symbol_index = {info['symbol']: i for i, info in enumerate(self.binance_symbols)}
+        self._prices = {}
+        self._orders = {}
+        self._order_ids = iter(range(1, 10 ** 12))
+        self._lock = threading.Lock()
+
+    def _rng(self, *key):
+        return random.Random(':'.join(str(part) for part in (self.seed, *key)))
+
+    def price(self, symbol):
+        if symbol not in self._prices:
+            self._prices[symbol] = self.store.last_price(symbol) or 100.0
+        return self._prices[symbol]
+
+    # --- Binance ---
+
+    def binance_account(self):
+        assets = sorted({info['baseAsset'] for info in self.binance_symbols} | {'USDT', 'EUR'})
+        balances = []
+        for asset in assets:
+            rng = self._rng('balance', asset)
+            balances.append({'asset': asset, 'free': f"{rng.uniform(0, 100):.8f}", 'locked': '0.00000000'})
+        return {
+            'makerCommission': 10, 'takerCommission': 10, 'canTrade': True, 'canWithdraw': True,
+            'canDeposit': True, 'accountType': 'SPOT', 'balances': balances, 'permissions': ['SPOT'],
+        }
+
+    def binance_trade(self, symbol, n):
+        """n-ième trade (0-based) du symbole"""
+        rng = self._rng('trade', symbol, n)
+        symbol_index = self._symbol_index[symbol]
+        price = self.price(symbol) * rng.uniform(0.8, 1.2)
+        qty = rng.uniform(0.001, 10)
+        timestamp = EPOCH_END - timedelta(minutes=(self.trades_per_symbol - n) * 5)
+        is_buyer = rng.random() < 0.5
+        return {
+            'symbol': symbol,
+            'id': symbol_index * self.trades_per_symbol + n + 1,
+            'orderId': symbol_index * self.trades_per_symbol + n + 1,
+            'orderListId': -1,
+            'price': f"{price:.8f}",
+            'qty': f"{qty:.8f}",
+            'quoteQty': f"{price * qty:.8f}",
+            'commission': f"{price * qty * 0.001:.8f}",
+            'commissionAsset': 'USDT',
+            'time': int(timestamp.timestamp() * 1000),
+            'isBuyer': is_buyer,
+            'isMaker': rng.random() < 0.5,
+            'isBestMatch': True,
+        }
+
+    def binance_trades(self, symbol, limit=500, from_id=None):
+        if symbol not in self._symbol_index:
+            return None
+        limit = max(1, min(int(limit or 500), 1000))
+        if from_id is not None:
+            start = max(0, int(from_id) - 1 - self._symbol_index[symbol] * self.trades_per_symbol)
+        else:
+            # Sans fromId, Binance renvoie les trades les plus récents
+            start = max(0, self.trades_per_symbol - limit)
+        end = min(self.trades_per_symbol, start + limit)
+        return [self.binance_trade(symbol, n) for n in range(start, end)]
+
+    def binance_kline(self, symbol, tick=None):
+        """Bougie journalière en cours du symbole, variant à chaque tick (demi-seconde par défaut)"""
+        tick = int(time.time() * 2) if tick is None else tick
+        rng = self._rng('kline', symbol, tick)
+        base = self.price(symbol)
+        close = base * (1 + rng.uniform(-0.002, 0.002))
+        day_start = int(time.time() // 86400 * 86400) * 1000
+        return {
+            't': day_start, 'T': day_start + 86399999, 's': symbol, 'i': '1d',
+            'o': f"{base:.8f}", 'c': f"{close:.8f}",
+            'h': f"{max(base, close) * 1.001:.8f}", 'l': f"{min(base, close) * 0.999:.8f}",
+            'v': f"{rng.uniform(100, 1000):.8f}", 'x': False,
+        }
+
+    def binance_tickers(self):
+        return [{
+            'symbol': info['symbol'],
+            'lastPrice': f"{self.price(info['symbol']):.8f}",
+            'priceChangePercent': '0.00',
+            'volume': '1000.00000000',
+        } for info in self.binance_symbols]
+
+    # --- Saxo ---
+
+    def saxo_position(self, n):
+        rng = self._rng('position', n)
+        instrument = self.saxo_instruments[n % len(self.saxo_instruments)]
+        amount = rng.randint(1, 500) * (1 if rng.random() < 0.8 else -1)
+        open_price = rng.uniform(10, 500)
+        current_price = open_price * rng.uniform(0.8, 1.2)
+        return {
+            'NetPositionId': f"{instrument['Uic']}__{instrument['AssetType']}",
+            'PositionId': str(1000000 + n),
+            'PositionBase': {
+                'AccountId': 'FAKE-ACCOUNT',
+                'Amount': amount,
+                'AssetType': instrument['AssetType'],
+                'OpenPrice': round(open_price, 4),
+                'SourceOrderId': str(5000000 + n),
+                'Status': 'Open',
+                'Uic': instrument['Uic'],
+                'ExecutionTimeOpen': (EPOCH_END - timedelta(hours=n)).isoformat(),
+            },
+            'PositionView': {
+                'CurrentPrice': round(current_price, 4),
+                'ProfitLossOnTrade': round((current_price - open_price) * amount, 2),
+            },
+        }
+
+    def saxo_closed_position(self, n):
+        rng = self._rng('closed', n)
+        instrument = self.saxo_instruments[n % len(self.saxo_instruments)]
+        amount = rng.randint(1, 500)
+        price_open = rng.uniform(10, 500)
+        price_close = price_open * rng.uniform(0.8, 1.2)
+        long_short = 'Long' if rng.random() < 0.7 else 'Short'
+        closing = EPOCH_END - timedelta(minutes=n)
+        direction = 1 if long_short == 'Long' else -1
+        return {
+            'PositionId': str(2000000 + n),
+            'InstrumentSymbol': instrument['Symbol'],
+            'ClosingAssetType': instrument['AssetType'],
+            'LongShort': {'Value': long_short, 'PresentationValue': long_short},
+            'Amount': amount,
+            'PriceOpen': round(price_open, 4),
+            'PriceClose': round(price_close, 4),
+            'OpeningTradeDate': (closing - timedelta(days=rng.randint(1, 60))).date().isoformat(),
+            'ClosingTradeDate': closing.date().isoformat(),
+            'ProfitLoss': round((price_close - price_open) * amount * direction, 2),
+            'ProfitLossAccountValueFraction': round(rng.uniform(-0.01, 0.01), 6),
+        }
+
+    def saxo_instrument(self, uic):
+        uic = int(uic)
+        if 1 <= uic <= len(self.saxo_instruments):
+            return self.saxo_instruments[uic - 1]
+        return None
+
+    def saxo_quote(self, uic, tick=None):
+        """Cotation infoprices de l'instrument, variant à chaque tick (demi-seconde par défaut)"""
+        instrument = self.saxo_instrument(uic)
+        if instrument is None:
+            return None
+        tick = int(time.time() * 2) if tick is None else tick
+        rng = self._rng('quote', uic, tick)
+        mid = self.price(instrument['Symbol']) * (1 + rng.uniform(-0.002, 0.002))
+        half_spread = mid * 0.00025
+        return {
+            'Uic': int(uic),
+            'AssetType': instrument['AssetType'],
+            'LastUpdated': datetime.now(timezone.utc).isoformat(),
+            'Quote': {
+                'Bid': round(mid - half_spread, 4),
+                'Ask': round(mid + half_spread, 4),
+                'Mid': round(mid, 4),
+                'PriceTypeBid': 'Tradable',
+                'PriceTypeAsk': 'Tradable',
+                'MarketState': 'Open',
+            },
+        }
+
+    # --- Ordres (partagés) ---
+
+    def create_order(self, payload):
+        with self._lock:
+            order_id = next(self._order_ids)
+            order = {**payload, 'orderId': order_id, 'createdAt': int(time.time() * 1000)}
+            self._orders[order_id] = order
+            return order
+
+    def get_order(self, order_id):
+        try:
+            return self._orders.get(int(order_id))
+        except (TypeError, ValueError):
+            return None
+
+    def find_client_order(self, client_order_id):
+        """Ordre d'un identifiant client (newClientOrderId Binance, ExternalReference Saxo)"""
+        if not client_order_id:
+            return None
+        for order in list(self._orders.values()):
+            if client_order_id in (order.get('clientOrderId'), order.get('ExternalReference')):
+                return order
+        return None
+
+    def cancel_order(self, order_id):
+        with self._lock:
+            order = self.get_order(order_id)
+            if order is not None:
+                order['status'] = 'CANCELED'
+            return order
+
+    def open_orders(self, symbol=None):
+        return [
+            order for order in list(self._orders.values())
+            if order.get('status') in ('NEW', 'Working') and (symbol is None or order.get('symbol') == symbol)
+        ]
+
+
+class RateLimiter:
+    """Seau à jetons : `per_minute` requêtes par minute (0 = illimité)"""
+
+    def __init__(self, per_minute=0):
+        self.per_minute = per_minute
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.per_minute:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.per_minute, self.tokens + (now - self.updated) * self.per_minute / 60)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+def _execution_report(order):
+    """Événement executionReport (flux utilisateur Binance) d'un ordre du jeu de données"""
+    return {
+        'e': 'executionReport', 'E': int(time.time() * 1000), 's': order['symbol'],
+        'c': order.get('clientOrderId', ''), 'S': order['side'], 'o': order['type'],
+        'f': order.get('timeInForce', 'GTC'), 'q': order['origQty'], 'p': order['price'], 'P': '0.00000000',
+        'x': 'TRADE' if order['status'] == 'FILLED' else order['status'], 'X': order['status'],
+        'i': order['orderId'], 'l': order['executedQty'], 'z': order['executedQty'], 'L': order['price'],
+        'n': '0', 'N': 'USDT', 'T': order['transactTime'], 'O': order['createdAt'],
+    }
+
+
+def _page(items_count, params, default_top=100, max_top=1000):
+    top = max(1, min(int(params.get('$top', default_top)), max_top))
+    skip = max(0, int(params.get('$skip', 0)))
+    return skip, min(items_count, skip + top), top
+
+
+def _next_link(path, skip, top, end, count):
+    if end >= count:
+        return {}
+    return {'__next': f"{path}?$top={top}&$skip={skip + top}"}
+
+
+class FakeBrokerHandler(BaseHTTPRequestHandler):
+    """Routage des requêtes vers les endpoints émulés"""
+
+    server_version = 'FakeBroker/1.0'
+
+    # (méthode, motif du chemin, nom de la méthode de traitement)
+    ROUTES = [
+        ('GET', r'/api/v3/ping', 'binance_ping'),
+        ('GET', r'/api/v3/time', 'binance_time'),
+        ('GET', r'/api/v3/exchangeInfo', 'binance_exchange_info'),
+        ('GET', r'/api/v3/account', 'binance_account'),
+        ('GET', r'/api/v3/myTrades', 'binance_my_trades'),
+        ('GET', r'/api/v3/ticker/24hr', 'binance_ticker_24hr'),
+        ('GET', r'/api/v3/ticker/price', 'binance_ticker_price'),
+        ('GET', r'/api/v3/depth', 'binance_depth'),
+        ('GET', r'/api/v3/openOrders', 'binance_open_orders'),
+        ('GET', r'/api/v3/allOrders', 'binance_all_orders'),
+        ('GET', r'/api/v3/order', 'binance_get_order'),
+        ('POST', r'/api/v3/order', 'binance_new_order'),
+        ('DELETE', r'/api/v3/order', 'binance_cancel_order'),
+        ('GET', r'/sapi/v1/convert/tradeFlow', 'binance_convert_history'),
+        ('POST', r'/api/v3/userDataStream', 'binance_listen_key_create'),
+        ('PUT', r'/api/v3/userDataStream', 'binance_listen_key_keepalive'),
+        ('DELETE', r'/api/v3/userDataStream', 'binance_listen_key_close'),
+        ('GET', r'/stream', 'binance_market_stream'),
+        ('GET', r'/ws/(?P<listen_key>[^/]+)', 'binance_user_stream'),
+        ('POST', r'/token', 'saxo_token'),
+        ('GET', r'/port/v1/accounts/me', 'saxo_accounts'),
+        ('GET', r'/port/v1/clients/me', 'saxo_client'),
+        ('GET', r'/port/v1/balances/me', 'saxo_balance'),
+        ('GET', r'/port/v1/positions/me', 'saxo_positions'),
+        ('GET', r'/port/v1/orders/me', 'saxo_open_orders'),
+        ('GET', r'/cs/v1/audit/orderactivities', 'saxo_order_activities'),
+        ('GET', r'/hist/v3/positions/(?P<client_key>[^/]+)', 'saxo_closed_positions'),
+        ('GET', r'/ref/v1/instruments/details', 'saxo_instruments'),
+        ('GET', r'/ref/v1/instruments/details/(?P<uic>\d+)/(?P<asset_type>[^/]+)', 'saxo_instrument_details'),
+        ('GET', r'/trade/v1/infoprices', 'saxo_infoprice'),
+        ('POST', r'/trade/v1/infoprices/subscriptions', 'saxo_price_subscribe'),
+        ('DELETE', r'/trade/v1/infoprices/subscriptions/(?P<context_id>[^/]+)(?:/(?P<reference_id>[^/]+))?', 'saxo_price_unsubscribe'),
+        ('GET', r'/streamingws/connect', 'saxo_streaming_connect'),
+        ('PUT', r'/streamingws/authorize', 'saxo_streaming_authorize'),
+        ('POST', r'/trade/v[12]/orders', 'saxo_new_order'),
+        ('GET', r'/trade/v[12]/orders/(?P<order_id>[^/]+)', 'saxo_get_order'),
+        ('DELETE', r'/trade/v[12]/orders/(?P<order_id>[^/]+)', 'saxo_cancel_order'),
+        ('GET', r'/__stats', 'stats'),
+    ]
+    COMPILED_ROUTES = [(method, re.compile(f"^(?:/sim)?(?:/openapi)?{pattern}$"), name)
+                       for method, pattern, name in ROUTES]
+
+    def log_message(self, format, *args):
+        # Silencieux : le volume de requêtes fausserait les mesures
+        pass
+
+    # --- Infrastructure ---
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+
+        for route_method, pattern, name in self.COMPILED_ROUTES:
+            match = pattern.match(parsed.path)
+            if match and route_method == method:
+                break
+        else:
+            return self._send(404, {'code': -1, 'msg': f"Endpoint non émulé: {method} {parsed.path}"})
+
+        self.server.stats[name] += 1
+        if name != 'stats':
+            if not self.server.rate_limiter.acquire():
+                self.server.stats['rate_limited'] += 1
+                return self._send(429, {'code': -1003, 'msg': 'Too many requests'}, {'Retry-After': '1'})
+            self.server.simulate_latency()
+
+        body = {}
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            raw = self.rfile.read(length)
+            try:
+                body = json.loads(raw)
+            except ValueError:
+                body = {key: values[-1] for key, values in parse_qs(raw.decode()).items()}
+
+        try:
+            status, payload = getattr(self, name)(params=params, body=body, **match.groupdict())
+        except Exception as e:
+            status, payload = 500, {'code': -1, 'msg': str(e)}
+        if status is not None:
+            # None : connexion reprise par le handler (websocket)
+            self._send(status, payload)
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    @property
+    def dataset(self):
+        return self.server.dataset
+
+    # --- Binance ---
+
+    def binance_ping(self, params, body):
+        return 200, {}
+
+    def binance_time(self, params, body):
+        return 200, {'serverTime': int(time.time() * 1000)}
+
+    def binance_exchange_info(self, params, body):
+        # Catalogue figé pour la durée du serveur : ETag stable, 304 sur If-None-Match
+        etag = f'"{self.dataset.seed}-{len(self.dataset.binance_symbols)}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return None, None
+        payload = {'timezone': 'UTC', 'serverTime': int(time.time() * 1000), 'symbols': self.dataset.binance_symbols}
+        self._send(200, payload, {'ETag': etag})
+        return None, None
+
+    def binance_account(self, params, body):
+        return 200, self.dataset.binance_account()
+
+    def binance_my_trades(self, params, body):
+        trades = self.dataset.binance_trades(params.get('symbol'), params.get('limit', 500), params.get('fromId'))
+        if trades is None:
+            return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+        return 200, trades
+
+    def binance_ticker_24hr(self, params, body):
+        tickers = self.dataset.binance_tickers()
+        if params.get('symbol'):
+            tickers = [ticker for ticker in tickers if ticker['symbol'] == params['symbol']]
+            return (200, tickers[0]) if tickers else (400, {'code': -1121, 'msg': 'Invalid symbol.'})
+        return 200, tickers
+
+    def binance_ticker_price(self, params, body):
+        symbol = params.get('symbol')
+        if symbol:
+            return 200, {'symbol': symbol, 'price': f"{self.dataset.price(symbol):.8f}"}
+        return 200, [{'symbol': t['symbol'], 'price': t['lastPrice']} for t in self.dataset.binance_tickers()]
+
+    def binance_depth(self, params, body):
+        return 200, self.dataset.store.order_book(params.get('symbol', ''), int(params.get('limit', 100)))
+
+    def binance_open_orders(self, params, body):
+        return 200, self.dataset.open_orders(params.get('symbol'))
+
+    def binance_all_orders(self, params, body):
+        symbol = params.get('symbol')
+        return 200, [order for order in list(self.dataset._orders.values()) if order.get('symbol') == symbol]
+
+    def binance_get_order(self, params, body):
+        if params.get('origClientOrderId'):
+            order = self.dataset.find_client_order(params['origClientOrderId'])
+        else:
+            order = self.dataset.get_order(params.get('orderId'))
+        return (200, order) if order else (400, {'code': -2013, 'msg': 'Order does not exist.'})
+
+    def binance_new_order(self, params, body):
+        params = {**params, **body}
+        symbol = params.get('symbol')
+        if symbol not in self.dataset._symbol_index:
+            return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+        existing = self.dataset.find_client_order(params.get('newClientOrderId'))
+        if existing and existing['status'] == 'NEW':
+            # Comme Binance : identifiant client d'un ordre encore ouvert
+            return 400, {'code': -2010, 'msg': 'Duplicate order sent.'}
+        quantity = params.get('quantity') or '0'
+        order_type = params.get('type', 'MARKET')
+        price = params.get('price') or f"{self.dataset.price(symbol):.8f}"
+        filled = order_type == 'MARKET'
+        order = self.dataset.create_order({
+            'symbol': symbol,
+            'clientOrderId': params.get('newClientOrderId', ''),
+            'transactTime': int(time.time() * 1000),
+            'price': price,
+            'origQty': quantity,
+            'executedQty': quantity if filled else '0.00000000',
+            'status': 'FILLED' if filled else 'NEW',
+            'timeInForce': params.get('timeInForce', 'GTC'),
+            'type': order_type,
+            'side': params.get('side', 'BUY'),
+            'fills': [{'price': price, 'qty': quantity, 'commission': '0', 'commissionAsset': 'USDT'}] if filled else [],
+        })
+        self.server.publish_user_event(_execution_report(order))
+        if filled:
+            self.server.publish_user_event(self._account_position(symbol))
+        return 200, order
+
+    def binance_cancel_order(self, params, body):
+        order = self.dataset.cancel_order(params.get('orderId'))
+        if order is None:
+            return 400, {'code': -2011, 'msg': 'Unknown order sent.'}
+        self.server.publish_user_event(_execution_report(order))
+        return 200, order
+
+    def _account_position(self, symbol):
+        info = self.dataset.binance_symbols[self.dataset._symbol_index[symbol]]
+        balances = {balance['asset']: balance for balance in self.dataset.binance_account()['balances']}
+        return {
+            'e': 'outboundAccountPosition', 'E': int(time.time() * 1000), 'u': int(time.time() * 1000),
+            'B': [{'a': asset, 'f': balances[asset]['free'], 'l': balances[asset]['locked']}
+                  for asset in (info['baseAsset'], info.get('quoteAsset', 'USDT')) if asset in balances],
+        }
+
+    def binance_listen_key_create(self, params, body):
+        if not self.headers.get('X-MBX-APIKEY'):
+            return 401, {'code': -2014, 'msg': 'API-key format invalid.'}
+        listen_key = uuid.uuid4().hex * 2
+        with self.server.streaming_lock:
+            self.server.listen_keys[listen_key] = time.time()
+        return 200, {'listenKey': listen_key}
+
+    def binance_listen_key_keepalive(self, params, body):
+        with self.server.streaming_lock:
+            if params.get('listenKey') not in self.server.listen_keys:
+                return 400, {'code': -1125, 'msg': 'This listenKey does not exist.'}
+            self.server.listen_keys[params['listenKey']] = time.time()
+        return 200, {}
+
+    def binance_listen_key_close(self, params, body):
+        with self.server.streaming_lock:
+            self.server.listen_keys.pop(params.get('listenKey'), None)
+        return 200, {}
+
+    def binance_market_stream(self, params, body):
+        """Websocket combiné : miniTicker et kline des flux demandés (?streams=a@miniTicker/a@kline_1d)"""
+        symbols = {}
+        for stream in params.get('streams', '').split('/'):
+            name, _, kind = stream.partition('@')
+            if name.upper() in self.dataset._symbol_index:
+                symbols.setdefault(name.upper(), []).append(kind)
+        connection = server_handshake(self)
+        try:
+            while True:
+                now = int(time.time() * 1000)
+                for symbol, kinds in symbols.items():
+                    kline = self.dataset.binance_kline(symbol)
+                    for kind in kinds:
+                        if kind == 'miniTicker':
+                            data = {'e': '24hrMiniTicker', 'E': now, 's': symbol, 'c': kline['c'], 'o': kline['o'],
+                                    'h': kline['h'], 'l': kline['l'], 'v': kline['v'], 'q': '0'}
+                        elif kind.startswith('kline_'):
+                            data = {'e': 'kline', 'E': now, 's': symbol, 'k': {**kline, 'i': kind[len('kline_'):]}}
+                        else:
+                            continue
+                        connection.send(json.dumps({'stream': f"{symbol.lower()}@{kind}", 'data': data}))
+                        self.server.stats['streaming_messages'] += 1
+                time.sleep(self.server.stream_interval)
+        except WebSocketError:
+            pass
+        finally:
+            connection.close()
+        return None, None
+
+    def binance_user_stream(self, params, body, listen_key):
+        """Websocket utilisateur : événements publiés par les ordres (executionReport, balances)"""
+        with self.server.streaming_lock:
+            if listen_key not in self.server.listen_keys:
+                return 400, {'code': -1125, 'msg': 'This listenKey does not exist.'}
+            events = queue.Queue()
+            self.server.user_streams.setdefault(listen_key, []).append(events)
+        connection = server_handshake(self)
+        try:
+            while listen_key in self.server.listen_keys:
+                try:
+                    connection.send(json.dumps(events.get(timeout=self.server.stream_interval)))
+                    self.server.stats['streaming_messages'] += 1
+                except queue.Empty:
+                    # Détecte la fermeture côté client
+                    connection.ping()
+            connection.send(json.dumps({'e': 'listenKeyExpired', 'E': int(time.time() * 1000), 'listenKey': listen_key}))
+        except WebSocketError:
+            pass
+        finally:
+            connection.close()
+            with self.server.streaming_lock:
+                self.server.user_streams.get(listen_key, []).remove(events)
+        return None, None
+
+    def binance_convert_history(self, params, body):
+        return 200, {'list': [], 'startTime': params.get('startTime'), 'endTime': params.get('endTime'), 'limit': 100, 'moreData': False}
+
+    # --- Saxo ---
+
+    def saxo_token(self, params, body):
+        return 200, {'access_token': 'fake-access-token', 'refresh_token': 'fake-refresh-token',
+                     'expires_in': 1200, 'refresh_token_expires_in': 3600, 'token_type': 'Bearer'}
+
+    def saxo_accounts(self, params, body):
+        return 200, {'Data': [{'AccountId': 'FAKE-ACCOUNT', 'AccountKey': FAKE_SAXO_ACCOUNT_KEY,
+                               'ClientKey': FAKE_SAXO_CLIENT_KEY, 'Currency': 'EUR', 'Active': True}]}
+
+    def saxo_client(self, params, body):
+        return 200, {'ClientId': 'FAKE-CLIENT', 'ClientKey': FAKE_SAXO_CLIENT_KEY, 'DefaultAccountKey': FAKE_SAXO_ACCOUNT_KEY}
+
+    def saxo_balance(self, params, body):
+        return 200, {'CashBalance': 100000.0, 'CollateralAvailable': 100000.0, 'Currency': 'EUR', 'TotalValue': 250000.0}
+
+    def saxo_positions(self, params, body):
+        count = self.dataset.positions
+        skip, end, top = _page(count, params)
+        data = [self.dataset.saxo_position(n) for n in range(skip, end)]
+        return 200, {'__count': count, 'Data': data, **_next_link('/port/v1/positions/me', skip, top, end, count)}
+
+    def saxo_open_orders(self, params, body):
+        orders = self.dataset.open_orders()
+        return 200, {'__count': len(orders), 'Data': orders}
+
+    def saxo_order_activities(self, params, body):
+        """Dernière activité de chaque ordre Saxo (EntryType=Last), y compris exécutés et annulés"""
+        if params.get('ClientKey') != FAKE_SAXO_CLIENT_KEY:
+            return 400, {'ErrorCode': 'InvalidClientKey', 'Message': 'ClientKey inconnue'}
+        statuses = {'Filled': 'FinalFill', 'CANCELED': 'Cancelled', 'Working': 'Placed'}
+        data = [{
+            'OrderId': order['OrderId'],
+            'ExternalReference': order.get('ExternalReference'),
+            'Uic': order.get('Uic'),
+            'AssetType': order.get('AssetType'),
+            'BuySell': order.get('BuySell'),
+            'Amount': order.get('Amount'),
+            'Status': statuses.get(order['status'], order['status']),
+            'ActivityTime': datetime.fromtimestamp(order['createdAt'] / 1000, timezone.utc).isoformat(),
+        } for order in list(self.dataset._orders.values()) if 'OrderId' in order]
+        return 200, {'__count': len(data), 'Data': data}
+
+    def saxo_closed_positions(self, params, body, client_key):
+        if client_key != FAKE_SAXO_CLIENT_KEY:
+            return 404, {'ErrorCode': 'InvalidClientKey', 'Message': 'ClientKey inconnue'}
+        count = self.dataset.trades
+        skip, end, top = _page(count, params)
+        data = [self.dataset.saxo_closed_position(n) for n in range(skip, end)]
+        return 200, {'__count': count, 'Data': data, **_next_link(f"/hist/v3/positions/{client_key}", skip, top, end, count)}
+
+    def saxo_instruments(self, params, body):
+        instruments = self.dataset.saxo_instruments
+        skip, end, top = _page(len(instruments), params)
+        return 200, {'__count': len(instruments), 'Data': instruments[skip:end],
+                     **_next_link('/ref/v1/instruments/details', skip, top, end, len(instruments))}
+
+    def saxo_instrument_details(self, params, body, uic, asset_type):
+        instrument = self.dataset.saxo_instrument(uic)
+        return (200, instrument) if instrument else (404, {'ErrorCode': 'NotFound', 'Message': 'Instrument inconnu'})
+
+    def saxo_infoprice(self, params, body):
+        quote = self.dataset.saxo_quote(params.get('Uic') or 0)
+        return (200, quote) if quote else (404, {'ErrorCode': 'NotFound', 'Message': 'Instrument inconnu'})
+
+    def saxo_price_subscribe(self, params, body):
+        context_id, reference_id = body.get('ContextId'), body.get('ReferenceId')
+        if not context_id or not reference_id:
+            return 400, {'ErrorCode': 'InvalidRequest', 'Message': 'ContextId et ReferenceId requis'}
+        arguments = body.get('Arguments', {})
+        uics = [int(uic) for uic in str(arguments.get('Uics', '')).split(',') if uic.strip()]
+        snapshot = [quote for quote in (self.dataset.saxo_quote(uic) for uic in uics) if quote]
+        with self.server.streaming_lock:
+            self.server.streaming.setdefault(context_id, {})[reference_id] = uics
+        return 201, {
+            'ContextId': context_id,
+            'ReferenceId': reference_id,
+            'RefreshRate': body.get('RefreshRate', 1000),
+            'Format': 'application/json',
+            'InactivityTimeout': 30,
+            'State': 'Active',
+            'Snapshot': {'Data': snapshot},
+        }
+
+    def saxo_price_unsubscribe(self, params, body, context_id, reference_id=None):
+        with self.server.streaming_lock:
+            if reference_id is None:
+                self.server.streaming.pop(context_id, None)
+            else:
+                self.server.streaming.get(context_id, {}).pop(reference_id, None)
+        return 202, {}
+
+    def saxo_streaming_authorize(self, params, body):
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return 401, {'ErrorCode': 'Unauthorized', 'Message': 'Token manquant'}
+        self.server.stats['streaming_reauthorized'] += 1
+        return 202, {}
+
+    def saxo_streaming_connect(self, params, body):
+        """Websocket : deltas de cotation des abonnements du contexte et heartbeats"""
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return 401, {'ErrorCode': 'Unauthorized', 'Message': 'Token manquant'}
+        context_id = params.get('contextId') or params.get('contextid')
+        connection = server_handshake(self)
+        message_id = 0
+        try:
+            while True:
+                with self.server.streaming_lock:
+                    subscriptions = dict(self.server.streaming.get(context_id, {}))
+                for reference_id, uics in subscriptions.items():
+                    quotes = [quote for quote in (self.dataset.saxo_quote(uic) for uic in uics) if quote]
+                    if quotes:
+                        message_id += 1
+                        connection.send(encode_message(message_id, reference_id, quotes))
+                        self.server.stats['streaming_messages'] += 1
+                if not subscriptions:
+                    message_id += 1
+                    connection.send(encode_message(message_id, HEARTBEAT, [
+                        {'ReferenceId': HEARTBEAT, 'Heartbeats': [{'OriginatingReferenceId': '', 'Reason': 'NoNewData'}]}
+                    ]))
+                time.sleep(self.server.stream_interval)
+        except WebSocketError:
+            pass
+        finally:
+            connection.close()
+            with self.server.streaming_lock:
+                self.server.streaming.pop(context_id, None)
+        return None, None
+
+    def saxo_new_order(self, params, body):
+        if body.get('AccountKey') != FAKE_SAXO_ACCOUNT_KEY:
+            return 400, {'ErrorCode': 'InvalidModelState', 'Message': 'AccountKey invalide',
+                         'ModelState': {'AccountKey': ['Compte inconnu']}}
+        request_id = self.headers.get('x-request-id')
+        if request_id and self.dataset.find_client_order(request_id):
+            # Renvoi d'un ordre déjà reçu (même x-request-id) : rejeté, pas de double exécution
+            return 409, {'ErrorCode': 'DuplicateOperation', 'Message': 'Opération déjà reçue'}
+        order = self.dataset.create_order({
+            'Uic': body.get('Uic'),
+            'ExternalReference': body.get('ExternalReference') or request_id,
+            'AssetType': body.get('AssetType', 'Stock'),
+            'BuySell': body.get('BuySell', 'Buy'),
+            'Amount': body.get('Amount', 0),
+            'OpenOrderType': body.get('OrderType', 'Market'),
+            'Price': body.get('Price'),
+            'status': 'Working' if str(body.get('OrderType', 'Market')).lower() == 'limit' else 'Filled',
+        })
+        order['OrderId'] = str(order['orderId'])
+        order['Status'] = order['status']
+        return 201, {'OrderId': order['OrderId']}
+
+    def saxo_get_order(self, params, body, order_id):
+        order = self.dataset.get_order(order_id)
+        return (200, order) if order else (404, {'ErrorCode': 'NotFound', 'Message': 'Ordre inconnu'})
+
+    def saxo_cancel_order(self, params, body, order_id):
+        order = self.dataset.cancel_order(order_id)
+        return (200, {'Orders': [{'OrderId': order_id}]}) if order else (404, {'ErrorCode': 'NotFound', 'Message': 'Ordre inconnu'})
+
+    # --- Observabilité ---
+
+    def stats(self, params, body):
+        return 200, dict(self.server.stats)
+
+
+class FakeBrokerServer(ThreadingHTTPServer):
+    """Serveur multi-thread portant le jeu de données, la latence et la limite de débit"""
+
+    daemon_threads = True
+
+    def __init__(self, address, dataset, latency_ms=0, jitter_ms=0, rate_limit=0, stream_interval=0.5):
+        super().__init__(address, FakeBrokerHandler)
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.stats = Counter()
+        # Abonnements streaming Saxo : contexte -> ReferenceId -> UICs
+        self.streaming = {}
+        # Flux utilisateur Binance : listenKey -> date du dernier keepalive, files d'événements ouvertes
+        self.listen_keys = {}
+        self.user_streams = {}
+        self.streaming_lock = threading.Lock()
+        self.stream_interval = stream_interval
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def publish_user_event(self, event):
+        """Diffuse un événement à tous les flux utilisateur Binance connectés"""
+        with self.streaming_lock:
+            for events in self.user_streams.values():
+                for stream_events in events:
+                    stream_events.put(event)
+
+    def simulate_latency(self):
+        delay = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+
+def start_fake_broker(host='127.0.0.1', port=0, latency_ms=0, jitter_ms=0, rate_limit=0, stream_interval=0.5,
+                      **dataset_options):
+    """
+    Démarre le serveur dans un thread (port 0 = port libre choisi par le système)
+
+    Returns:
+        FakeBrokerServer : utiliser server.base_url puis server.shutdown()
+    """
+    server = FakeBrokerServer((host, port), FakeBrokerDataset(**dataset_options),
+                              latency_ms=latency_ms, jitter_ms=jitter_ms, rate_limit=rate_limit,
+                              stream_interval=stream_interval)
+    thread = threading.Thread(target=server.serve_forever, name='fake-broker', daemon=True)
+    thread.start()
+    return server
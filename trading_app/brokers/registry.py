@@ -0,0 +1,122 @@
+"""
+Registre des instances de courtiers authentifiées
+
+BrokerService.get_broker_instance construisait un SaxoBroker/BinanceBroker à chaque
+appel, puis chaque opération (ordre, prix) rappelait authenticate() : plusieurs
+allers-retours réseau par ordre pour Binance (ping, heure serveur, compte).
+
+Le registre garde une instance par credential, dans le processus, tant que la version
+des tokens (access token, expiration, clés API, URL) ne change pas et que
+BROKER_INSTANCE_TTL n'est pas écoulé. L'état authentifié (et ce que l'instance a
+découvert, comme les clés de compte) est réutilisé d'un appel à l'autre.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .base import BrokerBase
+from .factory import BrokerFactory
+
+
+def token_version(credentials) -> str:
+    """Empreinte des champs qui invalident une instance (tokens, clés, environnement)"""
+    fields = (
+        credentials.broker_type, credentials.environment, credentials.base_url,
+        credentials.saxo_access_token, credentials.saxo_refresh_token, credentials.saxo_token_expires_at,
+        credentials.binance_api_key, credentials.binance_api_secret, credentials.binance_testnet,
+    )
+    return hashlib.md5(repr(fields).encode()).hexdigest()
+
+
+class _Entry:
+    __slots__ = ('broker', 'version', 'created', 'authenticated_at')
+
+    def __init__(self, broker: BrokerBase, version: str):
+        self.broker = broker
+        self.version = version
+        self.created = time.monotonic()
+        self.authenticated_at = None
+
+
+class BrokerRegistry:
+    """Instances de courtiers par credential, réutilisées jusqu'au changement de tokens ou au TTL"""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self._ttl = ttl
+        self._entries: Dict[Any, _Entry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'BROKER_INSTANCE_TTL', 600)
+
+    def _entry(self, credentials) -> _Entry:
+        version = token_version(credentials)
+        with self._lock:
+            entry = self._entries.get(credentials.pk)
+            if entry and entry.version == version and time.monotonic() - entry.created < self.ttl:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            broker = BrokerFactory.create_broker(
+                credentials.broker_type, credentials.user, credentials.get_credentials_dict()
+            )
+            entry = _Entry(broker, version)
+            if credentials.pk is not None:
+                self._entries[credentials.pk] = entry
+            return entry
+
+    def get(self, credentials) -> BrokerBase:
+        """Instance (non nécessairement authentifiée) pour ces credentials"""
+        return self._entry(credentials).broker
+
+    def authenticated(self, credentials) -> Optional[BrokerBase]:
+        """
+        Instance authentifiée, sans nouvelle authentification si elle l'a déjà été
+        (dans le TTL et avant l'expiration connue du token)
+
+        Returns:
+            BrokerBase ou None si l'authentification échoue
+        """
+        entry = self._entry(credentials)
+        if entry.authenticated_at is not None and self._still_authenticated(entry):
+            return entry.broker
+        if not entry.broker.authenticate():
+            entry.authenticated_at = None
+            return None
+        entry.authenticated_at = time.monotonic()
+        return entry.broker
+
+    def _still_authenticated(self, entry: _Entry) -> bool:
+        broker = entry.broker
+        if not broker.is_authenticated() or time.monotonic() - entry.authenticated_at >= self.ttl:
+            return False
+        expires_at = broker.token_expires_at
+        if expires_at is None:
+            return True
+        if timezone.is_naive(expires_at):
+            expires_at = timezone.make_aware(expires_at)
+        return timezone.now() < expires_at
+
+    def invalidate(self, credentials_id=None):
+        """Oublie une instance (ou toutes) : prochaine utilisation = nouvelle authentification"""
+        with self._lock:
+            if credentials_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(credentials_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {'instances': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+broker_registry = BrokerRegistry()
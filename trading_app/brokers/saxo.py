@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from decimal import Decimal
 from urllib.parse import urlencode
+from django.conf import settings
 from .base import BrokerBase
 
 
@@ -31,11 +32,22 @@ class SaxoBroker(BrokerBase):
             self.base_url = "https://gateway.saxobank.com/sim/openapi"
             self.auth_url = "https://sim.logonvalidation.net"
         
+        # Surcharge (serveur de test local) : credentials puis settings.BROKER_BASE_URLS
+        override = credentials.get('base_url') or getattr(settings, 'BROKER_BASE_URLS', {}).get('saxo')
+        if override:
+            self.base_url = self.auth_url = override.rstrip('/')
+        
         # Récupérer les tokens stockés s'ils existent
         self.access_token = credentials.get('access_token')
         self.refresh_token = credentials.get('refresh_token')
         self.token_expires_at = credentials.get('token_expires_at')
-        self.account_key = None  # Sera défini lors de l'authentification
+        # Clés de compte persistées sur BrokerCredentials (découvertes au premier appel)
+        self.account_key = credentials.get('account_key')
+        self.client_key = credentials.get('client_key')
+        # Identifiant des BrokerCredentials : tokens partagés entre processus (token_lifecycle)
+        self.credentials_id = credentials.get('credentials_id')
+        # Symbole -> UIC résolus par cette instance (réutilisée via le registre des courtiers)
+        self._uic_cache = {}
     
     def get_auth_url(self, state: str = "xyz123") -> str:
         """Générer l'URL d'autorisation OAuth2"""
@@ -58,7 +70,10 @@ class SaxoBroker(BrokerBase):
         return full_url
     
     def authenticate(self) -> bool:
-        """Authentification - vérifier si on a un token valide ou essayer de le rafraîchir"""
+        """Authentification - token valide ou tokens partagés ; refresh inline seulement hors credentials enregistrés"""
+        # Tokens déjà rafraîchis par le service de refresh ou un autre worker
+        self._adopt_shared_tokens()
+        
         # Si on a déjà un token valide, on est authentifié
         if self.is_authenticated() and self.token_expires_at:
             # Normaliser les dates pour la comparaison
@@ -86,6 +101,12 @@ class SaxoBroker(BrokerBase):
             print("🔑 Saxo Live - Token existant, pas de refresh automatique")
             return bool(self.access_token)
         
+        # Credentials enregistrés : le refresh appartient à TokenRefreshQueue (refresh_broker_tokens),
+        # une requête ne bloque jamais sur l'API d'authentification et échoue immédiatement
+        if self.credentials_id:
+            print("⏳ Token Saxo expiré - en attente du service de refresh (refresh_broker_tokens)")
+            return False
+        
         # Si on a un vrai refresh token (différent de l'access token), essayer de le rafraîchir
         if self.refresh_token and self.refresh_token != self.access_token:
             return self.refresh_auth_token()
@@ -93,6 +114,22 @@ class SaxoBroker(BrokerBase):
         # Sinon, on n'est pas authentifié
         return False
     
+    def _adopt_shared_tokens(self) -> bool:
+        """Reprendre les tokens publiés dans le cache partagé s'ils sont plus récents"""
+        if not self.credentials_id:
+            return False
+        from .. import token_lifecycle
+        tokens = token_lifecycle.shared_tokens(self.credentials_id)
+        if not tokens or tokens['access_token'] == self.access_token:
+            return False
+        current_expiry = token_lifecycle.aware_datetime(self.token_expires_at)
+        if current_expiry and tokens['expires_at'] and tokens['expires_at'] <= current_expiry:
+            return False
+        self.access_token = tokens['access_token']
+        self.refresh_token = tokens['refresh_token']
+        self.token_expires_at = tokens['expires_at']
+        return True
+    
     def authenticate_with_code(self, authorization_code: str) -> bool:
         """Authentification avec le code d'autorisation OAuth2"""
         token_url = f"{self.auth_url}/token"
@@ -156,8 +193,14 @@ class SaxoBroker(BrokerBase):
             traceback.print_exc()
             return False
     
-    def refresh_auth_token(self) -> bool:
-        """Rafraîchir le token d'authentification avec gestion d'erreur robuste"""
+    def refresh_auth_token(self, persist: bool = True) -> bool:
+        """
+        Rafraîchir le token d'authentification avec gestion d'erreur robuste
+
+        Args:
+            persist: enregistrer les nouveaux tokens en base ; False laisse l'écriture à
+                l'appelant (token_lifecycle écrit conditionnellement, hors transaction HTTP)
+        """
         if not self.refresh_token:
             print("❌ Refresh token non disponible")
             return False
@@ -211,6 +254,9 @@ class SaxoBroker(BrokerBase):
             self.access_token = tokens["access_token"]
             self.refresh_token = tokens["refresh_token"]
             self.token_expires_at = datetime.now() + timedelta(seconds=tokens["expires_in"])
+
+            if not persist:
+                return True
             
             # Mettre à jour les tokens dans la base de données si possible
             try:
@@ -402,6 +448,80 @@ class SaxoBroker(BrokerBase):
             print(f"Erreur récupération comptes Saxo: {e}")
             return []
     
+    # Marqueurs d'une erreur Saxo sur une AccountKey/ClientKey invalide (compte clôturé, clés changées)
+    INVALID_ACCOUNT_MARKERS = ('AccountKey', 'ClientKey', 'InvalidAccount', 'InvalidClient', 'AccountNotFound')
+    
+    def get_account_keys(self, refresh: bool = False) -> Optional[Dict[str, str]]:
+        """AccountKey/ClientKey du compte principal : découvertes une fois puis persistées"""
+        if self.account_key and self.client_key and not refresh:
+            return {'account_key': self.account_key, 'client_key': self.client_key}
+        
+        if not self.is_authenticated():
+            return None
+        
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        try:
+            response = requests.get(f"{self.base_url}/port/v1/accounts/me", headers=headers)
+            response.raise_for_status()
+            accounts = response.json().get("Data", [])
+            if not accounts:
+                print("❌ Aucun compte trouvé")
+                return None
+            
+            account_key = accounts[0]["AccountKey"]
+            # Les comptes portent en général la ClientKey : /clients/me seulement à défaut
+            client_key = accounts[0].get("ClientKey")
+            if not client_key:
+                response = requests.get(f"{self.base_url}/port/v1/clients/me", headers=headers)
+                response.raise_for_status()
+                client_key = response.json()["ClientKey"]
+        except Exception as e:
+            print(f"❌ Erreur récupération des clés de compte Saxo: {e}")
+            return None
+        
+        self.account_key = account_key
+        self.client_key = client_key
+        print(f"🔑 Clés de compte Saxo: Account Key {account_key} / Client Key {client_key}")
+        self._save_account_keys()
+        return {'account_key': account_key, 'client_key': client_key}
+    
+    def _save_account_keys(self):
+        """Persister les clés sur BrokerCredentials (partagées par les autres processus)"""
+        if not self.credentials_id:
+            return
+        try:
+            from ..models import BrokerCredentials
+            BrokerCredentials.objects.filter(pk=self.credentials_id).update(
+                saxo_account_key=self.account_key,
+                saxo_client_key=self.client_key,
+            )
+        except Exception as e:
+            print(f"⚠️ Erreur sauvegarde des clés de compte Saxo: {e}")
+    
+    def _is_invalid_account_error(self, response) -> bool:
+        if response is None or response.status_code not in (400, 403, 404):
+            return False
+        return any(marker in response.text for marker in self.INVALID_ACCOUNT_MARKERS)
+    
+    def with_account_keys(self, call):
+        """
+        Exécute call(keys) avec les clés persistées ; si Saxo les rejette, elles sont
+        redécouvertes et l'appel est rejoué une fois
+        
+        Returns:
+            requests.Response, ou None si aucune clé n'a pu être obtenue
+        """
+        keys = self.get_account_keys()
+        if not keys:
+            return None
+        response = call(keys)
+        if self._is_invalid_account_error(response):
+            print(f"🔑 Clés de compte Saxo rejetées ({response.status_code}) - nouvelle découverte")
+            keys = self.get_account_keys(refresh=True)
+            if keys:
+                response = call(keys)
+        return response
+    
     def get_positions(self) -> List[Dict[str, Any]]:
         """Récupère les positions depuis Saxo Bank"""
         print("🔍 Récupération des positions Saxo...")
@@ -497,42 +617,6 @@ class SaxoBroker(BrokerBase):
                 "Content-Type": "application/json"
             }
             
-            # Récupérer les informations du compte et du client
-            print("🔑 Récupération des informations du compte...")
-            
-            # Récupérer les comptes
-            accounts_url = f"{self.base_url}/port/v1/accounts/me"
-            accounts_response = requests.get(accounts_url, headers=headers)
-            
-            if accounts_response.status_code != 200:
-                print(f"❌ Erreur récupération comptes: {accounts_response.status_code}")
-                return []
-            
-            accounts_data = accounts_response.json()
-            accounts = accounts_data.get("Data", [])
-            
-            if not accounts:
-                print("❌ Aucun compte trouvé")
-                return []
-            
-            account_id = accounts[0]["AccountId"]
-            account_key = accounts[0]["AccountKey"]
-            
-            # Récupérer les informations du client
-            clients_url = f"{self.base_url}/port/v1/clients/me"
-            clients_response = requests.get(clients_url, headers=headers)
-            
-            if clients_response.status_code != 200:
-                print(f"❌ Erreur récupération client: {clients_response.status_code}")
-                return []
-            
-            clients_data = clients_response.json()
-            client_key = clients_data["ClientKey"]
-            
-            print(f"🔑 Account ID: {account_id}")
-            print(f"🔑 Client Key: {client_key}")
-            print(f"🔑 Account Key: {account_key}")
-            
             # Configuration de la période de recherche (30 derniers jours)
             from datetime import datetime, timezone, timedelta
             
@@ -540,20 +624,23 @@ class SaxoBroker(BrokerBase):
             start_date = (end_date - timedelta(days=30)).isoformat()
             end_date = end_date.isoformat()
             
-            # Endpoint historique des positions fermées
-            url = f"{self.base_url}/hist/v3/positions/{client_key}"
-            
-            params = {
-                "AccountKey": account_key,
-                "FromDate": start_date,
-                "ToDate": end_date,
-                "$top": limit
-            }
-            
-            print(f"🌐 Appel API historique: {url}")
-            print(f"📋 Params: {params}")
+            def fetch_history(keys):
+                # Endpoint historique des positions fermées (clés de compte persistées)
+                url = f"{self.base_url}/hist/v3/positions/{keys['client_key']}"
+                params = {
+                    "AccountKey": keys['account_key'],
+                    "FromDate": start_date,
+                    "ToDate": end_date,
+                    "$top": limit
+                }
+                print(f"🌐 Appel API historique: {url}")
+                print(f"📋 Params: {params}")
+                return requests.get(url, headers=headers, params=params)
             
-            response = requests.get(url, headers=headers, params=params)
+            response = self.with_account_keys(fetch_history)
+            if response is None:
+                print("❌ Clés de compte Saxo indisponibles")
+                return []
             
             print(f"📊 Status Code: {response.status_code}")
             
@@ -684,13 +771,21 @@ class SaxoBroker(BrokerBase):
     def get_asset_price(self, symbol: str, uic: Optional[int] = None, 
                        asset_type: str = "Stock") -> Optional[Decimal]:
         """Récupérer le prix d'un actif"""
+        uic = uic or self._get_uic_from_symbol(symbol)
+        
+        # Cotation reçue en streaming (run_price_feed) : pas d'appel réseau
+        from ..price_feed import price_store
+        live_price = price_store.price('saxo', uic)
+        if live_price is not None:
+            return live_price
+        
         if not self.is_authenticated():
             return None
             
         url = f"{self.base_url}/trade/v1/infoprices"
         headers = {"Authorization": f"Bearer {self.access_token}"}
         params = {
-            "Uic": uic or self._get_uic_from_symbol(symbol),
+            "Uic": uic,
             "AssetType": asset_type
         }
         
@@ -714,42 +809,96 @@ class SaxoBroker(BrokerBase):
     
     def place_order(self, symbol: str, side: str, size: Decimal, 
                    order_type: str = "Market", price: Optional[Decimal] = None,
-                   uic: Optional[int] = None, asset_type: str = "Stock") -> Dict[str, Any]:
-        """Placer un ordre"""
+                   uic: Optional[int] = None, asset_type: str = "Stock",
+                   client_order_id: Optional[str] = None) -> Dict[str, Any]:
+        """Placer un ordre
+        
+        client_order_id est envoyé en ExternalReference et en x-request-id : Saxo rejette
+        un renvoi identique (409) au lieu de l'exécuter deux fois. Timeout ou connexion
+        coupée : {"error", "uncertain": True}, l'ordre a pu être reçu.
+        """
         if not self.is_authenticated():
             return {"error": "Non authentifié"}
-            
-        accounts = self.get_accounts()
-        if not accounts:
-            return {"error": "Aucun compte trouvé"}
-            
-        account_key = accounts[0]["AccountKey"]  # Utiliser le premier compte
         
-        url = f"{self.base_url}/trade/v1/orders"
+        url = f"{self.base_url}/trade/v2/orders"
         headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
         
         order_data = {
-            "AccountKey": account_key,
             "Uic": uic or self._get_uic_from_symbol(symbol),
             "AssetType": asset_type,
-            "BuySell": side.upper(),
+            "BuySell": side.capitalize(),
             "Amount": float(size),
-            "OrderType": order_type
+            "OrderType": order_type.capitalize(),
+            "ManualOrder": False,
+            "OrderDuration": {"DurationType": "DayOrder"}
         }
         
         if price and order_type.lower() == "limit":
             order_data["Price"] = float(price)
         
+        if client_order_id:
+            order_data["ExternalReference"] = client_order_id
+            headers["x-request-id"] = client_order_id
+        
+        def post_order(keys):
+            # AccountKey persistée : pas d'appel /port/v1/accounts/me avant l'ordre
+            return requests.post(url, headers=headers, json={**order_data, "AccountKey": keys['account_key']},
+                                 timeout=getattr(settings, 'ORDER_EXECUTION_TIMEOUT', 10))
+        
         try:
-            response = requests.post(url, headers=headers, json=order_data)
+            response = self.with_account_keys(post_order)
+            if response is None:
+                return {"error": "Aucun compte trouvé"}
+            if response.status_code == 409 and client_order_id:
+                # Même x-request-id déjà reçu : le premier envoi a abouti
+                return {"duplicate": True, "ExternalReference": client_order_id}
             response.raise_for_status()
             return response.json()
+        except (requests.Timeout, requests.ConnectionError) as e:
+            return {"error": f"Réponse Saxo non reçue, ordre incertain: {e}", "uncertain": True}
         except Exception as e:
             return {"error": f"Erreur placement ordre Saxo: {e}"}
     
+    def get_order_by_client_id(self, client_order_id: str, since: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Ordre retrouvé par son ExternalReference : ordres ouverts, puis activités (exécuté, annulé)
+        
+        since : date de création de l'ordre (activités cherchées à partir de là, 24 h par défaut).
+        None si l'ordre est introuvable ; exception si Saxo n'a pas pu être interrogé.
+        """
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        timeout = getattr(settings, 'ORDER_EXECUTION_TIMEOUT', 10)
+        response = requests.get(f"{self.base_url}/port/v1/orders/me", headers=headers,
+                                params={"$top": 1000, "FieldGroups": "DisplayAndFormat"}, timeout=timeout)
+        response.raise_for_status()
+        for order in response.json().get("Data", []):
+            if order.get("ExternalReference") == client_order_id:
+                return order
+        
+        # Un ordre Market exécuté aussitôt n'est plus ouvert : dernière activité de chaque ordre
+        from django.utils import timezone
+        since = since or timezone.now() - timedelta(days=1)
+        
+        def fetch_activities(keys):
+            return requests.get(f"{self.base_url}/cs/v1/audit/orderactivities", headers=headers, params={
+                "ClientKey": keys['client_key'],
+                "FromDateTime": since.isoformat(),
+                "EntryType": "Last",
+                "FieldGroups": "DisplayAndFormat",
+                "$top": 1000,
+            }, timeout=timeout)
+        
+        response = self.with_account_keys(fetch_activities)
+        if response is None:
+            raise ValueError("Clés de compte Saxo indisponibles")
+        response.raise_for_status()
+        for activity in response.json().get("Data", []):
+            if activity.get("ExternalReference") == client_order_id:
+                return activity
+        return None
+    
     def cancel_order(self, order_id: str) -> bool:
         """Annuler un ordre"""
         if not self.is_authenticated():
@@ -887,12 +1036,21 @@ class SaxoBroker(BrokerBase):
             return []
     
     def _get_uic_from_symbol(self, symbol: str) -> Optional[int]:
-        """Récupérer l'UIC d'un symbole"""
-        assets = self.get_assets()
-        for asset in assets:
-            if asset.get("Symbol") == symbol:
-                return asset.get("Identifier")
-        return None 
+        """Récupérer l'UIC d'un symbole (AllAssets, puis liste des instruments Saxo en dernier recours)"""
+        if symbol in self._uic_cache:
+            return self._uic_cache[symbol]
+        
+        from ..price_feed import saxo_uic_for_symbol
+        uic = saxo_uic_for_symbol(symbol)
+        if uic is None:
+            assets = self.get_assets()
+            for asset in assets:
+                if asset.get("Symbol") == symbol:
+                    uic = asset.get("Identifier")
+                    break
+        if uic is not None:
+            self._uic_cache[symbol] = uic
+        return uic
 
     def set_24h_token(self, token: str):
         """Configurer un token 24h de Saxo"""
@@ -0,0 +1,351 @@
+"""
+Flux de prix Saxo en streaming (/streamingws) alimentant le PriceStore
+
+Au lieu d'un GET /trade/v1/infoprices par symbole et par appel, une connexion
+websocket par credential reçoit les cotations des instruments suivis (positions
+ouvertes, stratégies actives) :
+
+    stream = SaxoPriceStream(broker)
+    stream.watch(watched_saxo_instruments())
+    stream.start()   # thread : connexion, abonnements, deltas -> price_store
+
+Protocole Saxo : connexion sur {streaming}/streamingws/connect?contextId=..., puis
+abonnements POST /trade/v1/infoprices/subscriptions (ContextId + ReferenceId) dont la
+réponse contient le snapshot ; les messages binaires suivants sont des deltas à
+fusionner. Messages de contrôle : _heartbeat, _resetsubscriptions, _disconnect.
+Le token renouvelé (token_lifecycle) est transmis par PUT /streamingws/authorize.
+"""
+
+import json
+import logging
+import struct
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import websocket
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = '_heartbeat'
+RESET_SUBSCRIPTIONS = '_resetsubscriptions'
+DISCONNECT = '_disconnect'
+
+FORMAT_JSON = 0
+
+# Coupures réseau et trames invalides : reconnexion sans trace complète
+CONNECTION_ERRORS = (websocket.WebSocketError, OSError, ValueError, requests.RequestException)
+
+
+def parse_messages(data: bytes) -> List[Dict[str, Any]]:
+    """
+    Découpe une trame binaire Saxo en messages
+
+    Chaque message : id (8 octets LE), 2 octets réservés, taille de la ReferenceId (1),
+    ReferenceId (ASCII), format (1 : 0 = JSON), taille du contenu (4 octets LE), contenu.
+    """
+    messages, offset = [], 0
+    while offset < len(data):
+        message_id = struct.unpack_from('<q', data, offset)[0]
+        offset += 10
+        reference_size = data[offset]
+        offset += 1
+        reference_id = data[offset:offset + reference_size].decode('ascii')
+        offset += reference_size
+        payload_format = data[offset]
+        payload_size = struct.unpack_from('<i', data, offset + 1)[0]
+        offset += 5
+        payload = data[offset:offset + payload_size]
+        offset += payload_size
+        if payload_format == FORMAT_JSON:
+            payload = json.loads(payload.decode('utf-8-sig')) if payload else None
+        messages.append({'message_id': message_id, 'reference_id': reference_id,
+                         'format': payload_format, 'payload': payload})
+    return messages
+
+
+def encode_message(message_id: int, reference_id: str, payload) -> bytes:
+    """Message Saxo au format JSON (utilisé par le faux courtier)"""
+    reference = reference_id.encode('ascii')
+    content = json.dumps(payload).encode()
+    return (struct.pack('<q', message_id) + b'\x00\x00' + bytes([len(reference)]) + reference
+            + bytes([FORMAT_JSON]) + struct.pack('<i', len(content)) + content)
+
+
+def _merge(target: Dict[str, Any], delta: Dict[str, Any]):
+    """Fusionne un delta (seuls les champs modifiés sont envoyés) dans le snapshot"""
+    for key, value in delta.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+
+
+class SaxoPriceStream:
+    """Abonnements infoprices d'une session Saxo, tenus à jour dans le PriceStore"""
+
+    def __init__(self, broker, store=None, refresh_rate_ms: Optional[int] = None,
+                 chunk_size: Optional[int] = None):
+        if store is None:
+            from ..price_feed import price_store
+            store = price_store
+        self.broker = broker
+        self.store = store
+        self.refresh_rate_ms = refresh_rate_ms or getattr(settings, 'PRICE_FEED_REFRESH_RATE_MS', 1000)
+        self.chunk_size = chunk_size or getattr(settings, 'PRICE_FEED_SUBSCRIPTION_CHUNK', 100)
+        self.context_id = None
+        self.connection = None
+        self.instruments: Dict[int, Dict[str, str]] = {}
+        self.subscriptions: Dict[str, Dict[str, Any]] = {}
+        self.quotes: Dict[int, Dict[str, Any]] = {}
+        self.stats = Counter()
+        self.last_message_at = None
+        self._sequence = 0
+        self._authorized_token = None
+        self._auth_checked = 0.0
+        self._lock = threading.Lock()
+        self._resync = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- URLs ---
+
+    @property
+    def streaming_url(self) -> str:
+        """Hôte de streaming : SAXO_STREAMING_URL, sinon déduit de la passerelle REST"""
+        configured = getattr(settings, 'SAXO_STREAMING_URL', '')
+        if configured:
+            return configured.rstrip('/')
+        # gateway.saxobank.com/sim/openapi -> streaming.saxobank.com/sim/openapi ; le faux courtier sert les deux
+        return self.broker.base_url.replace('://gateway.saxobank.com', '://streaming.saxobank.com')
+
+    @property
+    def websocket_url(self) -> str:
+        url = self.streaming_url
+        if url.startswith('https://'):
+            url = 'wss://' + url[len('https://'):]
+        elif url.startswith('http://'):
+            url = 'ws://' + url[len('http://'):]
+        return f"{url}/streamingws/connect?contextId={self.context_id}"
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.broker.access_token}"}
+
+    # --- Instruments suivis ---
+
+    def watch(self, instruments: Dict[int, Dict[str, str]]):
+        """Instruments à suivre (UIC -> {'asset_type', 'symbol'}) ; abonnements ajustés au prochain message"""
+        with self._lock:
+            self.instruments = {int(uic): dict(info) for uic, info in instruments.items()}
+        self._resync.set()
+
+    def _wanted(self) -> List[tuple]:
+        """(AssetType, UICs triés) par abonnement : une souscription par type d'actif et par lot"""
+        by_type = defaultdict(list)
+        with self._lock:
+            for uic, info in self.instruments.items():
+                by_type[info.get('asset_type') or 'Stock'].append(uic)
+        wanted = []
+        for asset_type, uics in sorted(by_type.items()):
+            uics.sort()
+            for start in range(0, len(uics), self.chunk_size):
+                wanted.append((asset_type, tuple(uics[start:start + self.chunk_size])))
+        return wanted
+
+    # --- Abonnements ---
+
+    def _sync_subscriptions(self):
+        wanted = self._wanted()
+        current = {(sub['asset_type'], sub['uics']): reference_id for reference_id, sub in self.subscriptions.items()}
+        for key, reference_id in current.items():
+            if key not in wanted:
+                self._unsubscribe(reference_id)
+        for asset_type, uics in wanted:
+            if (asset_type, uics) not in current:
+                self._subscribe(asset_type, uics)
+
+    def _subscribe(self, asset_type: str, uics: tuple):
+        self._sequence += 1
+        reference_id = f"prices_{self._sequence}"
+        response = requests.post(
+            f"{self.broker.base_url}/trade/v1/infoprices/subscriptions",
+            headers=self._headers(),
+            json={
+                "ContextId": self.context_id,
+                "ReferenceId": reference_id,
+                "RefreshRate": self.refresh_rate_ms,
+                "Arguments": {
+                    "Uics": ','.join(str(uic) for uic in uics),
+                    "AssetType": asset_type,
+                    "FieldGroups": ["Quote"],
+                },
+            },
+            timeout=10,
+        )
+        response.raise_for_status()
+        self.subscriptions[reference_id] = {'asset_type': asset_type, 'uics': uics}
+        self.stats['subscriptions'] += 1
+        for item in response.json().get('Snapshot', {}).get('Data', []):
+            self._apply(item)
+
+    def _unsubscribe(self, reference_id: str):
+        self.subscriptions.pop(reference_id, None)
+        try:
+            requests.delete(
+                f"{self.broker.base_url}/trade/v1/infoprices/subscriptions/{self.context_id}/{reference_id}",
+                headers=self._headers(), timeout=10,
+            )
+        except requests.RequestException as e:
+            logger.warning(f"⚠️ Désabonnement Saxo {reference_id} impossible: {e}")
+
+    def _unsubscribe_all(self):
+        if not self.context_id or not self.subscriptions:
+            return
+        self.subscriptions = {}
+        try:
+            requests.delete(f"{self.broker.base_url}/trade/v1/infoprices/subscriptions/{self.context_id}",
+                            headers=self._headers(), timeout=10)
+        except requests.RequestException as e:
+            logger.warning(f"⚠️ Désabonnement Saxo (contexte {self.context_id}) impossible: {e}")
+
+    # --- Messages ---
+
+    def _apply(self, delta: Dict[str, Any]):
+        uic = delta.get('Uic')
+        if uic is None:
+            return
+        quote = self.quotes.setdefault(uic, {})
+        _merge(quote, delta)
+        prices = quote.get('Quote', {})
+        self.store.update(
+            'saxo', uic,
+            bid=prices.get('Bid'), ask=prices.get('Ask'), mid=prices.get('Mid'),
+            source='saxo_stream', asset_type=quote.get('AssetType'), last_updated=quote.get('LastUpdated'),
+        )
+        self.stats['quotes'] += 1
+
+    def handle_message(self, message: Dict[str, Any]):
+        reference_id = message['reference_id']
+        payload = message['payload']
+        self.last_message_at = time.time()
+        self.stats['messages'] += 1
+
+        if reference_id == HEARTBEAT:
+            self.stats['heartbeats'] += 1
+        elif reference_id == RESET_SUBSCRIPTIONS:
+            # Le serveur a perdu des messages : recréer les abonnements visés (tous si liste vide)
+            targets = (payload or {}).get('TargetReferenceIds') or list(self.subscriptions)
+            self.stats['resets'] += 1
+            for reference_id in targets:
+                subscription = self.subscriptions.get(reference_id)
+                if subscription:
+                    self._unsubscribe(reference_id)
+                    self._subscribe(subscription['asset_type'], subscription['uics'])
+        elif reference_id == DISCONNECT:
+            raise websocket.WebSocketClosed('Déconnexion demandée par Saxo')
+        elif reference_id in self.subscriptions:
+            for delta in payload if isinstance(payload, list) else [payload]:
+                self._apply(delta)
+
+    # --- Connexion ---
+
+    def _connect(self):
+        if not self.broker.authenticate():
+            raise websocket.WebSocketError('Authentification Saxo impossible')
+        self.context_id = f"tradingapp{uuid.uuid4().hex[:16]}"
+        self.connection = websocket.connect(self.websocket_url, headers=self._headers(),
+                                            timeout=getattr(settings, 'PRICE_FEED_CONNECT_TIMEOUT', 10))
+        # Saxo envoie des _heartbeat sans données : un silence prolongé = connexion morte
+        self.connection.settimeout(getattr(settings, 'PRICE_FEED_READ_TIMEOUT', 60))
+        self._authorized_token = self.broker.access_token
+        self._auth_checked = time.monotonic()
+        self.subscriptions, self.quotes = {}, {}
+        self._resync.clear()
+        self._sync_subscriptions()
+        logger.info(f"📡 Flux Saxo connecté ({self.context_id}), {len(self.instruments)} instruments")
+
+    def _reauthorize_if_needed(self):
+        """Transmet au flux le token renouvelé par le service de refresh (sans reconnexion)"""
+        if time.monotonic() - self._auth_checked < getattr(settings, 'PRICE_FEED_AUTH_CHECK', 30):
+            return
+        self._auth_checked = time.monotonic()
+        if not self.broker.authenticate() or self.broker.access_token == self._authorized_token:
+            return
+        response = requests.put(f"{self.streaming_url}/streamingws/authorize",
+                                params={"contextid": self.context_id}, headers=self._headers(), timeout=10)
+        response.raise_for_status()
+        self._authorized_token = self.broker.access_token
+        logger.info(f"🔑 Flux Saxo ré-autorisé avec le nouveau token ({self.context_id})")
+
+    def _consume(self):
+        while not self._stop.is_set():
+            if self._resync.is_set():
+                self._resync.clear()
+                self._sync_subscriptions()
+            self._reauthorize_if_needed()
+            opcode, data = self.connection.recv()
+            if opcode == websocket.OP_BINARY:
+                # Connexion DB expirée ou en erreur depuis la dernière trame (thread de longue durée)
+                close_old_connections()
+                for message in parse_messages(data):
+                    self.handle_message(message)
+
+    def _close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def run(self):
+        """Boucle du flux : reconnexion avec attente exponentielle jusqu'à stop()"""
+        backoff = 1
+        max_backoff = getattr(settings, 'PRICE_FEED_MAX_BACKOFF', 60)
+        while not self._stop.is_set():
+            try:
+                self._connect()
+                backoff = 1
+                self._consume()
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.stats['reconnects'] += 1
+                if isinstance(e, CONNECTION_ERRORS):
+                    logger.warning(f"⚠️ Flux Saxo interrompu ({e}), reconnexion dans {backoff}s")
+                else:
+                    # Erreur de traitement (base, bug) : le thread du flux ne doit pas s'arrêter
+                    self.stats['errors'] += 1
+                    logger.exception(f"❌ Erreur du flux Saxo, reconnexion dans {backoff}s")
+                self._unsubscribe_all()
+                self._close()
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, max_backoff)
+        self._unsubscribe_all()
+        self._close()
+
+    def start(self) -> 'SaxoPriceStream':
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name=f"saxo-stream-{self.broker.credentials_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._close()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'context_id': self.context_id,
+            'connected': self.connection is not None and not self.connection.closed,
+            'instruments': len(self.instruments),
+            'subscriptions': len(self.subscriptions),
+            'last_message_at': self.last_message_at,
+            **self.stats,
+        }
@@ -0,0 +1,224 @@
+"""
+WebSocket minimal (RFC 6455) pour les flux temps réel des courtiers
+
+Bibliothèque standard uniquement, comme le faux courtier : connexion ws/wss avec
+en-têtes (Authorization Bearer pour Saxo), trames texte/binaires fragmentées,
+ping/pong et fermeture. Les mêmes primitives servent au côté serveur du faux
+courtier (server_handshake), qui joue les flux Saxo et Binance en local.
+"""
+
+import base64
+import hashlib
+import os
+import socket
+import ssl
+import struct
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class WebSocketError(Exception):
+    """Poignée de main refusée ou trame invalide"""
+
+
+class WebSocketClosed(WebSocketError):
+    """Connexion fermée par le pair (ou coupée)"""
+
+
+def accept_key(key: str) -> str:
+    """Valeur Sec-WebSocket-Accept attendue pour une Sec-WebSocket-Key"""
+    return base64.b64encode(hashlib.sha1((key + _GUID).encode()).digest()).decode()
+
+
+def _mask(payload: bytes, key: bytes) -> bytes:
+    if not payload:
+        return payload
+    repeated = (key * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(payload), 'big')
+
+
+def encode_frame(opcode: int, payload: bytes, mask: bool) -> bytes:
+    """Trame unique (FIN) ; les clients masquent obligatoirement leurs trames"""
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header += struct.pack('!H', length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack('!Q', length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = _mask(payload, key)
+    return bytes(header) + payload
+
+
+def _read_exact(rfile, size: int) -> bytes:
+    data = rfile.read(size) if size else b''
+    if len(data) < size:
+        raise WebSocketClosed('Connexion interrompue')
+    return data
+
+
+def read_frame(rfile) -> Tuple[bool, int, bytes]:
+    """Lit une trame : (fin, opcode, payload démasqué)"""
+    head = _read_exact(rfile, 2)
+    fin = bool(head[0] & 0x80)
+    opcode = head[0] & 0x0F
+    masked = head[1] & 0x80
+    length = head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', _read_exact(rfile, 2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', _read_exact(rfile, 8))[0]
+    key = _read_exact(rfile, 4) if masked else None
+    payload = _read_exact(rfile, length)
+    if key:
+        payload = _mask(payload, key)
+    return fin, opcode, payload
+
+
+class WebSocketConnection:
+    """Connexion établie : envoi thread-safe, réception des messages complets"""
+
+    def __init__(self, sock, rfile, client: bool = True):
+        self.sock = sock
+        self.rfile = rfile
+        self.client = client
+        self.closed = False
+        self._send_lock = threading.Lock()
+
+    def settimeout(self, timeout: Optional[float]):
+        self.sock.settimeout(timeout)
+
+    def send(self, payload, opcode: Optional[int] = None):
+        """Envoie un message (str = trame texte, bytes = trame binaire)"""
+        if isinstance(payload, str):
+            payload, opcode = payload.encode(), opcode or OP_TEXT
+        frame = encode_frame(opcode or OP_BINARY, payload, mask=self.client)
+        with self._send_lock:
+            if self.closed:
+                raise WebSocketClosed('Connexion fermée')
+            try:
+                self.sock.sendall(frame)
+            except OSError as e:
+                self.closed = True
+                raise WebSocketClosed(str(e))
+
+    def recv(self) -> Tuple[int, bytes]:
+        """
+        Prochain message de données (OP_TEXT ou OP_BINARY, fragments réassemblés)
+
+        Les ping reçoivent leur pong ; une trame close lève WebSocketClosed.
+        socket.timeout est propagé (pas de message dans le délai du socket).
+        """
+        opcode, chunks = None, []
+        while True:
+            fin, frame_opcode, payload = read_frame(self.rfile)
+            if frame_opcode == OP_PING:
+                self.send(payload, OP_PONG)
+                continue
+            if frame_opcode == OP_PONG:
+                continue
+            if frame_opcode == OP_CLOSE:
+                self.close(payload[:2] if len(payload) >= 2 else b'')
+                raise WebSocketClosed('Fermeture demandée par le serveur')
+            if frame_opcode != OP_CONTINUATION:
+                opcode, chunks = frame_opcode, []
+            chunks.append(payload)
+            if fin:
+                return opcode, b''.join(chunks)
+
+    def ping(self, payload: bytes = b''):
+        self.send(payload, OP_PING)
+
+    def close(self, code: bytes = struct.pack('!H', 1000)):
+        """Envoie la trame close (si possible) puis ferme le socket"""
+        if self.closed:
+            return
+        try:
+            self.send(code, OP_CLOSE)
+        except WebSocketError:
+            pass
+        self.closed = True
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def connect(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10) -> WebSocketConnection:
+    """
+    Ouvre une connexion ws:// ou wss:// (http(s):// accepté)
+
+    Raises:
+        WebSocketError: le serveur refuse la mise à niveau (ex: 401 token expiré)
+    """
+    parsed = urlparse(url)
+    secure = parsed.scheme in ('wss', 'https')
+    host = parsed.hostname
+    port = parsed.port or (443 if secure else 80)
+
+    sock = socket.create_connection((host, port), timeout=timeout)
+    if secure:
+        sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+
+    key = base64.b64encode(os.urandom(16)).decode()
+    path = (parsed.path or '/') + (f"?{parsed.query}" if parsed.query else '')
+    lines = [
+        f"GET {path} HTTP/1.1",
+        f"Host: {parsed.netloc}",
+        "Upgrade: websocket",
+        "Connection: Upgrade",
+        f"Sec-WebSocket-Key: {key}",
+        "Sec-WebSocket-Version: 13",
+    ] + [f"{name}: {value}" for name, value in (headers or {}).items()]
+    sock.sendall(('\r\n'.join(lines) + '\r\n\r\n').encode())
+
+    rfile = sock.makefile('rb')
+    status_line = rfile.readline().decode('latin-1').strip()
+    response_headers = {}
+    while True:
+        line = rfile.readline().decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        response_headers[name.strip().lower()] = value.strip()
+
+    parts = status_line.split(' ', 2)
+    if len(parts) < 2 or parts[1] != '101':
+        sock.close()
+        raise WebSocketError(f"Connexion WebSocket refusée: {status_line}")
+    if response_headers.get('sec-websocket-accept') != accept_key(key):
+        sock.close()
+        raise WebSocketError('Sec-WebSocket-Accept invalide')
+    return WebSocketConnection(sock, rfile, client=True)
+
+
+def server_handshake(handler) -> WebSocketConnection:
+    """Accepte la mise à niveau dans un BaseHTTPRequestHandler (faux courtier)"""
+    key = handler.headers.get('Sec-WebSocket-Key')
+    if not key or handler.headers.get('Upgrade', '').lower() != 'websocket':
+        raise WebSocketError('Requête de mise à niveau WebSocket invalide')
+    handler.send_response(101, 'Switching Protocols')
+    handler.send_header('Upgrade', 'websocket')
+    handler.send_header('Connection', 'Upgrade')
+    handler.send_header('Sec-WebSocket-Accept', accept_key(key))
+    handler.end_headers()
+    handler.wfile.flush()
+    handler.close_connection = True
+    return WebSocketConnection(handler.connection, handler.rfile, client=False)
@@ -0,0 +1,293 @@
+"""
+Service de données de graphique
+
+Les bougies d'un Asset sont converties une seule fois (à l'écriture de price_history)
+en colonnes triées par timestamp epoch dans PriceSeries. Les graphiques lisent ces
+colonnes, découpent la plage demandée par recherche dichotomique et sous-échantillonnent
+(LTTB ou buckets min/max) à la résolution demandée.
+"""
+import calendar
+import hashlib
+import json
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import Asset, PriceSeries
+from .response_cache import bump_price_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POINTS = 1000
+MAX_POINTS = 5000
+METHODS = ('lttb', 'minmax')
+
+
+def _to_epoch(value):
+    """Timestamp epoch (secondes, UTC) d'une date de bougie"""
+    if isinstance(value, (int, float)):
+        # Millisecondes (CoinGecko, Binance) ou secondes
+        return int(value / 1000) if value > 1e11 else int(value)
+    if isinstance(value, datetime):
+        return calendar.timegm(value.utctimetuple())
+    if isinstance(value, str):
+        try:
+            if len(value) == 10:
+                parsed = datetime.strptime(value, '%Y-%m-%d')
+            else:
+                parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        return calendar.timegm(parsed.utctimetuple())
+    return None
+
+
+def candles_from_history(price_history):
+    """
+    Convertit un historique [{date, open, high, low, close, volume}, ...] (liste ou JSON)
+    en colonnes triées et dédoublonnées par timestamp.
+    """
+    if isinstance(price_history, str):
+        if not price_history or price_history == 'xxxx':
+            return None
+        price_history = json.loads(price_history)
+
+    rows = {}
+    for candle in price_history or []:
+        timestamp = _to_epoch(candle.get('date', candle.get('time')))
+        if timestamp is None:
+            continue
+        try:
+            rows[timestamp] = (
+                float(candle.get('open', 0) or 0),
+                float(candle.get('high', 0) or 0),
+                float(candle.get('low', 0) or 0),
+                float(candle.get('close', 0) or 0),
+                float(candle.get('volume', 0) or 0),
+            )
+        except (TypeError, ValueError):
+            continue
+
+    timestamps = sorted(rows)
+    columns = {'t': timestamps, 'o': [], 'h': [], 'l': [], 'c': [], 'v': []}
+    for timestamp in timestamps:
+        o, h, l, c, v = rows[timestamp]
+        columns['o'].append(o)
+        columns['h'].append(h)
+        columns['l'].append(l)
+        columns['c'].append(c)
+        columns['v'].append(v)
+    return columns
+
+
+def build_series(asset):
+    """(Re)construit la PriceSeries d'un Asset depuis son price_history"""
+    try:
+        candles = candles_from_history(asset.price_history)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Historique de prix invalide pour {asset.symbol}: {e}")
+        candles = None
+
+    if not candles or not candles['t']:
+        PriceSeries.objects.filter(asset=asset).delete()
+        return None
+
+    series, _ = PriceSeries.objects.update_or_create(
+        asset=asset,
+        defaults={
+            'candles': candles,
+            'candle_count': len(candles['t']),
+            'first_candle_at': candles['t'][0],
+            'last_candle_at': candles['t'][-1],
+            'last_close': candles['c'][-1],
+        }
+    )
+    return series
+
+
+def save_asset_prices(asset, bump_version=True):
+    """Sauvegarde un Asset dont price_history a changé et met à jour sa série"""
+    asset.save()
+    series = build_series(asset)
+    if bump_version:
+        bump_price_version()
+    return series
+
+
+def save_assets_prices(assets, fields=('price_history',), batch_size=500):
+    """
+    Version groupée de save_asset_prices : bulk_update des Assets, upsert des séries
+    et une seule invalidation du cache des prix.
+
+    Returns:
+        int: nombre de séries écrites
+    """
+    assets = list(assets)
+    if not assets:
+        return 0
+    Asset.objects.bulk_update(assets, list(fields), batch_size=batch_size)
+
+    series = []
+    for asset in assets:
+        try:
+            candles = candles_from_history(asset.price_history)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Historique de prix invalide pour {asset.symbol}: {e}")
+            continue
+        if not candles or not candles['t']:
+            continue
+        series.append(PriceSeries(
+            asset=asset,
+            candles=candles,
+            candle_count=len(candles['t']),
+            first_candle_at=candles['t'][0],
+            last_candle_at=candles['t'][-1],
+            last_close=candles['c'][-1],
+        ))
+
+    PriceSeries.objects.bulk_create(
+        series,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['asset'],
+        update_fields=['candles', 'candle_count', 'first_candle_at', 'last_candle_at', 'last_close', 'updated_at'],
+    )
+    bump_price_version()
+    return len(series)
+
+
+def upsert_candle(asset_id, timestamp, open_, high, low, close, volume, bump_version=True):
+    """
+    Remplace (même timestamp) ou insère une bougie dans la série d'un Asset, sans
+    reconstruction depuis price_history (bougies temps réel du flux Binance).
+    La série est reconstruite depuis price_history à la prochaine mise à jour de l'historique.
+
+    Returns:
+        PriceSeries ou None si l'Asset n'a pas encore de série
+    """
+    series = PriceSeries.objects.filter(asset_id=asset_id).first()
+    timestamp = _to_epoch(timestamp)
+    if series is None or timestamp is None or not series.candles.get('t'):
+        return None
+
+    candles = series.candles
+    row = {'o': float(open_), 'h': float(high), 'l': float(low), 'c': float(close), 'v': float(volume)}
+    index = bisect_left(candles['t'], timestamp)
+    if index < len(candles['t']) and candles['t'][index] == timestamp:
+        for column, value in row.items():
+            candles[column][index] = value
+    else:
+        candles['t'].insert(index, timestamp)
+        for column, value in row.items():
+            candles[column].insert(index, value)
+
+    series.candle_count = len(candles['t'])
+    series.first_candle_at = candles['t'][0]
+    series.last_candle_at = candles['t'][-1]
+    series.last_close = candles['c'][-1]
+    series.save(update_fields=['candles', 'candle_count', 'first_candle_at', 'last_candle_at', 'last_close', 'updated_at'])
+    if bump_version:
+        bump_price_version()
+    return series
+
+
+def find_asset(symbol):
+    """Asset correspondant à un symbole (exact d'abord, puis préfixe)"""
+    clean_symbol = symbol.upper().split(':')[0].split('_')[0]
+    return (
+        Asset.objects.filter(Q(symbol_clean=clean_symbol) | Q(symbol__iexact=symbol)).order_by('id').first()
+        or Asset.objects.filter(Q(symbol_clean__startswith=clean_symbol) | Q(symbol__istartswith=clean_symbol)).order_by('id').first()
+    )
+
+
+def get_series_meta(asset):
+    """Métadonnées de la série sans charger les bougies (construction à la demande si absente)"""
+    series = PriceSeries.objects.filter(asset=asset).defer('candles').first()
+    if series is None and asset.price_history and asset.price_history != 'xxxx':
+        series = build_series(asset)
+    return series
+
+
+def lttb_indices(xs, ys, start, end, threshold):
+    """Largest-Triangle-Three-Buckets sur [start, end) : indices des points retenus"""
+    count = end - start
+    if threshold >= count or threshold < 3:
+        return list(range(start, end))
+
+    every = (count - 2) / (threshold - 2)
+    selected = [start]
+    a = start
+    for i in range(threshold - 2):
+        avg_start = start + int((i + 1) * every) + 1
+        avg_end = min(start + int((i + 2) * every) + 1, end)
+        avg_len = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / avg_len
+        avg_y = sum(ys[avg_start:avg_end]) / avg_len
+
+        range_start = start + int(i * every) + 1
+        range_end = start + int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+
+        max_area = -1.0
+        next_a = range_start
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                next_a = j
+        selected.append(next_a)
+        a = next_a
+
+    selected.append(end - 1)
+    return selected
+
+
+def minmax_buckets(candles, start, end, points):
+    """Agrège [start, end) en buckets OHLC conservant les extrêmes (min/max) de chaque bucket"""
+    count = end - start
+    bucket_size = max(1, -(-count // points))
+    t, o, h, l, c, v = (candles[k] for k in ('t', 'o', 'h', 'l', 'c', 'v'))
+    result = []
+    for bucket_start in range(start, end, bucket_size):
+        bucket_end = min(bucket_start + bucket_size, end)
+        result.append({
+            'time': t[bucket_start],
+            'open': o[bucket_start],
+            'high': max(h[bucket_start:bucket_end]),
+            'low': min(l[bucket_start:bucket_end]),
+            'close': c[bucket_end - 1],
+            'volume': sum(v[bucket_start:bucket_end]),
+        })
+    return result
+
+
+def chart_points(candles, points=DEFAULT_POINTS, method='lttb', start_time=None, end_time=None):
+    """Bougies de la plage demandée, sous-échantillonnées à environ `points` points"""
+    timestamps = candles['t']
+    start = bisect_left(timestamps, start_time) if start_time is not None else 0
+    end = bisect_right(timestamps, end_time) if end_time is not None else len(timestamps)
+    if end <= start:
+        return []
+
+    if method == 'minmax' and end - start > points:
+        return minmax_buckets(candles, start, end, points)
+
+    indices = lttb_indices(timestamps, candles['c'], start, end, points)
+    return [{
+        'time': timestamps[i],
+        'open': candles['o'][i],
+        'high': candles['h'][i],
+        'low': candles['l'][i],
+        'close': candles['c'][i],
+        'volume': candles['v'][i],
+    } for i in indices]
+
+
+def series_etag(series, *params):
+    """ETag lié à la dernière bougie de la série et aux paramètres de rendu"""
+    raw = ':'.join(str(part) for part in (
+        series.asset_id, series.candle_count, series.last_candle_at, series.last_close, *params
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
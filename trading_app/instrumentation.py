@@ -0,0 +1,314 @@
+"""
+Instrumentation des requêtes : requêtes SQL, temps base de données et appels HTTP sortants
+
+`collect()` mesure un bloc de code (requête HTTP, étape d'automatisation...) :
+
+    with collect() as collector:
+        ...
+    collector.to_dict()  # {'duration_ms', 'queries', 'db_ms', 'http_count', 'http_ms', 'http_hosts'}
+
+RequestMetricsMiddleware l'applique à chaque requête, ajoute l'en-tête Server-Timing
+et alimente un histogramme glissant par vue, consultable par le staff sur
+/metrics/requests/. Les appels `requests` (APIs courtiers, Yahoo, CoinGecko...) sont
+comptés via un hook sur requests.Session.send.
+
+StageTimings découpe un traitement long (cycle d'automatisation) en étapes mesurées ;
+le code appelé y contribue avec `stage(nom, item)`, sans effet hors d'un tel traitement.
+"""
+
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Bornes (ms) de l'histogramme des latences
+LATENCY_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Métriques cumulées par étape (StageTimings)
+STAGE_METRICS = ['duration_ms', 'queries', 'db_ms', 'http_count', 'http_ms']
+
+_collectors = contextvars.ContextVar('instrumentation_collectors', default=())
+_stage_timings = contextvars.ContextVar('instrumentation_stage_timings', default=None)
+_hook_lock = threading.Lock()
+_original_send = None
+
+
+class Collector:
+    """Compteurs d'un bloc mesuré"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.http_count = 0
+        self.http_time = 0.0
+        self.http_hosts = defaultdict(lambda: {'count': 0, 'ms': 0.0})
+
+    def add_query(self, duration: float):
+        self.queries += 1
+        self.db_time += duration
+
+    def add_http(self, host: str, duration: float):
+        self.http_count += 1
+        self.http_time += duration
+        self.http_hosts[host]['count'] += 1
+        self.http_hosts[host]['ms'] += duration * 1000
+
+    def stop(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = self.duration if self.duration is not None else time.perf_counter() - self.started
+        return {
+            'duration_ms': round(duration * 1000, 2),
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'http_count': self.http_count,
+            'http_ms': round(self.http_time * 1000, 2),
+            'http_hosts': {host: {'count': v['count'], 'ms': round(v['ms'], 2)} for host, v in self.http_hosts.items()},
+        }
+
+    def server_timing(self) -> str:
+        """Valeur de l'en-tête Server-Timing (visible dans l'onglet Réseau du navigateur)"""
+        data = self.to_dict()
+        return ', '.join([
+            f'db;dur={data["db_ms"]};desc="{data["queries"]} SQL"',
+            f'http;dur={data["http_ms"]};desc="{data["http_count"]} HTTP"',
+            f'total;dur={data["duration_ms"]}',
+        ])
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        for collector in _collectors.get():
+            collector.add_query(duration)
+
+
+def _timed_send(session, request, **kwargs):
+    started = time.perf_counter()
+    try:
+        return _original_send(session, request, **kwargs)
+    finally:
+        active = _collectors.get()
+        if active:
+            duration = time.perf_counter() - started
+            host = urlparse(request.url).netloc
+            for collector in active:
+                collector.add_http(host, duration)
+
+
+def install_http_hook():
+    """Compte les appels HTTP sortants faits avec `requests` (idempotent)"""
+    global _original_send
+    with _hook_lock:
+        if _original_send is None:
+            _original_send = requests.Session.send
+            requests.Session.send = _timed_send
+
+
+@contextlib.contextmanager
+def collect():
+    """
+    Mesure le bloc : requêtes SQL (toutes les bases), temps DB, appels HTTP par hôte
+
+    Les mesures imbriquées sont cumulatives : une étape mesurée dans une requête
+    est comptée à la fois dans l'étape et dans la requête.
+    """
+    install_http_hook()
+    collector = Collector()
+    outermost = not _collectors.get()
+    token = _collectors.set(_collectors.get() + (collector,))
+    try:
+        with contextlib.ExitStack() as stack:
+            if outermost:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_db_wrapper))
+            yield collector
+    finally:
+        collector.stop()
+        _collectors.reset(token)
+
+
+class StageTimings:
+    """
+    Découpage d'un traitement long (cycle d'automatisation) en étapes mesurées
+
+    Chaque étape cumule durée, requêtes SQL, temps DB et appels HTTP *propres* : le
+    temps d'une étape imbriquée (ex: notification pendant une synchronisation) est
+    retiré de l'étape parente, la somme des étapes reste donc cohérente avec le total.
+    Une étape peut être détaillée par élément (actif, stratégie) via `item`.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._stack = []
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Rend ces mesures accessibles à stage() dans le code appelé"""
+        token = _stage_timings.set(self)
+        try:
+            yield self
+        finally:
+            _stage_timings.reset(token)
+
+    @contextlib.contextmanager
+    def stage(self, name: str, item: str = None):
+        children = dict.fromkeys(STAGE_METRICS, 0)
+        self._stack.append(children)
+        try:
+            with collect() as collector:
+                yield collector
+        finally:
+            self._stack.pop()
+            data = collector.to_dict()
+            if self._stack:
+                for metric in STAGE_METRICS:
+                    self._stack[-1][metric] += data[metric]
+            self._add(name, item, {metric: data[metric] - children[metric] for metric in STAGE_METRICS})
+
+    def _add(self, name: str, item, own: Dict[str, float]):
+        stage = self.stages.setdefault(name, dict(dict.fromkeys(STAGE_METRICS, 0), count=0))
+        stage['count'] += 1
+        for metric in STAGE_METRICS:
+            stage[metric] = round(stage[metric] + own[metric], 2)
+        if item is not None:
+            items = stage.setdefault('items', {})
+            items[str(item)] = round(items.get(str(item), 0) + own['duration_ms'], 2)
+
+    def dominant_stage(self) -> str:
+        if not self.stages:
+            return ''
+        return max(self.stages, key=lambda name: self.stages[name]['duration_ms'])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.stages
+
+
+@contextlib.contextmanager
+def stage(name: str, item: str = None):
+    """Étape des StageTimings actives (sans effet hors d'un traitement mesuré)"""
+    timings = _stage_timings.get()
+    if timings is None:
+        yield None
+        return
+    with timings.stage(name, item) as collector:
+        yield collector
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class MetricsRegistry:
+    """Histogramme glissant des mesures par vue (les `window` dernières requêtes)"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.totals = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, view: str, sample: Dict[str, Any]):
+        with self.lock:
+            self.samples[view].append(sample)
+            self.totals[view] += 1
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.totals.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Statistiques par vue, les plus lentes (p95) en premier"""
+        with self.lock:
+            samples = {view: list(values) for view, values in self.samples.items()}
+            totals = dict(self.totals)
+
+        views = []
+        for view, values in samples.items():
+            durations = [s['duration_ms'] for s in values]
+            queries = [s['queries'] for s in values]
+            hosts = defaultdict(lambda: {'count': 0, 'ms': 0.0})
+            for s in values:
+                for host, stats in s['http_hosts'].items():
+                    hosts[host]['count'] += stats['count']
+                    hosts[host]['ms'] += stats['ms']
+
+            histogram, lower = {}, float('-inf')
+            for bound in LATENCY_BUCKETS:
+                histogram[f"<={bound}ms"] = sum(1 for d in durations if lower < d <= bound)
+                lower = bound
+            histogram[f">{LATENCY_BUCKETS[-1]}ms"] = sum(1 for d in durations if d > lower)
+
+            count = len(values)
+            views.append({
+                'view': view,
+                'requests': totals.get(view, count),
+                'window': count,
+                'latency_ms': {
+                    'p50': round(_percentile(durations, 0.50), 2),
+                    'p95': round(_percentile(durations, 0.95), 2),
+                    'p99': round(_percentile(durations, 0.99), 2),
+                    'max': round(max(durations), 2),
+                },
+                'queries': {'avg': round(sum(queries) / count, 1), 'max': max(queries)},
+                'db_ms_avg': round(sum(s['db_ms'] for s in values) / count, 2),
+                'http_count_avg': round(sum(s['http_count'] for s in values) / count, 2),
+                'http_ms_avg': round(sum(s['http_ms'] for s in values) / count, 2),
+                'http_hosts': {host: {'count': v['count'], 'ms': round(v['ms'], 2)} for host, v in hosts.items()},
+                'histogram': histogram,
+            })
+        views.sort(key=lambda v: v['latency_ms']['p95'], reverse=True)
+        return views
+
+
+registry = MetricsRegistry(getattr(settings, 'REQUEST_METRICS_WINDOW', 500))
+
+
+class RequestMetricsMiddleware:
+    """Mesure chaque requête, ajoute Server-Timing et alimente le registre par vue"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_METRICS_ENABLED', True)
+        self.query_warning = getattr(settings, 'REQUEST_METRICS_QUERY_WARNING', 100)
+        if self.enabled:
+            install_http_hook()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        with collect() as collector:
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match and match.view_name else 'unresolved'
+        sample = collector.to_dict()
+        registry.record(view, sample)
+
+        if self.query_warning and sample['queries'] > self.query_warning:
+            logger.warning(f"⚠️ {view}: {sample['queries']} requêtes SQL ({request.path}) - N+1 probable")
+
+        response['Server-Timing'] = collector.server_timing()
+        return response
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from trading_app.pnl_engine import refresh_user_pnl
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Calcule le P&L FIFO (réalisé par fill et latent) et met à jour les statistiques des stratégies'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Nom d\'utilisateur spécifique (optionnel)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Ignorer les checkpoints et recalculer tout l\'historique'
+        )
+    
+    def handle(self, *args, **options):
+        if options['user']:
+            try:
+                users = [User.objects.get(username=options['user'])]
+            except User.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f"❌ Utilisateur {options['user']} non trouvé"))
+                return
+        else:
+            users = User.objects.filter(is_active=True, trade__isnull=False).distinct()
+        
+        for user in users:
+            try:
+                result = refresh_user_pnl(user, full=options['full'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {user.username}: {result['processed_fills']} fills traités, "
+                    f"réalisé {result['realized_pnl']:.2f}, latent {result['unrealized_pnl']:.2f}, "
+                    f"{result['strategies_updated']} stratégies mises à jour"
+                ))
+            except Exception as e:
+                logger.error(f"Erreur calcul P&L pour {user.username}: {e}")
+                self.stdout.write(self.style.ERROR(f"❌ {user.username}: {e}"))
@@ -0,0 +1,118 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+import json
+import logging
+import os
+import subprocess
+import sys
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TARGETS = [
+    'trading_app.urls',
+    'trading_app.views.portfolio',
+    'trading_app.views.strategies',
+    'trading_app.views.brokers',
+    'trading_app.views.market',
+    'trading_app.views.simulator',
+    'trading_app.market_data.bulk',
+]
+
+HEAVY_MODULES = ['numpy', 'pandas', 'yfinance']
+
+MARKER = '--import-report--'
+
+# Exécuté dans un processus neuf : Django initialisé, puis import de la cible seule
+CHILD_CODE = '''
+import importlib, json, os, resource, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+import django
+django.setup()
+before = set(sys.modules)
+sys.stderr.write({marker!r} + '\\n')
+sys.stderr.flush()
+started = time.perf_counter()
+importlib.import_module({target!r})
+duration = time.perf_counter() - started
+print(json.dumps({{
+    'import_ms': round(duration * 1000, 1),
+    'new_modules': len(set(sys.modules) - before),
+    'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    'heavy_loaded': [name for name in {heavy!r} if name in sys.modules],
+}}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Mesure le coût d\'import des vues et services (temps, mémoire, bibliothèques lourdes chargées)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*', default=DEFAULT_TARGETS, help='Modules à mesurer (défaut: urls, vues, market_data)')
+        parser.add_argument('--top', type=int, default=5, help='Modules les plus coûteux (temps propre) affichés par cible (défaut: 5)')
+        parser.add_argument('--heavy', nargs='*', default=HEAVY_MODULES, help='Bibliothèques lourdes mesurées pour comparaison')
+        parser.add_argument('--json', action='store_true', help='Sortie JSON')
+
+    def handle(self, *args, **options):
+        heavy = options['heavy']
+        report = {
+            'targets': {target: self._measure(target, heavy, options['top']) for target in options['targets']},
+            # Coût évité tant que ces bibliothèques ne sont pas importées à la demande
+            'heavy': {name: self._measure(name, heavy, options['top']) for name in heavy},
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write("📦 Coût d'import (processus neuf, Django initialisé)")
+        for section in ('targets', 'heavy'):
+            if section == 'heavy' and report['heavy']:
+                self.stdout.write("\n📚 Bibliothèques lourdes (chargées à la demande)")
+            for name, result in report[section].items():
+                if 'error' in result:
+                    self.stdout.write(self.style.ERROR(f"❌ {name}: {result['error']}"))
+                    continue
+                loaded = ', '.join(result['heavy_loaded']) or 'aucune'
+                line = (f"{name}: {result['import_ms']:.1f} ms, {result['new_modules']} modules, "
+                        f"RSS max {result['max_rss_mb']:.1f} Mo")
+                if section == 'targets':
+                    line += f", lourdes chargées: {loaded}"
+                style = self.style.WARNING if section == 'targets' and result['heavy_loaded'] else self.style.SUCCESS
+                self.stdout.write(style(f"   {line}"))
+                for module, cumulative_ms in result['slowest']:
+                    self.stdout.write(f"      {cumulative_ms:8.1f} ms  {module}")
+
+    def _measure(self, target, heavy, top):
+        """Importe `target` dans un sous-processus avec -X importtime"""
+        code = CHILD_CODE.format(
+            settings_module=os.environ.get('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE),
+            marker=MARKER,
+            target=target,
+            heavy=heavy,
+        )
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        )
+        if process.returncode != 0:
+            error = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else 'échec'
+            logger.error(f"❌ Import de {target} en échec: {error}")
+            return {'error': error}
+
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        result['slowest'] = self._slowest(process.stderr, top)
+        return result
+
+    @staticmethod
+    def _slowest(stderr, top):
+        """Modules les plus coûteux (temps propre, hors sous-imports) importés après le marqueur"""
+        modules = []
+        for line in stderr.split(MARKER, 1)[-1].splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            own, _, name = line[len('import time:'):].split('|')
+            modules.append((name.strip(), int(own) / 1000))
+        modules.sort(key=lambda item: item[1], reverse=True)
+        return modules[:top]
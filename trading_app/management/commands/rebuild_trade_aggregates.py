@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from trading_app.trade_aggregates import rebuild_aggregates
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recalcule les agrégats de trades (TradeAggregate) depuis la table Trade'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Nom d\'utilisateur spécifique (optionnel)'
+        )
+    
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+                self.stdout.write(f"👤 Reconstruction pour l'utilisateur: {options['user']}")
+            except User.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f"❌ Utilisateur {options['user']} non trouvé"))
+                return
+        else:
+            self.stdout.write("🔄 Reconstruction des agrégats pour tous les utilisateurs...")
+        
+        try:
+            created = rebuild_aggregates(user=user)
+            self.stdout.write(self.style.SUCCESS(f"✅ {created} agrégats de trades reconstruits"))
+        except Exception as e:
+            logger.error(f"Erreur reconstruction agrégats: {e}")
+            self.stdout.write(self.style.ERROR(f"❌ Erreur lors de la reconstruction: {e}"))
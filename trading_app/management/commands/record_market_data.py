@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from trading_app.market_data.coingecko import CoinGeckoProvider
+from trading_app.market_data.local import LocalDataStore
+from trading_app.market_data.yahoo import YahooProvider
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Enregistre des historiques réels sur disque pour le fournisseur local (MARKET_DATA_BACKEND=local)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'symbols',
+            nargs='+',
+            help='Symboles à enregistrer (ex: AAPL MSFT BTC)'
+        )
+        parser.add_argument(
+            '--provider',
+            choices=['yahoo', 'coingecko'],
+            default='yahoo',
+            help='Fournisseur réel à interroger (défaut: yahoo)'
+        )
+        parser.add_argument(
+            '--years',
+            type=int,
+            default=5,
+            help='Profondeur d\'historique en années (défaut: 5)'
+        )
+        parser.add_argument(
+            '--root',
+            type=str,
+            help='Répertoire de destination (défaut: MARKET_DATA_LOCAL_ROOT)'
+        )
+
+    def handle(self, *args, **options):
+        # Toujours interroger le fournisseur réel, quel que soit MARKET_DATA_BACKEND
+        provider = YahooProvider() if options['provider'] == 'yahoo' else CoinGeckoProvider()
+        store = LocalDataStore(root=options['root'])
+
+        for symbol in options['symbols']:
+            try:
+                history = provider.fetch_history(symbol, options['years'])
+                if not history or not history.get('bars'):
+                    self.stdout.write(self.style.ERROR(f"❌ {symbol}: aucune donnée"))
+                    continue
+                path = store.save('ohlcv', symbol.upper(), history['bars'])
+                self.stdout.write(self.style.SUCCESS(f"✅ {symbol}: {len(history['bars'])} bougies -> {path}"))
+            except Exception as e:
+                logger.error(f"Erreur enregistrement {symbol}: {e}")
+                self.stdout.write(self.style.ERROR(f"❌ {symbol}: {e}"))
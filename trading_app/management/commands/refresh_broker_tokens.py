@@ -1,7 +1,13 @@
-from django.core.management.base import BaseCommand
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.conf import settings
 from trading_app.models import BrokerCredentials
 from trading_app.services import BrokerService
+from trading_app import token_lifecycle
+from trading_app.token_lifecycle import TokenRefreshQueue
+from trading_app.shared_cache import require_shared
+from datetime import datetime
 from trading_app.telegram_notifications import TelegramNotifier
 import logging
 
@@ -29,60 +35,79 @@ class Command(BaseCommand):
             action='store_true',
             help='Forcer le refresh même si le token n\'est pas expiré'
         )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Service permanent : rafraîchit chaque token Saxo TOKEN_REFRESH_MARGIN avant son expiration'
+        )
+        parser.add_argument(
+            '--max-sleep',
+            type=float,
+            default=60,
+            help='Attente maximale entre deux vérifications en mode --loop (secondes, défaut: 60)'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write("🔄 Démarrage du refresh automatique des tokens...")
         
-        # Récupérer les utilisateurs
+        # Récupérer les credentials (utilisateurs actifs ou utilisateur spécifique)
+        credentials = BrokerCredentials.objects.select_related('user')
         if options['user']:
             try:
-                users = [User.objects.get(username=options['user'])]
+                user = User.objects.get(username=options['user'])
                 self.stdout.write(f"👤 Utilisateur spécifique: {options['user']}")
             except User.DoesNotExist:
                 self.stdout.write(self.style.ERROR(f"❌ Utilisateur {options['user']} non trouvé"))
                 return
+            credentials = credentials.filter(user=user)
         else:
-            users = User.objects.filter(is_active=True)
-            self.stdout.write(f"👥 {users.count()} utilisateurs actifs trouvés")
+            credentials = credentials.filter(user__is_active=True)
 
         # Filtrer par type de broker
         broker_type = options['broker']
+
+        if broker_type in ('saxo', 'all'):
+            # Verrous et tokens publiés doivent être visibles des workers et des autres crons
+            try:
+                require_shared('TOKEN_CACHE_ALIAS')
+            except ImproperlyConfigured as e:
+                raise CommandError(f"❌ {e}")
+        
+        if options['loop']:
+            if broker_type == 'binance':
+                self.stdout.write(self.style.ERROR("❌ --loop ne concerne que les tokens Saxo"))
+                return
+            self.stdout.write(f"♾️ Service de refresh Saxo (marge {settings.TOKEN_REFRESH_MARGIN}s avant expiration)")
+            TokenRefreshQueue(credentials).run_forever(max_sleep=options['max_sleep'])
+            return
         
         total_refreshed = 0
         total_errors = 0
         
-        for user in users:
-            self.stdout.write(f"\n🔍 Traitement de l'utilisateur: {user.username}")
-            
-            # Récupérer les credentials du broker
-            if broker_type == 'all':
-                credentials = BrokerCredentials.objects.filter(
-                    user=user,
-                    broker_type__in=['saxo', 'binance']
-                )
-            else:
-                credentials = BrokerCredentials.objects.filter(
-                    user=user,
-                    broker_type=broker_type
-                )
-            
-            if not credentials.exists():
-                self.stdout.write(f"⚠️ Aucun credential {broker_type} trouvé pour {user.username}")
-                continue
-            
-            for cred in credentials:
+        if broker_type in ('saxo', 'all'):
+            # File ordonnée par expiration : seuls les tokens arrivés à échéance sont rafraîchis
+            queue = TokenRefreshQueue(credentials)
+            scheduled = queue.load()
+            self.stdout.write(f"\n🔑 {scheduled} credentials Saxo rafraîchissables")
+            counts = queue.run_due(force=options['force'])
+            total_refreshed += counts[token_lifecycle.REFRESHED]
+            total_errors += counts[token_lifecycle.FAILED]
+            self.stdout.write(
+                f"  🔄 Rafraîchis: {counts[token_lifecycle.REFRESHED]}, "
+                f"déjà à jour: {counts[token_lifecycle.FRESH]}, "
+                f"en cours ailleurs: {counts[token_lifecycle.IN_FLIGHT]}, "
+                f"échecs: {counts[token_lifecycle.FAILED]}"
+            )
+            next_due = queue.next_due()
+            if next_due:
+                self.stdout.write(f"  ⏰ Prochain refresh: {datetime.fromtimestamp(next_due):%Y-%m-%d %H:%M:%S}")
+        
+        if broker_type in ('binance', 'all'):
+            for cred in credentials.filter(broker_type='binance'):
+                user = cred.user
                 try:
-                    self.stdout.write(f"  🔑 Broker: {cred.broker_type}")
-                    
-                    if cred.broker_type == 'saxo':
-                        success = self._refresh_saxo_tokens(user, cred, options['force'])
-                    elif cred.broker_type == 'binance':
-                        success = self._refresh_binance_tokens(user, cred, options['force'])
-                    else:
-                        self.stdout.write(f"    ⚠️ Type de broker non supporté: {cred.broker_type}")
-                        continue
-                    
-                    if success:
+                    self.stdout.write(f"\n🔍 Binance - {user.username}")
+                    if self._refresh_binance_tokens(user, cred, options['force']):
                         total_refreshed += 1
                         self.stdout.write(self.style.SUCCESS(f"    ✅ Refresh réussi"))
                     else:
@@ -110,30 +135,6 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(f"⚠️ Erreur notification Telegram: {e}")
 
-    def _refresh_saxo_tokens(self, user, cred, force=False):
-        """Rafraîchir les tokens Saxo"""
-        try:
-            broker_service = BrokerService(user)
-            
-            # Vérifier si le refresh est nécessaire
-            if not force and not broker_service._should_refresh_saxo_tokens(cred):
-                self.stdout.write(f"    ℹ️ Refresh non nécessaire pour {user.username}")
-                return True
-            
-            # Tenter le refresh
-            success = broker_service.refresh_saxo_tokens(cred)
-            
-            if success:
-                self.stdout.write(f"    🔄 Tokens Saxo rafraîchis pour {user.username}")
-            else:
-                self.stdout.write(f"    ❌ Échec refresh tokens Saxo pour {user.username}")
-            
-            return success
-            
-        except Exception as e:
-            self.stdout.write(f"    ❌ Erreur refresh Saxo: {e}")
-            return False
-
     def _refresh_binance_tokens(self, user, cred, force=False):
         """Rafraîchir les tokens Binance (si applicable)"""
         try:
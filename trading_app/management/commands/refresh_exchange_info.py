@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from trading_app.models import BrokerCredentials
+from trading_app.brokers.registry import broker_registry
+from trading_app.brokers.binance_exchange import exchange_index
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Revalide l\'index exchangeInfo Binance (filtres d\'ordre) : requête conditionnelle, 304 si inchangé'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--broker-id', type=int, action='append', help='BrokerCredentials Binance à utiliser (répétable, défaut: tous les actifs)')
+
+    def handle(self, *args, **options):
+        credentials = BrokerCredentials.objects.filter(broker_type='binance', is_active=True)
+        if options['broker_id']:
+            credentials = credentials.filter(pk__in=options['broker_id'])
+
+        # Un index par URL d'API (production / testnet) : inutile de revalider deux fois
+        refreshed = set()
+        for cred in credentials:
+            broker = broker_registry.get(cred)
+            if broker.base_url in refreshed:
+                continue
+            refreshed.add(broker.base_url)
+
+            index = exchange_index(broker, refresh=True)
+            if index is None:
+                self.stdout.write(self.style.ERROR(f"❌ {broker.base_url}: exchangeInfo indisponible"))
+                logger.error(f"exchangeInfo indisponible pour {broker.base_url}")
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {broker.base_url}: {len(index)} paires, {len(index.spot_symbols())} négociables en SPOT"
+            ))
+
+        if not refreshed:
+            self.stdout.write(self.style.WARNING("⚠️ Aucun credential Binance actif"))
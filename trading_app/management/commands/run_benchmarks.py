@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from trading_app.benchmarks import SCENARIOS, run_benchmarks
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Mesure les chemins critiques (signaux, catalogue, synchronisation, vues, rafraîchissement groupé) et exporte les résultats en JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=SCENARIOS,
+            default=SCENARIOS,
+            help='Scénarios à exécuter (défaut: tous)'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Nombre de mesures par cas (défaut: 5)')
+        parser.add_argument('--lengths', type=int, nargs='+', default=[100, 1000, 10000], help='Longueurs d\'historique pour les signaux')
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='Tailles de catalogue AllAssets')
+        parser.add_argument('--positions', type=int, default=1000, help='Positions servies par le faux courtier (défaut: 1000)')
+        parser.add_argument('--trades', type=int, default=100000, help='Trades servis par le faux courtier (défaut: 100000)')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Latence simulée du faux courtier en ms (défaut: 0)')
+        parser.add_argument('--users', type=int, default=5, help='Utilisateurs créés pour les vues (défaut: 5)')
+        parser.add_argument('--assets', type=int, default=200, help='Assets par utilisateur pour les vues (défaut: 200)')
+        parser.add_argument('--bulk-sizes', type=int, nargs='+', default=[100, 500], help='Nombre d\'Assets du rafraîchissement groupé à froid')
+        parser.add_argument('--output', type=str, help='Fichier JSON de sortie (défaut: sortie standard)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"⏱️ Benchmarks: {', '.join(options['only'])}")
+
+        report = run_benchmarks(
+            options['only'],
+            repeat=options['repeat'],
+            lengths=options['lengths'],
+            sizes=options['sizes'],
+            positions=options['positions'],
+            trades=options['trades'],
+            latency_ms=options['latency_ms'],
+            users=options['users'],
+            assets=options['assets'],
+            bulk_sizes=options['bulk_sizes'],
+        )
+
+        for scenario, cases in report['results'].items():
+            if 'error' in cases:
+                self.stdout.write(self.style.ERROR(f"❌ {scenario}: {cases['error']}"))
+                continue
+            self.stdout.write(f"📊 {scenario}")
+            for case, result in cases.items():
+                if isinstance(result, dict) and 'median_ms' in result:
+                    self.stdout.write(f"   {case}: {result['median_ms']:.2f} ms ({result['queries']} requêtes)")
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output)
+            self.stdout.write(self.style.SUCCESS(f"✅ Résultats enregistrés dans {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from trading_app.brokers.fake_server import FakeBrokerDataset, FakeBrokerServer
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Lance un serveur local émulant les APIs Binance et Saxo (tests de charge)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1', help='Adresse d\'écoute (défaut: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=8765, help='Port d\'écoute (défaut: 8765)')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Latence ajoutée à chaque réponse en ms (défaut: 0)')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Gigue aléatoire ajoutée à la latence en ms (défaut: 0)')
+        parser.add_argument('--rate-limit', type=int, default=0, help='Requêtes par minute avant réponse 429 (défaut: 0 = illimité)')
+        parser.add_argument('--symbols', type=int, default=200, help='Nombre d\'instruments Binance/Saxo (défaut: 200)')
+        parser.add_argument('--positions', type=int, default=10000, help='Nombre de positions Saxo ouvertes (défaut: 10000)')
+        parser.add_argument('--trades', type=int, default=1000000, help='Nombre de trades historiques (défaut: 1000000)')
+        parser.add_argument('--seed', type=int, default=42, help='Graine du jeu de données (défaut: 42)')
+        parser.add_argument('--stream-interval', type=float, default=0.5, help='Intervalle des cotations streaming Saxo en secondes (défaut: 0.5)')
+
+    def handle(self, *args, **options):
+        dataset = FakeBrokerDataset(
+            symbols=options['symbols'],
+            positions=options['positions'],
+            trades=options['trades'],
+            seed=options['seed'],
+        )
+        server = FakeBrokerServer(
+            (options['host'], options['port']),
+            dataset,
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            rate_limit=options['rate_limit'],
+            stream_interval=options['stream_interval'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"🚀 Faux courtier démarré sur {server.base_url}"))
+        self.stdout.write(f"📊 {len(dataset.binance_symbols)} symboles, {dataset.positions} positions, {dataset.trades} trades")
+        self.stdout.write(f"⏱️ Latence {options['latency_ms']}ms (+{options['jitter_ms']}ms), limite {options['rate_limit'] or '∞'} req/min")
+        self.stdout.write(f"💡 BINANCE_BASE_URL={server.base_url} SAXO_BASE_URL={server.base_url}")
+        self.stdout.write(f"📡 Streaming Saxo sur {server.base_url.replace('http://', 'ws://')}/streamingws/connect")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("🛑 Arrêt du faux courtier")
+        finally:
+            server.server_close()
+            logger.info(f"Faux courtier arrêté, requêtes servies: {dict(server.stats)}")
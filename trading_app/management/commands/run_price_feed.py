@@ -0,0 +1,91 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from trading_app.models import BrokerCredentials
+from trading_app.brokers.registry import broker_registry
+from trading_app.brokers.saxo_streaming import SaxoPriceStream
+from trading_app.brokers.binance_streaming import BinanceMarketStream, BinanceUserStream
+from trading_app.price_feed import watched_saxo_instruments, watched_binance_symbols
+from trading_app.shared_cache import require_shared
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Flux temps réel : streaming Saxo, flux marché et utilisateur Binance (positions ouvertes, stratégies actives)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--broker-id', type=int, action='append', help='BrokerCredentials à suivre (répétable, défaut: tous les actifs)')
+        parser.add_argument('--broker', type=str, choices=['saxo', 'binance', 'all'], default='all', help='Type de broker à suivre (défaut: all)')
+        parser.add_argument('--refresh-rate', type=int, default=None, help='Cadence des cotations Saxo en ms (défaut: PRICE_FEED_REFRESH_RATE_MS)')
+        parser.add_argument('--no-user-stream', action='store_true', help='Binance : flux marché uniquement (pas de listenKey)')
+        parser.add_argument('--resync-interval', type=float, default=60, help='Recalcul des instruments suivis en secondes (défaut: 60)')
+        parser.add_argument('--duration', type=float, default=0, help='Arrêt automatique après N secondes (défaut: 0 = permanent)')
+
+    def handle(self, *args, **options):
+        # Les cotations doivent être visibles des workers web et de run_strategies
+        try:
+            require_shared('PRICE_FEED_CACHE_ALIAS')
+        except ImproperlyConfigured as e:
+            raise CommandError(f"❌ {e}")
+
+        broker_types = ['saxo', 'binance'] if options['broker'] == 'all' else [options['broker']]
+        credentials = BrokerCredentials.objects.filter(broker_type__in=broker_types, is_active=True).select_related('user')
+        if options['broker_id']:
+            credentials = credentials.filter(pk__in=options['broker_id'])
+
+        # (credential, flux, fonction des instruments suivis ou None)
+        feeds = []
+        for cred in credentials:
+            broker = broker_registry.get(cred)
+            if cred.broker_type == 'saxo':
+                stream = SaxoPriceStream(broker, refresh_rate_ms=options['refresh_rate'])
+                feeds.append((cred, stream, watched_saxo_instruments))
+            else:
+                feeds.append((cred, BinanceMarketStream(broker), watched_binance_symbols))
+                if not options['no_user_stream']:
+                    feeds.append((cred, BinanceUserStream(broker, cred), None))
+
+        if not feeds:
+            self.stdout.write(self.style.WARNING("⚠️ Aucun credential actif à suivre"))
+            return
+
+        for cred, stream, watched in feeds:
+            if watched:
+                instruments = watched(user=cred.user)
+                stream.watch(instruments)
+                self.stdout.write(f"📡 {cred.name} ({cred.user.username}): {len(instruments)} instruments {cred.broker_type} suivis")
+            else:
+                self.stdout.write(f"📬 {cred.name} ({cred.user.username}): flux utilisateur Binance (ordres, balances)")
+            stream.start()
+
+        started = time.monotonic()
+        last_resync = started
+        try:
+            while not options['duration'] or time.monotonic() - started < options['duration']:
+                time.sleep(1)
+                # Keepalive du listenKey et réconciliation REST (due ou après reconnexion)
+                for cred, stream, watched in feeds:
+                    if isinstance(stream, BinanceUserStream):
+                        reconciled = stream.maintain()
+                        if reconciled:
+                            self.stdout.write(f"🔄 {cred.name}: réconciliation REST {reconciled}")
+
+                if time.monotonic() - last_resync < options['resync_interval']:
+                    continue
+                last_resync = time.monotonic()
+                for cred, stream, watched in feeds:
+                    if watched:
+                        # Nouvelles positions / stratégies activées depuis le dernier passage
+                        stream.watch(watched(user=cred.user))
+                    status = stream.status()
+                    self.stdout.write(
+                        f"📊 {cred.name} [{stream.__class__.__name__}]: {status.get('messages', 0)} messages, "
+                        f"{status.get('reconnects', 0)} reconnexions, dernier message {status.get('last_message_at') or '-'}"
+                    )
+        except KeyboardInterrupt:
+            self.stdout.write("🛑 Arrêt des flux temps réel")
+        finally:
+            for cred, stream, watched in feeds:
+                stream.stop()
+                logger.info(f"Flux {cred.name} [{stream.__class__.__name__}] arrêté: {stream.status()}")
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from trading_app.models import Strategy
+from trading_app.order_execution import order_executor
+from trading_app.strategy_runner import StrategyRunner
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Exécute les stratégies actives hors requête HTTP (planification cron, lots parallèles)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Nom d\'utilisateur spécifique (défaut: tous)')
+        parser.add_argument('--strategy-id', type=int, action='append', help='Stratégie à exécuter (répétable, défaut: toutes les actives)')
+        parser.add_argument('--workers', type=int, default=None, help='Stratégies exécutées en parallèle (défaut: STRATEGY_RUNNER_WORKERS)')
+        parser.add_argument('--no-refresh', action='store_true', help='Historique en base, sans rafraîchissement CoinGecko / Yahoo')
+        parser.add_argument('--wait-orders', type=float, default=60, help='Attente maximale de l\'envoi des ordres soumis en secondes (défaut: 60)')
+
+    def handle(self, *args, **options):
+        strategies = Strategy.objects.filter(status='active').select_related('asset', 'broker', 'user')
+        if options['user']:
+            strategies = strategies.filter(user__username=options['user'])
+        if options['strategy_id']:
+            strategies = strategies.filter(pk__in=options['strategy_id'])
+        strategies = list(strategies)
+
+        if not strategies:
+            self.stdout.write(self.style.WARNING("⚠️ Aucune stratégie active à exécuter"))
+            return
+
+        runner = StrategyRunner(refresh_prices=not options['no_refresh'])
+        started = time.monotonic()
+        results = runner.run_many(strategies, workers=options['workers'])
+        self.stdout.write(f"⏱️ {len(results)} stratégies évaluées en {time.monotonic() - started:.2f}s")
+
+        pending = []
+        for result in results:
+            if not result['success']:
+                self.stdout.write(self.style.ERROR(f"❌ {result['strategy']}: {result['error']}"))
+                continue
+            order = result.get('order')
+            self.stdout.write(f"📊 {result['strategy']}: {result['signal']} ({result['strength']:.2f}) à {result['current_price']}"
+                              + (f" - ordre {order['status']} {order['client_order_id']}" if order else ''))
+            if order and order['status'] == 'PENDING':
+                pending.append(order['client_order_id'])
+
+        # Le pool d'envoi tourne dans ce processus : attendre les ordres avant de quitter
+        deadline = time.monotonic() + options['wait_orders']
+        for coid in pending:
+            try:
+                order = order_executor.wait(coid, timeout=max(0.0, deadline - time.monotonic()))
+                self.stdout.write(self.style.SUCCESS(f"📨 {coid}: {order['status']} {order.get('order_id') or order.get('error') or ''}"))
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"⚠️ {coid}: envoi non terminé ({e})"))
+                logger.warning(f"Ordre {coid} non terminé à la sortie de run_strategies: {e}")
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from trading_app.asset_search import rebuild_search_index
+from trading_app.synthetic_data import DEFAULT_BATCH_SIZE, SyntheticDataset
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Génère un jeu de données synthétique à l\'échelle de la production (tests de charge)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Nombre d\'utilisateurs (défaut: 10)')
+        parser.add_argument('--binance-pairs', type=int, default=2000, help='Paires du catalogue Binance (défaut: 2000)')
+        parser.add_argument('--saxo-instruments', type=int, default=5000, help='Instruments du catalogue Saxo (défaut: 5000)')
+        parser.add_argument('--tradables', type=int, default=1000, help='AssetTradable créés (défaut: 1000)')
+        parser.add_argument('--candle-assets', type=int, default=100, help='Assets avec historique de bougies (défaut: 100)')
+        parser.add_argument('--years', type=int, default=5, help='Années de bougies et de trades (défaut: 5)')
+        parser.add_argument('--positions', type=int, default=10000, help='Positions ouvertes (défaut: 10000)')
+        parser.add_argument('--pending-orders', type=int, default=2000, help='Ordres en attente (défaut: 2000)')
+        parser.add_argument('--trades', type=int, default=1000000, help='Trades historiques (défaut: 1000000)')
+        parser.add_argument('--strategies', type=int, default=10, help='Stratégies par utilisateur (défaut: 10)')
+        parser.add_argument('--executions', type=int, default=100, help='Exécutions par stratégie (défaut: 100)')
+        parser.add_argument('--seed', type=int, default=42, help='Graine aléatoire (défaut: 42)')
+        parser.add_argument('--prefix', type=str, default='synth', help='Préfixe des utilisateurs générés (défaut: synth)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help=f'Taille des lots bulk_create (défaut: {DEFAULT_BATCH_SIZE})')
+        parser.add_argument('--reset', action='store_true', help='Supprimer d\'abord les utilisateurs générés avec ce préfixe')
+        parser.add_argument('--skip-derived', action='store_true', help='Ne pas recalculer agrégats de trades et index de recherche')
+
+    def handle(self, *args, **options):
+        dataset = SyntheticDataset(
+            seed=options['seed'],
+            prefix=options['prefix'],
+            batch_size=options['batch_size'],
+            progress=self.stdout.write,
+        )
+
+        if options['reset']:
+            deleted = dataset.reset()
+            self.stdout.write(f"🗑️ {deleted} objets supprimés (préfixe {options['prefix']})")
+
+        self.stdout.write(f"🌱 Génération du jeu de données (graine {options['seed']})...")
+        try:
+            result = dataset.generate(
+                users=options['users'],
+                binance_pairs=options['binance_pairs'],
+                saxo_instruments=options['saxo_instruments'],
+                tradables=options['tradables'],
+                candle_assets=options['candle_assets'],
+                years=options['years'],
+                positions=options['positions'],
+                pending_orders=options['pending_orders'],
+                trades=options['trades'],
+                strategies=options['strategies'],
+                executions=options['executions'],
+                derived=not options['skip_derived'],
+            )
+            if not options['skip_derived']:
+                rebuild_search_index()
+        except Exception as e:
+            logger.error(f"Erreur génération du jeu de données: {e}")
+            self.stdout.write(self.style.ERROR(f"❌ Erreur lors de la génération: {e}"))
+            return
+
+        summary = ', '.join(f"{count} {name}" for name, count in result['counts'].items())
+        self.stdout.write(self.style.SUCCESS(f"✅ Jeu de données généré en {result['duration']:.1f}s: {summary}"))
+        self.stdout.write(f"👤 Connexion: {options['prefix']}_user_00000 / mot de passe {options['prefix']}")
@@ -0,0 +1 @@
+# Package pour les fournisseurs de données de marché (Yahoo Finance, CoinGecko)
@@ -0,0 +1,94 @@
+"""
+Classe de base abstraite pour les fournisseurs de données de marché
+Un seul appel d'historique fournit à la fois les bougies et le prix courant ;
+les métadonnées (nom, secteur...) sont mises en cache beaucoup plus longtemps.
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from . import cache
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataProvider(ABC):
+    """Classe de base abstraite pour les fournisseurs de données de marché"""
+
+    name = ''
+
+    @abstractmethod
+    def fetch_history(self, symbol: str, years: int = 5) -> Optional[Dict[str, Any]]:
+        """
+        Récupérer l'historique d'un symbole en un seul appel
+
+        Returns:
+            {'provider_symbol': str, 'bars': [{date, open, high, low, close, volume}, ...], 'extra': dict}
+            ou None si le symbole est inconnu du fournisseur
+        """
+        pass
+
+    @abstractmethod
+    def fetch_metadata(self, symbol: str, provider_symbol: str) -> Dict[str, Any]:
+        """Récupérer les métadonnées (name, sector, industry, market_cap, type, market)"""
+        pass
+
+    def history_key(self, symbol: str, years: int) -> str:
+        return f"{self.name}:history:{symbol}:{years}"
+
+    def get_history(self, symbol: str, years: int = 5) -> Optional[Dict[str, Any]]:
+        """Historique en cache (TTL des cotations), un seul appel concurrent par symbole"""
+        return cache.cached_fetch(
+            self.name, self.history_key(symbol, years), cache.quote_ttl(),
+            lambda: self.fetch_history(symbol, years),
+        )
+
+    def get_metadata(self, symbol: str, provider_symbol: str) -> Dict[str, Any]:
+        """Métadonnées en cache (TTL long) ; {} si le fournisseur ne répond pas"""
+        try:
+            return cache.cached_fetch(
+                self.name, f"{self.name}:metadata:{symbol}", cache.metadata_ttl(),
+                lambda: self.fetch_metadata(symbol, provider_symbol),
+            ) or {}
+        except Exception as e:
+            logger.warning(f"⚠️ Métadonnées {self.name} indisponibles pour {symbol}: {e}")
+            return {}
+
+    def get_snapshot(self, symbol: str, years: int = 5) -> Optional[Dict[str, Any]]:
+        """
+        Historique + prix courant + métadonnées d'un symbole
+
+        Returns:
+            dict au format de get_yahoo_data/get_crypto_data (price_history en liste)
+        """
+        symbol = (symbol or '').strip()
+        if not symbol:
+            return None
+
+        history = self.get_history(symbol, years)
+        if not history or not history.get('bars'):
+            return None
+
+        bars: List[Dict[str, Any]] = history['bars']
+        snapshot = {
+            'symbol': symbol,
+            'name': symbol,
+            'sector': 'Unknown',
+            'industry': 'Unknown',
+            'market_cap': 0.0,
+        }
+        snapshot.update(self.get_metadata(symbol, history['provider_symbol']))
+        snapshot.update(history.get('extra') or {})
+        snapshot['symbol'] = symbol
+        snapshot['provider_symbol'] = history['provider_symbol']
+        snapshot['price_history'] = bars
+        snapshot['current_price'] = bars[-1]['close']
+        return snapshot
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        """Prix courant (dernière clôture de l'historique en cache)"""
+        history = self.get_history(symbol)
+        if not history or not history.get('bars'):
+            return None
+        return history['bars'][-1]['close']
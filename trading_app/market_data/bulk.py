@@ -0,0 +1,292 @@
+"""
+Rafraîchissement groupé des historiques Yahoo Finance
+
+Les Assets sont regroupés par (période, intervalle) puis téléchargés par lots de
+tickers avec yf.download (une requête par lot au lieu de plusieurs par symbole).
+Les symboles jamais résolus qui n'ont rien renvoyé sont retentés avec leurs variantes
+(BTCEUR -> BTC, BTC-USD) dans un second téléchargement groupé. Les historiques sont
+écrits avec un bulk_update et les échecs sont rapportés symbole par symbole sans
+interrompre le lot.
+
+Les métadonnées (nom, secteur, industrie, capitalisation) coûtent un Ticker.info par
+symbole : elles ne font pas partie du rafraîchissement groupé. refresh_metadata les
+complète dans une passe séparée, limitée aux Assets non renseignés et espacée de
+MARKET_DATA_METADATA_INTERVAL secondes.
+"""
+
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from django.conf import settings
+
+from .. import chart_data
+from ..models import Asset
+from . import cache, resolver
+from .factory import MarketDataFactory
+from .local import LocalProvider
+from .yahoo import YahooProvider, clean_yahoo_symbol, frame_to_bars, history_params, symbol_candidates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100
+
+METADATA_FIELDS = ('name', 'sector', 'industry', 'market_cap')
+
+
+def _ticker_frames(frame, tickers):
+    """Découpe le DataFrame multi-tickers de yf.download en un DataFrame par ticker"""
+    import pandas as pd
+
+    if frame is None or frame.empty:
+        return {}
+    if not isinstance(frame.columns, pd.MultiIndex):
+        # Un seul ticker : colonnes OHLCV à plat
+        return {tickers[0]: frame}
+    available = set(frame.columns.get_level_values(0))
+    return {ticker: frame[ticker] for ticker in tickers if ticker in available}
+
+
+def download_histories(tickers, period: str, interval: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       store=None) -> Dict[str, Any]:
+    """
+    Télécharge l'historique de plusieurs tickers par lots
+
+    Args:
+        store: LocalDataStore à utiliser à la place de Yahoo (backend local)
+
+    Returns:
+        {'bars': {ticker: [bougies]}, 'failed': {ticker: raison}}
+    """
+    bars, failed = {}, {}
+    tickers = list(dict.fromkeys(tickers))
+
+    if store is not None:
+        for ticker in tickers:
+            ticker_bars = store.ohlcv(ticker, period=period, interval=interval)
+            if ticker_bars:
+                bars[ticker] = ticker_bars
+            else:
+                failed[ticker] = 'Aucune donnée'
+        return {'bars': bars, 'failed': failed}
+
+    import yfinance as yf
+
+    for start in range(0, len(tickers), chunk_size):
+        chunk = tickers[start:start + chunk_size]
+        cache.call_counts[YahooProvider.name] += 1
+        try:
+            frame = yf.download(
+                chunk, period=period, interval=interval, group_by='ticker',
+                auto_adjust=True, threads=True, progress=False,
+            )
+        except Exception as e:
+            logger.warning(f"❌ Échec du téléchargement Yahoo ({len(chunk)} tickers): {e}")
+            failed.update({ticker: str(e) for ticker in chunk})
+            continue
+
+        frames = _ticker_frames(frame, chunk)
+        for ticker in chunk:
+            try:
+                ticker_bars = frame_to_bars(frames.get(ticker))
+            except Exception as e:
+                failed[ticker] = str(e)
+                continue
+            if ticker_bars:
+                bars[ticker] = ticker_bars
+            else:
+                failed[ticker] = 'Aucune donnée'
+
+    return {'bars': bars, 'failed': failed}
+
+
+def _retry_variants(by_ticker, failed, symbols, resolutions, period, interval, chunk_size, store):
+    """
+    Second téléchargement groupé avec les variantes des symboles jamais résolus
+
+    Returns:
+        ({ticker de repli: [Assets]}, {ticker de repli: bougies}) pour les variantes
+        qui ont renvoyé des bougies
+    """
+    pending = {}
+    for ticker, reason in failed.items():
+        if reason != 'Aucune donnée':
+            # Erreur réseau : pas de variantes, le lot suivant réessaiera le même ticker
+            continue
+        for asset in by_ticker[ticker]:
+            symbol = symbols[asset.pk]
+            if symbol in resolutions:
+                continue
+            variants = [candidate for candidate in symbol_candidates(symbol) if candidate != ticker]
+            if variants:
+                pending.setdefault(symbol, {'variants': variants, 'assets': []})['assets'].append(asset)
+    if not pending:
+        return {}, {}
+
+    tickers = [variant for entry in pending.values() for variant in entry['variants']]
+    logger.info(f"🔄 Variantes Yahoo pour {len(pending)} symboles non résolus ({len(tickers)} tickers)")
+    result = download_histories(tickers, period, interval, chunk_size=chunk_size, store=store)
+
+    recovered, bars = {}, {}
+    for symbol, entry in pending.items():
+        ticker = next((variant for variant in entry['variants'] if variant in result['bars']), None)
+        if ticker is None:
+            if store is None and all(result['failed'].get(variant) == 'Aucune donnée' for variant in entry['variants']):
+                # Aucune variante n'existe : cache négatif comme resolver.resolve
+                resolver.record(YahooProvider.name, symbol, None, 'Aucune donnée')
+            continue
+        if store is None:
+            resolver.record(YahooProvider.name, symbol, ticker)
+        recovered.setdefault(ticker, []).extend(entry['assets'])
+        bars[ticker] = result['bars'][ticker]
+    return recovered, bars
+
+
+def _apply_metadata(provider, asset, symbol, ticker):
+    """Nom, secteur, industrie et capitalisation (cache long du fournisseur, un Ticker.info au plus)"""
+    metadata = provider.get_metadata(symbol, ticker)
+    for field in METADATA_FIELDS:
+        if metadata.get(field) is not None:
+            setattr(asset, field, metadata[field])
+    return bool(metadata)
+
+
+def missing_metadata(asset) -> bool:
+    """Nom ou secteur jamais renseigné (valeurs par défaut du modèle)"""
+    return not asset.name or asset.sector in ('', 'xxxx')
+
+
+def refresh_assets(assets: Iterable, years: int = 5, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   metadata: bool = False) -> Dict[str, Any]:
+    """
+    Rafraîchit price_history d'Assets via des téléchargements Yahoo groupés
+
+    Args:
+        assets: Assets à rafraîchir (actions/ETF ; les cryptos passent par CoinGecko)
+        years: profondeur d'historique (détermine période et intervalle)
+        chunk_size: nombre de tickers par requête Yahoo
+        metadata: met aussi à jour name, sector, industry et market_cap (un Ticker.info
+            par Asset hors cache : préférer refresh_metadata)
+
+    Returns:
+        dict: {'success', 'updated', 'failed': {symbole: raison}, 'duration'}
+    """
+    started = time.perf_counter()
+    provider = MarketDataFactory.get_provider('yahoo')
+    store = provider.store if isinstance(provider, LocalProvider) else None
+
+    assets = [asset for asset in assets if clean_yahoo_symbol(asset.symbol_clean or asset.get_clean_symbol())]
+    symbols = {asset.pk: clean_yahoo_symbol(asset.symbol_clean or asset.get_clean_symbol()) for asset in assets}
+    # Pas de résolution persistante pour les données locales
+    resolutions = resolver.lookup_many(provider.name, set(symbols.values())) if store is None else {}
+
+    # Regrouper par (période, intervalle) puis par ticker Yahoo (résolu si connu)
+    groups = {}
+    updated, failed = [], {}
+    for asset in assets:
+        symbol = symbols[asset.pk]
+        resolution = resolutions.get(symbol)
+        if resolution is not None and resolver.is_negative(resolution):
+            failed[asset.symbol] = 'Symbole non résolu'
+            continue
+        ticker = resolution.provider_symbol if resolution is not None and resolution.is_resolved else symbol
+        params = history_params(years)
+        groups.setdefault(params, {}).setdefault(ticker, []).append(asset)
+
+    for (period, interval), by_ticker in groups.items():
+        logger.info(f"📊 Téléchargement groupé Yahoo: {len(by_ticker)} tickers ({period}, {interval})")
+        result = download_histories(list(by_ticker), period, interval, chunk_size=chunk_size, store=store)
+
+        recovered, recovered_bars = _retry_variants(
+            by_ticker, result['failed'], symbols, resolutions, period, interval, chunk_size, store
+        )
+        recovered_assets = {asset.pk for group in recovered.values() for asset in group}
+        by_ticker = {**by_ticker, **recovered}
+
+        for ticker, ticker_bars in {**result['bars'], **recovered_bars}.items():
+            history = {'provider_symbol': ticker, 'bars': ticker_bars, 'extra': {'type': 'Stock', 'market': 'Yahoo'}}
+            price_history = json.dumps(ticker_bars)
+            for asset in by_ticker[ticker]:
+                symbol = symbols[asset.pk]
+                if store is None and symbol not in resolutions:
+                    resolver.record(provider.name, symbol, ticker)
+                # Les vues et l'automatisation réutilisent ces données sans nouvel appel
+                cache.store(provider.history_key(symbol, years), history)
+                asset.price_history = price_history
+                if metadata:
+                    _apply_metadata(provider, asset, symbol, ticker)
+                updated.append(asset)
+
+        for ticker, reason in result['failed'].items():
+            for asset in by_ticker[ticker]:
+                if asset.pk not in recovered_assets:
+                    failed[asset.symbol] = reason
+
+    fields = ('price_history',) + (METADATA_FIELDS if metadata else ())
+    chart_data.save_assets_prices(updated, fields=fields)
+
+    duration = time.perf_counter() - started
+    logger.info(f"✅ Rafraîchissement groupé: {len(updated)} Assets mis à jour, {len(failed)} échecs en {duration:.1f}s")
+    return {
+        'success': True,
+        'updated': len(updated),
+        'failed': failed,
+        'duration': duration,
+    }
+
+
+def refresh_metadata(assets: Iterable, only_missing: bool = True, limit: Optional[int] = None,
+                     interval: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Passe séparée des métadonnées : un appel au fournisseur par Asset, espacé de `interval`
+
+    Args:
+        assets: Assets candidats
+        only_missing: seulement les Assets sans nom ou secteur (missing_metadata)
+        limit: nombre maximal d'Assets traités (MARKET_DATA_METADATA_BATCH par défaut) ;
+            les suivants le seront au prochain passage
+        interval: pause en secondes entre deux Assets (MARKET_DATA_METADATA_INTERVAL par défaut)
+
+    Returns:
+        dict: {'success', 'updated', 'remaining', 'duration'}
+    """
+    started = time.perf_counter()
+    provider = MarketDataFactory.get_provider('yahoo')
+    local = isinstance(provider, LocalProvider)
+    limit = limit if limit is not None else getattr(settings, 'MARKET_DATA_METADATA_BATCH', 50)
+    interval = interval if interval is not None else getattr(settings, 'MARKET_DATA_METADATA_INTERVAL', 0.5)
+
+    assets = [
+        asset for asset in assets
+        if clean_yahoo_symbol(asset.symbol_clean or asset.get_clean_symbol())
+        and (not only_missing or missing_metadata(asset))
+    ]
+    batch, remaining = assets[:limit], len(assets[limit:])
+    symbols = {asset.pk: clean_yahoo_symbol(asset.symbol_clean or asset.get_clean_symbol()) for asset in batch}
+    resolutions = resolver.lookup_many(provider.name, set(symbols.values())) if not local else {}
+
+    updated = []
+    for position, asset in enumerate(batch):
+        symbol = symbols[asset.pk]
+        resolution = resolutions.get(symbol)
+        if resolution is not None and resolver.is_negative(resolution):
+            continue
+        ticker = resolution.provider_symbol if resolution is not None and resolution.is_resolved else symbol
+        if position and interval and not local:
+            # Ticker.info n'a pas d'équivalent groupé : débit limité pour éviter les 429
+            time.sleep(interval)
+        if _apply_metadata(provider, asset, symbol, ticker):
+            updated.append(asset)
+
+    if updated:
+        Asset.objects.bulk_update(updated, list(METADATA_FIELDS), batch_size=500)
+
+    duration = time.perf_counter() - started
+    logger.info(f"✅ Métadonnées: {len(updated)} Assets mis à jour, {remaining} restants en {duration:.1f}s")
+    return {
+        'success': True,
+        'updated': len(updated),
+        'remaining': remaining,
+        'duration': duration,
+    }
@@ -0,0 +1,164 @@
+"""
+Cache TTL et coalescence des requêtes vers les fournisseurs de données de marché
+
+- Les réponses (historique, métadonnées) sont stockées dans le cache Django avec leur
+  date de récupération : fraîches pendant `ttl`, conservées ensuite comme valeur de
+  secours (stale) si le fournisseur échoue ou limite le débit.
+- Les appels concurrents pour une même clé (vues, automatisation) sont coalescés :
+  un seul thread interroge le fournisseur, les autres attendent son résultat.
+- Un fournisseur qui répond 429 est mis en pause (cooldown) au lieu de bloquer les
+  threads dans des time.sleep().
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from ..response_cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+_ENTRY_KEY = 'trading_app:market_data:{}'
+_COOLDOWN_KEY = 'trading_app:market_data:cooldown:{}'
+
+# Nombre d'appels réellement envoyés à chaque fournisseur (processus courant)
+call_counts = Counter()
+
+
+class RateLimited(Exception):
+    """Levée par un fournisseur qui a reçu une limite de débit (HTTP 429)"""
+
+    def __init__(self, retry_after=None):
+        super().__init__(f"Limite de débit atteinte (retry_after={retry_after})")
+        self.retry_after = retry_after
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Un seul appel en cours par clé ; les appelants concurrents partagent son résultat"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+_flight = SingleFlight()
+
+
+def quote_ttl():
+    return getattr(settings, 'MARKET_DATA_QUOTE_TTL', 300)
+
+
+def metadata_ttl():
+    return getattr(settings, 'MARKET_DATA_METADATA_TTL', 86400)
+
+
+def _stale_ttl(ttl):
+    return max(ttl, getattr(settings, 'MARKET_DATA_STALE_TTL', 86400))
+
+
+def in_cooldown(provider):
+    return bool(get_cache().get(_COOLDOWN_KEY.format(provider)))
+
+
+def start_cooldown(provider, seconds):
+    seconds = max(1, int(seconds or getattr(settings, 'MARKET_DATA_COOLDOWN', 60)))
+    logger.warning(f"⚠️ {provider}: limite de débit atteinte, pause de {seconds}s")
+    get_cache().set(_COOLDOWN_KEY.format(provider), True, seconds)
+
+
+def cached_fetch(provider, key, ttl, fetch):
+    """
+    Valeur fraîche du cache, sinon un unique appel fetch() partagé entre threads.
+
+    Args:
+        provider: nom du fournisseur (comptage des appels, cooldown)
+        key: clé identifiant la donnée (ex: "yahoo:history:AAPL:5y:1wk")
+        ttl: durée de fraîcheur en secondes
+        fetch: fonction sans argument interrogeant le fournisseur (None = pas de données)
+
+    Returns:
+        La donnée (éventuellement périmée si le fournisseur est indisponible) ou None
+    """
+    cache = get_cache()
+    cache_key = _ENTRY_KEY.format(key)
+
+    def fresh(entry):
+        return entry is not None and time.time() - entry['fetched_at'] < ttl
+
+    entry = cache.get(cache_key)
+    if fresh(entry):
+        return entry['data']
+
+    def load():
+        # Un autre processus a pu remplir le cache pendant l'attente
+        current = cache.get(cache_key)
+        if fresh(current):
+            return current['data']
+        stale = current['data'] if current is not None else None
+
+        if in_cooldown(provider):
+            return stale
+
+        call_counts[provider] += 1
+        try:
+            data = fetch()
+        except RateLimited as e:
+            start_cooldown(provider, e.retry_after)
+            return stale
+        except Exception as e:
+            if stale is None:
+                raise
+            logger.warning(f"⚠️ {provider}: échec de {key} ({e}), utilisation de la valeur en cache")
+            return stale
+
+        if data is None and stale is not None:
+            return stale
+
+        cache.set(cache_key, {'data': data, 'fetched_at': time.time()}, _stale_ttl(ttl))
+        return data
+
+    return _flight.do(cache_key, load)
+
+
+def store(key, data):
+    """Écrit une donnée récupérée par un autre chemin (ex: téléchargement groupé)"""
+    get_cache().set(_ENTRY_KEY.format(key), {'data': data, 'fetched_at': time.time()}, _stale_ttl(quote_ttl()))
+
+
+def invalidate(key):
+    get_cache().delete(_ENTRY_KEY.format(key))
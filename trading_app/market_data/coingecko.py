@@ -0,0 +1,136 @@
+"""
+Fournisseur CoinGecko
+
+L'historique (market_chart) contient aussi la capitalisation et les volumes : un seul
+appel donne les bougies, le prix courant et la market cap. Le nom de la crypto vient
+de /coins/{id}, mis en cache avec les métadonnées. Une réponse 429 met le fournisseur
+en pause au lieu d'attendre dans la requête.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import requests
+
+from . import resolver
+from .base import MarketDataProvider
+from .cache import RateLimited
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://api.coingecko.com/api/v3"
+HISTORY_DAYS = 7
+
+# Mapping des symboles vers les IDs CoinGecko
+CRYPTO_MAPPING = {
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'ETHW': 'ethereum',  # Utiliser Ethereum standard pour ETHW
+    'SOL': 'solana',
+    'AVAX': 'avalanche-2',
+    'BNB': 'binancecoin',
+    'ADA': 'cardano',
+    'DOT': 'polkadot',
+    'LINK': 'chainlink',
+    'UNI': 'uniswap',
+    'MATIC': 'matic-network',
+    'USDT': 'tether',
+    'USDC': 'usd-coin',
+    'DAI': 'dai',
+    'LTC': 'litecoin',
+    'XRP': 'ripple',
+    'DOGE': 'dogecoin',
+    'SHIB': 'shiba-inu',
+    'TRX': 'tron',
+    'BCH': 'bitcoin-cash',
+    'XLM': 'stellar'
+}
+
+
+def clean_crypto_symbol(symbol: str) -> str:
+    """Symbole crypto nettoyé (ex: "ETHEUR" depuis "ETHEUR_1:XCRY")"""
+    clean_symbol = symbol.split(':')[0] if ':' in symbol else symbol
+    clean_symbol = clean_symbol.split('_')[0] if '_' in clean_symbol else clean_symbol
+    return clean_symbol.strip().upper()
+
+
+def get_coin_id(symbol: str) -> Optional[str]:
+    """ID CoinGecko d'après le mapping intégré (ex: "ETHEUR" -> "ethereum")"""
+    clean_symbol = clean_crypto_symbol(symbol)
+
+    # Gérer les paires de devises (ex: ETHEUR -> ETH, BTCEUR -> BTC)
+    if clean_symbol.endswith('EUR') and clean_symbol[:-3] in CRYPTO_MAPPING:
+        return CRYPTO_MAPPING[clean_symbol[:-3]]
+
+    for sym, coin_id in CRYPTO_MAPPING.items():
+        if clean_symbol == sym or clean_symbol.endswith(sym):
+            return coin_id
+    return None
+
+
+class CoinGeckoProvider(MarketDataProvider):
+    """Données de marché CoinGecko"""
+
+    name = 'coingecko'
+
+    def __init__(self, timeout: int = 10):
+        self.timeout = timeout
+
+    def _get(self, path: str, params: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        response = requests.get(f"{API_URL}{path}", params=params, timeout=self.timeout)
+        if response.status_code == 429:
+            retry_after = response.headers.get('Retry-After')
+            raise RateLimited(int(retry_after) if retry_after and retry_after.isdigit() else None)
+        if response.status_code != 200:
+            logger.warning(f"❌ Erreur API CoinGecko {path}: {response.status_code}")
+            return None
+        return response.json()
+
+    def history_key(self, symbol: str, years: int) -> str:
+        # L'historique CoinGecko ne dépend pas de la profondeur demandée
+        return f"{self.name}:history:{clean_crypto_symbol(symbol)}"
+
+    def fetch_history(self, symbol: str, years: int = 5) -> Optional[Dict[str, Any]]:
+        # Le mapping intégré ne sert qu'à la première résolution ; ensuite SymbolResolution
+        # (modifiable dans l'admin) fait foi
+        mapped = get_coin_id(symbol)
+        coin_id, _ = resolver.resolve(
+            self.name, clean_crypto_symbol(symbol), [mapped] if mapped else [], lambda candidate: True
+        )
+        if not coin_id:
+            logger.warning(f"❌ Symbole crypto non reconnu: {symbol}")
+            return None
+
+        data = self._get(f"/coins/{coin_id}/market_chart", {
+            'vs_currency': 'usd', 'days': HISTORY_DAYS, 'interval': 'daily',
+        })
+        if not data or not data.get('prices'):
+            return None
+
+        volumes = dict(data.get('total_volumes') or [])
+        bars = []
+        for timestamp_ms, price in data['prices']:
+            bars.append({
+                'date': datetime.fromtimestamp(timestamp_ms / 1000).strftime('%Y-%m-%d'),
+                'open': price,
+                'high': price,  # CoinGecko ne donne pas OHLC, on utilise le prix
+                'low': price,
+                'close': price,
+                'volume': volumes.get(timestamp_ms, 0),
+            })
+
+        market_caps = data.get('market_caps') or []
+        extra = {'type': 'Crypto', 'market': 'CoinGecko', 'sector': 'Crypto', 'industry': 'Crypto'}
+        if market_caps:
+            extra['market_cap'] = market_caps[-1][1]
+        return {'provider_symbol': coin_id, 'bars': bars, 'extra': extra}
+
+    def fetch_metadata(self, symbol: str, provider_symbol: str) -> Dict[str, Any]:
+        data = self._get(f"/coins/{provider_symbol}", {
+            'localization': 'false', 'tickers': 'false', 'market_data': 'false',
+            'community_data': 'false', 'developer_data': 'false',
+        })
+        if not data:
+            raise ValueError(f"Métadonnées CoinGecko indisponibles pour {provider_symbol}")
+        return {'name': data.get('name', symbol)}
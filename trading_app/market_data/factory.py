@@ -0,0 +1,59 @@
+"""
+Factory pour obtenir les fournisseurs de données de marché
+"""
+
+from typing import Dict
+
+from django.conf import settings
+
+from .base import MarketDataProvider
+from .coingecko import CoinGeckoProvider
+from .local import LocalProvider
+from .yahoo import YahooProvider
+
+
+class MarketDataFactory:
+    """Factory des fournisseurs de données de marché (une instance partagée par type)"""
+
+    _providers: Dict[str, MarketDataProvider] = {}
+
+    @staticmethod
+    def get_backend() -> str:
+        """Backend configuré : 'live' (APIs réelles) ou 'local' (MARKET_DATA_BACKEND)"""
+        return getattr(settings, 'MARKET_DATA_BACKEND', 'live').lower()
+
+    @staticmethod
+    def get_provider(provider_type: str) -> MarketDataProvider:
+        """
+        Obtenir le fournisseur demandé
+
+        Args:
+            provider_type: Type de fournisseur ('yahoo', 'coingecko')
+
+        Returns:
+            Instance partagée du fournisseur (LocalProvider si MARKET_DATA_BACKEND = 'local')
+        """
+        provider_type = provider_type.lower()
+        if provider_type not in MarketDataFactory.get_supported_providers():
+            raise ValueError(f"Fournisseur de données non supporté: {provider_type}")
+
+        backend = MarketDataFactory.get_backend()
+        key = f"{backend}:{provider_type}"
+        provider = MarketDataFactory._providers.get(key)
+        if provider is None:
+            if backend == 'local':
+                provider = LocalProvider(provider_type)
+            elif provider_type == 'yahoo':
+                provider = YahooProvider()
+            else:
+                provider = CoinGeckoProvider()
+            MarketDataFactory._providers[key] = provider
+        return provider
+
+    @staticmethod
+    def get_supported_providers() -> Dict[str, str]:
+        """Retourner la liste des fournisseurs supportés"""
+        return {
+            'yahoo': 'Yahoo Finance',
+            'coingecko': 'CoinGecko'
+        }
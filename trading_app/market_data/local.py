@@ -0,0 +1,254 @@
+"""
+Fournisseur local (hors ligne) pour les tests et benchmarks
+
+Sert des bougies OHLCV, des carnets d'ordres et des catalogues d'instruments depuis des
+fichiers sur disque (MARKET_DATA_LOCAL_ROOT), ou des données synthétiques déterministes
+quand aucun fichier n'existe :
+
+    <root>/ohlcv/<SYMBOL>.json       [{date, open, high, low, close, volume}, ...]
+    <root>/ohlcv/<SYMBOL>.csv        date,open,high,low,close,volume
+    <root>/orderbooks/<SYMBOL>.json  {"bids": [[prix, quantité], ...], "asks": [...]}
+    <root>/catalogues/<platform>.json  liste au format Binance exchangeInfo / Saxo instruments
+
+Les données synthétiques ne dépendent que du symbole, de MARKET_DATA_LOCAL_SEED et de
+MARKET_DATA_LOCAL_END_DATE : deux exécutions produisent exactement les mêmes séries.
+Activé avec MARKET_DATA_BACKEND = 'local'.
+"""
+
+import csv
+import json
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from .base import MarketDataProvider
+from .yahoo import clean_yahoo_symbol, history_params
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_DAYS = {'1d': 1, '1wk': 7, '1mo': 30}
+
+CRYPTO_BASES = ['BTC', 'ETH', 'SOL', 'AVAX', 'BNB', 'ADA', 'DOT', 'LINK', 'UNI', 'MATIC',
+                'LTC', 'XRP', 'DOGE', 'SHIB', 'TRX', 'BCH', 'XLM']
+QUOTE_ASSETS = ['USDT', 'EUR', 'BTC']
+
+
+def _period_days(period: str) -> int:
+    """Nombre de jours d'une période Yahoo ("5y", "6mo", "7d")"""
+    if period.endswith('mo'):
+        return int(period[:-2]) * 30
+    if period.endswith('y'):
+        return int(period[:-1]) * 365
+    if period.endswith('d'):
+        return int(period[:-1])
+    return 365
+
+
+class LocalDataStore:
+    """Données de marché locales : fichiers enregistrés, sinon synthétiques et déterministes"""
+
+    def __init__(self, root: Optional[str] = None, seed: Optional[int] = None, end_date: Optional[str] = None):
+        self.root = str(root or getattr(settings, 'MARKET_DATA_LOCAL_ROOT', 'market_data_local'))
+        self.seed = seed if seed is not None else getattr(settings, 'MARKET_DATA_LOCAL_SEED', 42)
+        self.end_date = datetime.strptime(
+            end_date or getattr(settings, 'MARKET_DATA_LOCAL_END_DATE', '2025-01-03'), '%Y-%m-%d'
+        )
+        self._files = {}
+
+    def _rng(self, kind: str, key: str) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{key}")
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    def _load(self, path: str):
+        """Contenu d'un fichier JSON/CSV (mémorisé), None s'il n'existe pas"""
+        if path not in self._files:
+            data = None
+            if os.path.exists(path):
+                with open(path, newline='') as handle:
+                    if path.endswith('.csv'):
+                        data = [
+                            {key: (value if key == 'date' else float(value or 0)) for key, value in row.items()}
+                            for row in csv.DictReader(handle)
+                        ]
+                    else:
+                        data = json.load(handle)
+            self._files[path] = data
+        return self._files[path]
+
+    def save(self, kind: str, name: str, data) -> str:
+        """Enregistre des données (ohlcv, orderbooks, catalogues) au format JSON"""
+        path = self._path(kind, f"{name}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as handle:
+            json.dump(data, handle)
+        self._files.pop(path, None)
+        return path
+
+    # --- OHLCV ---
+
+    def ohlcv(self, symbol: str, period: str = '5y', interval: str = '1wk') -> List[Dict[str, Any]]:
+        """Bougies du symbole sur la période (enregistrées si disponibles)"""
+        start = (self.end_date - timedelta(days=_period_days(period))).strftime('%Y-%m-%d')
+        for extension in ('json', 'csv'):
+            recorded = self._load(self._path('ohlcv', f"{symbol.upper()}.{extension}"))
+            if recorded is not None:
+                return [bar for bar in recorded if bar['date'] >= start]
+        return self.synthetic_ohlcv(symbol, _period_days(period) // INTERVAL_DAYS.get(interval, 1), interval)
+
+    def synthetic_ohlcv(self, symbol: str, count: int, interval: str = '1d') -> List[Dict[str, Any]]:
+        """
+        Marche aléatoire géométrique déterministe terminant à end_date
+
+        La série est générée à rebours depuis la dernière clôture : quel que soit
+        l'intervalle demandé, le prix courant d'un symbole est le même.
+        """
+        rng = self._rng('ohlcv', symbol.upper())
+        step = INTERVAL_DAYS.get(interval, 1)
+        drift = rng.uniform(-0.0002, 0.0006) * step
+        volatility = rng.uniform(0.01, 0.04) * step ** 0.5
+        close_price = rng.uniform(10, 500)
+        base_volume = rng.randint(10_000, 5_000_000) * step
+
+        bars = []
+        for i in range(count):
+            date = self.end_date - timedelta(days=i * step)
+            open_price = max(0.01, close_price / (1 + rng.gauss(drift, volatility)))
+            spread = abs(rng.gauss(0, volatility / 2))
+            bars.append({
+                'date': date.strftime('%Y-%m-%d'),
+                'open': round(open_price, 4),
+                'high': round(max(open_price, close_price) * (1 + spread), 4),
+                'low': round(min(open_price, close_price) * (1 - spread), 4),
+                'close': round(close_price, 4),
+                'volume': int(base_volume * rng.uniform(0.5, 1.5)),
+            })
+            close_price = open_price
+        bars.reverse()
+        return bars
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        bars = self.ohlcv(symbol, period='7d', interval='1d')
+        return bars[-1]['close'] if bars else None
+
+    # --- Carnets d'ordres ---
+
+    def order_book(self, symbol: str, depth: int = 20) -> Dict[str, Any]:
+        """Carnet au format Binance /api/v3/depth (prix et quantités en chaînes)"""
+        recorded = self._load(self._path('orderbooks', f"{symbol.upper()}.json"))
+        if recorded is not None:
+            return {**recorded, 'bids': recorded['bids'][:depth], 'asks': recorded['asks'][:depth]}
+
+        rng = self._rng('orderbook', symbol.upper())
+        mid = self.last_price(symbol) or 100.0
+        tick = max(mid * 0.0001, 0.00000001)
+        bids, asks = [], []
+        for level in range(1, depth + 1):
+            bids.append([f"{mid - level * tick:.8f}", f"{rng.uniform(0.1, 50):.8f}"])
+            asks.append([f"{mid + level * tick:.8f}", f"{rng.uniform(0.1, 50):.8f}"])
+        return {'lastUpdateId': rng.randint(1, 10 ** 9), 'bids': bids, 'asks': asks}
+
+    # --- Catalogues d'instruments ---
+
+    def instruments(self, platform: str, count: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Catalogue d'une plateforme ('binance' : exchangeInfo.symbols, 'saxo' : instruments Data)"""
+        recorded = self._load(self._path('catalogues', f"{platform}.json"))
+        if recorded is not None:
+            return recorded[:count] if count else recorded
+
+        count = count or getattr(settings, 'MARKET_DATA_LOCAL_CATALOGUE_SIZE', 1000)
+        if platform == 'binance':
+            return self._binance_catalogue(count)
+        if platform == 'saxo':
+            return self._saxo_catalogue(count)
+        return []
+
+    def _binance_catalogue(self, count: int) -> List[Dict[str, Any]]:
+        bases = list(CRYPTO_BASES)
+        index = 0
+        while len(bases) * len(QUOTE_ASSETS) < count:
+            bases.append(f"SYN{index:04d}")
+            index += 1
+
+        symbols = []
+        for base in bases:
+            for quote in QUOTE_ASSETS:
+                if base == quote or len(symbols) >= count:
+                    continue
+                symbols.append({
+                    'symbol': f"{base}{quote}",
+                    'status': 'TRADING',
+                    'baseAsset': base,
+                    'quoteAsset': quote,
+                    'isSpotTradingAllowed': True,
+                    'permissions': ['SPOT'],
+                    'filters': [
+                        {'filterType': 'PRICE_FILTER', 'minPrice': '0.00000100', 'maxPrice': '1000000.00000000', 'tickSize': '0.00000100'},
+                        {'filterType': 'LOT_SIZE', 'minQty': '0.00001000', 'maxQty': '9000000.00000000', 'stepSize': '0.00001000'},
+                        {'filterType': 'NOTIONAL', 'minNotional': '5.00000000', 'maxNotional': '9000000.00000000'},
+                    ],
+                })
+        return symbols
+
+    def _saxo_catalogue(self, count: int) -> List[Dict[str, Any]]:
+        exchanges = [('NASDAQ', 'NASDAQ', 'US', 'USD'), ('NYSE', 'New York Stock Exchange', 'US', 'USD'),
+                     ('PAR', 'Euronext Paris', 'FR', 'EUR'), ('AMS', 'Euronext Amsterdam', 'NL', 'EUR')]
+        instruments = []
+        for uic in range(1, count + 1):
+            exchange_id, exchange_name, country, currency = exchanges[uic % len(exchanges)]
+            ticker = f"SYN{uic:05d}"
+            instruments.append({
+                'Identifier': uic,
+                'Uic': uic,
+                'Symbol': f"{ticker}:x{exchange_id.lower()}",
+                'Description': f"Synthetic Company {uic}",
+                'AssetType': 'Stock',
+                'CurrencyCode': currency,
+                'IsTradable': True,
+                'Exchange': {'ExchangeId': exchange_id, 'Name': exchange_name, 'CountryCode': country},
+            })
+        return instruments
+
+
+class LocalProvider(MarketDataProvider):
+    """Fournisseur hors ligne se comportant comme Yahoo ou CoinGecko"""
+
+    def __init__(self, mimic: str = 'yahoo', store: Optional[LocalDataStore] = None):
+        self.mimic = mimic
+        self.name = f"local-{mimic}"
+        self.store = store or LocalDataStore()
+
+    def fetch_history(self, symbol: str, years: int = 5) -> Optional[Dict[str, Any]]:
+        ticker = clean_yahoo_symbol(symbol).upper()
+        if self.mimic == 'coingecko':
+            # Même profondeur que l'API CoinGecko utilisée (7 jours quotidiens)
+            bars = self.store.ohlcv(ticker, period='7d', interval='1d')
+            extra = {'type': 'Crypto', 'market': 'CoinGecko', 'sector': 'Crypto', 'industry': 'Crypto'}
+        else:
+            period, interval = history_params(years)
+            bars = self.store.ohlcv(ticker, period=period, interval=interval)
+            extra = {'type': 'Stock', 'market': 'Yahoo'}
+
+        if not bars:
+            return None
+        return {'provider_symbol': ticker, 'bars': bars, 'extra': extra}
+
+    def fetch_metadata(self, symbol: str, provider_symbol: str) -> Dict[str, Any]:
+        rng = self.store._rng('metadata', provider_symbol)
+        return {
+            'name': f"{provider_symbol} (local)",
+            'sector': 'Crypto' if self.mimic == 'coingecko' else rng.choice(['Technology', 'Healthcare', 'Financial Services', 'Energy']),
+            'industry': 'Crypto' if self.mimic == 'coingecko' else 'Synthetic',
+            'market_cap': float(rng.randint(10 ** 8, 10 ** 12)),
+        }
+
+    def get_order_book(self, symbol: str, depth: int = 20) -> Dict[str, Any]:
+        return self.store.order_book(symbol, depth)
+
+    def get_instruments(self, platform: str, count: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self.store.instruments(platform, count)
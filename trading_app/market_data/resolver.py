@@ -0,0 +1,116 @@
+"""
+Résolution persistante symbole interne -> ticker fournisseur (modèle SymbolResolution)
+
+La première demande d'un symbole essaie ses variantes (BTC, BTC-USD, ETH depuis ETHEUR...)
+et mémorise celle qui fonctionne, ou l'échec (cache négatif). Les demandes suivantes
+vont directement au bon ticker. Les lignes sont modifiables dans l'admin ; une ligne
+marquée is_manual n'est jamais réécrite automatiquement.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+
+from ..models import SymbolResolution
+
+logger = logging.getLogger(__name__)
+
+
+def _retry_delay():
+    """Délai avant de réessayer un symbole non résolu (MARKET_DATA_RESOLUTION_RETRY_DAYS)"""
+    return timedelta(days=getattr(settings, 'MARKET_DATA_RESOLUTION_RETRY_DAYS', 30))
+
+
+def is_negative(resolution: SymbolResolution) -> bool:
+    """Vrai si la ligne mémorise un échec encore valable"""
+    if resolution.is_resolved:
+        return False
+    if resolution.is_manual:
+        return True
+    if resolution.last_checked_at is None:
+        return False
+    return timezone.now() - resolution.last_checked_at < _retry_delay()
+
+
+def record(provider: str, symbol: str, provider_symbol: Optional[str], error: str = '') -> None:
+    """Mémorise le résultat d'une résolution (provider_symbol=None pour un échec)"""
+    defaults = {
+        'provider_symbol': provider_symbol or '',
+        'is_resolved': bool(provider_symbol),
+        'last_error': '' if provider_symbol else error[:1000],
+        'last_checked_at': timezone.now(),
+    }
+    try:
+        resolution, created = SymbolResolution.objects.get_or_create(
+            symbol=symbol, provider=provider, defaults={**defaults, 'attempts': 1}
+        )
+    except IntegrityError:
+        # Résolu en parallèle par un autre processus
+        return
+    if created or resolution.is_manual:
+        return
+    for field, value in defaults.items():
+        setattr(resolution, field, value)
+    resolution.attempts += 1
+    resolution.save()
+
+
+def lookup_many(provider: str, symbols: Iterable[str]) -> Dict[str, SymbolResolution]:
+    """Résolutions connues pour plusieurs symboles (une requête)"""
+    return {
+        resolution.symbol: resolution
+        for resolution in SymbolResolution.objects.filter(provider=provider, symbol__in=list(symbols))
+    }
+
+
+def resolve(provider: str, symbol: str, candidates: Iterable[str],
+            probe: Callable[[str], Any]) -> Tuple[Optional[str], Any]:
+    """
+    Ticker fournisseur d'un symbole
+
+    Args:
+        provider: nom du fournisseur ('yahoo', 'coingecko')
+        symbol: symbole interne nettoyé
+        candidates: variantes à essayer si le symbole n'a jamais été résolu
+        probe: fonction(candidat) -> données (non vides si le ticker fonctionne)
+
+    Returns:
+        (ticker, données de la sonde) ; données None si la résolution était déjà connue,
+        (None, None) si le symbole ne se résout pas
+
+    Raises:
+        L'erreur de la sonde si aucun candidat n'a pu être interrogé (rien n'est mémorisé)
+    """
+    resolution = SymbolResolution.objects.filter(symbol=symbol, provider=provider).first()
+    if resolution is not None:
+        if resolution.is_resolved and resolution.provider_symbol:
+            return resolution.provider_symbol, None
+        if is_negative(resolution):
+            return None, None
+
+    last_error = None
+    answered = False
+    for candidate in candidates:
+        try:
+            data = probe(candidate)
+        except Exception as e:
+            logger.warning(f"❌ Échec {provider} avec {candidate}: {e}")
+            last_error = e
+            continue
+        answered = True
+        if data:
+            logger.info(f"✅ {symbol} résolu chez {provider}: {candidate}")
+            record(provider, symbol, candidate)
+            return candidate, data
+
+    if not answered and last_error is not None:
+        # Fournisseur injoignable : ne pas mémoriser un faux échec
+        raise last_error
+
+    logger.warning(f"❌ {symbol} non résolu chez {provider}")
+    record(provider, symbol, None, str(last_error or 'Aucune donnée'))
+    return None, None
@@ -0,0 +1,143 @@
+"""
+Fournisseur Yahoo Finance
+
+Le symbole est résolu directement avec l'appel d'historique (plus d'appel de sonde
+history(period="1d")) : la première variante qui renvoie des bougies est retenue et
+mémorisée dans SymbolResolution. Le prix courant est la clôture de la dernière bougie.
+
+yfinance et pandas sont importés à la demande : les workers qui ne servent pas de
+données de marché ne les chargent jamais.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from . import resolver
+from .base import MarketDataProvider
+
+logger = logging.getLogger(__name__)
+
+CRYPTO_SYMBOLS = ["BTC", "ETH", "SOL", "AVAX", "BNB", "ADA", "DOT", "LINK", "UNI", "MATIC"]
+
+
+def history_params(years: int):
+    """Période et intervalle Yahoo pour une profondeur en années"""
+    # Yahoo Finance a des limites : max 5 ans pour interval="1wk", max 2 ans pour interval="1d"
+    if years <= 5:
+        return f"{years}y", "1wk"
+    if years <= 10:
+        return f"{years}y", "1mo"
+    return f"{min(years, 20)}y", "1mo"  # Yahoo limite à 20 ans
+
+
+def clean_yahoo_symbol(symbol: str) -> str:
+    """Symbole sans suffixe de marché (ex: "AAPL" depuis "AAPL:XNAS")"""
+    return (symbol.split(':')[0] if ':' in symbol else symbol).strip()
+
+
+def symbol_candidates(symbol: str):
+    """Variantes de symbole à essayer, dans l'ordre"""
+    clean_symbol = clean_yahoo_symbol(symbol)
+    candidates = [clean_symbol]
+
+    # Pour les cryptomonnaies, essayer avec -USD
+    if clean_symbol in CRYPTO_SYMBOLS:
+        candidates.append(f"{clean_symbol}-USD")
+
+    # Pour les paires EUR, essayer sans EUR
+    if clean_symbol.endswith("EUR"):
+        base_symbol = clean_symbol[:-3]
+        candidates.extend([base_symbol, f"{base_symbol}-USD"])
+
+    return [candidate for candidate in dict.fromkeys(candidates) if candidate]
+
+
+def frame_to_bars(frame):
+    """DataFrame OHLCV yfinance -> liste de bougies [{date, open, high, low, close, volume}]"""
+    import pandas as pd
+
+    bars = []
+    if frame is None or frame.empty:
+        return bars
+    frame = frame.dropna(subset=['Close'])
+    for index, open_, high, low, close, volume in zip(
+        frame.index, frame['Open'], frame['High'], frame['Low'], frame['Close'], frame['Volume']
+    ):
+        bars.append({
+            'date': index.strftime('%Y-%m-%d'),
+            'open': float(open_),
+            'high': float(high),
+            'low': float(low),
+            'close': float(close),
+            'volume': int(volume) if not pd.isna(volume) else 0,
+        })
+    return bars
+
+
+class YahooProvider(MarketDataProvider):
+    """Données de marché Yahoo Finance"""
+
+    name = 'yahoo'
+
+    def history_key(self, symbol: str, years: int) -> str:
+        period, interval = history_params(years)
+        return f"{self.name}:history:{clean_yahoo_symbol(symbol)}:{period}:{interval}"
+
+    def fetch_history(self, symbol: str, years: int = 5) -> Optional[Dict[str, Any]]:
+        import yfinance as yf
+
+        period, interval = history_params(years)
+
+        def probe(candidate):
+            logger.info(f"📊 Yahoo history {candidate} ({period}, {interval})")
+            return frame_to_bars(yf.Ticker(candidate).history(period=period, interval=interval))
+
+        provider_symbol, bars = resolver.resolve(
+            self.name, clean_yahoo_symbol(symbol), symbol_candidates(symbol), probe
+        )
+        if provider_symbol is None:
+            return None
+        if bars is None:
+            # Ticker déjà connu : un seul appel
+            bars = probe(provider_symbol)
+        if not bars:
+            return None
+        return {'provider_symbol': provider_symbol, 'bars': bars, 'extra': {'type': 'Stock', 'market': 'Yahoo'}}
+
+    def fetch_metadata(self, symbol: str, provider_symbol: str) -> Dict[str, Any]:
+        import yfinance as yf
+
+        info = yf.Ticker(provider_symbol).info or {}
+
+        # Gérer les cas où les données sont manquantes
+        market_cap = info.get("marketCap", 0.0)
+        if market_cap == "N/A" or market_cap is None:
+            market_cap = 0.0
+
+        # Détecter si c'est une cryptomonnaie
+        quote_type = info.get("quoteType", "")
+        is_crypto = quote_type == "CRYPTOCURRENCY" or symbol.endswith(("USDT", "BTC", "ETH", "EUR"))
+        if any(crypto in symbol.upper() for crypto in CRYPTO_SYMBOLS):
+            is_crypto = True
+
+        if is_crypto:
+            sector = "Crypto"
+        else:
+            sector = info.get("sector", "Unknown")
+            if sector == "N/A" or sector is None:
+                sector = "Unknown"
+
+        industry = info.get("industry", "Unknown")
+        if industry == "N/A" or industry is None:
+            industry = "Unknown"
+
+        name = info.get("longName", symbol)
+        if name == "N/A" or name is None:
+            name = symbol
+
+        return {
+            'name': name,
+            'sector': sector,
+            'industry': industry,
+            'market_cap': market_cap,
+        }
@@ -0,0 +1,20 @@
+from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from .instrumentation import registry
+
+@staff_member_required
+def request_metrics(request):
+    """Histogramme glissant par vue : latence, requêtes SQL, temps DB et appels HTTP sortants"""
+    if request.GET.get('reset') == '1':
+        registry.reset()
+    
+    views = registry.snapshot()
+    view_filter = request.GET.get('view')
+    if view_filter:
+        views = [v for v in views if view_filter in v['view']]
+    
+    return JsonResponse({
+        'success': True,
+        'window': registry.window,
+        'views': views,
+    })
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2025-09-02 18:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("trading_app", "0012_automationconfig_auto_refresh_tokens"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TradeAggregate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "base_symbol",
+                    models.CharField(
+                        help_text="Symbole sans suffixe de marché (ex: AAPL pour AAPL:XNAS)",
+                        max_length=50,
+                    ),
+                ),
+                ("platform", models.CharField(max_length=20)),
+                (
+                    "buy_quantity",
+                    models.DecimalField(decimal_places=8, default=0, max_digits=28),
+                ),
+                (
+                    "buy_notional",
+                    models.DecimalField(decimal_places=8, default=0, max_digits=28),
+                ),
+                (
+                    "sell_quantity",
+                    models.DecimalField(decimal_places=8, default=0, max_digits=28),
+                ),
+                (
+                    "sell_notional",
+                    models.DecimalField(decimal_places=8, default=0, max_digits=28),
+                ),
+                ("buy_count", models.IntegerField(default=0)),
+                ("sell_count", models.IntegerField(default=0)),
+                ("last_trade_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trade_aggregates",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "base_symbol"],
+                        name="trading_app_user_id_eb9eb7_idx",
+                    )
+                ],
+                "unique_together": {("user", "base_symbol", "platform")},
+            },
+        ),
+    ]
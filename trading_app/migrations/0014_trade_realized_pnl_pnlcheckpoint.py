@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2025-09-04 20:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("trading_app", "0013_tradeaggregate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trade",
+            name="realized_pnl",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=8,
+                help_text="P&L réalisé par ce fill (calculé par le moteur FIFO)",
+                max_digits=20,
+                null=True,
+            ),
+        ),
+        migrations.CreateModel(
+            name="PnLCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_trade_id", models.BigIntegerField(default=0)),
+                ("last_trade_at", models.DateTimeField(blank=True, null=True)),
+                ("processed_fills", models.IntegerField(default=0)),
+                ("open_lots", models.JSONField(default=dict)),
+                (
+                    "position_quantity",
+                    models.DecimalField(decimal_places=8, default=0, max_digits=28),
+                ),
+                (
+                    "realized_pnl",
+                    models.DecimalField(decimal_places=8, default=0, max_digits=20),
+                ),
+                (
+                    "unrealized_pnl",
+                    models.DecimalField(decimal_places=8, default=0, max_digits=20),
+                ),
+                (
+                    "mark_price",
+                    models.DecimalField(
+                        blank=True, decimal_places=8, max_digits=20, null=True
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "asset_tradable",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pnl_checkpoints",
+                        to="trading_app.assettradable",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pnl_checkpoints",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "asset_tradable")},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2025-09-07 10:02
+
+import logging
+
+from django.db import migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+
+TRIGRAM_INDEXES = [
+    ("trading_app_allassets_symbol_trgm", "symbol"),
+    ("trading_app_allassets_name_trgm", "name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Index GIN pg_trgm pour la recherche d'actifs (PostgreSQL uniquement)"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for index_name, column in TRIGRAM_INDEXES:
+                schema_editor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {index_name} ON trading_app_allassets '
+                    f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+                )
+    except Exception as e:
+        # Extension indisponible (droits insuffisants) : la recherche utilisera l'index en mémoire
+        logger.warning(f"⚠️ Index pg_trgm non créés: {e}")
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index_name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trading_app", "0014_trade_realized_pnl_pnlcheckpoint"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
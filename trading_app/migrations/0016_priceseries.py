@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2025-09-10 19:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trading_app", "0015_allassets_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceSeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("candles", models.JSONField(default=dict)),
+                ("candle_count", models.IntegerField(default=0)),
+                ("first_candle_at", models.BigIntegerField(blank=True, null=True)),
+                ("last_candle_at", models.BigIntegerField(blank=True, null=True)),
+                ("last_close", models.FloatField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "asset",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_series",
+                        to="trading_app.asset",
+                    ),
+                ),
+            ],
+        ),
+    ]
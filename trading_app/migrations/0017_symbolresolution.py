@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2025-09-11 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trading_app", "0016_priceseries"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SymbolResolution",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "symbol",
+                    models.CharField(
+                        help_text="Symbole interne nettoyé (ex: BTCEUR, AAPL)",
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "provider",
+                    models.CharField(
+                        choices=[("yahoo", "Yahoo Finance"), ("coingecko", "CoinGecko")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "provider_symbol",
+                    models.CharField(
+                        blank=True,
+                        help_text="Ticker chez le fournisseur (ex: BTC-USD, bitcoin). Vide = non résolu",
+                        max_length=100,
+                    ),
+                ),
+                ("is_resolved", models.BooleanField(default=False)),
+                (
+                    "is_manual",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Saisie manuelle : jamais écrasée par la résolution automatique",
+                    ),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("last_checked_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("symbol", "provider")},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2025-09-12 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trading_app", "0017_symbolresolution"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="brokercredentials",
+            name="base_url",
+            field=models.URLField(
+                blank=True,
+                help_text="Surcharge de l'URL de l'API (tests de charge)",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2025-09-12 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trading_app", "0018_brokercredentials_base_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="automationexecutionlog",
+            name="stage_timings",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Durées, requêtes SQL et appels HTTP par étape",
+            ),
+        ),
+        migrations.AddField(
+            model_name="automationexecutionlog",
+            name="dominant_stage",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="Étape la plus longue du cycle",
+                max_length=50,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="automationexecutionlog",
+            index=models.Index(
+                fields=["user", "execution_time"], name="trading_app_user_id_47f1ad_idx"
+            ),
+        ),
+    ]
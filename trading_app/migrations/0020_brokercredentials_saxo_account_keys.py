@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2025-09-12 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trading_app", "0019_automationexecutionlog_stage_timings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="brokercredentials",
+            name="saxo_account_key",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name="brokercredentials",
+            name="saxo_client_key",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
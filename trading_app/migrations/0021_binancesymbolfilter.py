@@ -0,0 +1,92 @@
+# Generated by Django 4.2.7 on 2025-09-12 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trading_app", "0020_brokercredentials_saxo_account_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BinanceSymbolFilter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        help_text="URL de l'API Binance (live, testnet ou serveur local)",
+                        max_length=200,
+                    ),
+                ),
+                ("symbol", models.CharField(max_length=30)),
+                ("base_asset", models.CharField(max_length=20)),
+                ("quote_asset", models.CharField(max_length=20)),
+                ("status", models.CharField(max_length=20)),
+                ("is_spot_trading_allowed", models.BooleanField(default=True)),
+                (
+                    "tick_size",
+                    models.DecimalField(
+                        blank=True, decimal_places=8, max_digits=28, null=True
+                    ),
+                ),
+                (
+                    "min_price",
+                    models.DecimalField(
+                        blank=True, decimal_places=8, max_digits=28, null=True
+                    ),
+                ),
+                (
+                    "max_price",
+                    models.DecimalField(
+                        blank=True, decimal_places=8, max_digits=28, null=True
+                    ),
+                ),
+                (
+                    "step_size",
+                    models.DecimalField(
+                        blank=True, decimal_places=8, max_digits=28, null=True
+                    ),
+                ),
+                (
+                    "min_qty",
+                    models.DecimalField(
+                        blank=True, decimal_places=8, max_digits=28, null=True
+                    ),
+                ),
+                (
+                    "max_qty",
+                    models.DecimalField(
+                        blank=True, decimal_places=8, max_digits=28, null=True
+                    ),
+                ),
+                (
+                    "min_notional",
+                    models.DecimalField(
+                        blank=True, decimal_places=8, max_digits=28, null=True
+                    ),
+                ),
+                (
+                    "max_notional",
+                    models.DecimalField(
+                        blank=True, decimal_places=8, max_digits=28, null=True
+                    ),
+                ),
+                ("apply_min_to_market", models.BooleanField(default=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("source", "symbol")},
+            },
+        ),
+    ]
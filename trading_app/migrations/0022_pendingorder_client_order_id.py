@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2025-09-12 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trading_app", "0021_binancesymbolfilter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pendingorder",
+            name="client_order_id",
+            field=models.CharField(
+                blank=True,
+                help_text="Identifiant client (idempotence des renvois) : newClientOrderId Binance, ExternalReference Saxo",
+                max_length=64,
+                null=True,
+                unique=True,
+            ),
+        ),
+    ]
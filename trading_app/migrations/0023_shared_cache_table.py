@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2025-09-13 09:15
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    """Table du cache partagé (DatabaseCache) quand REDIS_URL n'est pas défini"""
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trading_app", "0022_pendingorder_client_order_id"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
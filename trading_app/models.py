@@ -124,6 +124,76 @@ class Asset(models.Model):
         clean_symbol = symbol.split(':')[0].split('_')[0].upper()
         return cls.objects.filter(symbol_clean=clean_symbol).first()
 
+class PriceSeries(models.Model):
+    """Bougies d'un Asset en colonnes triées par timestamp epoch (dérivées de price_history)"""
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, related_name='price_series')
+    
+    # {"t": [epoch s], "o": [...], "h": [...], "l": [...], "c": [...], "v": [...]} triés par t
+    candles = models.JSONField(default=dict)
+    candle_count = models.IntegerField(default=0)
+    first_candle_at = models.BigIntegerField(null=True, blank=True)
+    last_candle_at = models.BigIntegerField(null=True, blank=True)
+    last_close = models.FloatField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.asset} - {self.candle_count} bougies"
+
+class SymbolResolution(models.Model):
+    """Ticker fournisseur (Yahoo, CoinGecko) correspondant à un symbole interne, résolu une seule fois"""
+    PROVIDER_CHOICES = [
+        ('yahoo', 'Yahoo Finance'),
+        ('coingecko', 'CoinGecko'),
+    ]
+
+    symbol = models.CharField(max_length=50, help_text="Symbole interne nettoyé (ex: BTCEUR, AAPL)")
+    provider = models.CharField(max_length=20, choices=PROVIDER_CHOICES)
+    provider_symbol = models.CharField(max_length=100, blank=True, help_text="Ticker chez le fournisseur (ex: BTC-USD, bitcoin). Vide = non résolu")
+    is_resolved = models.BooleanField(default=False)
+    is_manual = models.BooleanField(default=False, help_text="Saisie manuelle : jamais écrasée par la résolution automatique")
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['symbol', 'provider']
+
+    def __str__(self):
+        target = self.provider_symbol if self.is_resolved else 'non résolu'
+        return f"{self.symbol} ({self.provider}) -> {target}"
+
+class BinanceSymbolFilter(models.Model):
+    """Filtres d'ordre d'une paire Binance (exchangeInfo), pour valider les ordres avant envoi"""
+    source = models.CharField(max_length=200, help_text="URL de l'API Binance (live, testnet ou serveur local)")
+    symbol = models.CharField(max_length=30)
+    base_asset = models.CharField(max_length=20)
+    quote_asset = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    is_spot_trading_allowed = models.BooleanField(default=True)
+    
+    # PRICE_FILTER, LOT_SIZE, NOTIONAL / MIN_NOTIONAL (vide = filtre absent)
+    tick_size = models.DecimalField(max_digits=28, decimal_places=8, null=True, blank=True)
+    min_price = models.DecimalField(max_digits=28, decimal_places=8, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=28, decimal_places=8, null=True, blank=True)
+    step_size = models.DecimalField(max_digits=28, decimal_places=8, null=True, blank=True)
+    min_qty = models.DecimalField(max_digits=28, decimal_places=8, null=True, blank=True)
+    max_qty = models.DecimalField(max_digits=28, decimal_places=8, null=True, blank=True)
+    min_notional = models.DecimalField(max_digits=28, decimal_places=8, null=True, blank=True)
+    max_notional = models.DecimalField(max_digits=28, decimal_places=8, null=True, blank=True)
+    apply_min_to_market = models.BooleanField(default=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['source', 'symbol']
+    
+    def __str__(self):
+        return f"{self.symbol} ({self.status}) step {self.step_size} tick {self.tick_size} min {self.min_notional}"
+
 class AssetTradable(models.Model):
     """Actifs tradables sur une plateforme spécifique"""
     # Référence obligatoire vers AllAssets
@@ -259,12 +329,18 @@ class BrokerCredentials(models.Model):
     saxo_access_token = models.TextField(blank=True, null=True)
     saxo_refresh_token = models.TextField(blank=True, null=True)
     saxo_token_expires_at = models.DateTimeField(blank=True, null=True)
+    # Clés de compte découvertes au premier appel (/port/v1/accounts/me, /port/v1/clients/me)
+    saxo_account_key = models.CharField(max_length=100, blank=True, null=True)
+    saxo_client_key = models.CharField(max_length=100, blank=True, null=True)
     
     # Credentials Binance
     binance_api_key = models.CharField(max_length=100, blank=True, null=True)
     binance_api_secret = models.CharField(max_length=100, blank=True, null=True)
     binance_testnet = models.BooleanField(default=False)
     
+    # URL de l'API (serveur de test local, ex: http://127.0.0.1:8765) ; vide = API officielle
+    base_url = models.URLField(blank=True, null=True, help_text="Surcharge de l'URL de l'API (tests de charge)")
+    
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -294,6 +370,10 @@ class BrokerCredentials(models.Model):
                 'refresh_token': self.saxo_refresh_token,
                 'token_expires_at': self.saxo_token_expires_at,
                 'environment': self.environment,
+                'base_url': self.base_url,
+                'credentials_id': self.pk,
+                'account_key': self.saxo_account_key,
+                'client_key': self.saxo_client_key,
             }
         elif self.broker_type == 'binance':
             return {
@@ -301,6 +381,7 @@ class BrokerCredentials(models.Model):
                 'api_secret': self.binance_api_secret,
                 'testnet': self.binance_testnet,
                 'environment': self.environment,
+                'base_url': self.base_url,
             }
         return {}
 
@@ -599,10 +680,75 @@ class Trade(models.Model):
     side = models.CharField(max_length=4)  # BUY, SELL
     timestamp = models.DateTimeField(auto_now_add=True)
     platform = models.CharField(max_length=20)
+    realized_pnl = models.DecimalField(max_digits=20, decimal_places=8, null=True, blank=True, help_text="P&L réalisé par ce fill (calculé par le moteur FIFO)")
     
     def __str__(self):
         return f"{self.side} {self.size} {self.asset_tradable.symbol} @ {self.price}"
 
+class TradeAggregate(models.Model):
+    """Agrégats courants des trades par utilisateur, symbole de base et plateforme"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='trade_aggregates')
+    base_symbol = models.CharField(max_length=50, help_text="Symbole sans suffixe de marché (ex: AAPL pour AAPL:XNAS)")
+    platform = models.CharField(max_length=20)
+    
+    # Sommes courantes
+    buy_quantity = models.DecimalField(max_digits=28, decimal_places=8, default=0)
+    buy_notional = models.DecimalField(max_digits=28, decimal_places=8, default=0)
+    sell_quantity = models.DecimalField(max_digits=28, decimal_places=8, default=0)
+    sell_notional = models.DecimalField(max_digits=28, decimal_places=8, default=0)
+    buy_count = models.IntegerField(default=0)
+    sell_count = models.IntegerField(default=0)
+    last_trade_at = models.DateTimeField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'base_symbol', 'platform']
+        indexes = [
+            models.Index(fields=['user', 'base_symbol']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.base_symbol} ({self.platform}) - {self.trade_count} trades"
+    
+    @property
+    def trade_count(self):
+        return self.buy_count + self.sell_count
+    
+    @property
+    def net_quantity(self):
+        return self.buy_quantity - self.sell_quantity
+
+class PnLCheckpoint(models.Model):
+    """État du moteur de P&L FIFO par utilisateur et actif (reprise incrémentale)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pnl_checkpoints')
+    asset_tradable = models.ForeignKey(AssetTradable, on_delete=models.CASCADE, related_name='pnl_checkpoints')
+    
+    # Dernier fill traité (ordre timestamp, id)
+    last_trade_id = models.BigIntegerField(default=0)
+    last_trade_at = models.DateTimeField(null=True, blank=True)
+    processed_fills = models.IntegerField(default=0)
+    
+    # Lots FIFO ouverts : {"q": [quantités signées], "p": [prix]}
+    open_lots = models.JSONField(default=dict)
+    
+    position_quantity = models.DecimalField(max_digits=28, decimal_places=8, default=0)
+    realized_pnl = models.DecimalField(max_digits=20, decimal_places=8, default=0)
+    unrealized_pnl = models.DecimalField(max_digits=20, decimal_places=8, default=0)
+    mark_price = models.DecimalField(max_digits=20, decimal_places=8, null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'asset_tradable']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.asset_tradable.symbol} - réalisé {self.realized_pnl} / latent {self.unrealized_pnl}"
+    
+    @property
+    def total_pnl(self):
+        return self.realized_pnl + self.unrealized_pnl
+
 class PendingOrder(models.Model):
     """Modèle pour les ordres en cours"""
     
@@ -639,6 +785,7 @@ class PendingOrder(models.Model):
     
     # Détails de l'ordre
     order_id = models.CharField(max_length=100, unique=True)  # ID unique du broker
+    client_order_id = models.CharField(max_length=64, unique=True, null=True, blank=True, help_text="Identifiant client (idempotence des renvois) : newClientOrderId Binance, ExternalReference Saxo")
     order_type = models.CharField(max_length=20, choices=ORDER_TYPE_CHOICES, default='MARKET')
     side = models.CharField(max_length=4, choices=SIDE_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
@@ -769,8 +916,15 @@ class AutomationExecutionLog(models.Model):
     errors = models.TextField(blank=True, help_text="Erreurs rencontrées")
     execution_duration = models.DurationField(null=True, blank=True)
     
+    # Découpage par étape : {étape: {count, duration_ms, queries, db_ms, http_count, http_ms, items?}}
+    stage_timings = models.JSONField(default=dict, blank=True, help_text="Durées, requêtes SQL et appels HTTP par étape")
+    dominant_stage = models.CharField(max_length=50, blank=True, db_index=True, help_text="Étape la plus longue du cycle")
+    
     class Meta:
         ordering = ['-execution_time']
+        indexes = [
+            models.Index(fields=['user', 'execution_time']),
+        ]
     
     def __str__(self):
         return f"Exécution {self.user.username} - {self.status} - {self.execution_time}"
@@ -0,0 +1,510 @@
+"""
+Exécution des ordres des stratégies : intentions, contrôles pré-trade, envoi asynchrone
+
+execute_strategy passait ses ordres en ligne (place_*_order_with_asset) : AllAssets et
+AssetTradable recherchés à chaque appel, et la requête HTTP bloquée jusqu'à la réponse
+du courtier. Un timeout laissait l'ordre dans un état inconnu ; le relancer pouvait
+l'exécuter deux fois.
+
+Une stratégie soumet maintenant une intention d'ordre :
+
+1. l'instrument (AssetTradable, symbole, UIC) est résolu une fois puis gardé en mémoire ;
+2. les contrôles pré-trade ne font aucun appel réseau : quantité, ordre précédent encore
+   en vol, plafond ORDER_MAX_NOTIONAL, filtres Binance (index exchangeInfo en cache),
+   solde connu (positions synchronisées par REST ou par le flux utilisateur) ;
+3. un PendingOrder est créé avec un identifiant client déterministe (stratégie +
+   exécution + sens) : la même intention soumise deux fois ne crée qu'un ordre ;
+4. un pool borné (ORDER_EXECUTION_WORKERS threads, ORDER_EXECUTION_QUEUE_SIZE ordres en
+   attente) l'envoie au courtier. Après un timeout, l'ordre est d'abord recherché par son
+   identifiant client. Binance : renvoyé, avec le même identifiant, seulement s'il n'a
+   pas été reçu. Saxo (ordres ouverts puis activités) : jamais renvoyé, un ordre
+   introuvable passe UNKNOWN et la synchronisation des ordres tranche.
+
+Chaque transition est ajoutée à PendingOrder.broker_data['lifecycle'] :
+QUEUED, SUBMITTED, UNCERTAIN, RECOVERED, ACCEPTED, REJECTED, UNKNOWN.
+
+    result = order_executor.submit(strategy, 'BUY', 0.5, execution=execution, reference_price=43000)
+    # {'success': True, 'status': 'PENDING', 'client_order_id': 'st12-ex345-B', ...}
+    order_executor.wait(result['client_order_id'], timeout=30)
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .brokers.registry import broker_registry
+from .models import AllAssets, AssetTradable, AssetType, Market, PendingOrder, Position, Strategy, StrategyExecution
+from .telegram_notifications import telegram_notifier
+
+logger = logging.getLogger(__name__)
+
+# Précision de Position.size (2 décimales) : marge avant de refuser pour solde insuffisant.
+# En dessous de _BALANCE_MIN_CHECKED, la marge dépasse 1 % du montant : pas de contrôle.
+_BALANCE_TOLERANCE = Decimal('0.01')
+_BALANCE_MIN_CHECKED = Decimal('1')
+
+
+# Clés de PendingOrder.broker_data écrites par le pipeline : jamais écrasées par les données du courtier
+PIPELINE_KEYS = ('strategy_id', 'execution_id', 'symbol', 'uic', 'asset_type', 'quantity', 'price',
+                 'reference_price', 'lifecycle', 'response')
+
+
+def merge_broker_data(current: Optional[Dict[str, Any]], update: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """broker_data mis à jour par la synchronisation ou le flux sans perdre l'état du pipeline"""
+    current = current or {}
+    merged = {**current, **(update or {})}
+    merged.update({key: current[key] for key in PIPELINE_KEYS if key in current})
+    return merged
+
+
+class OrderRejected(Exception):
+    """Intention refusée avant envoi (contrôle pré-trade)"""
+
+
+def client_order_id(strategy_id: int, execution_id: Optional[int], side: str) -> str:
+    """
+    Identifiant client déterministe : newClientOrderId Binance ([A-Za-z0-9-], 36 max),
+    ExternalReference et x-request-id Saxo. Sans exécution, un suffixe horodaté le rend unique.
+    """
+    if execution_id:
+        return f"st{strategy_id}-ex{execution_id}-{side[0].upper()}"
+    return f"st{strategy_id}-t{time.time_ns() // 1000}-{side[0].upper()}"
+
+
+class OrderExecutionService:
+    """Intentions d'ordre des stratégies : contrôles pré-trade puis envoi par un pool borné"""
+
+    def __init__(self, workers: Optional[int] = None, queue_size: Optional[int] = None):
+        self._workers = workers
+        self._queue_size = queue_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
+        self._futures: Dict[str, Future] = {}
+        self._instruments: Dict[Tuple[int, int], Tuple[Dict[str, Any], float]] = {}
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def _pool(self) -> Tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+        with self._lock:
+            if self._executor is None:
+                workers = self._workers or getattr(settings, 'ORDER_EXECUTION_WORKERS', 4)
+                queue_size = self._queue_size or getattr(settings, 'ORDER_EXECUTION_QUEUE_SIZE', 100)
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='order-execution')
+                # Ordres en attente + en cours d'envoi : au-delà, l'intention est refusée
+                self._slots = threading.BoundedSemaphore(workers + queue_size)
+            return self._executor, self._slots
+
+    # --- Résolution des instruments ---
+
+    def resolve_instrument(self, asset, broker_credentials) -> Optional[Dict[str, Any]]:
+        """
+        AssetTradable, symbole de trading et UIC d'un Asset pour un courtier
+
+        Même correspondance que place_*_order_with_asset (AllAssets puis AssetTradable,
+        créé si absent), gardée ORDER_EXECUTION_RESOLVE_TTL secondes.
+        """
+        key = (asset.id, broker_credentials.id)
+        cached = self._instruments.get(key)
+        if cached and time.monotonic() < cached[1]:
+            return cached[0]
+
+        platform = broker_credentials.broker_type
+        symbol = asset.symbol_clean or asset.symbol
+        all_asset = AllAssets.objects.filter(symbol__icontains=symbol, platform=platform).first()
+        if not all_asset:
+            return None
+
+        asset_tradable = AssetTradable.objects.filter(symbol__startswith=symbol, platform=platform).first()
+        if not asset_tradable:
+            asset_type, _ = AssetType.objects.get_or_create(name='Crypto' if platform == 'binance' else 'Stock')
+            market, _ = Market.objects.get_or_create(name='Binance' if platform == 'binance' else 'NASDAQ')
+            asset_tradable = AssetTradable.objects.create(
+                symbol=all_asset.symbol, platform=platform, all_asset=all_asset,
+                name=all_asset.name, asset_type=asset_type, market=market,
+            )
+            logger.info(f"✅ AssetTradable créé automatiquement: {asset_tradable.symbol}")
+
+        trading_symbol = asset_tradable.symbol
+        if platform == 'binance' and not trading_symbol.endswith(('EUR', 'USDT')):
+            trading_symbol = f"{trading_symbol}EUR"
+
+        instrument = {
+            'asset_tradable_id': asset_tradable.id,
+            'symbol': trading_symbol,
+            'uic': all_asset.saxo_uic,
+            'asset_type': all_asset.asset_type or 'Stock',
+        }
+        ttl = getattr(settings, 'ORDER_EXECUTION_RESOLVE_TTL', 300)
+        self._instruments[key] = (instrument, time.monotonic() + ttl)
+        return instrument
+
+    # --- Contrôles pré-trade ---
+
+    def pre_trade_check(self, strategy, instrument: Dict[str, Any], side: str, quantity, order_type: str = 'MARKET',
+                        price=None, reference_price=None, brokers=None) -> Tuple[Decimal, Optional[Decimal]]:
+        """
+        Quantité et prix arrondis si l'ordre passe les contrôles (aucun appel réseau)
+
+        Raises:
+            OrderRejected: l'ordre ne doit pas être envoyé
+        """
+        try:
+            quantity = Decimal(str(quantity))
+            price = Decimal(str(price)) if price is not None else None
+            reference_price = Decimal(str(reference_price)) if reference_price else None
+        except InvalidOperation:
+            raise OrderRejected(f"Quantité ou prix invalide: {quantity} / {price}")
+        if quantity <= 0:
+            raise OrderRejected(f"Quantité invalide: {quantity}")
+
+        window = getattr(settings, 'ORDER_EXECUTION_INFLIGHT_WINDOW', 600)
+        in_flight = PendingOrder.objects.filter(
+            client_order_id__startswith=f"st{strategy.id}-", status='PENDING',
+            created_at__gte=timezone.now() - timedelta(seconds=window),
+        )
+        if in_flight.exists():
+            raise OrderRejected("Ordre précédent de la stratégie encore en cours d'envoi")
+
+        if strategy.broker.broker_type == 'binance':
+            # Dernière copie de l'index, même périmée : jamais de revalidation réseau ici
+            from .brokers.binance_exchange import cached_exchange_index, OrderValidationError
+            index = cached_exchange_index((brokers or broker_registry).get(strategy.broker).base_url)
+            if index is not None and instrument['symbol'] in index:
+                try:
+                    quantity, price = index.prepare_order(instrument['symbol'], side, quantity, order_type, price, reference_price)
+                except OrderValidationError as e:
+                    raise OrderRejected(str(e))
+                instrument = {**instrument, 'pair': index.split(instrument['symbol'])}
+
+        notional_price = price or reference_price
+        max_notional = Decimal(str(getattr(settings, 'ORDER_MAX_NOTIONAL', 0)))
+        if max_notional and notional_price and quantity * notional_price > max_notional:
+            raise OrderRejected(f"Montant {quantity * notional_price:.2f} au-delà du plafond ORDER_MAX_NOTIONAL ({max_notional})")
+
+        self._check_balance(strategy, instrument, side, quantity, notional_price)
+        return quantity, price
+
+    def _check_balance(self, strategy, instrument: Dict[str, Any], side: str, quantity: Decimal,
+                       notional_price: Optional[Decimal]):
+        """
+        Solde connu en base ; aucune position synchronisée = solde inconnu, pas de refus
+
+        Position.size n'a que 2 décimales : le contrôle est ignoré pour un montant requis
+        inférieur à 1 (la plupart des quantités crypto), le courtier refusant de toute
+        façon un solde insuffisant.
+        """
+        positions = Position.objects.filter(user=strategy.user)
+        if strategy.broker.broker_type == 'binance':
+            if not instrument.get('pair'):
+                return
+            base, quote = instrument['pair']
+            if side == 'SELL':
+                asset, needed = base, quantity
+            elif notional_price:
+                asset, needed = quote, quantity * notional_price
+            else:
+                return
+            positions = positions.filter(asset_tradable__platform='binance', broker_position_id=asset)
+        elif side == 'SELL':
+            asset, needed = instrument['symbol'], quantity
+            positions = positions.filter(asset_tradable_id=instrument['asset_tradable_id'])
+        else:
+            # Achat Saxo : marge et devise du compte, laissées au contrôle du courtier
+            return
+
+        if needed < _BALANCE_MIN_CHECKED:
+            # Position.size arrondi au centième : 0.004 BTC ne se compare pas à un solde de 0.00
+            return
+        if not positions.exists():
+            return
+        held = positions.filter(status='OPEN').aggregate(total=Sum('size'))['total'] or Decimal('0')
+        if held + _BALANCE_TOLERANCE < needed:
+            raise OrderRejected(f"Solde {asset} insuffisant: {held} disponible, {needed:.8f} requis")
+
+    # --- Soumission ---
+
+    def submit(self, strategy, side: str, quantity, execution=None, reference_price=None,
+               order_type: str = 'MARKET', price=None, brokers=None) -> Dict[str, Any]:
+        """
+        Soumet une intention d'ordre : contrôles, PendingOrder, puis envoi par le pool
+
+        Ne bloque jamais sur le courtier. Une intention déjà soumise (même stratégie,
+        exécution et sens) renvoie l'ordre existant au lieu d'en créer un second.
+        brokers : cache d'instances (BrokerRegistry par défaut) utilisé pour l'envoi.
+        """
+        side = side.upper()
+        order_type = order_type.upper()
+        coid = client_order_id(strategy.id, execution.id if execution else None, side)
+
+        existing = PendingOrder.objects.filter(client_order_id=coid).first()
+        if existing is not None:
+            return self.order_result(existing, duplicate=True)
+
+        instrument = self.resolve_instrument(strategy.asset, strategy.broker)
+        if instrument is None:
+            self.stats['rejected'] += 1
+            return {'success': False, 'status': 'REJECTED', 'client_order_id': coid,
+                    'error': f"Aucun AllAssets {strategy.broker.broker_type} trouvé pour {strategy.asset.symbol}"}
+
+        rejection = None
+        try:
+            quantity, price = self.pre_trade_check(strategy, instrument, side, quantity, order_type, price, reference_price,
+                                                   brokers)
+        except OrderRejected as e:
+            rejection = str(e)
+            try:
+                quantity = Decimal(str(quantity))
+            except InvalidOperation:
+                quantity = Decimal('0')
+
+        data = {
+            'strategy_id': strategy.id,
+            'execution_id': execution.id if execution else None,
+            'symbol': instrument['symbol'],
+            'uic': instrument['uic'],
+            'asset_type': instrument['asset_type'],
+            'quantity': str(quantity),
+            'price': str(price) if price is not None else None,
+            'reference_price': str(reference_price) if reference_price else None,
+            'lifecycle': [],
+        }
+        try:
+            pending = PendingOrder.objects.create(
+                user=strategy.user,
+                asset_tradable_id=instrument['asset_tradable_id'],
+                broker_credentials=strategy.broker,
+                order_id=coid,
+                client_order_id=coid,
+                order_type=order_type,
+                side=side,
+                status='PENDING',
+                original_quantity=quantity,
+                remaining_quantity=quantity,
+                price=price,
+                broker_data=data,
+            )
+        except IntegrityError:
+            # Soumission concurrente de la même intention
+            return self.order_result(PendingOrder.objects.get(client_order_id=coid), duplicate=True)
+
+        if rejection:
+            self._transition(pending, 'REJECTED', 'REJECTED', rejection)
+            self._on_rejected(pending, rejection)
+            return self.order_result(pending)
+
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            self._transition(pending, 'REJECTED', 'REJECTED', "File d'envoi des ordres pleine")
+            self._on_rejected(pending, "File d'envoi des ordres pleine")
+            return self.order_result(pending)
+
+        self._transition(pending, 'PENDING', 'QUEUED')
+        self.stats['submitted'] += 1
+
+        def enqueue():
+            future = executor.submit(self._run, pending.pk, brokers)
+            with self._lock:
+                self._futures[coid] = future
+            future.add_done_callback(lambda _: self._done(coid, slots))
+
+        # Le worker doit voir le PendingOrder : envoi après le commit de la transaction en cours
+        transaction.on_commit(enqueue)
+        return self.order_result(pending)
+
+    def _done(self, coid: str, slots: threading.BoundedSemaphore):
+        slots.release()
+        with self._lock:
+            self._futures.pop(coid, None)
+
+    def wait(self, coid: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Attend la fin de l'envoi d'un ordre (commandes, tests) et renvoie son état"""
+        with self._lock:
+            future = self._futures.get(coid)
+        if future is not None:
+            future.result(timeout=timeout)
+        return self.order_result(PendingOrder.objects.get(client_order_id=coid))
+
+    @staticmethod
+    def order_result(pending: PendingOrder, duplicate: bool = False) -> Dict[str, Any]:
+        lifecycle = pending.broker_data.get('lifecycle', [])
+        result = {
+            'success': pending.status != 'REJECTED',
+            'status': pending.status,
+            'client_order_id': pending.client_order_id,
+            'order_id': pending.order_id if pending.order_id != pending.client_order_id else None,
+            'pending_order_id': pending.pk,
+            'quantity': float(Decimal(pending.broker_data.get('quantity') or pending.original_quantity)),
+            'event': lifecycle[-1]['event'] if lifecycle else None,
+        }
+        if pending.status == 'REJECTED' and lifecycle:
+            result['error'] = lifecycle[-1]['detail']
+        if duplicate:
+            result['duplicate'] = True
+        return result
+
+    # --- Envoi (worker) ---
+
+    def _run(self, pending_id: int, brokers=None):
+        close_old_connections()
+        try:
+            pending = PendingOrder.objects.select_related('broker_credentials', 'user').get(pk=pending_id)
+            broker = (brokers or broker_registry).authenticated(pending.broker_credentials)
+            if broker is None:
+                self._transition(pending, 'REJECTED', 'REJECTED', f"Échec authentification {pending.broker_credentials.broker_type}")
+                self._on_rejected(pending, pending.broker_data['lifecycle'][-1]['detail'])
+                return
+
+            max_attempts = getattr(settings, 'ORDER_EXECUTION_MAX_ATTEMPTS', 3)
+            delay = getattr(settings, 'ORDER_EXECUTION_RETRY_DELAY', 1.0)
+            result = {}
+            for attempt in range(1, max_attempts + 1):
+                if attempt > 1:
+                    time.sleep(delay * 2 ** (attempt - 2))
+                    # Avant tout renvoi : l'ordre a-t-il été reçu malgré le timeout ?
+                    try:
+                        found = self._lookup(broker, pending)
+                    except Exception as e:
+                        # Jamais de renvoi à l'aveugle : un ordre exécuté serait doublé
+                        self._transition(pending, 'PENDING', 'UNCERTAIN', f"Recherche impossible: {e}")
+                        continue
+                    if found:
+                        self.stats['recovered'] += 1
+                        self._transition(pending, 'PENDING', 'RECOVERED', f"Ordre retrouvé (tentative {attempt})")
+                        result = found
+                        break
+                    if pending.broker_credentials.broker_type == 'saxo':
+                        # Activités Saxo publiées avec retard : un renvoi pourrait doubler l'ordre
+                        self.stats['unknown'] += 1
+                        self._transition(pending, 'PENDING', 'UNKNOWN', "Ordre Saxo introuvable après timeout, non renvoyé")
+                        return
+                    self.stats['retries'] += 1
+
+                self._transition(pending, 'PENDING', 'SUBMITTED', f"Tentative {attempt}")
+                result = self._send(broker, pending)
+                if not result.get('uncertain'):
+                    break
+                self._transition(pending, 'PENDING', 'UNCERTAIN', result['error'])
+            else:
+                # Toujours incertain : la synchronisation des ordres tranchera
+                self.stats['unknown'] += 1
+                self._transition(pending, 'PENDING', 'UNKNOWN', "Ordre non confirmé après toutes les tentatives")
+                return
+
+            if 'error' in result:
+                self.stats['rejected'] += 1
+                self._transition(pending, 'REJECTED', 'REJECTED', str(result['error']))
+                self._on_rejected(pending, str(result['error']))
+            else:
+                self.stats['accepted'] += 1
+                self._accept(pending, result)
+        except Exception as e:
+            logger.exception(f"❌ Erreur envoi ordre {pending_id}: {e}")
+        finally:
+            close_old_connections()
+
+    def _send(self, broker, pending: PendingOrder) -> Dict[str, Any]:
+        data = pending.broker_data
+        quantity = Decimal(data['quantity'])
+        price = Decimal(data['price']) if data.get('price') else None
+        if pending.broker_credentials.broker_type == 'saxo':
+            return broker.place_order(data['symbol'], pending.side, quantity, pending.order_type, price,
+                                      uic=data['uic'], asset_type=data['asset_type'],
+                                      client_order_id=pending.client_order_id)
+        reference_price = Decimal(data['reference_price']) if data.get('reference_price') else None
+        return broker.place_order(data['symbol'], pending.side, quantity, pending.order_type, price,
+                                  client_order_id=pending.client_order_id, reference_price=reference_price)
+
+    def _lookup(self, broker, pending: PendingOrder) -> Optional[Dict[str, Any]]:
+        if pending.broker_credentials.broker_type == 'saxo':
+            return broker.get_order_by_client_id(pending.client_order_id, since=pending.created_at)
+        return broker.get_order_by_client_id(pending.broker_data['symbol'], pending.client_order_id)
+
+    def _accept(self, pending: PendingOrder, result: Dict[str, Any]):
+        broker_order_id = str(result.get('orderId') or result.get('OrderId') or '')
+        # Statut brut Binance (NEW, FILLED...) comme la synchronisation REST ; Saxo : en cours
+        status = result.get('status') or 'WORKING'
+        with transaction.atomic():
+            if broker_order_id:
+                # Ordre déjà importé par la synchronisation pendant l'envoi : une seule ligne
+                PendingOrder.objects.filter(
+                    order_id=broker_order_id, broker_credentials=pending.broker_credentials,
+                ).exclude(pk=pending.pk).delete()
+                pending.order_id = broker_order_id
+            if result.get('executedQty') is not None:
+                executed = Decimal(str(result['executedQty']))
+                pending.executed_quantity = executed
+                pending.remaining_quantity = max(pending.original_quantity - executed, Decimal('0'))
+            pending.broker_data['response'] = result
+            self._transition(pending, status, 'ACCEPTED', broker_order_id or 'Renvoi déjà reçu par le courtier',
+                             extra_fields=['order_id', 'executed_quantity', 'remaining_quantity'])
+
+        data = pending.broker_data
+        quantity = Decimal(data['quantity'])
+        reference_price = Decimal(data['reference_price']) if data.get('reference_price') else None
+        if data.get('execution_id'):
+            StrategyExecution.objects.filter(pk=data['execution_id']).update(
+                order_executed=True, order_size=quantity, order_price=reference_price,
+            )
+        strategy = Strategy.objects.select_related('asset').filter(pk=data['strategy_id']).first()
+        if strategy is None:
+            return
+        Strategy.objects.filter(pk=strategy.pk).update(
+            total_trades=F('total_trades') + 1, successful_trades=F('successful_trades') + 1,
+        )
+        try:
+            telegram_notifier.send_order_notification({
+                'symbol': strategy.asset.symbol_clean or strategy.asset.symbol,
+                'asset_name': strategy.asset.name or strategy.asset.symbol,
+                'price': f"{reference_price or 0:.4f}",
+                'quantity': f"{quantity:.4f}",
+                'side': pending.side,
+                'broker': pending.broker_credentials.broker_type.upper(),
+                'strategy': strategy.name,
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur notification Telegram ordre {pending.client_order_id}: {e}")
+
+    def _on_rejected(self, pending: PendingOrder, reason: str):
+        data = pending.broker_data
+        if data.get('execution_id'):
+            StrategyExecution.objects.filter(pk=data['execution_id']).update(error_message=reason)
+        strategy = Strategy.objects.select_related('asset').filter(pk=data.get('strategy_id')).first()
+        if strategy is None:
+            return
+        try:
+            telegram_notifier.send_error_notification({
+                'symbol': strategy.asset.symbol_clean or strategy.asset.symbol,
+                'broker': pending.broker_credentials.broker_type.upper(),
+                'error_message': reason,
+                'strategy': strategy.name,
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur notification d'erreur Telegram ordre {pending.client_order_id}: {e}")
+
+    @staticmethod
+    def _transition(pending: PendingOrder, status: str, event: str, detail: str = '', extra_fields=()):
+        pending.status = status
+        pending.broker_data.setdefault('lifecycle', []).append({
+            'event': event, 'status': status, 'at': timezone.now().isoformat(), 'detail': detail,
+        })
+        pending.save(update_fields=['status', 'broker_data', 'updated_at', *extra_fields])
+        logger.info(f"📨 Ordre {pending.client_order_id}: {event} ({status}) {detail}")
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+order_executor = OrderExecutionService()
@@ -0,0 +1,278 @@
+"""
+Moteur de P&L par lots FIFO
+
+Les fills sont traités par (utilisateur, AssetTradable) dans l'ordre (timestamp, id).
+Chaque fill consomme les lots ouverts de sens opposé (FIFO) et reçoit son P&L réalisé ;
+le reliquat ouvre un nouveau lot. Le P&L latent est évalué contre la dernière bougie
+connue de l'actif. L'état (lots ouverts, dernier fill traité) est sauvegardé dans
+PnLCheckpoint pour ne traiter que les nouveaux fills aux exécutions suivantes.
+"""
+import logging
+from array import array
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from .chart_data import get_series_meta
+from .models import Asset, PnLCheckpoint, Strategy, Trade
+from .trade_aggregates import get_base_symbol
+
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-12
+PNL_QUANTUM = Decimal('0.00000001')
+
+
+class LotBook:
+    """
+    File FIFO de lots ouverts stockée dans deux array('d') (quantités signées, prix).
+
+    Tous les lots ouverts ont le même signe (position longue > 0, courte < 0).
+    Les lots consommés sont sautés via un index de tête, et le tableau est
+    compacté quand plus de la moitié est morte.
+    """
+
+    __slots__ = ('quantities', 'prices', 'head', 'position')
+
+    def __init__(self, quantities=(), prices=()):
+        self.quantities = array('d', quantities)
+        self.prices = array('d', prices)
+        self.head = 0
+        self.position = sum(self.quantities)
+
+    def fill(self, quantity, price):
+        """Applique un fill signé (+achat / -vente) et retourne le P&L réalisé"""
+        realized = 0.0
+        remaining = quantity
+        quantities, prices = self.quantities, self.prices
+
+        while remaining and self.head < len(quantities) and (quantities[self.head] > 0) != (remaining > 0):
+            lot_quantity = quantities[self.head]
+            direction = 1.0 if lot_quantity > 0 else -1.0
+            matched = min(abs(lot_quantity), abs(remaining))
+
+            realized += (price - prices[self.head]) * matched * direction
+
+            lot_quantity -= direction * matched
+            if abs(lot_quantity) <= EPSILON:
+                self.head += 1
+            else:
+                quantities[self.head] = lot_quantity
+
+            remaining += direction * matched
+            if abs(remaining) <= EPSILON:
+                remaining = 0.0
+
+        if remaining:
+            quantities.append(remaining)
+            prices.append(price)
+
+        self.position += quantity
+        if abs(self.position) <= EPSILON:
+            self.position = 0.0
+        self._compact()
+        return realized
+
+    def _compact(self):
+        if self.head > 1024 and self.head * 2 > len(self.quantities):
+            del self.quantities[:self.head]
+            del self.prices[:self.head]
+            self.head = 0
+
+    def unrealized(self, mark_price):
+        """P&L latent des lots ouverts au prix de marché donné"""
+        total = 0.0
+        for i in range(self.head, len(self.quantities)):
+            total += (mark_price - self.prices[i]) * self.quantities[i]
+        return total
+
+    def to_state(self):
+        return {
+            'q': self.quantities[self.head:].tolist(),
+            'p': self.prices[self.head:].tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        state = state or {}
+        return cls(state.get('q', ()), state.get('p', ()))
+
+
+def _to_decimal(value):
+    return Decimal(str(value)).quantize(PNL_QUANTUM)
+
+
+def latest_close(asset_tradable):
+    """Clôture de la dernière bougie connue pour l'actif sous-jacent (None si inconnue)"""
+    asset = Asset.find_by_all_asset_symbol(asset_tradable.symbol)
+    if not asset:
+        return None
+    series = get_series_meta(asset)
+    return series.last_close if series else None
+
+
+class PnLEngine:
+    """Calcul incrémental du P&L FIFO pour un utilisateur"""
+
+    def __init__(self, user, batch_size=2000):
+        self.user = user
+        self.batch_size = batch_size
+
+    def process(self, asset_tradable_ids=None, full=False, mark_prices=None):
+        """
+        Traite les nouveaux fills de l'utilisateur et met à jour les checkpoints.
+
+        Args:
+            asset_tradable_ids: restreindre à certains AssetTradable (None = tous)
+            full: ignorer les checkpoints et tout recalculer
+            mark_prices: {asset_tradable_id: prix} pour forcer le prix de valorisation
+
+        Returns:
+            dict: résumé du traitement
+        """
+        trades = Trade.objects.filter(user=self.user)
+        if asset_tradable_ids is not None:
+            trades = trades.filter(asset_tradable_id__in=asset_tradable_ids)
+
+        keys = trades.values_list('asset_tradable_id', flat=True).distinct().order_by()
+        checkpoints = {
+            cp.asset_tradable_id: cp
+            for cp in PnLCheckpoint.objects.filter(user=self.user).select_related('asset_tradable')
+        }
+
+        # Checkpoints sans trade (trades supprimés) : plus rien à reporter
+        keys = set(keys)
+        orphans = [
+            checkpoint.pk for asset_id, checkpoint in checkpoints.items()
+            if asset_id not in keys and (asset_tradable_ids is None or asset_id in asset_tradable_ids)
+        ]
+        if orphans:
+            PnLCheckpoint.objects.filter(pk__in=orphans).delete()
+
+        processed = 0
+        realized_total = 0.0
+        unrealized_total = 0.0
+        for asset_tradable_id in keys:
+            checkpoint = checkpoints.get(asset_tradable_id)
+            count, checkpoint = self._process_asset(asset_tradable_id, checkpoint, full, mark_prices or {})
+            processed += count
+            realized_total += float(checkpoint.realized_pnl)
+            unrealized_total += float(checkpoint.unrealized_pnl)
+
+        logger.info(f"P&L FIFO {self.user.username}: {processed} fills traités")
+        return {
+            'success': True,
+            'processed_fills': processed,
+            'realized_pnl': realized_total,
+            'unrealized_pnl': unrealized_total,
+        }
+
+    def _process_asset(self, asset_tradable_id, checkpoint, full, mark_prices):
+        trades = Trade.objects.filter(user=self.user, asset_tradable_id=asset_tradable_id)
+
+        if checkpoint is None:
+            checkpoint = PnLCheckpoint(user=self.user, asset_tradable_id=asset_tradable_id)
+        elif not full and checkpoint.last_trade_at is not None:
+            # Un fill antérieur au checkpoint est arrivé : l'ordre FIFO n'est plus valable
+            full = trades.filter(realized_pnl__isnull=True, timestamp__lt=checkpoint.last_trade_at).exists()
+
+        if full or checkpoint.last_trade_at is None:
+            book = LotBook()
+            realized = 0.0
+            processed_fills = 0
+        else:
+            book = LotBook.from_state(checkpoint.open_lots)
+            realized = float(checkpoint.realized_pnl)
+            processed_fills = checkpoint.processed_fills
+            trades = trades.filter(
+                Q(timestamp__gt=checkpoint.last_trade_at) |
+                Q(timestamp=checkpoint.last_trade_at, id__gt=checkpoint.last_trade_id)
+            )
+
+        rows = trades.order_by('timestamp', 'id').values_list('id', 'side', 'size', 'price', 'timestamp')
+
+        count = 0
+        pending = []
+        last_id, last_at = checkpoint.last_trade_id, checkpoint.last_trade_at
+        for trade_id, side, size, price, timestamp in rows.iterator(chunk_size=self.batch_size):
+            quantity = float(size) if str(side).upper() == 'BUY' else -float(size)
+            fill_realized = book.fill(quantity, float(price))
+            realized += fill_realized
+            pending.append(Trade(id=trade_id, realized_pnl=_to_decimal(fill_realized)))
+            last_id, last_at = trade_id, timestamp
+            count += 1
+
+            if len(pending) >= self.batch_size:
+                Trade.objects.bulk_update(pending, ['realized_pnl'])
+                pending = []
+
+        mark_price = mark_prices.get(asset_tradable_id)
+        if mark_price is None:
+            asset_tradable = checkpoint.asset_tradable
+            mark_price = latest_close(asset_tradable)
+
+        with transaction.atomic():
+            if pending:
+                Trade.objects.bulk_update(pending, ['realized_pnl'])
+            checkpoint.last_trade_id = last_id
+            checkpoint.last_trade_at = last_at
+            checkpoint.processed_fills = processed_fills + count
+            checkpoint.open_lots = book.to_state()
+            checkpoint.position_quantity = _to_decimal(book.position)
+            checkpoint.realized_pnl = _to_decimal(realized)
+            checkpoint.mark_price = _to_decimal(mark_price) if mark_price is not None else None
+            checkpoint.unrealized_pnl = _to_decimal(book.unrealized(mark_price)) if mark_price is not None else Decimal('0')
+            checkpoint.save()
+
+        return count, checkpoint
+
+    def update_strategy_statistics(self):
+        """Reporte le P&L FIFO (réalisé + latent) sur Strategy.total_pnl"""
+        pnl_by_symbol = {}
+        for symbol, realized, unrealized in PnLCheckpoint.objects.filter(user=self.user).values_list(
+            'asset_tradable__symbol', 'realized_pnl', 'unrealized_pnl'
+        ):
+            base_symbol = get_base_symbol(symbol).split('_')[0].upper()
+            pnl_by_symbol[base_symbol] = pnl_by_symbol.get(base_symbol, Decimal('0')) + realized + unrealized
+
+        updated = []
+        for strategy in Strategy.objects.filter(user=self.user).select_related('asset'):
+            base_symbol = strategy.asset.get_clean_symbol()
+            if base_symbol in pnl_by_symbol:
+                strategy.total_pnl = pnl_by_symbol[base_symbol].quantize(Decimal('0.01'))
+                updated.append(strategy)
+
+        if updated:
+            Strategy.objects.bulk_update(updated, ['total_pnl'])
+        return len(updated)
+
+
+def invalidate_checkpoints(user, asset_tradable_ids=None):
+    """Supprime les checkpoints (tous ou par AssetTradable) : recalcul complet au prochain passage"""
+    checkpoints = PnLCheckpoint.objects.filter(user=user)
+    if asset_tradable_ids is not None:
+        checkpoints = checkpoints.filter(asset_tradable_id__in=asset_tradable_ids)
+    return checkpoints.delete()[0]
+
+
+def pnl_by_base_symbol(user):
+    """P&L FIFO réalisé/latent agrégé par symbole de base (lecture des checkpoints)"""
+    result = {}
+    rows = PnLCheckpoint.objects.filter(user=user).values('asset_tradable__symbol').annotate(
+        realized=Sum('realized_pnl'), unrealized=Sum('unrealized_pnl')
+    )
+    for row in rows:
+        base_symbol = get_base_symbol(row['asset_tradable__symbol'])
+        current = result.setdefault(base_symbol, {'realized_pnl': Decimal('0'), 'unrealized_pnl': Decimal('0')})
+        current['realized_pnl'] += row['realized'] or 0
+        current['unrealized_pnl'] += row['unrealized'] or 0
+    return result
+
+
+def refresh_user_pnl(user, full=False):
+    """Traite les nouveaux fills puis met à jour les statistiques des stratégies"""
+    engine = PnLEngine(user)
+    result = engine.process(full=full)
+    result['strategies_updated'] = engine.update_strategy_statistics()
+    return result
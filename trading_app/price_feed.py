@@ -0,0 +1,224 @@
+"""
+Dernières cotations reçues des flux de prix des courtiers
+
+Les flux temps réel (run_price_feed : abonnements Saxo /streamingws, miniTicker
+Binance) écrivent ici bid/ask/mid horodatés ; get_asset_price des courtiers et
+l'exécution des stratégies les lisent sans appel réseau, et retombent sur l'API REST
+si la cotation est absente ou plus vieille que PRICE_FEED_MAX_AGE.
+
+Stockage double : dictionnaire du processus (lecture immédiate dans le processus du
+flux) et cache PRICE_FEED_CACHE_ALIAS, partagé entre processus (SHARED_CACHE_ALIAS :
+Redis ou table de la base). run_price_feed refuse de démarrer sur un cache locmem :
+les cotations n'y seraient vues par aucun autre processus.
+"""
+
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+
+from .models import AllAssets, Position, Strategy
+
+logger = logging.getLogger(__name__)
+
+_QUOTE_KEY = 'trading_app:live_price:{}:{}'
+
+# Ordre de préférence des actifs de cotation quand un symbole d'asset n'est pas une paire (BTC -> BTCUSDT)
+BINANCE_QUOTE_PREFERENCE = ('USDT', 'USDC', 'FDUSD', 'EUR', 'BTC', 'ETH', 'BNB')
+
+
+class PriceStore:
+    """Cotations par (plateforme, clé) : UIC pour Saxo, symbole pour Binance"""
+
+    def __init__(self, alias: Optional[str] = None):
+        self._alias = alias
+        self._local: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self._alias or getattr(settings, 'PRICE_FEED_CACHE_ALIAS', 'shared')]
+
+    @staticmethod
+    def key(platform: str, key) -> str:
+        return _QUOTE_KEY.format(platform, str(key).upper())
+
+    def update(self, platform: str, key, bid=None, ask=None, mid=None, last=None,
+               source: str = 'stream', **extra) -> Dict[str, Any]:
+        """Enregistre une cotation (mid calculé si absent) et la publie dans le cache"""
+        if mid is None and bid is not None and ask is not None:
+            mid = (float(bid) + float(ask)) / 2
+        quote = {
+            'bid': bid,
+            'ask': ask,
+            'mid': mid,
+            'last': last,
+            'source': source,
+            'received_at': time.time(),
+            **extra,
+        }
+        cache_key = self.key(platform, key)
+        with self._lock:
+            self._local[cache_key] = quote
+        self.cache.set(cache_key, quote, getattr(settings, 'PRICE_FEED_TTL', 300))
+        return quote
+
+    def get(self, platform: str, key, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Cotation plus récente que max_age secondes (PRICE_FEED_MAX_AGE par défaut), sinon None"""
+        if key is None:
+            return None
+        max_age = getattr(settings, 'PRICE_FEED_MAX_AGE', 60) if max_age is None else max_age
+        cache_key = self.key(platform, key)
+        quote = self._local.get(cache_key)
+        if quote is None or time.time() - quote['received_at'] > max_age:
+            quote = self.cache.get(cache_key)
+        if quote is None or time.time() - quote['received_at'] > max_age:
+            return None
+        return quote
+
+    def price(self, platform: str, key, max_age: Optional[float] = None) -> Optional[Decimal]:
+        """Prix de la cotation, même priorité que l'API REST Saxo : Ask > Mid > Bid (puis dernier)"""
+        quote = self.get(platform, key, max_age)
+        if not quote:
+            return None
+        for field in ('ask', 'mid', 'bid', 'last'):
+            if quote.get(field):
+                return Decimal(str(quote[field]))
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
+price_store = PriceStore()
+
+
+def _saxo_instrument(symbol: str) -> Optional[Tuple[int, str]]:
+    """(UIC, type d'actif) d'un symbole en une requête indexée (symboles AllAssets en majuscules)"""
+    if not symbol:
+        return None
+    symbol = symbol.upper()
+    base_symbol = symbol.split('_')[0]
+    rows = list(
+        AllAssets.objects.filter(platform='saxo', saxo_uic__isnull=False)
+        .filter(Q(symbol__in={symbol, base_symbol}) | Q(symbol__startswith=f"{base_symbol}_"))
+        .values_list('symbol', 'saxo_uic', 'asset_type')
+    )
+    if not rows:
+        return None
+    # Correspondance exacte, puis symbole de base, puis variante à extension (AAPL_0)
+    rows.sort(key=lambda row: (row[0] != symbol, row[0] != base_symbol, row[0]))
+    return rows[0][1], rows[0][2] or 'Stock'
+
+
+def saxo_uic_for_symbol(symbol: str) -> Optional[int]:
+    """UIC Saxo d'un symbole depuis AllAssets (sans appel à l'API Saxo)"""
+    instrument = _saxo_instrument(symbol)
+    return instrument[0] if instrument else None
+
+
+def watched_saxo_instruments(user=None) -> Dict[int, Dict[str, str]]:
+    """
+    Instruments Saxo à suivre en streaming : positions ouvertes et stratégies actives
+
+    Returns:
+        Dict UIC -> {'asset_type', 'symbol'}
+    """
+    instruments = {}
+
+    positions = Position.objects.filter(
+        status='OPEN', asset_tradable__platform='saxo', asset_tradable__all_asset__saxo_uic__isnull=False,
+    )
+    strategies = Strategy.objects.filter(status='active', broker__broker_type='saxo').select_related('asset')
+    if user is not None:
+        positions = positions.filter(user=user)
+        strategies = strategies.filter(user=user)
+
+    for uic, asset_type, symbol in positions.values_list(
+            'asset_tradable__all_asset__saxo_uic', 'asset_tradable__all_asset__asset_type', 'asset_tradable__symbol'):
+        instruments[uic] = {'asset_type': asset_type or 'Stock', 'symbol': symbol}
+
+    for strategy in strategies:
+        symbol = strategy.asset.symbol_clean or strategy.asset.symbol
+        instrument = _saxo_instrument(symbol)
+        if instrument:
+            instruments.setdefault(instrument[0], {'asset_type': instrument[1], 'symbol': symbol})
+
+    return instruments
+
+
+def binance_index(credentials):
+    """Index exchangeInfo de l'API des credentials Binance, sans appel réseau (None si aucune copie)"""
+    from .brokers.binance_exchange import cached_exchange_index
+    from .brokers.registry import broker_registry
+
+    return cached_exchange_index(broker_registry.get(credentials).base_url)
+
+
+def binance_pair_for_symbol(symbol: str, index) -> Optional[str]:
+    """
+    Paire Binance (BTCUSDT) d'un symbole d'asset (BTC, BTCUSDT ou BTC/USDT)
+
+    index : ExchangeInfoIndex (binance_index) ; un actif de base est résolu par ses
+    paires en trading, dans l'ordre de BINANCE_QUOTE_PREFERENCE
+    """
+    if not symbol or index is None:
+        return None
+    symbol = symbol.upper().split('_')[0].replace('/', '')
+    if symbol in index:
+        return symbol
+    pairs = index.pairs_for_assets({symbol}, include_delisted=False)
+    for quote in BINANCE_QUOTE_PREFERENCE:
+        if f"{symbol}{quote}" in pairs:
+            return f"{symbol}{quote}"
+    return min(pairs) if pairs else None
+
+
+def watched_binance_symbols(user=None) -> Dict[str, Optional[int]]:
+    """
+    Paires Binance à suivre : balances ouvertes et stratégies actives
+
+    Returns:
+        Dict paire -> id de l'Asset dont la série de bougies suit la paire (None si aucun)
+    """
+    symbols = {}
+
+    strategies = Strategy.objects.filter(status='active', broker__broker_type='binance').select_related('asset', 'broker')
+    positions = Position.objects.filter(status='OPEN', asset_tradable__platform='binance').select_related('asset_tradable__all_asset')
+    if user is not None:
+        strategies = strategies.filter(user=user)
+        positions = positions.filter(user=user)
+
+    for strategy in strategies:
+        pair = binance_pair_for_symbol(strategy.asset.symbol_clean or strategy.asset.symbol, binance_index(strategy.broker))
+        if pair:
+            symbols[pair] = strategy.asset_id
+
+    for position in positions:
+        all_asset = position.asset_tradable.all_asset
+        pair = all_asset.symbol.upper().replace('/', '') if all_asset else None
+        if pair and pair not in symbols:
+            # AllAssets au symbole de la balance (USDT, EUR...) : pas une paire, rien à suivre
+            if pair == position.asset_tradable.symbol.upper():
+                continue
+            symbols[pair] = None
+
+    return symbols
+
+
+def strategy_live_price(strategy, max_age: Optional[float] = None) -> Optional[float]:
+    """Dernier prix reçu en streaming pour l'asset d'une stratégie (None si aucun flux récent)"""
+    symbol = strategy.asset.symbol_clean or strategy.asset.symbol
+    if strategy.broker.broker_type == 'saxo':
+        price = price_store.price('saxo', saxo_uic_for_symbol(symbol), max_age)
+    elif strategy.broker.broker_type == 'binance':
+        price = price_store.price('binance', binance_pair_for_symbol(symbol, binance_index(strategy.broker)), max_age)
+    else:
+        price = price_store.price(strategy.broker.broker_type, symbol, max_age)
+    return float(price) if price is not None else None
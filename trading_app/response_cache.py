@@ -0,0 +1,91 @@
+"""
+Cache des réponses dérivées du catalogue et des prix
+
+Les réponses (autocomplétion, recherche, données de graphique) sont stockées dans un
+cache Django (locmem, fichier, Redis...) sous une clé qui contient la requête normalisée,
+la plateforme et les versions courantes du catalogue et des prix. Une synchronisation
+du catalogue ou un rafraîchissement des prix incrémente la version concernée : les
+anciennes entrées ne sont plus jamais lues et expirent d'elles-mêmes.
+
+Les versions sont rangées dans le cache partagé (RESPONSE_VERSION_CACHE_ALIAS) : une
+synchronisation menée par un cron ou un autre worker invalide les réponses et l'index
+de recherche de tous les processus, même si les réponses restent en cache local.
+"""
+import hashlib
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE = 'catalogue'
+PRICES = 'prices'
+
+_VERSION_KEY = 'trading_app:version:{}'
+_RESPONSE_KEY = 'trading_app:response:{namespace}:{versions}:{digest}'
+
+
+def get_cache():
+    """Backend de cache configuré pour les réponses (RESPONSE_CACHE_ALIAS)"""
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def get_version_cache():
+    """Backend partagé entre processus qui porte les versions (RESPONSE_VERSION_CACHE_ALIAS)"""
+    return caches[getattr(settings, 'RESPONSE_VERSION_CACHE_ALIAS', 'shared')]
+
+
+def get_version(name):
+    """Version courante d'une source de données (catalogue, prix)"""
+    return get_version_cache().get_or_set(_VERSION_KEY.format(name), time.time_ns(), None)
+
+
+def bump_version(name):
+    """Invalide toutes les réponses dépendant de cette source"""
+    version = time.time_ns()
+    get_version_cache().set(_VERSION_KEY.format(name), version, None)
+    return version
+
+
+def bump_catalogue_version():
+    return bump_version(CATALOGUE)
+
+
+def bump_price_version():
+    return bump_version(PRICES)
+
+
+def normalize_query(query):
+    """Normalise une saisie utilisateur (espaces, casse) pour la clé de cache"""
+    return ' '.join((query or '').split()).upper()
+
+
+def response_key(namespace, params, depends_on=(CATALOGUE,)):
+    versions = '-'.join(str(get_version(name)) for name in depends_on)
+    digest = hashlib.md5(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return _RESPONSE_KEY.format(namespace=namespace, versions=versions, digest=digest)
+
+
+def cached_response(namespace, params, builder, depends_on=(CATALOGUE,), timeout=None):
+    """
+    Retourne la réponse en cache ou la construit avec builder().
+
+    Args:
+        namespace: nom de la vue / du type de réponse
+        params: paramètres normalisés identifiant la réponse
+        builder: fonction sans argument retournant un objet sérialisable
+        depends_on: versions dont dépend la réponse (CATALOGUE, PRICES)
+        timeout: durée de vie en secondes (RESPONSE_CACHE_TIMEOUT par défaut)
+    """
+    cache = get_cache()
+    key = response_key(namespace, params, depends_on)
+    data = cache.get(key)
+    if data is None:
+        data = builder()
+        if timeout is None:
+            timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 600)
+        cache.set(key, data, timeout)
+    return data
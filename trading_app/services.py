@@ -2,11 +2,18 @@
 Services pour gérer les interactions avec les courtiers
 """
 
+import copy
 from typing import Dict, List, Optional, Any
 from decimal import Decimal
 from django.contrib.auth.models import User
-from .brokers.factory import BrokerFactory
+from django.db import transaction
+from .brokers.registry import broker_registry
 from .models import BrokerCredentials, Asset, Trade, Position, AssetTradable, AssetType, Market, AllAssets, PendingOrder
+from . import trade_aggregates
+from . import token_lifecycle
+from .order_execution import merge_broker_data
+from .pnl_engine import invalidate_checkpoints, refresh_user_pnl
+from .asset_search import rebuild_search_index
 
 
 class BrokerService:
@@ -20,13 +27,12 @@ class BrokerService:
         return BrokerCredentials.objects.filter(user=self.user, is_active=True)
     
     def get_broker_instance(self, broker_credentials: BrokerCredentials):
-        """Créer une instance de courtier à partir des credentials"""
-        credentials_dict = broker_credentials.get_credentials_dict()
-        return BrokerFactory.create_broker(
-            broker_credentials.broker_type,
-            self.user,
-            credentials_dict
-        )
+        """Instance de courtier pour ces credentials (réutilisée tant que les tokens ne changent pas)"""
+        return broker_registry.get(broker_credentials)
+    
+    def get_authenticated_broker(self, broker_credentials: BrokerCredentials):
+        """Instance authentifiée (None si échec), sans ré-authentification à chaque opération"""
+        return broker_registry.authenticated(broker_credentials)
     
     def update_saxo_tokens(self, broker_credentials: BrokerCredentials, new_tokens: Dict[str, Any]) -> bool:
         """Mettre à jour les tokens Saxo dans la base de données"""
@@ -61,21 +67,24 @@ class BrokerService:
             print(f"❌ Erreur mise à jour tokens Saxo: {e}")
             return False
     
-    def refresh_saxo_tokens(self, broker_credentials: BrokerCredentials) -> bool:
-        """Rafraîchir les tokens Saxo"""
+    def refresh_saxo_tokens(self, broker_credentials: BrokerCredentials, force: bool = True) -> bool:
+        """Rafraîchir les tokens Saxo (un seul refresh à la fois par credential, tous processus confondus)"""
         try:
             if broker_credentials.broker_type != 'saxo':
                 print("❌ Cette méthode est réservée aux brokers Saxo Bank")
                 return False
             
-            # Créer le broker et tenter le refresh
-            broker = self.get_broker_instance(broker_credentials)
-            success = broker.refresh_auth_token()
+            outcome = token_lifecycle.refresh_credentials(broker_credentials.pk, force=force)
+            success = outcome in (token_lifecycle.REFRESHED, token_lifecycle.FRESH)
+            if outcome == token_lifecycle.IN_FLIGHT:
+                # Refresh mené par un autre processus : réussi seulement si ses tokens sont publiés
+                success = token_lifecycle.wait_for_refresh(broker_credentials.pk) is not None
             
             if success:
-                print(f"✅ Tokens Saxo rafraîchis pour {broker_credentials.name}")
+                broker_credentials.refresh_from_db()
+                print(f"✅ Tokens Saxo à jour pour {broker_credentials.name} ({outcome})")
             else:
-                print(f"❌ Échec du refresh des tokens Saxo pour {broker_credentials.name}")
+                print(f"❌ Échec du refresh des tokens Saxo pour {broker_credentials.name} ({outcome})")
             
             return success
             
@@ -84,26 +93,9 @@ class BrokerService:
             return False
     
     def _should_refresh_saxo_tokens(self, broker_credentials: BrokerCredentials) -> bool:
-        """Vérifier si les tokens Saxo doivent être rafraîchis"""
+        """Vérifier si les tokens Saxo doivent être rafraîchis (TOKEN_REFRESH_MARGIN avant expiration)"""
         try:
-            if not broker_credentials.saxo_token_expires_at:
-                return True  # Pas de date d'expiration, refresh nécessaire
-            
-            from datetime import datetime
-            now = datetime.now()
-            expires_at = broker_credentials.saxo_token_expires_at
-            
-            # Si expires_at a un timezone, convertir now en timezone-aware
-            if hasattr(expires_at, 'tzinfo') and expires_at.tzinfo:
-                from django.utils import timezone
-                now = timezone.now()
-            
-            # Refresh 5 minutes avant expiration
-            from datetime import timedelta
-            refresh_threshold = expires_at - timedelta(minutes=5)
-            
-            return now >= refresh_threshold
-            
+            return token_lifecycle.needs_refresh(broker_credentials)
         except Exception as e:
             print(f"❌ Erreur vérification expiration tokens: {e}")
             return True  # En cas d'erreur, refresh par sécurité
@@ -209,8 +201,14 @@ class BrokerService:
                         ).first()
                         
                         if existing_position:
-                            # Position existe déjà, on l'ignore
-                            print(f"ℹ️ Position Binance existante ignorée: {asset_symbol} {position_size}")
+                            # Position existante : la balance fait foi (réconciliation du flux utilisateur)
+                            if existing_position.size != Decimal(str(position_size)).quantize(Decimal('0.01')) or existing_position.status != 'OPEN':
+                                existing_position.size = Decimal(str(position_size))
+                                existing_position.status = 'OPEN'
+                                existing_position.save(update_fields=['size', 'status', 'updated_at'])
+                                print(f"🔄 Position Binance réconciliée: {asset_symbol} {position_size}")
+                            else:
+                                print(f"ℹ️ Position Binance existante inchangée: {asset_symbol} {position_size}")
                         else:
                             # Nouvelle position, la créer
                             position = Position.objects.create(
@@ -399,28 +397,36 @@ class BrokerService:
                         }
                     )
                     
-                    # Récupérer ou créer le Trade
-                    trade, created = Trade.objects.get_or_create(
-                        user=broker_credentials.user,
-                        asset_tradable=asset_tradable,
-                        timestamp=trade_data.get('timestamp'),
-                        defaults={
-                            'size': Decimal(str(trade_data.get('size', 0))),
-                            'price': Decimal(str(trade_data.get('price', 0))),
-                            'side': trade_data.get('side', 'BUY'),
-                            'platform': broker_credentials.broker_type,
-                        }
-                    )
-                    
-                    if created:
-                        saved_count += 1
-                    else:
-                        # Mise à jour si le trade existe déjà
-                        trade.size = Decimal(str(trade_data.get('size', 0)))
-                        trade.price = Decimal(str(trade_data.get('price', 0)))
-                        trade.side = trade_data.get('side', 'BUY')
-                        trade.platform = broker_credentials.broker_type
-                        trade.save()
+                    # Récupérer ou créer le Trade (et mettre à jour ses agrégats dans la même transaction)
+                    with transaction.atomic():
+                        trade, created = Trade.objects.get_or_create(
+                            user=broker_credentials.user,
+                            asset_tradable=asset_tradable,
+                            timestamp=trade_data.get('timestamp'),
+                            defaults={
+                                'size': Decimal(str(trade_data.get('size', 0))),
+                                'price': Decimal(str(trade_data.get('price', 0))),
+                                'side': trade_data.get('side', 'BUY'),
+                                'platform': broker_credentials.broker_type,
+                            }
+                        )
+                        
+                        if created:
+                            trade_aggregates.record_trade(trade)
+                            saved_count += 1
+                        else:
+                            # Mise à jour si le trade existe déjà
+                            previous = copy.copy(trade)
+                            trade.size = Decimal(str(trade_data.get('size', 0)))
+                            trade.price = Decimal(str(trade_data.get('price', 0)))
+                            trade.side = trade_data.get('side', 'BUY')
+                            trade.platform = broker_credentials.broker_type
+                            # Trade inchangé (cas courant d'une resynchronisation) : aucune écriture
+                            if (previous.size, previous.price, previous.side) != (trade.size, trade.price, trade.side):
+                                trade.save()
+                                trade_aggregates.record_trade(trade, previous=previous)
+                                # Fill modifié : le checkpoint FIFO de l'actif n'est plus valable
+                                invalidate_checkpoints(broker_credentials.user, [trade.asset_tradable_id])
                     
                     trades.append(trade)
                     print(f"✅ Trade synchronisé: {trade.asset_tradable.symbol}")
@@ -436,6 +442,12 @@ class BrokerService:
             ).count()
             
             print(f"✅ Synchronisation terminée: {len(trades)} trades traités, {saved_count} nouveaux")
+            
+            # Mettre à jour le P&L FIFO (reprise depuis le dernier checkpoint)
+            try:
+                refresh_user_pnl(broker_credentials.user)
+            except Exception as e:
+                print(f"⚠️ Erreur calcul P&L FIFO: {e}")
             return {
                 'success': True,
                 'trades': trades,
@@ -530,25 +542,36 @@ class BrokerService:
                         }
                     )
                     
+                    # Ordre passé par le pipeline d'exécution : retrouvé par son identifiant client
+                    raw_order = order_data.get('broker_data') or {}
+                    client_order_id = raw_order.get('clientOrderId') or raw_order.get('ExternalReference')
+                    pending_order = None
+                    if client_order_id:
+                        pending_order = PendingOrder.objects.filter(
+                            client_order_id=client_order_id, broker_credentials=broker_credentials,
+                        ).first()
+                    created = False
+                    
                     # Créer ou mettre à jour l'ordre en cours
-                    pending_order, created = PendingOrder.objects.get_or_create(
-                        order_id=order_data['order_id'],
-                        defaults={
-                            'user': broker_credentials.user,
-                            'asset_tradable': asset_tradable,  # Utiliser AssetTradable
-                            'broker_credentials': broker_credentials,
-                            'order_type': order_data['order_type'],
-                            'side': order_data['side'],
-                            'status': order_data['status'],
-                            'original_quantity': order_data['original_quantity'],
-                            'executed_quantity': order_data['executed_quantity'],
-                            'remaining_quantity': order_data['remaining_quantity'],
-                            'price': order_data.get('price'),
-                            'stop_price': order_data.get('stop_price'),
-                            'expires_at': order_data.get('expires_at'),
-                            'broker_data': order_data.get('broker_data', {}),
-                        }
-                    )
+                    if pending_order is None:
+                        pending_order, created = PendingOrder.objects.get_or_create(
+                            order_id=order_data['order_id'],
+                            defaults={
+                                'user': broker_credentials.user,
+                                'asset_tradable': asset_tradable,  # Utiliser AssetTradable
+                                'broker_credentials': broker_credentials,
+                                'order_type': order_data['order_type'],
+                                'side': order_data['side'],
+                                'status': order_data['status'],
+                                'original_quantity': order_data['original_quantity'],
+                                'executed_quantity': order_data['executed_quantity'],
+                                'remaining_quantity': order_data['remaining_quantity'],
+                                'price': order_data.get('price'),
+                                'stop_price': order_data.get('stop_price'),
+                                'expires_at': order_data.get('expires_at'),
+                                'broker_data': order_data.get('broker_data', {}),
+                            }
+                        )
                     
                     if created:
                         created_count += 1
@@ -558,7 +581,8 @@ class BrokerService:
                         pending_order.status = order_data['status']
                         pending_order.executed_quantity = order_data['executed_quantity']
                         pending_order.remaining_quantity = order_data['remaining_quantity']
-                        pending_order.broker_data = order_data.get('broker_data', {})
+                        # Fusion : lifecycle, quantité, stratégie et exécution du pipeline conservés
+                        pending_order.broker_data = merge_broker_data(pending_order.broker_data, order_data.get('broker_data', {}))
                         pending_order.save()
                         updated_count += 1
                         print(f"    🔄 Ordre mis à jour: {order_data['order_id']}")
@@ -620,15 +644,17 @@ class BrokerService:
             else:
                 side = broker_trade.get('side', 'BUY')
             
-            # Create the trade
-            trade = Trade.objects.create(
-                user=self.user,
-                asset_tradable=asset_tradable,
-                size=Decimal(str(broker_trade.get('qty', broker_trade.get('size', 0)))),
-                price=Decimal(str(broker_trade.get('price', 0))),
-                side=side,
-                platform=broker_credentials.broker_type.upper(),
-            )
+            # Create the trade and update its aggregate atomically
+            with transaction.atomic():
+                trade = Trade.objects.create(
+                    user=self.user,
+                    asset_tradable=asset_tradable,
+                    size=Decimal(str(broker_trade.get('qty', broker_trade.get('size', 0)))),
+                    price=Decimal(str(broker_trade.get('price', 0))),
+                    side=side,
+                    platform=broker_credentials.broker_type.upper(),
+                )
+                trade_aggregates.record_trade(trade)
             
             created_trades.append(trade)
             print(f"    Trade créé: {trade.id} - {side} {trade.size} @ {trade.price}")
@@ -643,18 +669,18 @@ class BrokerService:
                    side: str, size: Decimal, order_type: str = "MARKET", 
                    price: Optional[Decimal] = None) -> Dict[str, Any]:
         """Placer un ordre via un courtier"""
-        broker = self.get_broker_instance(broker_credentials)
+        broker = self.get_authenticated_broker(broker_credentials)
         
-        if not broker.authenticate():
+        if broker is None:
             return {"error": "Échec de l'authentification"}
         
         return broker.place_order(symbol, side, size, order_type, price)
     
     def get_asset_price(self, broker_credentials: BrokerCredentials, symbol: str) -> Optional[Decimal]:
         """Récupérer le prix d'un actif depuis un courtier"""
-        broker = self.get_broker_instance(broker_credentials)
+        broker = self.get_authenticated_broker(broker_credentials)
         
-        if not broker.authenticate():
+        if broker is None:
             return None
         
         return broker.get_asset_price(symbol)
@@ -736,6 +762,9 @@ class BrokerService:
                     print(f"❌ Erreur lors du traitement de l'actif Saxo {symbol}: {str(e)}")
                     continue
             
+            # Le catalogue a changé : reconstruire l'index de recherche
+            rebuild_search_index()
+            
             return {
                 'success': True,
                 'saved_count': saved_count,
@@ -810,6 +839,9 @@ class BrokerService:
                     print(f"❌ Erreur lors du traitement de l'actif Binance {symbol}: {str(e)}")
                     continue
             
+            # Le catalogue a changé : reconstruire l'index de recherche
+            rebuild_search_index()
+            
             return {
                 'success': True,
                 'saved_count': saved_count,
@@ -0,0 +1,46 @@
+"""
+Cache partagé entre processus (SHARED_CACHE_ALIAS : Redis ou table de la base)
+
+Les cotations du flux (run_price_feed), les tokens Saxo (refresh_broker_tokens) et les
+versions du catalogue et des prix sont écrits par un processus et lus par les autres
+(workers gunicorn, run_strategies, commandes cron). Un cache propre au processus
+(locmem, dummy) les rend invisibles ailleurs : les commandes qui les publient refusent
+de démarrer avec require_shared.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+# Backends dont le contenu n'est visible que du processus qui l'écrit
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def get_shared_cache():
+    return caches[getattr(settings, 'SHARED_CACHE_ALIAS', 'shared')]
+
+
+def is_process_local(alias: str) -> bool:
+    """Cache `alias` invisible des autres processus (alias inconnu compris)"""
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    return not backend or backend in PROCESS_LOCAL_BACKENDS
+
+
+def require_shared(setting_name: str, default: str = 'shared'):
+    """
+    Vérifie que le cache désigné par le réglage `setting_name` est partagé
+
+    Raises:
+        ImproperlyConfigured: backend locmem/dummy ou alias absent de CACHES
+    """
+    alias = getattr(settings, setting_name, default)
+    if is_process_local(alias):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND', 'alias absent de CACHES')
+        raise ImproperlyConfigured(
+            f"{setting_name}='{alias}' ({backend}) n'est pas partagé entre processus : "
+            f"utiliser un cache Redis ou DatabaseCache (SHARED_CACHE_ALIAS)"
+        )
+    return alias
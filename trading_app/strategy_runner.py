@@ -0,0 +1,278 @@
+"""
+Exécution des stratégies hors de la couche HTTP
+
+La vue execute_strategy faisait tout le travail (prix, signal, StrategyExecution, ordre)
+à partir d'une HttpRequest ; AutomationService l'appelait avec un simple id et lisait
+sa JsonResponse comme un dict. StrategyRunner porte ce travail pour la vue,
+l'automatisation et les commandes :
+
+    result = strategy_runner.run(strategy)                       # historique rafraîchi puis signal
+    result = strategy_runner.run(strategy, prices=candles)       # bougies déjà chargées
+    results = strategy_runner.run_many(strategies, workers=4)    # un rafraîchissement par asset
+
+Chaque résultat est un dict : success, strategy_id, signal, strength, reason,
+current_price, execution_id, order (intention soumise à order_execution), error.
+"""
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import chart_data
+from .brokers.registry import broker_registry
+from .instrumentation import stage
+from .models import StrategyExecution
+from .order_execution import order_executor
+from .price_feed import strategy_live_price
+
+logger = logging.getLogger(__name__)
+
+CRYPTO_SYMBOLS = ["BTC", "ETH", "ETHW", "SOL", "AVAX", "BNB", "ADA", "DOT", "LINK", "UNI", "MATIC", "USDT", "USDC",
+                  "DAI", "LTC", "XRP", "DOGE", "SHIB", "TRX", "BCH", "XLM"]
+
+
+class StrategyRunError(Exception):
+    """Stratégie non exécutable (pas d'historique de prix exploitable)"""
+
+
+def _candle_date(candle) -> Optional[date]:
+    try:
+        return datetime.strptime(str(candle['date'])[:10], '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        return None
+
+
+def apply_live_price(price_data: List[Dict[str, Any]], live_price: float, today: Optional[date] = None) -> None:
+    """
+    Intègre la dernière cotation aux bougies (modifiées en place)
+
+    La dernière bougie est mise à jour si sa période (écart entre les deux dernières
+    bougies : jour, semaine ; mois calendaire au-delà de 28 jours) contient aujourd'hui ;
+    sinon une nouvelle bougie commence au début de la période courante.
+    """
+    last = price_data[-1]
+    last_date = _candle_date(last)
+    previous_date = _candle_date(price_data[-2]) if len(price_data) > 1 else None
+    today = today or timezone.localdate()
+    step = (last_date - previous_date).days if last_date and previous_date else 1
+
+    if step >= 28:
+        # Bougies mensuelles : périodes de 28 à 31 jours, comparaison par mois
+        if last_date is not None and (today.year, today.month) > (last_date.year, last_date.month):
+            price_data.append(_live_candle(today.replace(day=1), live_price))
+            return
+        step = 0
+
+    if last_date is None or step <= 0 or (today - last_date).days < step:
+        price_data[-1] = {
+            **last,
+            'high': max(float(last.get('high', live_price)), live_price),
+            'low': min(float(last.get('low', live_price)), live_price),
+            'close': live_price,
+        }
+        return
+
+    periods = (today - last_date).days // step
+    price_data.append(_live_candle(date.fromordinal(last_date.toordinal() + periods * step), live_price))
+
+
+def _live_candle(start: date, live_price: float) -> Dict[str, Any]:
+    return {
+        'date': start.strftime('%Y-%m-%d'),
+        'open': live_price,
+        'high': live_price,
+        'low': live_price,
+        'close': live_price,
+        'volume': 0,
+    }
+
+
+class StrategyRunner:
+    """Prix, signal, enregistrement de l'exécution et intention d'ordre d'une ou plusieurs stratégies"""
+
+    def __init__(self, brokers=None, executor=None, refresh_prices: bool = True):
+        # brokers : cache d'instances authentifiées (BrokerRegistry ou équivalent)
+        self.brokers = brokers or broker_registry
+        self.executor = executor or order_executor
+        self.refresh_prices = refresh_prices
+
+    # --- Prix ---
+
+    def refresh_asset_prices(self, asset):
+        """Met à jour l'historique de l'asset (CoinGecko pour les cryptos, Yahoo Finance sinon)"""
+        from .views.market import get_crypto_data, get_yahoo_data
+
+        clean_symbol = (asset.symbol_clean or asset.get_clean_symbol()).strip()
+        is_crypto = any(crypto in clean_symbol.upper() for crypto in CRYPTO_SYMBOLS)
+        if clean_symbol.endswith('EUR') and clean_symbol[:-3] in CRYPTO_SYMBOLS:
+            is_crypto = True
+
+        data = get_crypto_data(clean_symbol) if is_crypto else get_yahoo_data(clean_symbol)
+        if not data:
+            logger.warning(f"⚠️ Pas de données {'CoinGecko' if is_crypto else 'Yahoo'} pour {clean_symbol}")
+            return False
+
+        asset.name = data.get('name', asset.name)
+        asset.sector = data.get('sector', asset.sector)
+        asset.industry = data.get('industry', asset.industry)
+        asset.market_cap = data.get('market_cap', asset.market_cap)
+        asset.price_history = data.get('price_history', asset.price_history)
+        chart_data.save_asset_prices(asset)
+        logger.info(f"✅ Prix mis à jour pour {clean_symbol} via {'CoinGecko' if is_crypto else 'Yahoo Finance'}")
+        return True
+
+    def load_prices(self, asset) -> List[Dict[str, Any]]:
+        """
+        Bougies de l'asset (rafraîchies d'abord si refresh_prices)
+
+        Raises:
+            StrategyRunError: historique absent ou illisible
+        """
+        if self.refresh_prices:
+            with stage('price_refresh', item=asset.symbol):
+                try:
+                    self.refresh_asset_prices(asset)
+                except Exception as e:
+                    # Anciens prix conservés si la mise à jour échoue
+                    logger.warning(f"⚠️ Erreur lors de la mise à jour des prix de {asset.symbol}: {e}")
+
+        if not asset.price_history or asset.price_history == 'xxxx':
+            raise StrategyRunError('Aucun historique de prix disponible pour cet asset')
+        try:
+            prices = json.loads(asset.price_history)
+        except json.JSONDecodeError:
+            raise StrategyRunError('Format d\'historique de prix invalide')
+        if not prices:
+            raise StrategyRunError('Aucune donnée de prix disponible')
+        return prices
+
+    # --- Exécution ---
+
+    def run(self, strategy, prices: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Exécute une stratégie ; prices : bougies préchargées (pas de rafraîchissement ni de décodage)"""
+        result = {'success': False, 'strategy_id': strategy.id, 'strategy': strategy.name}
+        try:
+            price_data = list(prices) if prices is not None else self.load_prices(strategy.asset)
+            if not price_data:
+                raise StrategyRunError('Aucune donnée de prix disponible')
+
+            # Dernière cotation du flux temps réel (run_price_feed) : bougie en cours ou nouvelle bougie
+            live_price = strategy_live_price(strategy)
+            if live_price is not None:
+                apply_live_price(price_data, live_price)
+
+            with stage('signals', item=strategy.name):
+                start_time = time.time()
+                signal_result = strategy.calculate_signals(price_data)
+                execution_duration = time.time() - start_time
+
+            current_price = float(price_data[-1]['close'])
+            execution = StrategyExecution.objects.create(
+                strategy=strategy,
+                current_price=current_price,
+                signal=signal_result['signal'],
+                signal_strength=signal_result['strength'],
+                execution_duration=execution_duration,
+            )
+
+            order = None
+            if strategy.should_execute_order(signal_result):
+                with stage('order_submit', item=strategy.name):
+                    order = self._submit_order(strategy, signal_result, execution, current_price)
+
+            strategy.last_execution = timezone.now()
+            strategy.save(update_fields=['last_execution', 'updated_at'])
+
+            result.update({
+                'success': True,
+                'signal': signal_result['signal'],
+                'strength': signal_result['strength'],
+                'reason': signal_result.get('reason', ''),
+                'current_price': current_price,
+                'live_price': live_price is not None,
+                'execution_id': execution.id,
+                'execution_duration': execution_duration,
+                'order': order,
+                'order_executed': bool(order and order['status'] not in ('PENDING', 'REJECTED')),
+            })
+        except StrategyRunError as e:
+            result['error'] = str(e)
+        except Exception as e:
+            logger.error(f"❌ Erreur exécution stratégie {strategy.name}: {e}")
+            result['error'] = str(e)
+        return result
+
+    def _submit_order(self, strategy, signal_result, execution, current_price) -> Dict[str, Any]:
+        if signal_result.get('auto_quantity') and signal_result.get('calculated_quantity'):
+            order_size = signal_result['calculated_quantity']
+        else:
+            # Quantité par défaut des paramètres
+            order_size = strategy.target_min_quantity
+        side = 'BUY' if signal_result['signal'] == 'BUY' else 'SELL'
+        logger.info(f"🔐 Intention d'ordre stratégie {strategy.name}: {side} {order_size}")
+        # Contrôles pré-trade puis envoi par le pool : aucune attente du courtier ici
+        return self.executor.submit(strategy, side, order_size, execution=execution,
+                                    reference_price=current_price, brokers=self.brokers)
+
+    def run_many(self, strategies: Iterable, prices: Optional[Dict[int, List[Dict[str, Any]]]] = None,
+                 workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Exécute plusieurs stratégies : un seul chargement de prix par asset, puis les
+        stratégies en parallèle (workers threads, STRATEGY_RUNNER_WORKERS par défaut)
+
+        prices : bougies préchargées par id d'Asset
+        """
+        strategies = list(strategies)
+        workers = workers or getattr(settings, 'STRATEGY_RUNNER_WORKERS', 4)
+        prices = dict(prices or {})
+        errors = {}
+
+        assets = {strategy.asset_id: strategy.asset for strategy in strategies if strategy.asset_id not in prices}
+
+        def load(asset):
+            try:
+                return asset.id, self.load_prices(asset), None
+            except StrategyRunError as e:
+                return asset.id, None, str(e)
+
+        def run(strategy):
+            if strategy.asset_id in errors:
+                return {'success': False, 'strategy_id': strategy.id, 'strategy': strategy.name,
+                        'error': errors[strategy.asset_id]}
+            return self.run(strategy, prices[strategy.asset_id])
+
+        if workers <= 1 or len(strategies) <= 1:
+            self._store([load(asset) for asset in assets.values()], prices, errors)
+            return [run(strategy) for strategy in strategies]
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='strategy-runner') as pool:
+            self._store(list(pool.map(self._in_worker(load), assets.values())), prices, errors)
+            return list(pool.map(self._in_worker(run), strategies))
+
+    @staticmethod
+    def _store(loaded, prices, errors):
+        for asset_id, data, error in loaded:
+            if error:
+                errors[asset_id] = error
+            else:
+                prices[asset_id] = data
+
+    @staticmethod
+    def _in_worker(func):
+        """Connexions DB du thread fermées après chaque tâche (threads du pool)"""
+        def wrapped(*args):
+            try:
+                return func(*args)
+            finally:
+                connections.close_all()
+        return wrapped
+
+
+strategy_runner = StrategyRunner()
@@ -0,0 +1,327 @@
+"""
+Générateur de jeu de données synthétique pour les tests de charge
+
+Crée, de façon déterministe (graine), des utilisateurs avec leurs courtiers, des
+catalogues AllAssets à l'échelle Binance/Saxo, des AssetTradable, des positions, des
+ordres en attente, des trades (1M+), des stratégies avec leurs exécutions et des années
+de bougies (marche aléatoire géométrique du fournisseur local).
+
+Tout est écrit par bulk_create en lots dans une seule transaction :
+
+    python manage.py seed_dataset --users 20 --trades 1000000
+
+Les utilisateurs générés portent le préfixe configuré (--prefix) : --reset supprime
+uniquement ces utilisateurs et leurs données.
+"""
+
+import contextlib
+import json
+import logging
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import chart_data
+from .algorithms import AlgorithmFactory
+from .market_data.local import LocalDataStore
+from .models import (AllAssets, Asset, AssetTradable, AssetType, BrokerCredentials, Market,
+                     PendingOrder, Position, Strategy, StrategyExecution, Trade)
+from .trade_aggregates import rebuild_aggregates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+@contextlib.contextmanager
+def explicit_timestamps(model, field_name: str):
+    """Désactive auto_now_add le temps d'un bulk_create pour conserver les dates générées"""
+    field = model._meta.get_field(field_name)
+    previous = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = previous
+
+
+def _batched(items: Iterable, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _decimal(value: float, places: int = 2) -> Decimal:
+    return Decimal(f"{value:.{places}f}")
+
+
+class SyntheticDataset:
+    """Génère un jeu de données réaliste et reproductible à partir d'une graine"""
+
+    def __init__(self, seed: int = 42, prefix: str = 'synth', batch_size: int = DEFAULT_BATCH_SIZE,
+                 progress: Optional[Callable[[str], None]] = None):
+        self.seed = seed
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.store = LocalDataStore(seed=seed)
+        self.progress = progress or logger.info
+        self.now = timezone.now()
+
+    def _step(self, label: str, started: float):
+        self.progress(f"✅ {label} ({time.perf_counter() - started:.1f}s)")
+
+    def reset(self) -> int:
+        """Supprime les utilisateurs générés (et leurs données en cascade)"""
+        deleted, _ = User.objects.filter(username__startswith=f"{self.prefix}_").delete()
+        return deleted
+
+    # --- Étapes ---
+
+    def create_users(self, count: int) -> List[User]:
+        password = make_password(self.prefix)
+        User.objects.bulk_create([
+            User(username=f"{self.prefix}_user_{i:05d}", email=f"{self.prefix}_{i}@example.com", password=password)
+            for i in range(count)
+        ], batch_size=self.batch_size, ignore_conflicts=True)
+        return list(User.objects.filter(username__startswith=f"{self.prefix}_user_").order_by('username')[:count])
+
+    def create_brokers(self, users: List[User]) -> Dict[int, Dict[str, BrokerCredentials]]:
+        BrokerCredentials.objects.bulk_create([
+            BrokerCredentials(user=user, broker_type=broker_type, name=f"{self.prefix} {broker_type}")
+            for user in users for broker_type in ('binance', 'saxo')
+        ], batch_size=self.batch_size, ignore_conflicts=True)
+        brokers = {}
+        for broker in BrokerCredentials.objects.filter(user__in=users, name__startswith=self.prefix):
+            brokers.setdefault(broker.user_id, {})[broker.broker_type] = broker
+        return brokers
+
+    def create_catalogues(self, binance_pairs: int, saxo_instruments: int) -> Dict[str, List[AllAssets]]:
+        """Catalogues AllAssets (les symboles déjà présents sont conservés)"""
+        existing = set(AllAssets.objects.values_list('platform', 'symbol'))
+        rows = []
+        for info in self.store.instruments('binance', binance_pairs):
+            if ('binance', info['symbol']) not in existing:
+                rows.append(AllAssets(
+                    symbol=info['symbol'], name=f"{info['baseAsset']}/{info['quoteAsset']}", platform='binance',
+                    asset_type='Crypto', market='SPOT', currency=info['quoteAsset'],
+                    binance_base_asset=info['baseAsset'], binance_quote_asset=info['quoteAsset'],
+                    binance_status=info['status'],
+                ))
+        for info in self.store.instruments('saxo', saxo_instruments):
+            if ('saxo', info['Symbol'].upper()) not in existing:
+                rows.append(AllAssets(
+                    symbol=info['Symbol'].upper(), name=info['Description'], platform='saxo',
+                    asset_type=info['AssetType'], market=info['Exchange']['ExchangeId'],
+                    currency=info['CurrencyCode'], exchange=info['Exchange']['Name'],
+                    saxo_uic=info['Uic'], saxo_exchange_id=info['Exchange']['ExchangeId'],
+                    saxo_country_code=info['Exchange']['CountryCode'],
+                ))
+        AllAssets.objects.bulk_create(rows, batch_size=self.batch_size)
+        return {
+            'binance': list(AllAssets.objects.filter(platform='binance').order_by('id')[:binance_pairs]),
+            'saxo': list(AllAssets.objects.filter(platform='saxo').order_by('id')[:saxo_instruments]),
+        }
+
+    def create_tradables(self, catalogues: Dict[str, List[AllAssets]], count: int) -> List[AssetTradable]:
+        """AssetTradable répartis entre Binance et Saxo"""
+        types = {name: AssetType.objects.get_or_create(name=name)[0] for name in ('Crypto', 'Stock')}
+        markets = {name: Market.objects.get_or_create(name=name)[0] for name in ('SPOT', 'Stock')}
+        selected = catalogues['binance'][:count // 2] + catalogues['saxo'][:count - count // 2]
+        AssetTradable.objects.bulk_create([
+            AssetTradable(
+                all_asset=all_asset, symbol=all_asset.symbol[:20], name=all_asset.name[:100],
+                platform=all_asset.platform,
+                asset_type=types['Crypto' if all_asset.platform == 'binance' else 'Stock'],
+                market=markets['SPOT' if all_asset.platform == 'binance' else 'Stock'],
+            )
+            for all_asset in selected
+        ], batch_size=self.batch_size, ignore_conflicts=True)
+        return list(AssetTradable.objects.filter(all_asset__in=selected).order_by('id'))
+
+    def create_assets(self, tradables: List[AssetTradable], count: int, years: int) -> List[Asset]:
+        """Assets enrichis avec `years` années de bougies quotidiennes (+ PriceSeries)"""
+        assets = []
+        for tradable in tradables[:count]:
+            symbol = tradable.symbol.split(':')[0].split('_')[0].upper()
+            bars = self.store.synthetic_ohlcv(symbol, years * 365, '1d')
+            rng = random.Random(f"{self.seed}:asset:{symbol}")
+            assets.append(Asset(
+                all_asset_id=tradable.all_asset_id, symbol=tradable.symbol, symbol_clean=symbol,
+                name=tradable.name,
+                sector='Crypto' if tradable.platform == 'binance' else rng.choice(['Technology', 'Healthcare', 'Financial Services', 'Energy']),
+                industry='Crypto' if tradable.platform == 'binance' else 'Synthetic',
+                market_cap=float(rng.randint(10 ** 8, 10 ** 12)),
+                price_history=json.dumps(bars),
+            ))
+        Asset.objects.bulk_create(assets, batch_size=200, ignore_conflicts=True)
+        assets = list(Asset.objects.filter(symbol__in=[asset.symbol for asset in assets]))
+        chart_data.save_assets_prices(assets, batch_size=200)
+        return assets
+
+    def create_positions(self, users: List[User], tradables: List[AssetTradable], count: int) -> int:
+        def rows():
+            for i in range(count):
+                tradable = tradables[i % len(tradables)]
+                entry = self.rng.uniform(1, 500)
+                current = entry * self.rng.uniform(0.7, 1.4)
+                size = self.rng.uniform(1, 100)
+                side = 'BUY' if self.rng.random() < 0.85 else 'SELL'
+                direction = 1 if side == 'BUY' else -1
+                yield Position(
+                    user=users[i % len(users)], asset_tradable=tradable, broker_position_id=f"S{i}",
+                    size=_decimal(size), entry_price=_decimal(entry, 5), current_price=_decimal(current, 5),
+                    side=side, status='OPEN', pnl=_decimal((current - entry) * size * direction),
+                )
+
+        for batch in _batched(rows(), self.batch_size):
+            Position.objects.bulk_create(batch)
+        return count
+
+    def create_pending_orders(self, users: List[User], tradables: List[AssetTradable],
+                              brokers: Dict[int, Dict[str, BrokerCredentials]], count: int) -> int:
+        def rows():
+            for i in range(count):
+                user = users[i % len(users)]
+                tradable = tradables[self.rng.randrange(len(tradables))]
+                quantity = _decimal(self.rng.uniform(1, 100))
+                yield PendingOrder(
+                    user=user, asset_tradable=tradable, broker_credentials=brokers[user.id][tradable.platform],
+                    order_id=f"{self.prefix}-{self.seed}-{i}", order_type=self.rng.choice(['LIMIT', 'STOP', 'STOP_LIMIT']),
+                    side=self.rng.choice(['BUY', 'SELL']), status=self.rng.choice(['PENDING', 'WORKING', 'PARTIALLY_FILLED']),
+                    original_quantity=quantity, remaining_quantity=quantity,
+                    price=_decimal(self.rng.uniform(1, 500), 5),
+                )
+
+        for batch in _batched(rows(), self.batch_size):
+            PendingOrder.objects.bulk_create(batch, ignore_conflicts=True)
+        return count
+
+    def create_trades(self, users: List[User], tradables: List[AssetTradable], count: int, years: int) -> int:
+        """`count` trades étalés sur `years` années (dates conservées, pas d'auto_now_add)"""
+        span = timedelta(days=years * 365).total_seconds()
+
+        def rows():
+            for i in range(count):
+                tradable = tradables[self.rng.randrange(len(tradables))]
+                yield Trade(
+                    user=users[i % len(users)], asset_tradable=tradable,
+                    size=_decimal(self.rng.uniform(0.01, 50)), price=_decimal(self.rng.uniform(1, 500), 5),
+                    side='BUY' if self.rng.random() < 0.55 else 'SELL', platform=tradable.platform,
+                    timestamp=self.now - timedelta(seconds=span * (count - i) / count),
+                )
+
+        with explicit_timestamps(Trade, 'timestamp'):
+            for batch in _batched(rows(), self.batch_size):
+                Trade.objects.bulk_create(batch)
+        return count
+
+    def create_strategies(self, users: List[User], assets: List[Asset],
+                          brokers: Dict[int, Dict[str, BrokerCredentials]], per_user: int) -> List[Strategy]:
+        algorithms = list(AlgorithmFactory._algorithms)
+        rows = []
+        for user in users:
+            for i, asset in enumerate(self.rng.sample(assets, min(per_user, len(assets)))):
+                algorithm_type = algorithms[i % len(algorithms)]
+                rows.append(Strategy(
+                    user=user, asset=asset, broker=brokers[user.id]['binance'],
+                    name=f"{self.prefix} {algorithm_type} {asset.symbol_clean}", algorithm_type=algorithm_type,
+                    parameters=AlgorithmFactory.get_algorithm_parameters(algorithm_type),
+                    status=self.rng.choice(['active', 'inactive', 'paused']),
+                ))
+        Strategy.objects.bulk_create(rows, batch_size=self.batch_size, ignore_conflicts=True)
+        return list(Strategy.objects.filter(user__in=users, name__startswith=self.prefix))
+
+    def create_executions(self, strategies: List[Strategy], per_strategy: int) -> int:
+        def rows():
+            for strategy in strategies:
+                for n in range(per_strategy):
+                    signal = self.rng.choice(['BUY', 'SELL', 'HOLD', 'HOLD', 'HOLD'])
+                    yield StrategyExecution(
+                        strategy=strategy, execution_time=self.now - timedelta(minutes=45 * (per_strategy - n)),
+                        current_price=_decimal(self.rng.uniform(1, 500), 5), signal=signal,
+                        signal_strength=self.rng.random(), order_executed=signal != 'HOLD',
+                        execution_duration=self.rng.uniform(0.01, 2),
+                    )
+
+        with explicit_timestamps(StrategyExecution, 'execution_time'):
+            for batch in _batched(rows(), self.batch_size):
+                StrategyExecution.objects.bulk_create(batch)
+        return len(strategies) * per_strategy
+
+    # --- Orchestration ---
+
+    def generate(self, users: int = 10, binance_pairs: int = 2000, saxo_instruments: int = 5000,
+                 tradables: int = 1000, candle_assets: int = 100, years: int = 5, positions: int = 10000,
+                 pending_orders: int = 2000, trades: int = 1000000, strategies: int = 10,
+                 executions: int = 100, derived: bool = True) -> Dict[str, Any]:
+        """
+        Génère le jeu de données complet dans une transaction
+
+        Args:
+            derived: recalculer les agrégats de trades (TradeAggregate)
+
+        Returns:
+            dict: nombre d'objets créés par type, utilisateurs générés et durée totale
+        """
+        started = time.perf_counter()
+        counts = {}
+        with transaction.atomic():
+            step = time.perf_counter()
+            user_objects = self.create_users(users)
+            brokers = self.create_brokers(user_objects)
+            counts['users'] = len(user_objects)
+            self._step(f"{len(user_objects)} utilisateurs", step)
+
+            step = time.perf_counter()
+            catalogues = self.create_catalogues(binance_pairs, saxo_instruments)
+            counts['all_assets'] = sum(len(rows) for rows in catalogues.values())
+            self._step(f"{counts['all_assets']} AllAssets", step)
+
+            step = time.perf_counter()
+            tradable_objects = self.create_tradables(catalogues, tradables)
+            counts['asset_tradables'] = len(tradable_objects)
+            self._step(f"{len(tradable_objects)} AssetTradable", step)
+
+            step = time.perf_counter()
+            assets = self.create_assets(tradable_objects, candle_assets, years)
+            counts['assets'] = len(assets)
+            self._step(f"{len(assets)} Assets avec {years} ans de bougies", step)
+
+            step = time.perf_counter()
+            counts['positions'] = self.create_positions(user_objects, tradable_objects, positions)
+            counts['pending_orders'] = self.create_pending_orders(user_objects, tradable_objects, brokers, pending_orders)
+            self._step(f"{positions} positions, {pending_orders} ordres en attente", step)
+
+            step = time.perf_counter()
+            counts['trades'] = self.create_trades(user_objects, tradable_objects, trades, years)
+            self._step(f"{trades} trades", step)
+
+            step = time.perf_counter()
+            strategy_objects = self.create_strategies(user_objects, assets, brokers, strategies)
+            counts['strategies'] = len(strategy_objects)
+            counts['executions'] = self.create_executions(strategy_objects, executions)
+            self._step(f"{len(strategy_objects)} stratégies, {counts['executions']} exécutions", step)
+
+            if derived:
+                step = time.perf_counter()
+                counts['trade_aggregates'] = sum(rebuild_aggregates(user=user) for user in user_objects)
+                self._step(f"{counts['trade_aggregates']} agrégats de trades", step)
+
+        return {
+            'counts': counts,
+            'users': user_objects,
+            'duration': time.perf_counter() - started,
+        }
@@ -1,3 +1,580 @@
-from django.test import TestCase
+"""
+Tests des flux temps réel et du pipeline d'ordres contre le faux courtier (brokers/fake_server.py),
+des filtres d'ordre Binance et du moteur de P&L FIFO
 
-# Create your tests here.
+Aucun appel aux API réelles : chaque classe démarre son propre serveur sur un port libre.
+"""
+
+import shutil
+import socket
+import tempfile
+import time
+from datetime import timedelta
+from decimal import ROUND_UP, Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .brokers.binance import BinanceBroker
+from .brokers.binance_exchange import ExchangeInfoIndex, OrderValidationError, _round_to_step, exchange_index
+from .brokers.binance_streaming import BinanceUserStream
+from .brokers.fake_server import FAKE_SAXO_ACCOUNT_KEY, FAKE_SAXO_CLIENT_KEY, FakeBrokerHandler, start_fake_broker
+from .brokers.registry import BrokerRegistry
+from .brokers.saxo import SaxoBroker
+from .brokers.saxo_streaming import (
+    DISCONNECT, HEARTBEAT, RESET_SUBSCRIPTIONS, SaxoPriceStream, _merge, encode_message, parse_messages,
+)
+from .brokers.websocket import WebSocketClosed
+from .models import (
+    AllAssets, Asset, AssetTradable, AssetType, BrokerCredentials, Market, PendingOrder, PnLCheckpoint, Strategy,
+    StrategyExecution, Trade,
+)
+from .order_execution import OrderExecutionService
+from .pnl_engine import LotBook, PnLEngine
+from .price_feed import PriceStore
+from .shared_cache import require_shared
+from .telegram_notifications import telegram_notifier
+
+
+def wait_until(predicate, timeout=5.0, interval=0.02):
+    """Attend que predicate() soit vrai (threads du flux ou du pool) ; False après timeout"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return predicate()
+
+
+def saxo_broker(server, **credentials):
+    return SaxoBroker(None, {
+        'access_token': 'fake-access-token',
+        'refresh_token': 'fake-refresh-token',
+        'token_expires_at': timezone.now() + timedelta(hours=1),
+        'base_url': server.base_url,
+        **credentials,
+    })
+
+
+class SaxoMessageTests(SimpleTestCase):
+    """Format binaire des trames Saxo et fusion des deltas"""
+
+    def test_encode_parse_round_trip(self):
+        quotes = [{'Uic': 1, 'Quote': {'Bid': 10.5, 'Ask': 10.6}}]
+        heartbeat = [{'ReferenceId': HEARTBEAT, 'Heartbeats': [{'OriginatingReferenceId': '', 'Reason': 'NoNewData'}]}]
+        frame = encode_message(7, 'prices_1', quotes) + encode_message(8, HEARTBEAT, heartbeat)
+
+        messages = parse_messages(frame)
+
+        self.assertEqual([message['message_id'] for message in messages], [7, 8])
+        self.assertEqual([message['reference_id'] for message in messages], ['prices_1', HEARTBEAT])
+        self.assertEqual(messages[0]['payload'], quotes)
+        self.assertEqual(messages[1]['payload'], heartbeat)
+
+    def test_merge_keeps_unchanged_nested_fields(self):
+        snapshot = {'Uic': 1, 'Quote': {'Bid': 10.5, 'Ask': 10.6, 'MarketState': 'Open'}}
+        _merge(snapshot, {'Quote': {'Bid': 10.4}, 'LastUpdated': '2025-01-02T10:00:00Z'})
+        self.assertEqual(snapshot['Quote'], {'Bid': 10.4, 'Ask': 10.6, 'MarketState': 'Open'})
+        self.assertEqual(snapshot['LastUpdated'], '2025-01-02T10:00:00Z')
+
+
+class SharedCacheTests(SimpleTestCase):
+    """Caches lus par plusieurs processus : locmem refusé"""
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'trading_app_shared_cache'},
+    })
+    def test_require_shared(self):
+        self.assertEqual(require_shared('PRICE_FEED_CACHE_ALIAS'), 'shared')
+        with override_settings(PRICE_FEED_CACHE_ALIAS='default'):
+            with self.assertRaises(ImproperlyConfigured):
+                require_shared('PRICE_FEED_CACHE_ALIAS')
+        with override_settings(PRICE_FEED_CACHE_ALIAS='missing'):
+            with self.assertRaises(ImproperlyConfigured):
+                require_shared('PRICE_FEED_CACHE_ALIAS')
+
+
+class SaxoPriceStreamTests(SimpleTestCase):
+    """SaxoPriceStream contre le faux courtier : snapshot, deltas, reset, déconnexion"""
+
+    def setUp(self):
+        cache.clear()
+        self.server = start_fake_broker(stream_interval=0.05, symbols=5, positions=10, trades=10)
+        self.store = PriceStore(alias='default')
+        self.stream = SaxoPriceStream(saxo_broker(self.server), store=self.store)
+
+    def tearDown(self):
+        self.stream.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _subscribed(self):
+        self.stream.context_id = 'ctxtest'
+        self.stream._subscribe('Stock', (1, 2))
+        return next(iter(self.stream.subscriptions))
+
+    def test_snapshot_fills_price_store(self):
+        reference_id = self._subscribed()
+
+        self.assertEqual(self.server.streaming['ctxtest'][reference_id], [1, 2])
+        for uic in (1, 2):
+            quote = self.store.get('saxo', uic)
+            self.assertIsNotNone(quote)
+            self.assertEqual(quote['source'], 'saxo_stream')
+            self.assertLess(quote['bid'], quote['ask'])
+
+    def test_delta_updates_only_sent_fields(self):
+        reference_id = self._subscribed()
+        ask = self.store.get('saxo', 1)['ask']
+
+        self.stream.handle_message({'reference_id': reference_id, 'payload': [{'Uic': 1, 'Quote': {'Bid': 1.5}}]})
+
+        quote = self.store.get('saxo', 1)
+        self.assertEqual(quote['bid'], 1.5)
+        self.assertEqual(quote['ask'], ask)
+
+    def test_delta_of_unknown_subscription_is_ignored(self):
+        self._subscribed()
+        bid = self.store.get('saxo', 1)['bid']
+
+        self.stream.handle_message({'reference_id': 'prices_99', 'payload': [{'Uic': 1, 'Quote': {'Bid': 1.5}}]})
+
+        self.assertEqual(self.store.get('saxo', 1)['bid'], bid)
+
+    def test_reset_subscriptions_recreates_target(self):
+        old_reference = self._subscribed()
+
+        self.stream.handle_message({'reference_id': RESET_SUBSCRIPTIONS, 'payload': {
+            'ReferenceId': RESET_SUBSCRIPTIONS, 'TargetReferenceIds': [old_reference],
+        }})
+
+        self.assertEqual(self.stream.stats['resets'], 1)
+        self.assertNotIn(old_reference, self.stream.subscriptions)
+        (new_reference, subscription), = self.stream.subscriptions.items()
+        self.assertEqual(subscription, {'asset_type': 'Stock', 'uics': (1, 2)})
+        self.assertEqual(set(self.server.streaming['ctxtest']), {new_reference})
+
+    def test_disconnect_closes_stream(self):
+        self._subscribed()
+        with self.assertRaises(WebSocketClosed):
+            self.stream.handle_message({'reference_id': DISCONNECT, 'payload': None})
+
+    def test_reconnects_with_new_context(self):
+        self.stream.watch({1: {'asset_type': 'Stock', 'symbol': 'FAKE1'}, 2: {'asset_type': 'Stock', 'symbol': 'FAKE2'}})
+        self.stream.start()
+        self.assertTrue(wait_until(lambda: self.stream.stats['quotes'] > 2))
+        first_context = self.stream.context_id
+
+        # Coupure réseau : recv() du thread du flux reçoit EOF
+        self.stream.connection.sock.shutdown(socket.SHUT_RDWR)
+
+        self.assertTrue(wait_until(lambda: self.stream.stats['reconnects'] >= 1))
+        self.assertTrue(wait_until(lambda: self.stream.context_id != first_context and self.stream.status()['connected']))
+        quotes = self.stream.stats['quotes']
+        self.assertTrue(wait_until(lambda: self.stream.stats['quotes'] > quotes))
+        self.assertEqual(self.stream.stats['errors'], 0)
+        self.assertNotIn(first_context, self.server.streaming)
+
+
+def binance_symbol(symbol, apply_min_to_market=True):
+    """Entrée exchangeInfo minimale : pas de prix 0.01, pas de quantité 0.001, notionnel minimum 10"""
+    return {
+        'symbol': symbol, 'baseAsset': symbol[:-4], 'quoteAsset': 'USDT', 'status': 'TRADING',
+        'filters': [
+            {'filterType': 'PRICE_FILTER', 'tickSize': '0.01000000', 'minPrice': '0.01000000', 'maxPrice': '1000000.00000000'},
+            {'filterType': 'LOT_SIZE', 'stepSize': '0.00100000', 'minQty': '0.00100000', 'maxQty': '9000.00000000'},
+            {'filterType': 'NOTIONAL', 'minNotional': '10.00000000', 'applyMinToMarket': apply_min_to_market,
+             'maxNotional': '9000000.00000000'},
+        ],
+    }
+
+
+class ExchangeInfoIndexTests(SimpleTestCase):
+    """Arrondis au pas et contrôles de notionnel de prepare_order"""
+
+    def setUp(self):
+        self.index = ExchangeInfoIndex.from_exchange_info({'symbols': [
+            binance_symbol('BTCUSDT'), binance_symbol('ETHUSDT', apply_min_to_market=False),
+        ]})
+
+    def test_round_to_step(self):
+        self.assertEqual(str(_round_to_step(Decimal('1.23456'), '0.00100000')), '1.234')
+        self.assertEqual(str(_round_to_step(Decimal('1.23456'), '0.00100000', ROUND_UP)), '1.235')
+        self.assertEqual(str(_round_to_step(Decimal('17.9'), '1.00000000')), '17')
+        self.assertEqual(_round_to_step(Decimal('1.23456'), None), Decimal('1.23456'))
+
+    def test_limit_price_rounded_against_the_order(self):
+        # Jamais plus défavorable : vers le bas à l'achat, vers le haut à la vente
+        quantity, price = self.index.prepare_order('BTCUSDT', 'BUY', Decimal('0.12345'), 'LIMIT', Decimal('100.019'))
+        self.assertEqual((str(quantity), str(price)), ('0.123', '100.01'))
+        quantity, price = self.index.prepare_order('BTCUSDT', 'SELL', Decimal('0.12345'), 'LIMIT', Decimal('100.011'))
+        self.assertEqual((str(quantity), str(price)), ('0.123', '100.02'))
+
+    def test_quantity_below_step_rejected(self):
+        with self.assertRaises(OrderValidationError):
+            self.index.prepare_order('BTCUSDT', 'BUY', Decimal('0.0004'), 'MARKET', reference_price=Decimal('100'))
+
+    def test_market_min_notional(self):
+        # 0.05 x 100 = 5 USDT < 10 : refusé si applyMinToMarket, accepté sinon
+        with self.assertRaises(OrderValidationError):
+            self.index.prepare_order('BTCUSDT', 'BUY', Decimal('0.05'), 'MARKET', reference_price=Decimal('100'))
+        quantity, price = self.index.prepare_order('ETHUSDT', 'BUY', Decimal('0.05'), 'MARKET',
+                                                   reference_price=Decimal('100'))
+        self.assertEqual((quantity, price), (Decimal('0.050'), None))
+        # Le minimum s'applique toujours aux ordres LIMIT
+        with self.assertRaises(OrderValidationError):
+            self.index.prepare_order('ETHUSDT', 'BUY', Decimal('0.05'), 'LIMIT', Decimal('100'))
+
+
+class LotBookTests(SimpleTestCase):
+    """Consommation FIFO des lots ouverts"""
+
+    def test_sell_spans_two_lots(self):
+        book = LotBook()
+        self.assertEqual(book.fill(1.0, 100.0), 0.0)
+        self.assertEqual(book.fill(2.0, 110.0), 0.0)
+
+        # Vente de 2 : tout le premier lot (+20) puis 1 du second (+10)
+        self.assertAlmostEqual(book.fill(-2.0, 120.0), 30.0)
+        self.assertEqual(book.to_state(), {'q': [1.0], 'p': [110.0]})
+        self.assertEqual(book.position, 1.0)
+        self.assertAlmostEqual(book.unrealized(130.0), 20.0)
+
+    def test_sell_beyond_position_opens_short_lot(self):
+        book = LotBook()
+        book.fill(1.0, 100.0)
+
+        self.assertAlmostEqual(book.fill(-3.0, 90.0), -10.0)
+        self.assertEqual(book.to_state(), {'q': [-2.0], 'p': [90.0]})
+        self.assertAlmostEqual(book.unrealized(80.0), 20.0)
+
+    def test_state_round_trip(self):
+        book = LotBook()
+        book.fill(1.0, 100.0)
+        book.fill(2.0, 110.0)
+        book.fill(-1.5, 120.0)
+
+        restored = LotBook.from_state(book.to_state())
+        self.assertEqual(restored.position, book.position)
+        self.assertAlmostEqual(restored.fill(-1.5, 130.0), book.fill(-1.5, 130.0))
+
+
+class FakeBinanceTestCase(TransactionTestCase):
+    """Credentials Binance pointant sur le faux courtier, Telegram coupé, exchangeInfo hors BASE_DIR"""
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.server = start_fake_broker(stream_interval=0.05, symbols=20, positions=10, trades=10)
+        self.exchange_info_dir = tempfile.mkdtemp()
+        settings_override = override_settings(
+            BINANCE_EXCHANGE_INFO_PATH=self.exchange_info_dir,
+            ORDER_EXECUTION_TIMEOUT=0.2,
+            ORDER_EXECUTION_RETRY_DELAY=0.01,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        telegram = mock.patch.object(telegram_notifier, 'send_message', return_value=True)
+        telegram.start()
+        self.addCleanup(telegram.stop)
+
+        self.user = User.objects.create_user('trader', password='secret')
+        self.credentials = BrokerCredentials.objects.create(
+            user=self.user, broker_type='binance', name='fake', base_url=self.server.base_url,
+            binance_api_key='fake-key', binance_api_secret='fake-secret',
+        )
+        self.symbol = next(info['symbol'] for info in self.server.dataset.binance_symbols if info['quoteAsset'] == 'USDT')
+        self.price = Decimal(str(self.server.dataset.price(self.symbol)))
+        # Notionnel d'environ 50 USDT (au-dessus du minNotional), 2 décimales comme PendingOrder
+        self.quantity = (Decimal('50') / self.price).quantize(Decimal('0.01'), rounding=ROUND_UP)
+        self.all_asset = AllAssets.objects.create(symbol=self.symbol, name=self.symbol, platform='binance',
+                                                  asset_type='Crypto', market='SPOT')
+
+        self.broker = BinanceBroker(self.user, self.credentials.get_credentials_dict())
+        self.assertTrue(self.broker.authenticate())
+        # Index exchangeInfo chargé d'avance : pas de revalidation en arrière-plan pendant le test
+        self.assertIsNotNone(exchange_index(self.broker))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.exchange_info_dir, ignore_errors=True)
+
+    def dataset_orders(self, client_order_id):
+        return [order for order in self.server.dataset._orders.values() if order.get('clientOrderId') == client_order_id]
+
+
+class BinanceUserStreamTests(FakeBinanceTestCase):
+    """Flux utilisateur : executionReport appliqué au PendingOrder du pipeline"""
+
+    def setUp(self):
+        super().setUp()
+        asset_tradable = AssetTradable.objects.create(
+            all_asset=self.all_asset, symbol=self.symbol, name=self.symbol, platform='binance',
+            asset_type=AssetType.objects.create(name='Crypto'), market=Market.objects.create(name='Binance'),
+        )
+        self.pending = PendingOrder.objects.create(
+            user=self.user, asset_tradable=asset_tradable, broker_credentials=self.credentials,
+            order_id='st1-ex1-B', client_order_id='st1-ex1-B', side='BUY', status='PENDING',
+            original_quantity=self.quantity, remaining_quantity=self.quantity,
+            broker_data={'symbol': self.symbol, 'quantity': str(self.quantity),
+                         'lifecycle': [{'event': 'SUBMITTED', 'status': 'PENDING', 'at': '', 'detail': ''}]},
+        )
+        self.stream = BinanceUserStream(self.broker, self.credentials)
+
+    def tearDown(self):
+        self.stream.stop()
+        super().tearDown()
+
+    def test_execution_report_matches_client_order_id(self):
+        self.stream.start()
+        self.assertTrue(wait_until(lambda: self.server.user_streams.get(self.stream.listen_key)))
+
+        # Réponse de l'envoi pas encore traitée : seul newClientOrderId identifie l'ordre
+        result = self.broker.place_order(self.symbol, 'BUY', self.quantity, client_order_id='st1-ex1-B',
+                                         reference_price=self.price)
+        self.assertEqual(result['status'], 'FILLED')
+
+        self.assertTrue(wait_until(lambda: PendingOrder.objects.get(pk=self.pending.pk).status == 'FILLED'))
+        pending = PendingOrder.objects.get(pk=self.pending.pk)
+        self.assertEqual(pending.executed_quantity, self.quantity)
+        self.assertEqual(pending.remaining_quantity, 0)
+        self.assertEqual(pending.broker_data['X'], 'FILLED')
+        self.assertEqual(pending.broker_data['i'], result['orderId'])
+        # État du pipeline conservé
+        self.assertEqual(pending.broker_data['lifecycle'][0]['event'], 'SUBMITTED')
+        self.assertEqual(pending.broker_data['quantity'], str(self.quantity))
+        self.assertEqual(self.stream.stats['errors'], 0)
+
+    def test_unexpected_error_keeps_stream_alive(self):
+        self.stream.start()
+        self.assertTrue(wait_until(lambda: self.stream.stats['connections'] == 1))
+
+        with mock.patch.object(self.stream, '_apply_execution', side_effect=RuntimeError('bug')):
+            self.broker.place_order(self.symbol, 'BUY', self.quantity, client_order_id='st1-ex1-B',
+                                    reference_price=self.price)
+            self.assertTrue(wait_until(lambda: self.stream.stats['errors'] == 1))
+
+        self.assertTrue(wait_until(lambda: self.stream.stats['connections'] == 2, timeout=5))
+        self.assertTrue(self.stream._thread.is_alive())
+
+
+class OrderExecutionTests(FakeBinanceTestCase):
+    """Pipeline d'ordres : idempotence de l'intention, reprise après timeout"""
+
+    def setUp(self):
+        super().setUp()
+        asset = Asset.objects.create(symbol=self.symbol, symbol_clean=self.symbol, name=self.symbol)
+        self.strategy = Strategy.objects.create(name='test', asset=asset, broker=self.credentials, user=self.user)
+        self.execution = StrategyExecution.objects.create(strategy=self.strategy, current_price=self.price, signal='BUY')
+        self.service = OrderExecutionService(workers=2)
+        self.brokers = BrokerRegistry()
+
+    def tearDown(self):
+        self.service.shutdown()
+        super().tearDown()
+
+    def submit(self):
+        return self.service.submit(self.strategy, 'BUY', self.quantity, execution=self.execution,
+                                   reference_price=self.price, brokers=self.brokers)
+
+    def test_same_intent_sends_a_single_order(self):
+        first = self.submit()
+        second = self.submit()
+
+        self.assertEqual(first['status'], 'PENDING')
+        self.assertTrue(second['duplicate'])
+        self.assertEqual(second['client_order_id'], first['client_order_id'])
+        result = self.service.wait(first['client_order_id'], timeout=5)
+
+        self.assertEqual(result['status'], 'FILLED')
+        self.assertEqual(PendingOrder.objects.count(), 1)
+        self.assertEqual(len(self.dataset_orders(first['client_order_id'])), 1)
+        self.assertTrue(self.submit()['duplicate'])
+        self.assertEqual(self.server.stats['binance_new_order'], 1)
+
+    def test_timeout_recovers_order_without_resend(self):
+        original = FakeBrokerHandler.binance_new_order
+        posts = []
+
+        def slow_new_order(handler, params, body):
+            # Ordre créé, réponse reçue après ORDER_EXECUTION_TIMEOUT
+            response = original(handler, params, body)
+            posts.append(response)
+            if len(posts) == 1:
+                time.sleep(0.5)
+            return response
+
+        with mock.patch.object(FakeBrokerHandler, 'binance_new_order', slow_new_order):
+            submitted = self.submit()
+            result = self.service.wait(submitted['client_order_id'], timeout=10)
+
+        pending = PendingOrder.objects.get(client_order_id=submitted['client_order_id'])
+        events = [entry['event'] for entry in pending.broker_data['lifecycle']]
+        self.assertEqual(events, ['QUEUED', 'SUBMITTED', 'UNCERTAIN', 'RECOVERED', 'ACCEPTED'])
+        self.assertEqual(len(posts), 1)
+        orders = self.dataset_orders(submitted['client_order_id'])
+        self.assertEqual(len(orders), 1)
+        self.assertEqual(result['order_id'], str(orders[0]['orderId']))
+        self.assertEqual(self.service.stats['recovered'], 1)
+
+    def test_timeout_before_receipt_resends_with_same_client_id(self):
+        original = FakeBrokerHandler.binance_new_order
+        posts = []
+
+        def lost_new_order(handler, params, body):
+            # Premier envoi perdu avant d'atteindre le carnet
+            posts.append(params)
+            if len(posts) == 1:
+                time.sleep(0.5)
+                return 503, {'code': -1001, 'msg': 'Internal error'}
+            return original(handler, params, body)
+
+        with mock.patch.object(FakeBrokerHandler, 'binance_new_order', lost_new_order):
+            submitted = self.submit()
+            result = self.service.wait(submitted['client_order_id'], timeout=10)
+
+        events = [entry['event'] for entry in
+                  PendingOrder.objects.get(client_order_id=submitted['client_order_id']).broker_data['lifecycle']]
+        self.assertEqual(events, ['QUEUED', 'SUBMITTED', 'UNCERTAIN', 'SUBMITTED', 'ACCEPTED'])
+        self.assertEqual(len(posts), 2)
+        self.assertEqual({post['newClientOrderId'] for post in posts}, {submitted['client_order_id']})
+        self.assertEqual(len(self.dataset_orders(submitted['client_order_id'])), 1)
+        self.assertEqual(result['status'], 'FILLED')
+
+
+class SaxoOrderRecoveryTests(TransactionTestCase):
+    """Ordres Saxo retrouvés par ExternalReference ; jamais renvoyés s'ils sont introuvables"""
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.server = start_fake_broker(symbols=5, positions=10, trades=10)
+        settings_override = override_settings(ORDER_EXECUTION_TIMEOUT=0.2, ORDER_EXECUTION_RETRY_DELAY=0.01)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        telegram = mock.patch.object(telegram_notifier, 'send_message', return_value=True)
+        telegram.start()
+        self.addCleanup(telegram.stop)
+        self.broker = saxo_broker(self.server, account_key=FAKE_SAXO_ACCOUNT_KEY, client_key=FAKE_SAXO_CLIENT_KEY)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_filled_market_order_found_in_activities(self):
+        self.assertIn('OrderId', self.broker.place_order('FAKE', 'BUY', Decimal('10'), 'Market', uic=1,
+                                                         client_order_id='st1-ex1-B'))
+
+        found = self.broker.get_order_by_client_id('st1-ex1-B', since=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(found['ExternalReference'], 'st1-ex1-B')
+        self.assertEqual(found['Status'], 'FinalFill')
+        self.assertIsNone(self.broker.get_order_by_client_id('st1-ex2-B'))
+
+    def test_lost_order_is_marked_unknown_and_not_resent(self):
+        instrument = self.server.dataset.saxo_instruments[0]
+        user = User.objects.create_user('trader', password='secret')
+        credentials = BrokerCredentials.objects.create(
+            user=user, broker_type='saxo', name='fake', base_url=self.server.base_url,
+            saxo_access_token='fake-access-token', saxo_refresh_token='fake-refresh-token',
+            saxo_token_expires_at=timezone.now() + timedelta(hours=1),
+            saxo_account_key=FAKE_SAXO_ACCOUNT_KEY, saxo_client_key=FAKE_SAXO_CLIENT_KEY,
+        )
+        AllAssets.objects.create(symbol=instrument['Symbol'], name=instrument['Description'], platform='saxo',
+                                 asset_type=instrument['AssetType'], market='XNAS', saxo_uic=instrument['Identifier'])
+        asset = Asset.objects.create(symbol=instrument['Symbol'], symbol_clean=instrument['Symbol'],
+                                     name=instrument['Description'])
+        strategy = Strategy.objects.create(name='test', asset=asset, broker=credentials, user=user)
+        execution = StrategyExecution.objects.create(strategy=strategy, current_price=Decimal('100'), signal='BUY')
+        service = OrderExecutionService(workers=1)
+        self.addCleanup(service.shutdown)
+        posts = []
+
+        def lost_new_order(handler, params, body):
+            # Requête jamais parvenue au carnet, réponse après le timeout
+            posts.append(body)
+            time.sleep(0.5)
+            return 503, {'ErrorCode': 'ServiceUnavailable', 'Message': 'Indisponible'}
+
+        with mock.patch.object(FakeBrokerHandler, 'saxo_new_order', lost_new_order):
+            submitted = service.submit(strategy, 'BUY', 10, execution=execution, reference_price=100,
+                                       brokers=BrokerRegistry())
+            result = service.wait(submitted['client_order_id'], timeout=10)
+
+        events = [entry['event'] for entry in
+                  PendingOrder.objects.get(client_order_id=submitted['client_order_id']).broker_data['lifecycle']]
+        self.assertEqual(events, ['QUEUED', 'SUBMITTED', 'UNCERTAIN', 'UNKNOWN'])
+        self.assertEqual(result['status'], 'PENDING')
+        self.assertEqual(len(posts), 1)
+        self.assertEqual(service.stats['unknown'], 1)
+
+
+class PnLEngineTests(TestCase):
+    """Reprise incrémentale depuis PnLCheckpoint et recalcul complet"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('trader', password='secret')
+        all_asset = AllAssets.objects.create(symbol='BTCUSDT', name='BTCUSDT', platform='binance',
+                                             asset_type='Crypto', market='SPOT')
+        self.asset_tradable = AssetTradable.objects.create(
+            all_asset=all_asset, symbol='BTCUSDT', name='BTCUSDT', platform='binance',
+            asset_type=AssetType.objects.create(name='Crypto'), market=Market.objects.create(name='Binance'),
+        )
+        self.engine = PnLEngine(self.user)
+        self.mark_prices = {self.asset_tradable.id: 130}
+        self.start = timezone.now() - timedelta(days=1)
+
+    def add_trade(self, minutes, side, size, price):
+        trade = Trade.objects.create(user=self.user, asset_tradable=self.asset_tradable, side=side,
+                                     size=Decimal(size), price=Decimal(price), platform='binance')
+        # timestamp en auto_now_add : date du fill fixée après coup
+        Trade.objects.filter(pk=trade.pk).update(timestamp=self.start + timedelta(minutes=minutes))
+        return trade
+
+    def checkpoint(self):
+        return PnLCheckpoint.objects.get(user=self.user, asset_tradable=self.asset_tradable)
+
+    def test_resume_matches_full_recompute(self):
+        self.add_trade(1, 'BUY', '1', '100')
+        self.add_trade(2, 'BUY', '2', '110')
+        self.assertEqual(self.engine.process(mark_prices=self.mark_prices)['processed_fills'], 2)
+
+        sell = self.add_trade(3, 'SELL', '2', '120')
+        result = self.engine.process(mark_prices=self.mark_prices)
+
+        # Seul le nouveau fill est traité, à partir des lots sauvegardés
+        self.assertEqual(result['processed_fills'], 1)
+        self.assertEqual(result['realized_pnl'], 30.0)
+        self.assertEqual(result['unrealized_pnl'], 20.0)
+        sell.refresh_from_db()
+        self.assertEqual(sell.realized_pnl, Decimal('30'))
+        resumed = self.checkpoint()
+        self.assertEqual(resumed.open_lots, {'q': [1.0], 'p': [110.0]})
+        self.assertEqual(resumed.processed_fills, 3)
+
+        full = self.engine.process(full=True, mark_prices=self.mark_prices)
+        self.assertEqual(full['processed_fills'], 3)
+        self.assertEqual((full['realized_pnl'], full['unrealized_pnl']), (30.0, 20.0))
+        recomputed = self.checkpoint()
+        self.assertEqual(recomputed.open_lots, resumed.open_lots)
+        self.assertEqual(recomputed.processed_fills, 3)
+
+    def test_backdated_fill_forces_recompute(self):
+        self.add_trade(1, 'BUY', '1', '100')
+        self.add_trade(3, 'SELL', '1', '120')
+        self.engine.process(mark_prices=self.mark_prices)
+        self.assertEqual(self.checkpoint().realized_pnl, Decimal('20'))
+
+        # Fill antérieur au checkpoint : le premier lot vendu devient celui à 90
+        self.add_trade(0, 'BUY', '1', '90')
+        result = self.engine.process(mark_prices=self.mark_prices)
+
+        self.assertEqual(result['processed_fills'], 3)
+        self.assertEqual(result['realized_pnl'], 30.0)
+        self.assertEqual(self.checkpoint().open_lots, {'q': [1.0], 'p': [100.0]})
@@ -0,0 +1,275 @@
+"""
+Cycle de vie des tokens Saxo : rafraîchissement proactif et partagé entre processus
+
+Les credentials sont rangés dans un tas (heapq) ordonné par date de rafraîchissement
+(`saxo_token_expires_at` moins TOKEN_REFRESH_MARGIN) : le service ne traite que ceux
+qui arrivent à échéance au lieu de parcourir tous les utilisateurs à chaque passage.
+
+    queue = TokenRefreshQueue()
+    queue.load()
+    queue.run_due()      # passage unique (cron)
+    queue.run_forever()  # service permanent (refresh_broker_tokens --loop)
+
+Un seul rafraîchissement par credential est en cours, quel que soit le nombre de
+processus : verrou dans le cache partagé (cache.add, TOKEN_CACHE_ALIAS), vérification
+sous verrou de ligne (select_for_update) dans une transaction courte, appel HTTP hors
+transaction puis écriture conditionnelle sur le refresh token réservé. Les nouveaux
+tokens sont publiés dans le cache : les workers (SaxoBroker.authenticate) les reprennent
+sans appeler l'API d'authentification.
+"""
+
+import heapq
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import BrokerCredentials
+
+logger = logging.getLogger(__name__)
+
+REFRESHED = 'refreshed'
+FRESH = 'fresh'
+IN_FLIGHT = 'in_flight'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+_TOKENS_KEY = 'trading_app:saxo_tokens:{}'
+_LOCK_KEY = 'trading_app:saxo_token_refresh:{}'
+
+
+def get_cache():
+    """Backend de cache partagé par les workers (TOKEN_CACHE_ALIAS)"""
+    return caches[getattr(settings, 'TOKEN_CACHE_ALIAS', 'shared')]
+
+
+def refresh_margin() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'TOKEN_REFRESH_MARGIN', 300))
+
+
+def aware_datetime(value: Optional[datetime]) -> Optional[datetime]:
+    """Les tokens sont parfois datés avec datetime.now() (naïf) : même convention que l'ORM"""
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+def is_24h_token(access_token: Optional[str], refresh_token: Optional[str]) -> bool:
+    """Token 24h (access == refresh) : pas de rafraîchissement OAuth possible"""
+    return bool(access_token) and access_token == refresh_token
+
+
+def is_refreshable(credentials: BrokerCredentials) -> bool:
+    return (
+        credentials.broker_type == 'saxo'
+        and bool(credentials.saxo_refresh_token)
+        and not is_24h_token(credentials.saxo_access_token, credentials.saxo_refresh_token)
+    )
+
+
+def refresh_due_at(credentials: BrokerCredentials) -> datetime:
+    """Date à laquelle rafraîchir (immédiatement si l'expiration est inconnue)"""
+    expires_at = aware_datetime(credentials.saxo_token_expires_at)
+    if expires_at is None:
+        return timezone.now()
+    return expires_at - refresh_margin()
+
+
+def needs_refresh(credentials: BrokerCredentials, now: Optional[datetime] = None) -> bool:
+    return (now or timezone.now()) >= refresh_due_at(credentials)
+
+
+def publish_tokens(credentials: BrokerCredentials):
+    """Publie les tokens courants dans le cache partagé (jusqu'à leur expiration)"""
+    expires_at = aware_datetime(credentials.saxo_token_expires_at)
+    timeout = None
+    if expires_at is not None:
+        timeout = max(1, int((expires_at - timezone.now()).total_seconds()))
+    get_cache().set(_TOKENS_KEY.format(credentials.pk), {
+        'access_token': credentials.saxo_access_token,
+        'refresh_token': credentials.saxo_refresh_token,
+        'expires_at': expires_at,
+    }, timeout)
+
+
+def shared_tokens(credentials_id) -> Optional[Dict[str, Any]]:
+    """Tokens encore valides publiés par un autre processus (None sinon)"""
+    if not credentials_id:
+        return None
+    tokens = get_cache().get(_TOKENS_KEY.format(credentials_id))
+    if not tokens or not tokens.get('access_token'):
+        return None
+    if tokens['expires_at'] is not None and tokens['expires_at'] <= timezone.now():
+        return None
+    return tokens
+
+
+def refresh_in_flight(credentials_id) -> bool:
+    return get_cache().get(_LOCK_KEY.format(credentials_id)) is not None
+
+
+def refresh_credentials(credentials_id, force: bool = False) -> str:
+    """
+    Rafraîchit les tokens d'un credential Saxo, au plus une fois à la fois
+
+    Returns:
+        str: REFRESHED, FRESH (déjà rafraîchi par un autre processus), IN_FLIGHT
+        (rafraîchissement en cours ailleurs), FAILED ou SKIPPED (token 24h, inactif)
+    """
+    cache = get_cache()
+    lock_key = _LOCK_KEY.format(credentials_id)
+    owner = uuid.uuid4().hex
+    if not cache.add(lock_key, owner, getattr(settings, 'TOKEN_REFRESH_LOCK_TIMEOUT', 60)):
+        return IN_FLIGHT
+
+    try:
+        # Réservation courte : état vérifié sous verrou de ligne, puis commit avant l'appel HTTP
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = BrokerCredentials.objects.select_for_update(skip_locked=True)
+            else:
+                queryset = BrokerCredentials.objects.select_for_update()
+            credentials = queryset.filter(pk=credentials_id).first()
+            if credentials is None:
+                # Ligne verrouillée par un autre processus ou supprimée
+                return IN_FLIGHT if BrokerCredentials.objects.filter(pk=credentials_id).exists() else SKIPPED
+            if not credentials.is_active or not is_refreshable(credentials):
+                return SKIPPED
+
+            # Un autre processus a pu rafraîchir entre la planification et le verrou
+            if not force and not needs_refresh(credentials):
+                publish_tokens(credentials)
+                return FRESH
+            claimed_refresh_token = credentials.saxo_refresh_token
+
+        # Appel Saxo hors transaction : aucune ligne ni connexion retenue pendant la requête
+        from .brokers.factory import BrokerFactory
+        broker = BrokerFactory.create_broker('saxo', credentials.user, credentials.get_credentials_dict())
+        if not broker.refresh_auth_token(persist=False):
+            logger.warning(f"❌ Échec du refresh des tokens Saxo ({credentials.name})")
+            return FAILED
+
+        # Écriture conditionnelle : ignorée si les tokens ont changé entre-temps (callback OAuth...)
+        updated = BrokerCredentials.objects.filter(
+            pk=credentials_id, saxo_refresh_token=claimed_refresh_token,
+        ).update(
+            saxo_access_token=broker.access_token,
+            saxo_refresh_token=broker.refresh_token,
+            saxo_token_expires_at=aware_datetime(broker.token_expires_at),
+            updated_at=timezone.now(),
+        )
+        credentials.refresh_from_db()
+        publish_tokens(credentials)
+        if not updated:
+            logger.warning(f"⚠️ Tokens Saxo modifiés pendant le refresh ({credentials.name}) : résultat ignoré")
+            return FRESH
+        logger.info(f"🔄 Tokens Saxo rafraîchis ({credentials.name}), expiration {credentials.saxo_token_expires_at}")
+        return REFRESHED
+    except Exception as e:
+        logger.error(f"❌ Erreur refresh tokens Saxo (credential {credentials_id}): {e}")
+        return FAILED
+    finally:
+        if cache.get(lock_key) == owner:
+            cache.delete(lock_key)
+
+
+def wait_for_refresh(credentials_id, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Attend (brièvement) les tokens d'un rafraîchissement mené par un autre processus"""
+    timeout = getattr(settings, 'TOKEN_REFRESH_WAIT', 5) if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    while True:
+        tokens = shared_tokens(credentials_id)
+        if tokens or not refresh_in_flight(credentials_id) or time.monotonic() >= deadline:
+            return tokens
+        time.sleep(0.1)
+
+
+class TokenRefreshQueue:
+    """Credentials Saxo ordonnés par date de rafraîchissement (tas min)"""
+
+    def __init__(self, queryset=None):
+        self.queryset = queryset
+        self.heap = []
+        self.scheduled = {}
+
+    def load(self, queryset=None) -> int:
+        """(Re)charge les credentials rafraîchissables depuis la base"""
+        if queryset is not None:
+            self.queryset = queryset
+        queryset = self.queryset if self.queryset is not None else BrokerCredentials.objects.all()
+        queryset = queryset.filter(broker_type='saxo', is_active=True, auto_refresh_enabled=True)
+        self.heap, self.scheduled = [], {}
+        for credentials in queryset.exclude(saxo_refresh_token__isnull=True).exclude(saxo_refresh_token=''):
+            self.schedule(credentials)
+        return len(self.scheduled)
+
+    def schedule(self, credentials: BrokerCredentials, due: Optional[datetime] = None):
+        if not is_refreshable(credentials):
+            self.scheduled.pop(credentials.pk, None)
+            return
+        due_ts = (due or refresh_due_at(credentials)).timestamp()
+        self.scheduled[credentials.pk] = due_ts
+        heapq.heappush(self.heap, (due_ts, credentials.pk))
+        # Les anciennes entrées du même credential sont ignorées au dépilement
+
+    def _discard_stale(self):
+        while self.heap and self.scheduled.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    def next_due(self) -> Optional[float]:
+        """Timestamp du prochain rafraîchissement (None si la file est vide)"""
+        self._discard_stale()
+        return self.heap[0][0] if self.heap else None
+
+    def run_due(self, now: Optional[float] = None, force: bool = False) -> Dict[str, int]:
+        """Rafraîchit les credentials arrivés à échéance (tous si force) et les replanifie"""
+        now = time.time() if now is None else now
+        retry = timedelta(seconds=getattr(settings, 'TOKEN_REFRESH_RETRY', 60))
+        counts = {REFRESHED: 0, FRESH: 0, IN_FLIGHT: 0, FAILED: 0, SKIPPED: 0}
+
+        due_ids = []
+        while True:
+            next_due = self.next_due()
+            if next_due is None or (next_due > now and not force):
+                break
+            _, credentials_id = heapq.heappop(self.heap)
+            self.scheduled.pop(credentials_id, None)
+            due_ids.append(credentials_id)
+
+        for credentials_id in due_ids:
+            outcome = refresh_credentials(credentials_id, force=force)
+            counts[outcome] += 1
+            credentials = BrokerCredentials.objects.filter(pk=credentials_id, is_active=True).first()
+            if credentials is None:
+                continue
+            if outcome in (FAILED, IN_FLIGHT):
+                # Nouvel essai rapproché ; le processus concurrent aura publié ses tokens
+                self.schedule(credentials, timezone.now() + retry)
+            else:
+                self.schedule(credentials)
+        return counts
+
+    def run_forever(self, max_sleep: float = 60, reload_every: float = 300, stop=None):
+        """Service permanent : dort jusqu'à la prochaine échéance, recharge périodiquement"""
+        self.load()
+        reloaded = time.monotonic()
+        while not (stop and stop.is_set()):
+            if time.monotonic() - reloaded >= reload_every:
+                # Nouveaux credentials, tokens obtenus par OAuth (callback)...
+                self.load()
+                reloaded = time.monotonic()
+            counts = self.run_due()
+            if any(counts.values()):
+                logger.info(f"🔑 Refresh tokens Saxo: {counts}")
+            next_due = self.next_due()
+            delay = max_sleep if next_due is None else min(max_sleep, max(0.0, next_due - time.time()))
+            if stop:
+                stop.wait(delay)
+            else:
+                time.sleep(delay)
@@ -0,0 +1,197 @@
+"""
+Agrégats courants des trades (modèle TradeAggregate)
+
+Les sommes achat/vente par utilisateur, symbole de base et plateforme sont mises à jour
+dans la même transaction que l'ingestion des trades. Les tableaux de bord lisent ainsi
+une ligne par symbole au lieu de recalculer tout l'historique des trades.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Case, CharField, Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum, Value, When,
+)
+from django.db.models.functions import StrIndex, Substr
+
+from .models import Trade, TradeAggregate
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE_FIELDS = [
+    'buy_quantity', 'buy_notional', 'sell_quantity', 'sell_notional',
+    'buy_count', 'sell_count', 'last_trade_at',
+]
+
+
+def get_base_symbol(symbol):
+    """Symbole de base (ex: "AAPL" depuis "AAPL:XNAS_0")"""
+    return symbol.split(':')[0] if symbol else symbol
+
+
+def base_symbol_expression(field='asset_tradable__symbol'):
+    """Équivalent SQL de get_base_symbol, utilisable dans un GROUP BY"""
+    return Case(
+        When(**{f'{field}__contains': ':'},
+             then=Substr(field, 1, StrIndex(field, Value(':')) - 1)),
+        default=F(field),
+        output_field=CharField(),
+    )
+
+
+def aggregate_trades(trades, extra_group_by=()):
+    """
+    Agrège un queryset de Trade par (symbole de base, plateforme) via un GROUP BY en base.
+
+    Retourne une liste de dicts contenant les mêmes champs que TradeAggregate.
+    """
+    decimal_field = DecimalField(max_digits=28, decimal_places=8)
+    zero = Value(Decimal('0'), output_field=decimal_field)
+    notional = ExpressionWrapper(F('size') * F('price'), output_field=decimal_field)
+    is_buy = Q(side='BUY')
+
+    return list(
+        trades.annotate(base_symbol=base_symbol_expression())
+        .values('base_symbol', 'platform', *extra_group_by)
+        .annotate(
+            buy_quantity=Sum(Case(When(is_buy, then=F('size')), default=zero, output_field=decimal_field)),
+            buy_notional=Sum(Case(When(is_buy, then=notional), default=zero, output_field=decimal_field)),
+            sell_quantity=Sum(Case(When(is_buy, then=zero), default=F('size'), output_field=decimal_field)),
+            sell_notional=Sum(Case(When(is_buy, then=zero), default=notional, output_field=decimal_field)),
+            buy_count=Count('id', filter=is_buy),
+            sell_count=Count('id', filter=~is_buy),
+            last_trade_at=Max('timestamp'),
+        )
+        .order_by()
+    )
+
+
+def _apply_trade(trade, sign):
+    """Ajoute (sign=1) ou retire (sign=-1) un trade de son agrégat. Doit être appelé dans une transaction."""
+    base_symbol = get_base_symbol(trade.asset_tradable.symbol)
+    size = Decimal(str(trade.size))
+    notional = size * Decimal(str(trade.price))
+
+    aggregate, _ = TradeAggregate.objects.select_for_update().get_or_create(
+        user_id=trade.user_id,
+        base_symbol=base_symbol,
+        platform=trade.platform,
+    )
+
+    prefix = 'buy' if str(trade.side).upper() == 'BUY' else 'sell'
+    updates = {
+        f'{prefix}_quantity': F(f'{prefix}_quantity') + sign * size,
+        f'{prefix}_notional': F(f'{prefix}_notional') + sign * notional,
+        f'{prefix}_count': F(f'{prefix}_count') + sign,
+    }
+    if sign > 0 and trade.timestamp and (aggregate.last_trade_at is None or trade.timestamp > aggregate.last_trade_at):
+        updates['last_trade_at'] = trade.timestamp
+
+    TradeAggregate.objects.filter(pk=aggregate.pk).update(**updates)
+
+    if sign < 0:
+        aggregate.refresh_from_db()
+        if aggregate.trade_count <= 0:
+            aggregate.delete()
+        elif aggregate.last_trade_at == trade.timestamp:
+            # Le dernier trade a été retiré : recalculer la date à partir des trades restants
+            aggregate.last_trade_at = Trade.objects.annotate(
+                base_symbol=base_symbol_expression()
+            ).filter(
+                user_id=trade.user_id, platform=trade.platform, base_symbol=base_symbol
+            ).exclude(pk=trade.pk).aggregate(last=Max('timestamp'))['last']
+            aggregate.save(update_fields=['last_trade_at', 'updated_at'])
+
+
+def record_trade(trade, previous=None):
+    """
+    Répercute la création ou la modification d'un trade sur les agrégats.
+
+    Args:
+        trade: Trade créé ou modifié
+        previous: copie du trade avant modification (None pour une création)
+    """
+    with transaction.atomic():
+        if previous is not None:
+            _apply_trade(previous, -1)
+        _apply_trade(trade, 1)
+
+
+def forget_trades(user, platform=None):
+    """Supprime les agrégats d'un utilisateur (après suppression de ses trades)"""
+    aggregates = TradeAggregate.objects.filter(user=user)
+    if platform:
+        aggregates = aggregates.filter(platform=platform)
+    aggregates.delete()
+
+
+def rebuild_aggregates(user=None):
+    """
+    Recalcule entièrement les agrégats depuis la table Trade (réparation).
+
+    Returns:
+        int: nombre de lignes TradeAggregate créées
+    """
+    trades = Trade.objects.all()
+    aggregates = TradeAggregate.objects.all()
+    if user is not None:
+        trades = trades.filter(user=user)
+        aggregates = aggregates.filter(user=user)
+
+    rows = aggregate_trades(trades, extra_group_by=('user_id',))
+
+    with transaction.atomic():
+        aggregates.delete()
+        TradeAggregate.objects.bulk_create([
+            TradeAggregate(
+                user_id=row['user_id'],
+                base_symbol=row['base_symbol'],
+                platform=row['platform'],
+                **{field: row[field] for field in AGGREGATE_FIELDS},
+            )
+            for row in rows
+        ], batch_size=1000)
+
+    logger.info(f"Agrégats de trades reconstruits: {len(rows)} lignes")
+    return len(rows)
+
+
+def stored_aggregates(user, platform=None):
+    """Agrégats persistés d'un utilisateur, au même format que aggregate_trades"""
+    aggregates = TradeAggregate.objects.filter(user=user)
+    if platform:
+        aggregates = aggregates.filter(platform__iexact=platform)
+    return list(aggregates.values('base_symbol', 'platform', *AGGREGATE_FIELDS))
+
+
+def merge_by_symbol(rows):
+    """
+    Fusionne des agrégats (symbole, plateforme) en un total par symbole de base
+
+    Clés en majuscules (btc et BTC forment un seul groupe) ; 'base_symbol' garde
+    l'écriture du premier agrégat rencontré.
+    """
+    merged = {}
+    for row in rows:
+        key = (row['base_symbol'] or '').upper()
+        if key not in merged:
+            merged[key] = {
+                'base_symbol': row['base_symbol'],
+                'platforms': set(),
+                'buy_quantity': Decimal('0'),
+                'buy_notional': Decimal('0'),
+                'sell_quantity': Decimal('0'),
+                'sell_notional': Decimal('0'),
+                'buy_count': 0,
+                'sell_count': 0,
+                'last_trade_at': None,
+            }
+        group = merged[key]
+        group['platforms'].add(row['platform'])
+        for field in ('buy_quantity', 'buy_notional', 'sell_quantity', 'sell_notional'):
+            group[field] += Decimal(row[field] or 0)
+        group['buy_count'] += row['buy_count'] or 0
+        group['sell_count'] += row['sell_count'] or 0
+        if row['last_trade_at'] and (group['last_trade_at'] is None or row['last_trade_at'] > group['last_trade_at']):
+            group['last_trade_at'] = row['last_trade_at']
+    return merged
@@ -1,10 +1,11 @@
 from django.urls import path
-from . import views
+from .views import portfolio, strategies, brokers, market, simulator
 from . import auth_views
 from . import saxo_sync
 from . import auto_refresh_views
 from . import pwa_views
 from . import automation_views
+from . import metrics_views
 
 urlpatterns = [
     # Authentification
@@ -13,19 +14,19 @@ urlpatterns = [
     path('logout/', auth_views.logout_view, name='logout'),
     
     # Pages principales
-    path('', views.home, name='home'),
-    path('brokers/', views.broker_dashboard, name='broker_dashboard'),
-    path('brokers/config/', views.broker_config, name='broker_config'),
-    path('brokers/config/<int:broker_id>/', views.broker_config, name='broker_config_edit'),
-    path('brokers/saxo/auth-url/', views.saxo_auth_url, name='saxo_auth_url'),
-    path('brokers/<int:broker_id>/saxo/auth-url/', views.saxo_auth_url, name='saxo_auth_url_broker'),
-    path('brokers/<int:broker_id>/exchange-auth-code/', views.exchange_auth_code, name='exchange_auth_code'),
-    path('brokers/saxo/callback/', views.saxo_auth_callback, name='saxo_auth_callback'),
-    path('brokers/<int:broker_id>/test/', views.test_broker_connection, name='test_broker_connection'),
-    path('brokers/<int:broker_id>/sync/', views.sync_broker_data, name='sync_broker_data'),
+    path('', portfolio.home, name='home'),
+    path('brokers/', brokers.broker_dashboard, name='broker_dashboard'),
+    path('brokers/config/', brokers.broker_config, name='broker_config'),
+    path('brokers/config/<int:broker_id>/', brokers.broker_config, name='broker_config_edit'),
+    path('brokers/saxo/auth-url/', brokers.saxo_auth_url, name='saxo_auth_url'),
+    path('brokers/<int:broker_id>/saxo/auth-url/', brokers.saxo_auth_url, name='saxo_auth_url_broker'),
+    path('brokers/<int:broker_id>/exchange-auth-code/', brokers.exchange_auth_code, name='exchange_auth_code'),
+    path('brokers/saxo/callback/', brokers.saxo_auth_callback, name='saxo_auth_callback'),
+    path('brokers/<int:broker_id>/test/', brokers.test_broker_connection, name='test_broker_connection'),
+    path('brokers/<int:broker_id>/sync/', brokers.sync_broker_data, name='sync_broker_data'),
     path('brokers/<int:broker_id>/sync-saxo-complete/', saxo_sync.sync_saxo_complete, name='sync_saxo_complete'),
     path('brokers/<int:broker_id>/force-refresh-tokens/', saxo_sync.force_refresh_saxo_tokens, name='force_refresh_saxo_tokens'),
-    path('brokers/<int:broker_id>/sync-trades/', views.sync_saxo_trades, name='sync_saxo_trades'),
+    path('brokers/<int:broker_id>/sync-trades/', brokers.sync_saxo_trades, name='sync_saxo_trades'),
     
     # URLs pour l'auto-refresh
     path('brokers/<int:broker_id>/toggle-auto-refresh/', auto_refresh_views.toggle_auto_refresh, name='toggle_auto_refresh'),
@@ -40,53 +41,55 @@ urlpatterns = [
     path('pwa/unsubscribe/', pwa_views.unsubscribe_push_notifications, name='pwa_unsubscribe'),
     path('pwa/test-notification/', pwa_views.send_test_notification, name='pwa_test_notification'),
     
-    path('brokers/<int:broker_id>/sync-positions/', views.sync_saxo_positions, name='sync_saxo_positions'),
-    path('brokers/<int:broker_id>/order/', views.place_broker_order, name='place_broker_order'),
+    path('brokers/<int:broker_id>/sync-positions/', brokers.sync_saxo_positions, name='sync_saxo_positions'),
+    path('brokers/<int:broker_id>/order/', brokers.place_broker_order, name='place_broker_order'),
     
-    path('trades/tabulator/', views.trade_tabulator, name='trade_tabulator'),
-    path('test-telegram/', views.test_telegram_notification, name='test_telegram'),
-    path('trades/tabulator/synch/', views.trade_tabulator_with_synch, name='trade_tabulator_with_synch'),
-    path('trades/binance/', views.binance_trades_ajax, name='binance_trades_ajax'),
-    path('trades/delete-all/', views.delete_all_trades, name='delete_all_trades'),
-    path('trades/update-all/', views.update_all_trades, name='update_all_trades'),
-    path('trades/chart-data/<str:asset_symbol>/', views.get_asset_price_for_chart, name='get_asset_price_for_chart'),
-    path('pending-orders/tabulator/', views.pending_orders_tabulator, name='pending_orders_tabulator'),
-    path('sync-pending-orders/<int:broker_id>/', views.sync_pending_orders, name='sync_pending_orders'),
-    path('cancel-order/<str:order_id>/', views.cancel_order, name='cancel_order'),
+    path('trades/tabulator/', portfolio.trade_tabulator, name='trade_tabulator'),
+    path('trades/tabulator/groups/', portfolio.trade_tabulator_groups, name='trade_tabulator_groups'),
+    path('trades/tabulator/children/', portfolio.trade_tabulator_children, name='trade_tabulator_children'),
+    path('test-telegram/', brokers.test_telegram_notification, name='test_telegram'),
+    path('trades/tabulator/synch/', portfolio.trade_tabulator_with_synch, name='trade_tabulator_with_synch'),
+    path('trades/binance/', portfolio.binance_trades_ajax, name='binance_trades_ajax'),
+    path('trades/delete-all/', portfolio.delete_all_trades, name='delete_all_trades'),
+    path('trades/update-all/', portfolio.update_all_trades, name='update_all_trades'),
+    path('trades/chart-data/<str:asset_symbol>/', market.get_asset_price_for_chart, name='get_asset_price_for_chart'),
+    path('pending-orders/tabulator/', portfolio.pending_orders_tabulator, name='pending_orders_tabulator'),
+    path('sync-pending-orders/<int:broker_id>/', portfolio.sync_pending_orders, name='sync_pending_orders'),
+    path('cancel-order/<str:order_id>/', portfolio.cancel_order, name='cancel_order'),
     
-    path('positions/tabulator/', views.position_tabulator, name='position_tabulator'),
-    path('positions/binance/', views.binance_positions_ajax, name='binance_positions_ajax'),
-    path('positions/delete-all/', views.delete_all_positions, name='delete_all_positions'),
-    path('positions/update-all/', views.update_all_positions, name='update_all_positions'),
-    path('positions/overview/', views.positions_overview_tabulator, name='positions_overview_tabulator'),
+    path('positions/tabulator/', portfolio.position_tabulator, name='position_tabulator'),
+    path('positions/binance/', portfolio.binance_positions_ajax, name='binance_positions_ajax'),
+    path('positions/delete-all/', portfolio.delete_all_positions, name='delete_all_positions'),
+    path('positions/update-all/', portfolio.update_all_positions, name='update_all_positions'),
+    path('positions/overview/', portfolio.positions_overview_tabulator, name='positions_overview_tabulator'),
 
-    path('assets/sync-all/', views.sync_all_assets, name='sync_all_assets'),
-    path('brokers/<int:broker_id>/sync-assets/', views.sync_broker_assets, name='sync_broker_assets'),
-    path('assets/search/', views.search_all_assets, name='search_all_assets'),
+    path('assets/sync-all/', brokers.sync_all_assets, name='sync_all_assets'),
+    path('brokers/<int:broker_id>/sync-assets/', brokers.sync_broker_assets, name='sync_broker_assets'),
+    path('assets/search/', market.search_all_assets, name='search_all_assets'),
     
 
-    path('assets/tabulator/', views.asset_tabulator, name='asset_tabulator'),
-    path('assets/save/', views.save_asset_ajax, name='save_asset_ajax'),
-    path('assets/tradable/tabulator/', views.asset_tradable_tabulator, name='asset_tradable_tabulator'),
-    path('assets/search/tabulator/', views.asset_search_tabulator, name='asset_search_tabulator'),
-    path('assets/update-yahoo/', views.update_all_assets_with_yahoo, name='update_all_assets_with_yahoo'),
-    path('assets/autocomplete/', views.asset_autocomplete, name='asset_autocomplete'),
-    path('assets/create/', views.create_asset, name='create_asset'),
-    path('assets/<int:asset_id>/price-history/', views.get_asset_price_history, name='get_asset_price_history'),
-    path('assets/<int:asset_id>/price/', views.get_asset_price, name='get_asset_price'),
-    path('brokers/<int:broker_id>/balance/', views.get_broker_balance, name='get_broker_balance'),
+    path('assets/tabulator/', market.asset_tabulator, name='asset_tabulator'),
+    path('assets/save/', market.save_asset_ajax, name='save_asset_ajax'),
+    path('assets/tradable/tabulator/', market.asset_tradable_tabulator, name='asset_tradable_tabulator'),
+    path('assets/search/tabulator/', market.asset_search_tabulator, name='asset_search_tabulator'),
+    path('assets/update-yahoo/', market.update_all_assets_with_yahoo, name='update_all_assets_with_yahoo'),
+    path('assets/autocomplete/', market.asset_autocomplete, name='asset_autocomplete'),
+    path('assets/create/', market.create_asset, name='create_asset'),
+    path('assets/<int:asset_id>/price-history/', market.get_asset_price_history, name='get_asset_price_history'),
+    path('assets/<int:asset_id>/price/', market.get_asset_price, name='get_asset_price'),
+    path('brokers/<int:broker_id>/balance/', brokers.get_broker_balance, name='get_broker_balance'),
     
-    path('strategies/tabulator/', views.strategy_tabulator, name='strategy_tabulator'),
-    path('strategies/create/', views.create_strategy, name='create_strategy'),
-    path('strategies/<int:strategy_id>/details/', views.strategy_details, name='strategy_details'),
-    path('strategies/<int:strategy_id>/toggle/', views.toggle_strategy, name='toggle_strategy'),
-    path('strategies/<int:strategy_id>/delete/', views.delete_strategy, name='delete_strategy'),
-    path('strategies/<int:strategy_id>/execute/', views.execute_strategy, name='execute_strategy'),
-    path('strategies/<int:strategy_id>/update-frequency/', views.update_strategy_frequency, name='update_strategy_frequency'),
-    path('strategies/<int:strategy_id>/update/', views.update_strategy, name='update_strategy'),
-    path('strategies/<int:strategy_id>/executions/', views.get_strategy_executions, name='get_strategy_executions'),
-    path('strategies/update-portfolio/', views.update_portfolio_quantities, name='update_portfolio_quantities'),
-    path('strategies/execution-history/', views.execution_history, name='execution_history'),
+    path('strategies/tabulator/', strategies.strategy_tabulator, name='strategy_tabulator'),
+    path('strategies/create/', strategies.create_strategy, name='create_strategy'),
+    path('strategies/<int:strategy_id>/details/', strategies.strategy_details, name='strategy_details'),
+    path('strategies/<int:strategy_id>/toggle/', strategies.toggle_strategy, name='toggle_strategy'),
+    path('strategies/<int:strategy_id>/delete/', strategies.delete_strategy, name='delete_strategy'),
+    path('strategies/<int:strategy_id>/execute/', strategies.execute_strategy, name='execute_strategy'),
+    path('strategies/<int:strategy_id>/update-frequency/', strategies.update_strategy_frequency, name='update_strategy_frequency'),
+    path('strategies/<int:strategy_id>/update/', strategies.update_strategy, name='update_strategy'),
+    path('strategies/<int:strategy_id>/executions/', strategies.get_strategy_executions, name='get_strategy_executions'),
+    path('strategies/update-portfolio/', portfolio.update_portfolio_quantities, name='update_portfolio_quantities'),
+    path('strategies/execution-history/', strategies.execution_history, name='execution_history'),
     
     # URLs pour l'automatisation
     path('automation/status/', automation_views.automation_status, name='automation_status'),
@@ -99,14 +102,17 @@ urlpatterns = [
     path('automation/execute/', automation_views.execute_manual_cycle, name='execute_manual_cycle'),
     path('automation/logs/', automation_views.automation_logs, name='automation_logs'),
     
-    path('order/place/', views.place_order_view, name='place_order_view'),
+    # Instrumentation (staff)
+    path('metrics/requests/', metrics_views.request_metrics, name='request_metrics'),
     
-    path('asset-tradable/', views.asset_search_tabulator, name='asset_tradable_home'),  # Redirection vers la recherche
-    path('asset-tradable/<int:asset_tradable_id>/update-saxo/', views.update_asset_tradable_saxo, name='update_asset_tradable_saxo'),
-    path('asset-tradable/update-all-saxo/', views.update_all_saxo_assets, name='update_all_saxo_assets'),
-    path('asset-tradable/update-saxo-page/', views.update_saxo_assets_page, name='update_saxo_assets_page'),
-    path('kenza/', views.kenza, name='kenza'),
-    path('kenza/simulateur/', views.portfolio_simulator, name='portfolio_simulator'),
-    path('api/historical-data/', views.get_historical_data_for_simulator, name='get_historical_data'),
-    path('test/', views.test_page, name='test_page'),
+    path('order/place/', brokers.place_order_view, name='place_order_view'),
+    
+    path('asset-tradable/', market.asset_search_tabulator, name='asset_tradable_home'),  # Redirection vers la recherche
+    path('asset-tradable/<int:asset_tradable_id>/update-saxo/', market.update_asset_tradable_saxo, name='update_asset_tradable_saxo'),
+    path('asset-tradable/update-all-saxo/', market.update_all_saxo_assets, name='update_all_saxo_assets'),
+    path('asset-tradable/update-saxo-page/', market.update_saxo_assets_page, name='update_saxo_assets_page'),
+    path('kenza/', simulator.kenza, name='kenza'),
+    path('kenza/simulateur/', simulator.portfolio_simulator, name='portfolio_simulator'),
+    path('api/historical-data/', simulator.get_historical_data_for_simulator, name='get_historical_data'),
+    path('test/', portfolio.test_page, name='test_page'),
 ]
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""
+Vues de trading_app, découpées par fonctionnalité :
+
+- portfolio : accueil, trades, positions, ordres en attente
+- strategies : stratégies de trading et exécutions
+- brokers : courtiers, authentification Saxo, synchronisation, ordres
+- market : actifs, recherche, historiques de prix
+- simulator : simulateur de portefeuille
+
+Les modules sont chargés à la demande : `from trading_app.views import trade_tabulator`
+reste valide mais n'importe que le module concerné.
+"""
+
+import importlib
+
+VIEW_MODULES = ['portfolio', 'strategies', 'brokers', 'market', 'simulator']
+
+
+def __getattr__(name):
+    for module_name in VIEW_MODULES:
+        module = importlib.import_module(f'.{module_name}', __name__)
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,949 @@
+"""
+Vues des courtiers : configuration, authentification Saxo, synchronisation et passage d'ordres
+"""
+
+from django.shortcuts import render, get_object_or_404
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import csrf_exempt
+from decimal import Decimal
+import json
+import logging
+from datetime import datetime
+from ..services import BrokerService  # Import direct de la classe BrokerService
+import requests
+from ..brokers.factory import BrokerFactory
+from ..brokers.registry import broker_registry
+from ..models import Asset, Position, Strategy, BrokerCredentials, AssetType, Market, AssetTradable, AllAssets
+from ..telegram_notifications import telegram_notifier
+
+
+logger = logging.getLogger(__name__)
+
+
+@login_required
+def broker_dashboard(request):
+    """Tableau de bord des courtiers"""
+    broker_service = BrokerService(request.user)
+    user_brokers = broker_service.get_user_brokers()
+    broker_balances = {}
+    from ..brokers.factory import BrokerFactory
+    for broker in user_brokers:
+        credentials = broker.get_credentials_dict()
+        broker_instance = BrokerFactory.create_broker(broker.broker_type, request.user, credentials)
+        if hasattr(broker_instance, "get_balance"):
+            broker_balances[broker.id] = broker_instance.get_balance()
+        else:
+            broker_balances[broker.id] = None
+    return render(request, 'trading_app/broker_dashboard.html', {
+        'brokers': user_brokers,
+        'supported_brokers': BrokerFactory.get_supported_brokers(),
+        'broker_balances': broker_balances,
+    })
+
+
+@login_required
+def broker_config(request, broker_id=None):
+    """Configuration d'un courtier"""
+    broker = None
+    if broker_id:
+        try:
+            broker = BrokerCredentials.objects.get(id=broker_id, user=request.user)
+        except BrokerCredentials.DoesNotExist:
+            pass
+    
+    if request.method == 'POST':
+        broker_type = request.POST.get('broker_type')
+        name = request.POST.get('name')
+        
+        if broker_type and name:
+            if broker:
+                # Mise à jour
+                broker.broker_type = broker_type
+                broker.name = name
+                broker.environment = request.POST.get('environment', 'simulation')
+                
+                if broker_type == 'saxo':
+                    broker.saxo_client_id = request.POST.get('saxo_client_id')
+                    broker.saxo_client_secret = request.POST.get('saxo_client_secret')
+                    broker.saxo_redirect_uri = request.POST.get('saxo_redirect_uri')
+                    # Gestion des tokens manuels (optionnels)
+                    access_token = request.POST.get('saxo_access_token')
+                    refresh_token = request.POST.get('saxo_refresh_token')
+                    if access_token:
+                        broker.saxo_access_token = access_token
+                    if refresh_token:
+                        broker.saxo_refresh_token = refresh_token
+                elif broker_type == 'binance':
+                    broker.binance_api_key = request.POST.get('binance_api_key')
+                    broker.binance_api_secret = request.POST.get('binance_api_secret')
+                    broker.binance_testnet = request.POST.get('binance_testnet') == 'on'
+                
+                broker.save()
+            else:
+                # Création
+                broker = BrokerCredentials.objects.create(
+                    user=request.user,
+                    broker_type=broker_type,
+                    name=name,
+                    environment=request.POST.get('environment', 'simulation'),
+                    saxo_client_id=request.POST.get('saxo_client_id'),
+                    saxo_client_secret=request.POST.get('saxo_client_secret'),
+                    saxo_redirect_uri=request.POST.get('saxo_redirect_uri'),
+                    saxo_access_token=request.POST.get('saxo_access_token'),
+                    saxo_refresh_token=request.POST.get('saxo_refresh_token'),
+                    binance_api_key=request.POST.get('binance_api_key'),
+                    binance_api_secret=request.POST.get('binance_api_secret'),
+                    binance_testnet=request.POST.get('binance_testnet') == 'on',
+                )
+    
+    return render(request, 'trading_app/broker_config.html', {
+        'broker': broker,
+        'supported_brokers': BrokerFactory.get_supported_brokers(),
+    })
+
+
+@login_required
+def saxo_auth_callback(request):
+    """Callback pour l'authentification Saxo"""
+    code = request.GET.get('code')
+    state = request.GET.get('state')
+    
+    if not code:
+        return JsonResponse({"error": "Code d'autorisation manquant"}, status=400)
+    
+    # Récupérer les credentials Saxo de l'utilisateur
+    try:
+        broker_creds = BrokerCredentials.objects.filter(
+            user=request.user, 
+            broker_type='saxo',
+            is_active=True
+        ).first()
+        
+        if not broker_creds:
+            return JsonResponse({"error": "Aucune configuration Saxo trouvée"}, status=400)
+        
+        # Utiliser le BrokerService pour l'authentification
+        broker_service = BrokerService(request.user)
+        success = broker_service.authenticate_saxo_with_code(broker_creds, code)
+        
+        if success:
+            # Récupérer l'instance du broker pour sauvegarder les tokens
+            broker = broker_service.get_broker_instance(broker_creds)
+            
+            # Sauvegarder les tokens dans les credentials
+            broker_creds.saxo_access_token = broker.access_token
+            broker_creds.saxo_refresh_token = broker.refresh_token
+            broker_creds.saxo_token_expires_at = broker.token_expires_at
+            broker_creds.save()
+            
+            return JsonResponse({"success": True, "message": "Authentification Saxo réussie"})
+        else:
+            return JsonResponse({"error": "Échec de l'authentification Saxo"}, status=400)
+        
+    except Exception as e:
+        return JsonResponse({"error": f"Erreur d'authentification: {str(e)}"}, status=400)
+
+
+@login_required
+def saxo_auth_url(request, broker_id=None):
+    """Obtenir l'URL d'authentification Saxo"""
+    try:
+        # Si un broker_id est fourni, utiliser ce broker spécifique
+        if broker_id:
+            try:
+                broker_creds = BrokerCredentials.objects.get(id=broker_id, user=request.user, broker_type='saxo')
+            except BrokerCredentials.DoesNotExist:
+                return JsonResponse({"error": "Courtier non trouvé"}, status=404)
+        else:
+            # Sinon, utiliser le premier broker Saxo actif
+            broker_creds = BrokerCredentials.objects.filter(
+                user=request.user, 
+                broker_type='saxo',
+                is_active=True
+            ).first()
+            
+            if not broker_creds:
+                return JsonResponse({"error": "Aucune configuration Saxo trouvée"}, status=400)
+        
+        # Vérifier que les credentials nécessaires sont présents
+        if not broker_creds.saxo_client_id:
+            return JsonResponse({"error": "Client ID manquant. Veuillez configurer votre client ID dans les paramètres du courtier."}, status=400)
+        
+        if not broker_creds.saxo_redirect_uri:
+            return JsonResponse({"error": "Redirect URI manquant. Veuillez configurer votre redirect URI dans les paramètres du courtier."}, status=400)
+        
+        broker_service = BrokerService(request.user)
+        auth_url = broker_service.get_saxo_auth_url(broker_creds)
+        
+        return JsonResponse({
+            "success": True,
+            "auth_url": auth_url
+        })
+        
+    except Exception as e:
+        # Log l'erreur complète pour le débogage
+        logger.error(f"Erreur dans saxo_auth_url: {str(e)}", exc_info=True)
+        return JsonResponse({"error": f"Erreur: {str(e)}"}, status=400)
+
+
+@login_required
+@csrf_exempt
+def exchange_auth_code(request, broker_id):
+    """Échanger un code d'autorisation contre des tokens"""
+    try:
+        broker_creds = BrokerCredentials.objects.get(id=broker_id, user=request.user, broker_type='saxo')
+        
+        # Récupérer le code d'autorisation depuis le body
+        data = json.loads(request.body)
+        authorization_code = data.get('code')
+        
+        if not authorization_code:
+            return JsonResponse({"error": "Code d'autorisation manquant"}, status=400)
+        
+        # Vérifier que les credentials sont présents
+        if not broker_creds.saxo_client_id or not broker_creds.saxo_client_secret or not broker_creds.saxo_redirect_uri:
+            return JsonResponse({
+                "error": "Configuration incomplète. Veuillez vérifier Client ID, Client Secret et Redirect URI."
+            }, status=400)
+        
+        print(f"\n🔐 Échange du code d'autorisation pour le courtier {broker_creds.name}")
+        print(f"   Client ID: {broker_creds.saxo_client_id}")
+        print(f"   Redirect URI: {broker_creds.saxo_redirect_uri}")
+        print(f"   Environment: {broker_creds.environment}")
+        
+        # Créer d'abord l'instance du broker
+        broker_service = BrokerService(request.user)
+        broker = broker_service.get_broker_instance(broker_creds)
+        
+        # Appeler directement la méthode authenticate_with_code sur l'instance
+        success = broker.authenticate_with_code(authorization_code)
+        
+        if success:
+            # Sauvegarder les tokens dans la base de données
+            broker_creds.saxo_access_token = broker.access_token
+            broker_creds.saxo_refresh_token = broker.refresh_token
+            broker_creds.saxo_token_expires_at = broker.token_expires_at
+            broker_creds.save()
+            
+            expires_in = int((broker.token_expires_at - datetime.now()).total_seconds()) if broker.token_expires_at else None
+            
+            print(f"✅ Tokens sauvegardés avec succès!")
+            print(f"   Access Token: {broker.access_token[:50]}...")
+            print(f"   Refresh Token: {broker.refresh_token[:50]}...")
+            print(f"   Expire dans: {expires_in} secondes\n")
+            
+            return JsonResponse({
+                "success": True,
+                "access_token": broker.access_token,
+                "refresh_token": broker.refresh_token,
+                "expires_in": expires_in
+            })
+        else:
+            error_msg = "Échec de l'échange du code d'autorisation. Vérifiez les logs pour plus de détails."
+            print(f"❌ {error_msg}\n")
+            return JsonResponse({"error": error_msg}, status=400)
+        
+    except BrokerCredentials.DoesNotExist:
+        return JsonResponse({"error": "Courtier non trouvé"}, status=404)
+    except Exception as e:
+        error_detail = str(e)
+        logger.error(f"Erreur dans exchange_auth_code: {error_detail}", exc_info=True)
+        print(f"❌ Erreur: {error_detail}\n")
+        return JsonResponse({"error": f"Erreur: {error_detail}"}, status=400)
+
+
+@login_required
+@csrf_exempt
+def sync_broker_data(request, broker_id):
+    """Synchroniser les données depuis un courtier"""
+    try:
+        broker_creds = BrokerCredentials.objects.get(id=broker_id, user=request.user)
+        broker_service = BrokerService(request.user)
+        
+        data_type = request.POST.get('data_type', 'positions')
+        
+        if data_type == 'positions':
+            positions = broker_service.sync_positions_from_broker(broker_creds)
+            return JsonResponse({
+                "success": True,
+                "message": f"{len(positions)} positions synchronisées"
+            })
+        elif data_type == 'trades':
+            result = broker_service.sync_trades_from_broker(broker_creds)
+            if result['success']:
+                return JsonResponse({
+                    "success": True,
+                    "message": f"{result['saved_count']} nouveaux trades synchronisés sur {result['total_trades']} au total"
+                })
+            else:
+                return JsonResponse({
+                    "success": False,
+                    "error": result['error']
+                }, status=400)
+        else:
+            return JsonResponse({"error": "Type de données non supporté"}, status=400)
+            
+    except BrokerCredentials.DoesNotExist:
+        return JsonResponse({"error": "Courtier non trouvé"}, status=404)
+    except Exception as e:
+        return JsonResponse({"error": f"Erreur de synchronisation: {str(e)}"}, status=400)
+
+
+@login_required
+@csrf_exempt
+def place_broker_order(request, broker_id):
+    """Placer un ordre via un courtier"""
+    try:
+        broker_creds = BrokerCredentials.objects.get(id=broker_id, user=request.user)
+        broker_service = BrokerService(request.user)
+        
+        data = json.loads(request.body)
+        symbol = data.get('symbol')
+        side = data.get('side')
+        size = data.get('size')
+        order_type = data.get('order_type', 'MARKET')
+        price = data.get('price')
+        
+        if not all([symbol, side, size]):
+            return JsonResponse({"error": "Paramètres manquants"}, status=400)
+        
+        result = broker_service.place_order(
+            broker_creds,
+            symbol,
+            side,
+            Decimal(str(size)),
+            order_type,
+            Decimal(str(price)) if price else None
+        )
+        
+        return JsonResponse(result)
+        
+    except BrokerCredentials.DoesNotExist:
+        return JsonResponse({"error": "Courtier non trouvé"}, status=404)
+    except Exception as e:
+        return JsonResponse({"error": f"Erreur de placement d'ordre: {str(e)}"}, status=400)
+
+
+def test_broker_connection(request, broker_id):
+    """Test de connexion à un broker spécifique"""
+    try:
+        credentials = BrokerCredentials.objects.get(id=broker_id, user=request.user)
+        broker = BrokerFactory.create_broker(credentials.broker_type, request.user, credentials.get_credentials_dict())
+        
+        if credentials.broker_type == 'binance':
+            # Test spécifique pour Binance
+            test_result = broker.test_connection()
+            auth_result = broker.authenticate()
+            
+            return JsonResponse({
+                'success': True,
+                'test_connection': test_result,
+                'authentication': auth_result,
+                'broker_type': credentials.broker_type,
+                'base_url': broker.base_url if hasattr(broker, 'base_url') else 'N/A'
+            })
+        else:
+            # Test générique pour autres brokers
+            auth_result = broker.authenticate()
+            return JsonResponse({
+                'success': True,
+                'authentication': auth_result,
+                'broker_type': credentials.broker_type
+            })
+            
+    except BrokerCredentials.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Broker non trouvé'})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+def place_order_view(request):
+    """Vue pour passer des ordres d'achat/vente"""
+    if request.method == 'POST':
+        try:
+            data = request.POST.dict()
+            
+            asset_id = data.get('asset_id')
+            broker_id = data.get('broker_id')
+            amount = float(data.get('amount', 0))
+            side = data.get('side', 'Buy')  # Buy ou Sell
+            
+            print(f"📋 Ordre reçu: Asset ID {asset_id} - Broker ID {broker_id} - {amount} - {side}")
+            
+            # Récupérer l'asset et le broker
+            try:
+                asset = Asset.objects.get(id=asset_id)
+                broker = BrokerCredentials.objects.get(id=broker_id, user=request.user)
+            except (Asset.DoesNotExist, BrokerCredentials.DoesNotExist):
+                return JsonResponse({
+                    'status': 'error',
+                    'message': 'Asset ou broker non trouvé'
+                })
+            
+            # Vérifier si on peut calculer la quantité automatiquement
+            # Chercher une stratégie correspondante pour cet asset
+            try:
+                strategy = Strategy.objects.filter(
+                    user=request.user,
+                    asset=asset,
+                    status='active'
+                ).first()
+                
+                if strategy and strategy.portfolio_quantity != -1:
+                    # Calculer la quantité optimale selon la stratégie
+                    if side.upper() == 'BUY' and strategy.target_max_quantity > 0:
+                        current_quantity = float(strategy.portfolio_quantity)
+                        optimal_amount = strategy.target_max_quantity - current_quantity
+                        if optimal_amount > 0:
+                            amount = min(optimal_amount, amount)  # Prendre le minimum entre optimal et saisi
+                            print(f"🎯 Quantité optimale calculée: {optimal_amount}, utilisée: {amount}")
+                    elif side.upper() == 'SELL' and strategy.target_min_quantity > 0:
+                        current_quantity = float(strategy.portfolio_quantity)
+                        optimal_amount = current_quantity - strategy.target_min_quantity
+                        if optimal_amount > 0:
+                            amount = min(optimal_amount, amount)  # Prendre le minimum entre optimal et saisi
+                            print(f"🎯 Quantité optimale calculée: {optimal_amount}, utilisée: {amount}")
+                            
+            except Exception as e:
+                print(f"⚠️ Impossible de calculer la quantité optimale: {e}")
+            
+            # Passer l'ordre selon le type de broker
+            if broker.broker_type == 'saxo':
+                result = place_saxo_order_with_asset(asset, broker, amount, side)
+            elif broker.broker_type == 'binance':
+                result = place_binance_order_with_asset(asset, broker, amount, side, request.user)
+            else:
+                return JsonResponse({
+                    'status': 'error',
+                    'message': f'Broker {broker.broker_type} non supporté'
+                })
+            
+            return JsonResponse(result)
+            
+        except Exception as e:
+            print(f"❌ Erreur lors du passage d'ordre: {e}")
+            return JsonResponse({
+                'status': 'error',
+                'message': f'Erreur: {str(e)}'
+            })
+    
+    # Récupérer les Assets et les brokers configurés
+    assets = Asset.objects.all().order_by('symbol_clean', 'symbol')
+    brokers = BrokerCredentials.objects.filter(user=request.user, is_active=True).order_by('name')
+    
+    return render(request, 'trading_app/place_order.html', {
+        'assets': assets,
+        'brokers': brokers
+    })
+
+
+def place_saxo_order_with_asset(asset: Asset, broker: BrokerCredentials, amount: float, side: str) -> dict:
+    """Passe un ordre sur Saxo Bank avec un Asset"""
+    try:
+        print(f"🔐 Passage d'ordre Saxo: {asset.symbol} - {amount} - {side}")
+        
+        if not broker.saxo_access_token:
+            return {
+                'status': 'error',
+                'message': 'Pas de token Saxo disponible'
+            }
+        
+        # Instance authentifiée réutilisée (registre) : token à jour et URL de l'environnement
+        saxo_broker = broker_registry.authenticated(broker)
+        if saxo_broker is None:
+            return {
+                'status': 'error',
+                'message': 'Échec authentification Saxo'
+            }
+        
+        headers = {
+            "Authorization": f"Bearer {saxo_broker.access_token}",
+            "Content-Type": "application/json"
+        }
+        
+        # Chercher un AllAssets correspondant
+        all_asset = AllAssets.objects.filter(
+            symbol__icontains=asset.symbol_clean or asset.symbol,
+            platform='saxo'
+        ).first()
+        
+        if not all_asset:
+            return {
+                'status': 'error',
+                'message': f'Aucun AllAssets Saxo trouvé pour {asset.symbol}. Veuillez d\'abord ajouter cet actif dans le catalogue AllAssets.'
+            }
+        
+        # Chercher ou créer un AssetTradable correspondant
+        asset_tradable = AssetTradable.objects.filter(
+            symbol__startswith=asset.symbol_clean or asset.symbol,
+            platform='saxo'
+        ).first()
+        
+        if not asset_tradable:
+            # Créer automatiquement un AssetTradable basé sur AllAssets
+            try:
+                asset_type, _ = AssetType.objects.get_or_create(name='Stock')
+                market, _ = Market.objects.get_or_create(name='NASDAQ')
+                
+                asset_tradable = AssetTradable.objects.create(
+                    symbol=all_asset.symbol,
+                    platform='saxo',
+                    all_asset=all_asset,
+                    name=all_asset.name,
+                    asset_type=asset_type,
+                    market=market
+                )
+                print(f"✅ AssetTradable créé automatiquement: {asset_tradable.symbol}")
+            except Exception as e:
+                return {
+                    'status': 'error',
+                    'message': f'Erreur création AssetTradable: {str(e)}'
+                }
+        
+        # Pour l'instant, on utilise un UIC par défaut (à adapter selon ta logique)
+        uic = all_asset.saxo_uic if all_asset and all_asset.saxo_uic else None #211  # À remplacer par la vraie logique de récupération UIC
+        
+        # Préparer l'ordre (AccountKey ajoutée depuis les clés persistées du broker)
+        order_payload = {
+            "Uic": uic,
+            "AssetType": "Stock",
+            "OrderType": "Market",
+            "BuySell": side,
+            "Amount": int(amount),
+            "ManualOrder": True,
+            "OrderDuration": {
+                "DurationType": "DayOrder"
+            }
+        }
+        
+        print(f"📋 Payload ordre: {order_payload}")
+        
+        # Passer l'ordre
+        order_url = f"{saxo_broker.base_url}/trade/v2/orders"
+        order_response = saxo_broker.with_account_keys(
+            lambda keys: requests.post(order_url, headers=headers, json={**order_payload, "AccountKey": keys['account_key']})
+        )
+        
+        if order_response is None:
+            return {
+                'status': 'error',
+                'message': 'Aucun compte trouvé'
+            }
+        
+        print(f"📊 Réponse ordre: {order_response.status_code} - {order_response.text}")
+        
+        if order_response.status_code == 200:
+            order_data = order_response.json()
+            
+            # Envoyer notification Telegram
+            try:
+                # Récupérer le solde en cash (à adapter selon votre logique)
+                cash_balance = 0.0  # TODO: Récupérer le vrai solde depuis Saxo
+                
+                notification_data = {
+                    'symbol': asset.symbol,
+                    'name': asset.name or asset.symbol,
+                    'price': 0.0,  # Prix marché, pas encore connu
+                    'quantity': amount,
+                    'side': side,
+                    'broker': 'saxo',
+                    'cash_balance': cash_balance
+                }
+                
+                telegram_notifier.send_order_notification(notification_data)
+                print("✅ Notification Telegram envoyée")
+                
+            except Exception as e:
+                print(f"⚠️ Erreur notification Telegram: {e}")
+            
+            return {
+                'status': 'success',
+                'message': f'Ordre passé avec succès: {order_data}',
+                'order_id': order_data.get('OrderId', 'Unknown')
+            }
+        else:
+            error_message = f'Erreur passage ordre: {order_response.status_code} - {order_response.text}'
+            
+            # Envoyer notification d'erreur Telegram
+            try:
+                error_notification_data = {
+                    'symbol': asset.symbol,
+                    'error': error_message,
+                    'broker': 'saxo'
+                }
+                
+                telegram_notifier.send_error_notification(error_notification_data)
+                print("✅ Notification d'erreur Telegram envoyée")
+                
+            except Exception as e:
+                print(f"⚠️ Erreur notification d'erreur Telegram: {e}")
+            
+            return {
+                'status': 'error',
+                'message': error_message
+            }
+            
+    except Exception as e:
+        print(f"❌ Erreur passage ordre Saxo: {e}")
+        return {
+            'status': 'error',
+            'message': f'Erreur: {str(e)}'
+        }
+
+
+def place_binance_order_with_asset(asset: Asset, broker: BrokerCredentials, amount: float, side: str, user=None) -> dict:
+    """Passe un ordre sur Binance avec un Asset"""
+    try:
+        print(f"🔐 Passage d'ordre Binance: {asset.symbol} - {amount} - {side}")
+        
+        if not broker.binance_api_key or not broker.binance_api_secret:
+            return {
+                'status': 'error',
+                'message': 'Pas de credentials Binance disponibles'
+            }
+        
+        # Instance Binance authentifiée réutilisée (registre) : pas de ré-authentification par ordre
+        binance_broker = broker_registry.authenticated(broker)
+        
+        if binance_broker is None:
+            return {
+                'status': 'error',
+                'message': 'Échec authentification Binance'
+            }
+        
+        # Chercher un AllAssets correspondant
+        all_asset = AllAssets.objects.filter(
+            symbol__icontains=asset.symbol_clean or asset.symbol,
+            platform='binance'
+        ).first()
+        
+        if not all_asset:
+            return {
+                'status': 'error',
+                'message': f'Aucun AllAssets Binance trouvé pour {asset.symbol}. Veuillez d\'abord ajouter cet actif dans le catalogue AllAssets.'
+            }
+        
+        # Chercher ou créer un AssetTradable correspondant
+        asset_tradable = AssetTradable.objects.filter(
+            symbol__startswith=asset.symbol_clean or asset.symbol,
+            platform='binance'
+        ).first()
+        
+        if not asset_tradable:
+            # Créer automatiquement un AssetTradable basé sur AllAssets
+            try:
+                asset_type, _ = AssetType.objects.get_or_create(name='Crypto')
+                market, _ = Market.objects.get_or_create(name='Binance')
+                
+                asset_tradable = AssetTradable.objects.create(
+                    symbol=all_asset.symbol,
+                    platform='binance',
+                    all_asset=all_asset,
+                    name=all_asset.name,
+                    asset_type=asset_type,
+                    market=market
+                )
+                print(f"✅ AssetTradable créé automatiquement: {asset_tradable.symbol}")
+            except Exception as e:
+                return {
+                    'status': 'error',
+                    'message': f'Erreur création AssetTradable: {str(e)}'
+                }
+        
+        # Passer l'ordre
+        try:
+            # Pour Binance, ajouter le suffixe EUR si nécessaire
+            trading_symbol = asset_tradable.symbol
+            if not trading_symbol.endswith('EUR') and not trading_symbol.endswith('USDT'):
+                trading_symbol = f"{trading_symbol}EUR"
+            
+            print(f"🔍 Symbole de trading: {trading_symbol}")
+            
+            result = binance_broker.place_order(
+                symbol=trading_symbol,
+                side=side.upper(),
+                size=Decimal(str(amount)),
+                order_type="MARKET"
+            )
+            
+            print(f"📊 Résultat ordre Binance: {result}")
+            
+            if 'error' in result:
+                error_message = f'Erreur passage ordre Binance: {result["error"]}'
+                
+                # Envoyer notification d'erreur Telegram
+                try:
+                    error_notification_data = {
+                        'symbol': asset.symbol,
+                        'error': error_message,
+                        'broker': 'binance'
+                    }
+                    
+                    telegram_notifier.send_error_notification(error_notification_data)
+                    print("✅ Notification d'erreur Telegram envoyée")
+                    
+                except Exception as e:
+                    print(f"⚠️ Erreur notification d'erreur Telegram: {e}")
+                
+                return {
+                    'status': 'error',
+                    'message': error_message,
+                    'details': result
+                }
+            else:
+                # Envoyer notification Telegram
+                try:
+                    # Récupérer le solde en cash (à adapter selon votre logique)
+                    cash_balance = 0.0  # TODO: Récupérer le vrai solde depuis Binance
+                    
+                    notification_data = {
+                        'symbol': asset.symbol,
+                        'name': asset.name or asset.symbol,
+                        'price': 0.0,  # Prix marché, pas encore connu
+                        'quantity': amount,
+                        'side': side,
+                        'broker': 'binance',
+                        'cash_balance': cash_balance
+                    }
+                    
+                    telegram_notifier.send_order_notification(notification_data)
+                    print("✅ Notification Telegram envoyée")
+                    
+                except Exception as e:
+                    print(f"⚠️ Erreur notification Telegram: {e}")
+                
+                return {
+                    'status': 'success',
+                    'message': f'Ordre Binance passé avec succès pour {asset_tradable.symbol}',
+                    'order_id': result.get('orderId'),
+                    'details': result
+                }
+                
+        except Exception as e:
+            print(f"❌ Exception lors du passage d'ordre Binance: {e}")
+            return {
+                'status': 'error',
+                'message': f'Erreur lors du passage d\'ordre: {str(e)}'
+            }
+        
+    except Exception as e:
+        print(f"❌ Erreur passage ordre Binance: {e}")
+        import traceback
+        traceback.print_exc()
+        return {
+            'status': 'error',
+            'message': f'Erreur: {str(e)}'
+        }
+
+
+@login_required
+def test_telegram_notification(request):
+    """Test des notifications Telegram"""
+    try:
+        # Test de connexion
+        if telegram_notifier.test_connection():
+            return JsonResponse({
+                'success': True,
+                'message': 'Notification Telegram de test envoyée avec succès !'
+            })
+        else:
+            return JsonResponse({
+                'success': False,
+                'message': 'Erreur de connexion au bot Telegram'
+            })
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'message': f'Erreur lors du test: {str(e)}'
+        })
+
+
+@login_required
+@csrf_exempt
+def sync_saxo_trades(request, broker_id):
+    """Synchroniser les trades depuis un broker Saxo spécifique"""
+    try:
+        # Récupérer le broker
+        broker_creds = get_object_or_404(BrokerCredentials, id=broker_id, user=request.user, broker_type='saxo')
+        
+        # Créer le service broker
+        broker_service = BrokerService(request.user)
+        
+        # Synchroniser les trades
+        result = broker_service.sync_trades_from_broker(broker_creds)
+        
+        if result['success']:
+            return JsonResponse({
+                'success': True,
+                'message': f"✅ {result.get('saved_count', 0)} nouveaux trades Saxo synchronisés",
+                'saved_count': result.get('saved_count', 0),
+                'total_trades': result.get('total_trades', 0)
+            })
+        else:
+            return JsonResponse({
+                'success': False,
+                'error': result.get('error', 'Erreur inconnue lors de la synchronisation')
+                }, status=400)
+        
+    except Exception as e:
+        logger.error(f"Erreur lors de la synchronisation des trades Saxo: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': f"Erreur lors de la synchronisation: {str(e)}"
+        }, status=500)
+
+
+@login_required
+@csrf_exempt
+def sync_saxo_positions(request, broker_id):
+    """Synchroniser les positions depuis un broker Saxo spécifique"""
+    try:
+        # Récupérer le broker
+        broker_creds = get_object_or_404(BrokerCredentials, id=broker_id, user=request.user, broker_type='saxo')
+        
+        # Créer le service broker
+        broker_service = BrokerService(request.user)
+        
+        # Synchroniser les positions
+        positions = broker_service.sync_positions_from_broker(broker_creds)
+        
+        # Compter le nombre total de positions pour ce broker
+        total_positions = Position.objects.filter(
+            user=broker_creds.user
+        ).count()
+        
+        return JsonResponse({
+            'success': True,
+            'message': f"✅ {len(positions)} positions Saxo synchronisées",
+            'saved_count': len(positions),
+            'total_positions': total_positions
+        })
+            
+    except Exception as e:
+        logger.error(f"Erreur lors de la synchronisation des positions Saxo: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': f"Erreur lors de la synchronisation: {str(e)}"
+        }, status=500)
+
+
+@login_required
+@csrf_exempt
+def get_broker_balance(request, broker_id):
+    """Récupère le solde d'un broker spécifique"""
+    try:
+        broker = BrokerCredentials.objects.get(id=broker_id, user=request.user, is_active=True)
+        
+        # Créer l'instance du broker
+        from ..brokers.factory import BrokerFactory
+        credentials = broker.get_credentials_dict()
+        broker_instance = BrokerFactory.create_broker(broker.broker_type, request.user, credentials)
+        
+        # Récupérer le solde
+        if hasattr(broker_instance, 'get_balance'):
+            print(f"🔍 Récupération solde pour broker {broker.name} ({broker.broker_type})")
+            balance = broker_instance.get_balance()
+            print(f"📊 Balance brute reçue: {balance} (type: {type(balance)})")
+            
+            # Gérer les différents formats de retour
+            if balance is None:
+                balance = {'EUR': 0.0, 'USD': 0.0}
+            elif isinstance(balance, dict):
+                # Format Binance: {'EUR': 100.0, 'USD': 50.0}
+                pass
+            elif hasattr(balance, '__dict__'):
+                # Format Saxo: objet CashBalance
+                balance_dict = {}
+                for attr in dir(balance):
+                    if not attr.startswith('_') and not callable(getattr(balance, attr)):
+                        value = getattr(balance, attr)
+                        if isinstance(value, (int, float)) and value > 0:
+                            balance_dict[attr] = float(value)
+                balance = balance_dict if balance_dict else {'EUR': 0.0, 'USD': 0.0}
+            elif isinstance(balance, (list, tuple)):
+                # Format Saxo: liste de balances
+                balance_dict = {}
+                for item in balance:
+                    if isinstance(item, dict):
+                        currency = item.get('Currency', 'EUR')
+                        amount = float(item.get('Amount', 0))
+                        if amount > 0:
+                            balance_dict[currency] = amount
+                balance = balance_dict if balance_dict else {'EUR': 0.0, 'USD': 0.0}
+            elif isinstance(balance, (int, float)):
+                # Format Saxo: montant simple (probablement en EUR)
+                balance = {'EUR': float(balance)} if balance > 0 else {'EUR': 0.0}
+            else:
+                print(f"⚠️ Format de balance inconnu: {type(balance)} - {balance}")
+                balance = {'EUR': 0.0, 'USD': 0.0}
+        else:
+            balance = {'EUR': 0.0, 'USD': 0.0}  # Valeur par défaut
+        
+        return JsonResponse({
+            'success': True,
+            'balance': balance
+        })
+        
+    except BrokerCredentials.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Broker non trouvé'}, status=404)
+    except Exception as e:
+        print(f"❌ Erreur récupération solde broker {broker_id}: {e}")
+        import traceback
+        traceback.print_exc()
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+@login_required
+@csrf_exempt
+def sync_broker_assets(request, broker_id):
+    """Synchronise les actifs depuis un broker spécifique"""
+    try:
+        broker_creds = get_object_or_404(BrokerCredentials, id=broker_id, user=request.user, is_active=True)
+        broker_service = BrokerService(request.user)
+        
+        if broker_creds.broker_type == 'saxo':
+            result = broker_service.sync_all_assets_from_saxo(broker_creds)
+        elif broker_creds.broker_type == 'binance':
+            result = broker_service.sync_all_assets_from_binance(broker_creds)
+        else:
+            return JsonResponse({'success': False, 'error': f'Broker {broker_creds.broker_type} non supporté'}, status=400)
+        
+        if result['success']:
+            return JsonResponse({
+                'success': True,
+                'message': result['message'],
+                'saved_count': result['saved_count'],
+                'updated_count': result['updated_count'],
+                'total_processed': result['total_processed']
+            })
+        else:
+            return JsonResponse({'success': False, 'error': result.get('error', 'Erreur inconnue')}, status=400)
+            
+    except Exception as e:
+        logger.error(f"Erreur lors de la synchronisation des actifs du broker {broker_id}: {str(e)}")
+        return JsonResponse({'success': False, 'error': f"Erreur lors de la synchronisation: {str(e)}"}, status=500)
+
+
+@login_required
+@csrf_exempt
+def sync_all_assets(request):
+    """Synchronise tous les actifs depuis tous les brokers configurés"""
+    try:
+        broker_service = BrokerService(request.user)
+        result = broker_service.sync_all_assets_from_all_brokers()
+        
+        if result['success']:
+            return JsonResponse({
+                'success': True,
+                'message': result['message'],
+                'total_saved': result['total_saved'],
+                'total_updated': result['total_updated'],
+                'broker_results': result['broker_results']
+            })
+        else:
+            return JsonResponse({'success': False, 'error': result.get('error', 'Erreur inconnue')}, status=400)
+            
+    except Exception as e:
+        logger.error(f"Erreur lors de la synchronisation des actifs: {str(e)}")
+        return JsonResponse({'success': False, 'error': f"Erreur lors de la synchronisation: {str(e)}"}, status=500)
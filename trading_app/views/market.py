@@ -0,0 +1,1261 @@
+"""
+Vues des actifs et données de marché : catalogues, recherche, historiques de prix (Yahoo, CoinGecko, Saxo)
+"""
+
+from django.shortcuts import render
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import csrf_exempt
+from django.db import models
+import json
+import logging
+from datetime import datetime
+import requests
+from django.core.serializers.json import DjangoJSONEncoder
+from ..brokers.factory import BrokerFactory
+from ..market_data.factory import MarketDataFactory
+from ..market_data.bulk import refresh_assets, refresh_metadata
+from ..models import Asset, Position, BrokerCredentials, AssetType, Market, AssetTradable, AllAssets
+from ..asset_search import search_assets
+from ..response_cache import PRICES, bump_price_version, cached_response, normalize_query
+from .. import chart_data
+
+
+logger = logging.getLogger(__name__)
+
+
+def asset_tabulator(request):
+    # Récupérer tous les Asset mis à jour par Yahoo Finance
+    assets = Asset.objects.all()
+    
+    # Dictionnaire pour regrouper par symbole
+    grouped_assets = {}
+    
+    for asset in assets:
+        symbol = asset.symbol_clean or asset.symbol
+        
+        if symbol not in grouped_assets:
+            # Récupérer les données depuis Asset
+            sector = asset.sector or 'Non défini'
+            industry = asset.industry or 'Non défini'
+            market_cap = float(asset.market_cap) if asset.market_cap else 0.0
+            
+            # Traiter l'historique des prix
+            price_history_display = 'Non disponible'
+            last_price = 0.0
+            if asset.price_history and asset.price_history != 'xxxx':
+                try:
+                    price_data = json.loads(asset.price_history)
+                    if price_data and len(price_data) >= 3:
+                        # Prendre les 3 dernières valeurs de prix de fermeture
+                        last_3_closes = [str(round(candle['close'], 2)) for candle in price_data[-3:]]
+                        price_history_display = ', '.join(last_3_closes)
+                        # Récupérer le dernier prix pour le calcul de la valeur
+                        last_price = float(price_data[-1]['close'])
+                    elif price_data:
+                        # Si moins de 3 valeurs, prendre toutes
+                        last_closes = [str(round(candle['close'], 2)) for candle in price_data]
+                        price_history_display = ', '.join(last_closes)
+                        # Récupérer le dernier prix pour le calcul de la valeur
+                        last_price = float(price_data[-1]['close'])
+                except (json.JSONDecodeError, KeyError, IndexError):
+                    price_history_display = 'Erreur format'
+            
+            # Chercher s'il y a un AssetTradable correspondant
+            asset_tradable = None
+            try:
+                asset_tradable = AssetTradable.objects.get(symbol=symbol)
+            except AssetTradable.DoesNotExist:
+                # Essayer de trouver par symbole nettoyé
+                clean_symbol = symbol.split(':')[0] if ':' in symbol else symbol
+                clean_symbol = clean_symbol.split('_')[0] if '_' in clean_symbol else clean_symbol
+                try:
+                    asset_tradable = AssetTradable.objects.get(symbol=clean_symbol)
+                except AssetTradable.DoesNotExist:
+                    pass
+            
+            # Calculer la taille totale depuis toutes les positions correspondantes
+            total_size = 0.0
+            
+            if request.user.is_authenticated:
+                # Nettoyer le symbole pour la recherche
+                base_symbol = symbol.split(':')[0] if ':' in symbol else symbol
+                base_symbol = base_symbol.split('_')[0] if '_' in base_symbol else base_symbol
+                base_symbol = base_symbol.upper()
+                
+                # Chercher tous les AssetTradable qui correspondent au symbole de base
+                # Logique : Asset.symbol = "AAPL:xns_1" → chercher AssetTradable où symbol contient "AAPL" (symbole nettoyé)
+                base_symbol = asset.symbol_clean if asset.symbol_clean else asset.symbol
+                # Nettoyer le symbole (enlever les extensions comme :XNAS, _0, etc.)
+                if ':' in base_symbol:
+                    base_symbol = base_symbol.split(':')[0]
+                if '_' in base_symbol:
+                    base_symbol = base_symbol.split('_')[0]
+                
+                # Chercher directement les AssetTradable correspondants
+                # Cela inclut les positions Saxo avec suffixes (_0, _1, _2, etc.)
+                matching_asset_tradables = AssetTradable.objects.filter(
+                    symbol__startswith=base_symbol
+                )
+                
+                # Calculer la taille totale de toutes les positions correspondantes
+                for at in matching_asset_tradables:
+                    positions_size = Position.objects.filter(
+                        asset_tradable=at,
+                        user=request.user
+                    ).aggregate(
+                        total_size=models.Sum('size')
+                    )['total_size'] or 0
+                    total_size += float(positions_size)
+            
+                print(f"🔍 Symbole: {symbol}, Base nettoyé: {base_symbol}, AssetTradables trouvés: {matching_asset_tradables.count()}, Taille totale: {total_size}")
+            
+                # Calculer la valeur (size * dernier prix)
+                value = total_size * last_price
+                
+                # Récupérer les positions détaillées pour cet asset
+                positions_data = []
+                if request.user.is_authenticated and total_size > 0:
+                    for at in matching_asset_tradables:
+                        positions = Position.objects.filter(
+                            asset_tradable=at,
+                            user=request.user
+                        ).select_related('asset_tradable')
+                        
+                        for position in positions:
+                            positions_data.append({
+                                'id': f"pos_{position.id}",
+                                'symbol': at.symbol,
+                                'name': f"Position {at.symbol}",
+                                'platform': at.platform,
+                                'asset_type': at.asset_type.name,
+                                'market': at.market.name,
+                                'sector': 'Position',
+                                'industry': 'Position',
+                                'market_cap': 0,
+                                'size': float(position.size),
+                                'value': float(position.size) * last_price,
+                                'price_history': f"Entry: {position.entry_price}, Current: {position.current_price}",
+                                'entry_price': float(position.entry_price),
+                                'current_price': float(position.current_price),
+                                'side': position.side,
+                                'status': position.status,
+                                'pnl': float(position.pnl),
+                                'is_position': True,
+                                'position_id': position.id,
+                                'asset_tradable_id': at.id
+                            })
+                
+                grouped_assets[symbol] = {
+                    'id': asset.id,
+                    'symbol': symbol,
+                    'name': asset.name,
+                    'platform': asset_tradable.platform if asset_tradable else 'Non défini',
+                    'asset_type': asset_tradable.asset_type.name if asset_tradable else 'Non défini',
+                    'market': asset_tradable.market.name if asset_tradable else 'Non défini',
+                    'sector': sector,
+                    'industry': industry,
+                    'market_cap': market_cap,
+                    'size': total_size,
+                    'value': value,
+                    'price_history': price_history_display,
+                    'all_asset_id': asset_tradable.all_asset.id if asset_tradable and asset_tradable.all_asset else None,
+                    '_children': positions_data if positions_data else None
+                }
+    
+    # Convertir le dictionnaire en liste
+    data_assets = list(grouped_assets.values())
+    
+    # Calculer les données pour les graphiques
+    sector_data = {}
+    industry_data = {}
+    
+    for asset in data_assets:
+        value = asset['value']  # Utiliser la valeur au lieu de la taille
+        sector = asset['sector'] or 'Non défini'
+        industry = asset['industry'] or 'Non défini'
+        
+        # Agréger par secteur
+        if sector not in sector_data:
+            sector_data[sector] = 0
+        sector_data[sector] += value
+        
+        # Agréger par industrie
+        if industry not in industry_data:
+            industry_data[industry] = 0
+        industry_data[industry] += value
+    
+    # Convertir en format pour Chart.js
+    chart_sector_data = [{'label': k, 'value': v} for k, v in sector_data.items() if v > 0]
+    chart_industry_data = [{'label': k, 'value': v} for k, v in industry_data.items() if v > 0]
+    
+    return render(request, 'trading_app/asset_tabulator.html', {
+        'data_assets': json.dumps(data_assets, cls=DjangoJSONEncoder),
+        'chart_sector_data': json.dumps(chart_sector_data, cls=DjangoJSONEncoder),
+        'chart_industry_data': json.dumps(chart_industry_data, cls=DjangoJSONEncoder),
+    })
+
+#@csrf_exempt
+
+
+def save_asset_ajax(request):
+    if request.method == "POST":
+        data = request.POST.dict() if request.POST else json.loads(request.body)
+        symbol = data.get("symbol")
+        if not symbol:
+            return JsonResponse({"error": "No symbol provided"}, status=400)
+        try:
+            asset, created = Asset.objects.get_or_create(symbol=symbol)
+            asset.name = data.get("name", asset.name)
+            asset.type = data.get("type", asset.type)
+            asset.platform = data.get("platform", asset.platform)
+            # Conversion sécurisée pour les floats
+            asset.last_price = float(data.get("last_price", asset.last_price) or 0)
+            asset.is_active = str(data.get("is_active", asset.is_active)).lower() in ["true", "1"]
+            asset.sector = data.get("sector", asset.sector)
+            asset.industry = data.get("industry", asset.industry)
+            asset.market_cap = float(data.get("market_cap", asset.market_cap) or 0)
+            asset.price_history = data.get("price_history", asset.price_history)
+            asset.data_source = data.get("data_source", asset.data_source)
+            asset.id_from_platform = data.get("id_from_platform", asset.id_from_platform)
+            chart_data.save_asset_prices(asset)
+            return JsonResponse({"success": True, "created": created})
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({"error": "Invalid request"}, status=400)
+
+
+def asset_tradable_tabulator(request):
+    """Vue pour gérer les AssetTradable avec Tabulator"""
+    if request.method == 'POST':
+        try:
+            data = request.POST.dict()
+            
+            print(f"📝 Données reçues: {data}")
+            
+            # Récupérer le symbole
+            symbol = data.get('symbol', '').upper().strip()
+            
+            if not symbol:
+                return JsonResponse({'status': 'error', 'message': 'Le symbole ne peut pas être vide'})
+            
+            # Récupérer ou créer AssetType et Market
+            asset_type, _ = AssetType.objects.get_or_create(name=data.get('asset_type', 'Unknown'))
+            market, _ = Market.objects.get_or_create(name=data.get('market', 'Unknown'))
+            
+            # Récupérer les données Yahoo pour enrichir l'Asset
+            yahoo_data = get_yahoo_data(symbol)
+            
+            if yahoo_data:
+                print(f"✅ Données Yahoo trouvées pour {symbol}")
+                # Utiliser les données Yahoo pour l'Asset
+                asset_data = {
+                    'symbol': symbol,
+                    'name': yahoo_data.get('name', data.get('name', symbol)),
+                    'sector': yahoo_data.get('sector', data.get('sector', 'xxxx')),
+                    'industry': yahoo_data.get('industry', data.get('industry', 'xxxx')),
+                    'market_cap': yahoo_data.get('market_cap', data.get('market_cap', 0.0)),
+                    'price_history': yahoo_data.get('price_history', 'xxxx'),
+                }
+            else:
+                print(f"⚠️ Pas de données Yahoo pour {symbol}, utilisation des données manuelles")
+                asset_data = {
+                    'symbol': symbol,
+                    'name': data.get('name', symbol),
+                    'sector': data.get('sector', 'xxxx'),
+                    'industry': data.get('industry', 'xxxx'),
+                    'market_cap': data.get('market_cap', 0.0),
+                    'price_history': 'xxxx',
+                }
+            
+            # Récupérer ou créer l'Asset sous-jacent
+            asset, created = Asset.objects.get_or_create(
+                symbol=symbol,
+                defaults=asset_data
+            )
+            
+            # Si l'Asset existe déjà, mettre à jour avec les données Yahoo
+            if not created and yahoo_data:
+                print(f"🔄 Mise à jour de l'Asset existant: {asset.symbol}")
+                asset.name = asset_data['name']
+                asset.sector = asset_data['sector']
+                asset.industry = asset_data['industry']
+                asset.market_cap = asset_data['market_cap']
+                asset.save()
+                print(f"✅ Asset mis à jour: {asset.symbol} - Secteur: {asset.sector} - Industrie: {asset.industry} - Market Cap: {asset.market_cap}")
+            
+            # Trouver un AllAssets correspondant existant
+            all_asset = AssetTradable.find_matching_all_asset(symbol, data.get('platform', 'saxo'))
+            
+            if not all_asset:
+                return JsonResponse({'status': 'error', 'message': f'Aucun AllAssets trouvé pour le symbole {symbol}. Veuillez d\'abord ajouter cet actif dans le catalogue AllAssets.'})
+            
+            # Récupérer ou créer l'AssetTradable
+            asset_tradable, created_tradable = AssetTradable.objects.get_or_create(
+                symbol=symbol.upper(),
+                platform=data.get('platform', 'saxo'),
+                defaults={
+                    'all_asset': all_asset,
+                    'name': asset_data['name'],
+                    'asset_type': asset_type,
+                    'market': market,
+                }
+            )
+            
+            if not created_tradable:
+                # Mise à jour si l'objet existe déjà
+                asset_tradable.name = asset_data['name']
+                asset_tradable.asset_type = asset_type
+                asset_tradable.market = market
+                asset_tradable.save()
+            
+            return JsonResponse({'status': 'success', 'message': 'AssetTradable sauvegardé'})
+            
+        except Exception as e:
+            print(f"❌ Erreur lors de la sauvegarde: {e}")
+            return JsonResponse({'status': 'error', 'message': f'Erreur: {str(e)}'})
+    
+    # Récupérer les données pour Tabulator
+    asset_tradables = AssetTradable.objects.select_related('asset_type', 'market').all()
+    data_asset_tradables = []
+    
+    for at in asset_tradables:
+        data_asset_tradables.append({
+            'id': at.id,
+            'symbol': at.symbol,
+            'name': at.name,
+            'platform': at.platform,
+            'asset_type': at.asset_type.name,
+            'market': at.market.name,
+            'sector': 'Non défini',  # Plus disponible depuis Asset
+            'industry': 'Non défini',  # Plus disponible depuis Asset
+            'market_cap': 0.0,  # Plus disponible depuis Asset
+            'created_at': at.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+    
+    return render(request, 'trading_app/asset_tradable_tabulator.html', {
+        'data_asset_tradables': json.dumps(data_asset_tradables, cls=DjangoJSONEncoder)
+    })
+
+
+def asset_search_tabulator(request):
+    """Vue pour rechercher et créer des AssetTradable"""
+    if request.method == 'POST':
+        try:
+            data = request.POST.dict()
+            symbol = data.get('symbol', '').upper()
+            platform = data.get('platform', '')
+            
+            print(f" Recherche: {symbol} sur {platform}")
+            
+            if platform == 'saxo':
+                # Recherche Saxo
+                result = search_saxo_instrument(symbol)
+                if result:
+                    # Enrichir avec Yahoo Finance
+                    yahoo_data = get_yahoo_data(symbol)
+                    if yahoo_data:
+                        result.update(yahoo_data)
+                    
+                    # Créer l'Asset et AssetTradable
+                    asset, asset_tradable = create_asset_from_data(result, platform)
+                    
+                    return JsonResponse({
+                        'status': 'success',
+                        'message': f'AssetTradable créé: {asset_tradable.symbol}',
+                        'data': {
+                            'symbol': asset_tradable.symbol,
+                            'name': asset_tradable.name,
+                            'platform': asset_tradable.platform,
+                            'asset_type': asset_tradable.asset_type.name,
+                            'market': asset_tradable.market.name,
+                            'sector': 'Non défini',  # Plus disponible depuis Asset
+                            'industry': 'Non défini',  # Plus disponible depuis Asset
+                            'market_cap': 0.0,  # Plus disponible depuis Asset
+                        }
+                    })
+                else:
+                    return JsonResponse({
+                        'status': 'error',
+                        'message': f'Symbole {symbol} non trouvé sur Saxo'
+                    })
+            
+            elif platform == 'yahoo':
+                # Recherche Yahoo Finance uniquement
+                yahoo_data = get_yahoo_data(symbol)
+                if yahoo_data:
+                    # Créer l'Asset et AssetTradable
+                    asset, asset_tradable = create_asset_from_data(yahoo_data, platform)
+                    
+                    return JsonResponse({
+                        'status': 'success',
+                        'message': f'AssetTradable créé: {asset_tradable.symbol}',
+                        'data': {
+                            'symbol': asset_tradable.symbol,
+                            'name': asset_tradable.name,
+                            'platform': asset_tradable.platform,
+                            'asset_type': asset_tradable.asset_type.name,
+                            'market': asset_tradable.market.name,
+                            'sector': 'Non défini',  # Plus disponible depuis Asset
+                            'industry': 'Non défini',  # Plus disponible depuis Asset
+                            'market_cap': 0.0,  # Plus disponible depuis Asset
+                        }
+                    })
+                else:
+                    return JsonResponse({
+                        'status': 'error',
+                        'message': f'Symbole {symbol} non trouvé sur Yahoo Finance'
+                    })
+            
+            else:
+                return JsonResponse({
+                    'status': 'error',
+                    'message': f'Plateforme {platform} non supportée'
+                })
+                
+        except Exception as e:
+            return JsonResponse({
+                'status': 'error',
+                'message': f'Erreur: {str(e)}'
+            })
+    
+    # Récupérer les AssetTradable existants pour l'affichage
+    asset_tradables = AssetTradable.objects.select_related('asset_type', 'market').all()
+    data_asset_tradables = []
+    
+    for at in asset_tradables:
+        data_asset_tradables.append({
+            'id': at.id,
+            'symbol': at.symbol,
+            'name': at.name,
+            'platform': at.platform,
+            'asset_type': at.asset_type.name,
+            'market': at.market.name,
+            'sector': 'Non défini',  # Plus disponible depuis Asset
+            'industry': 'Non défini',  # Plus disponible depuis Asset
+            'market_cap': 0.0,  # Plus disponible depuis Asset
+            'created_at': at.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+    
+    return render(request, 'trading_app/asset_search_tabulator.html', {
+        'data_asset_tradables': data_asset_tradables
+    })
+
+
+def search_saxo_instrument(symbol: str) -> dict:
+    """Recherche un instrument sur Saxo Bank"""
+    try:
+        # Récupérer le token Saxo (à adapter selon ta logique d'authentification)
+        from ..models import BrokerCredentials
+        credentials = BrokerCredentials.objects.filter(broker_type='saxo').first()
+        
+        if not credentials or not credentials.saxo_access_token:
+            print("❌ Pas de token Saxo disponible")
+            return None
+        
+        headers = {"Authorization": f"Bearer {credentials.saxo_access_token}"}
+        search_url = "https://gateway.saxobank.com/sim/openapi/ref/v1/instruments"
+        params = {"Keyword": symbol, "AssetTypes": "Stock"}
+        
+        print(f"🌐 Recherche Saxo: {search_url} avec {params}")
+        response = requests.get(search_url, headers=headers, params=params)
+        
+        if response.status_code == 200:
+            data = response.json()
+            
+            # Chercher l'instrument exact
+            for instrument in data.get("Data", []):
+                if instrument.get("Symbol") == f"{symbol}:xnas":
+                    print(f"✅ Instrument trouvé: {instrument}")
+                    return {
+                        'symbol': symbol,
+                        'name': instrument.get("Description", symbol),
+                        'type': 'Stock',
+                        'market': instrument.get("ExchangeId", "NASDAQ"),
+                        'sector': 'Unknown',
+                        'industry': 'Unknown',
+                        'market_cap': 0.0,
+                        'price_history': 'xxxx',
+                        'saxo_identifier': instrument.get("Identifier"),
+                        'saxo_exchange_id': instrument.get("ExchangeId"),
+                    }
+            
+            print(f"❌ Symbole {symbol} non trouvé dans la réponse Saxo")
+            return None
+        else:
+            print(f"❌ Erreur API Saxo: {response.status_code}")
+            return None
+            
+    except Exception as e:
+        print(f"❌ Erreur recherche Saxo: {e}")
+        return None
+
+
+def get_saxo_instrument_details(uic: int, asset_type: str = "Stock") -> dict:
+    """Récupère les détails d'un instrument Saxo par UIC"""
+    try:
+        from ..models import BrokerCredentials
+        from ..brokers.factory import BrokerFactory
+        
+        # Récupérer les credentials Saxo
+        credentials_obj = BrokerCredentials.objects.filter(broker_type='saxo').first()
+        if not credentials_obj:
+            print("❌ Pas de credentials Saxo trouvés")
+            return None
+        
+        credentials = credentials_obj.get_credentials_dict()
+        broker = BrokerFactory.create_broker('saxo', None, credentials)
+        
+        if not broker.authenticate():
+            print("❌ Échec de l'authentification Saxo")
+            return None
+        
+        # Construire l'URL pour les détails de l'instrument
+        base_url = broker.base_url
+        url = f"{base_url}/ref/v1/instruments/details/{uic}/{asset_type.lower()}"
+        
+        headers = {
+            "Authorization": f"Bearer {broker.access_token}",
+            "Accept": "application/json"
+        }
+        
+        print(f"🌐 Appel API Saxo: {url}")
+        response = requests.get(url, headers=headers)
+        
+        if response.status_code == 200:
+            data = response.json()
+            print(f"📊 Réponse Saxo: {data}")
+            
+            return {
+                'description': data.get("Description"),
+                'symbol': data.get("Symbol"),
+                'identifier': data.get("Identifier"),
+                'exchange_id': data.get("ExchangeId"),
+                'asset_type': data.get("AssetType"),
+            }
+        else:
+            print(f"❌ Erreur API Saxo: {response.status_code} - {response.text}")
+            return None
+            
+    except Exception as e:
+        print(f"❌ Erreur récupération détails Saxo: {e}")
+        return None
+
+
+def update_asset_tradable_from_saxo(asset_tradable_id: int) -> bool:
+    """Met à jour un AssetTradable avec les informations Saxo"""
+    try:
+        from ..models import AssetTradable
+        
+        asset_tradable = AssetTradable.objects.get(id=asset_tradable_id)
+        
+        # Récupérer les détails depuis Saxo
+        details = get_saxo_instrument_details(asset_tradable.symbol, asset_tradable.asset_type.name)
+        
+        if details:
+            # Mettre à jour l'AssetTradable
+            asset_tradable.name = details.get('description', asset_tradable.name)
+            asset_tradable.symbol = details.get('symbol', asset_tradable.symbol)
+            asset_tradable.save()
+            
+            print(f"✅ AssetTradable {asset_tradable_id} mis à jour: {asset_tradable.name} ({asset_tradable.symbol})")
+            return True
+        else:
+            print(f"❌ Impossible de récupérer les détails pour AssetTradable {asset_tradable_id}")
+            return False
+            
+    except AssetTradable.DoesNotExist:
+        print(f"❌ AssetTradable {asset_tradable_id} non trouvé")
+        return False
+    except Exception as e:
+        print(f"❌ Erreur mise à jour AssetTradable: {e}")
+        return False
+
+
+def get_yahoo_data(symbol: str, years: int = 5) -> dict:
+    """Récupère les données depuis Yahoo Finance (via le fournisseur partagé et son cache)"""
+    try:
+        # Vérifier que le symbole n'est pas vide
+        if not symbol or symbol.strip() == "":
+            print(f"⚠️ Symbole vide, pas de recherche Yahoo")
+            return None
+            
+        print(f"📈 Recherche Yahoo Finance pour: {symbol} sur {years} ans")
+        
+        snapshot = MarketDataFactory.get_provider('yahoo').get_snapshot(symbol, years)
+        if not snapshot:
+            print(f"❌ Aucun symbole fonctionnel trouvé pour {symbol}")
+            return None
+        
+        price_history_data = list(snapshot['price_history'])
+        print(f"📊 Historique récupéré: {len(price_history_data)} bougies ({snapshot['provider_symbol']})")
+        
+        # Si on a moins de données que demandé, compléter avec des données simulées
+        if years > 20 and len(price_history_data) > 0:
+            print(f"🔄 Complétion des données manquantes pour {years} ans...")
+            # numpy/pandas ne sont chargés que pour cette complétion (import à la demande)
+            import numpy as np
+            import pandas as pd
+            
+            # Calculer la volatilité réelle de l'asset
+            returns = []
+            for i in range(1, len(price_history_data)):
+                prev_price = price_history_data[i-1]['close']
+                curr_price = price_history_data[i]['close']
+                if prev_price > 0:
+                    returns.append((curr_price - prev_price) / prev_price)
+            
+            if returns:
+                # Statistiques réelles de l'asset
+                avg_return = sum(returns) / len(returns)
+                volatility = (sum((r - avg_return) ** 2 for r in returns) / len(returns)) ** 0.5
+                
+                print(f"📈 Statistiques réelles - Rendement moyen: {avg_return:.4f}, Volatilité: {volatility:.4f}")
+                
+                # Compléter avec des données simulées basées sur la volatilité réelle
+                missing_years = years - 20
+                missing_periods = missing_years * 12  # 12 mois par an
+                
+                last_price = price_history_data[0]['close']  # Prix le plus ancien
+                
+                for i in range(missing_periods):
+                    # Simulation basée sur la volatilité réelle de l'asset
+                    simulated_return = avg_return + (np.random.normal(0, 1) * volatility)
+                    last_price *= (1 + simulated_return)
+                    
+                    # Calculer la date (en remontant dans le temps)
+                    simulated_date = (pd.to_datetime(price_history_data[0]['date']) - pd.DateOffset(months=i+1)).strftime('%Y-%m-%d')
+                    
+                    simulated_candle = {
+                        'date': simulated_date,
+                        'open': last_price * 0.999,  # Légère variation
+                        'high': last_price * 1.002,
+                        'low': last_price * 0.998,
+                        'close': last_price,
+                        'volume': 0  # Volume inconnu pour les données simulées
+                    }
+                    
+                    price_history_data.insert(0, simulated_candle)
+                
+                print(f"✅ Données complétées: {len(price_history_data)} points au total ({missing_years} ans simulés)")
+        
+        print(f"✅ Données Yahoo récupérées: {snapshot['name']} - Prix: {snapshot['current_price']} - {len(price_history_data)} bougies")
+        
+        return {
+            'symbol': symbol,
+            'name': snapshot['name'],
+            'type': 'Stock',
+            'market': 'Yahoo',
+            'sector': snapshot['sector'],
+            'industry': snapshot['industry'],
+            'market_cap': snapshot['market_cap'],
+            'price_history': json.dumps(price_history_data),
+            'current_price': snapshot['current_price'],
+        }
+        
+    except Exception as e:
+        print(f"❌ Erreur Yahoo Finance pour {symbol}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def get_crypto_data(symbol: str) -> dict:
+    """Récupère les données d'une cryptomonnaie depuis CoinGecko (via le fournisseur partagé et son cache)"""
+    try:
+        print(f"🪙 Recherche CoinGecko pour: {symbol}")
+        
+        snapshot = MarketDataFactory.get_provider('coingecko').get_snapshot(symbol)
+        if not snapshot:
+            print(f"❌ Pas de données CoinGecko pour {symbol}")
+            return None
+        
+        print(f"✅ Données CoinGecko récupérées: {snapshot['name']} - Prix: {snapshot['current_price']} - {len(snapshot['price_history'])} jours")
+        
+        return {
+            'symbol': symbol,
+            'name': snapshot['name'],
+            'type': 'Crypto',
+            'market': 'CoinGecko',
+            'sector': 'Crypto',
+            'industry': 'Crypto',
+            'market_cap': snapshot['market_cap'],
+            'price_history': json.dumps(snapshot['price_history']),
+            'current_price': snapshot['current_price'],
+        }
+        
+    except Exception as e:
+        print(f"❌ Erreur CoinGecko pour {symbol}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def create_asset_from_data(data: dict, platform: str) -> tuple:
+    """Crée un Asset et AssetTradable à partir des données"""
+    try:
+        # Récupérer ou créer AssetType et Market
+        asset_type, _ = AssetType.objects.get_or_create(name=data.get('type', 'Unknown'))
+        market, _ = Market.objects.get_or_create(name=data.get('market', 'Unknown'))
+        
+        # Récupérer ou créer l'Asset sous-jacent
+        asset, created = Asset.objects.get_or_create(
+            symbol=data['symbol'],
+            defaults={
+                'name': data.get('name', data['symbol']),
+                'sector': data.get('sector', 'xxxx'),
+                'industry': data.get('industry', 'xxxx'),
+                'market_cap': data.get('market_cap', 0.0),
+                'price_history': data.get('price_history', 'xxxx'),
+            }
+        )
+        
+        # Si l'Asset existe déjà, mettre à jour avec les nouvelles données Yahoo
+        if not created:
+            print(f"🔄 Mise à jour de l'Asset existant: {asset.symbol}")
+            asset.name = data.get('name', asset.name)
+            asset.sector = data.get('sector', asset.sector)
+            asset.industry = data.get('industry', asset.industry)
+            asset.market_cap = data.get('market_cap', asset.market_cap)
+            asset.save()
+            print(f"✅ Asset mis à jour: {asset.symbol} - Secteur: {asset.sector} - Industrie: {asset.industry} - Market Cap: {asset.market_cap}")
+        
+        # Trouver un AllAssets correspondant existant
+        all_asset = AssetTradable.find_matching_all_asset(data['symbol'], platform)
+        
+        if not all_asset:
+            raise Exception(f'Aucun AllAssets trouvé pour le symbole {data["symbol"]}. Veuillez d\'abord ajouter cet actif dans le catalogue AllAssets.')
+        
+        # Récupérer ou créer l'AssetTradable
+        asset_tradable, created_tradable = AssetTradable.objects.get_or_create(
+            symbol=data['symbol'].upper(),
+            platform=platform,
+            defaults={
+                'all_asset': all_asset,
+                'name': data.get('name', data['symbol']),
+                'asset_type': asset_type,
+                'market': market,
+            }
+        )
+        
+        # Si l'AssetTradable existe déjà, mettre à jour
+        if not created_tradable:
+            print(f"🔄 Mise à jour de l'AssetTradable existant: {asset_tradable.symbol}")
+            asset_tradable.name = data.get('name', asset_tradable.name)
+            asset_tradable.asset_type = asset_type
+            asset_tradable.market = market
+            asset_tradable.save()
+        
+        print(f"✅ AssetTradable créé/mis à jour: {asset_tradable.symbol} sur {platform}")
+        return asset, asset_tradable
+        
+    except Exception as e:
+        print(f"❌ Erreur création AssetTradable: {e}")
+        raise
+
+
+def asset_autocomplete(request):
+    """Autocomplétion pour les Assets"""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'results': []})
+    query = normalize_query(query)
+    
+    def build_results():
+        # Chercher dans AllAssets d'abord (index de recherche, symboles exacts en premier)
+        results = []
+        for asset in search_assets(query, limit=10):
+            clean_symbol = asset['symbol'].split(':')[0].split('_')[0]
+            results.append({
+                'id': asset['id'],
+                'text': f"{clean_symbol} - {asset['name']}",
+                'symbol': clean_symbol,
+                'name': asset['name'],
+                'platform': asset['platform'],
+                'asset_type': asset['asset_type'],
+                'market': asset['market'],
+                'source': 'all_assets'
+            })
+    
+        # Si pas assez de résultats, ajouter des suggestions basées sur le query
+        if len(results) < 5:
+            # Suggestions pour les cryptomonnaies populaires
+            crypto_suggestions = ['BTC', 'ETH', 'SOL', 'AVAX', 'BNB', 'ADA', 'DOT', 'LINK', 'UNI', 'MATIC']
+            for crypto in crypto_suggestions:
+                if query.upper() in crypto and not any(r['symbol'] == crypto for r in results):
+                    results.append({
+                        'id': f'crypto_{crypto}',
+                        'text': f"{crypto} - {crypto} (Cryptomonnaie)",
+                        'symbol': crypto,
+                        'name': f"{crypto} (Cryptomonnaie)",
+                        'platform': 'binance',
+                        'asset_type': 'Crypto',
+                        'market': 'SPOT',
+                        'source': 'suggestion'
+                    })
+        
+            # Suggestions pour les actions populaires
+            stock_suggestions = ['AAPL', 'GOOGL', 'MSFT', 'TSLA', 'AMZN', 'META', 'NVDA', 'NFLX']
+            for stock in stock_suggestions:
+                if query.upper() in stock and not any(r['symbol'] == stock for r in results):
+                    results.append({
+                        'id': f'stock_{stock}',
+                        'text': f"{stock} - {stock} (Action)",
+                        'symbol': stock,
+                        'name': f"{stock} (Action)",
+                        'platform': 'yahoo',
+                        'asset_type': 'Stock',
+                        'market': 'NASDAQ',
+                        'source': 'suggestion'
+                    })
+        
+        return results[:10]
+    
+    results = cached_response('asset_autocomplete', {'q': query}, build_results)
+    return JsonResponse({'results': results})
+
+
+def create_asset(request):
+    """Crée un nouvel Asset avec synchronisation automatique"""
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            symbol = data.get('symbol', '').strip().upper()
+            name = data.get('name', '').strip()
+            source = data.get('source', 'manual')  # 'all_assets', 'suggestion', 'manual'
+            
+            if not symbol:
+                return JsonResponse({'success': False, 'error': 'Symbole requis'})
+            
+            # Vérifier si l'Asset existe déjà
+            existing_asset = Asset.objects.filter(symbol_clean=symbol).first()
+            if existing_asset:
+                return JsonResponse({'success': False, 'error': f'Asset {symbol} existe déjà'})
+            
+            # Créer le nouvel Asset
+            asset = Asset.objects.create(
+                symbol=symbol,  # Symbole original
+                symbol_clean=symbol,  # Symbole nettoyé (même chose ici)
+                name=name or symbol,
+                sector='xxxx',
+                industry='xxxx',
+                market_cap=0.0,
+                price_history='xxxx'
+            )
+            
+            # Si c'est un AllAssets existant, créer la référence
+            if source == 'all_assets' and data.get('all_asset_id'):
+                try:
+                    all_asset = AllAssets.objects.get(id=data['all_asset_id'])
+                    asset.all_asset = all_asset
+                    asset.save()
+                except AllAssets.DoesNotExist:
+                    pass
+            
+            # Synchronisation automatique avec Yahoo/CoinGecko
+            print(f"🔄 Synchronisation automatique pour {symbol}")
+            
+            # Détecter si c'est une cryptomonnaie
+            crypto_symbols = ["BTC", "ETH", "ETHW", "SOL", "AVAX", "BNB", "ADA", "DOT", "LINK", "UNI", "MATIC", "USDT", "USDC", "DAI", "LTC", "XRP", "DOGE", "SHIB", "TRX", "BCH", "XLM"]
+            is_crypto = any(crypto in symbol.upper() for crypto in crypto_symbols)
+            
+            if is_crypto:
+                print(f"🪙 Synchronisation CoinGecko pour {symbol}")
+                crypto_data = get_crypto_data(symbol)
+                if crypto_data:
+                    asset.name = crypto_data.get('name', asset.name)
+                    asset.sector = crypto_data.get('sector', asset.sector)
+                    asset.industry = crypto_data.get('industry', asset.industry)
+                    asset.market_cap = crypto_data.get('market_cap', asset.market_cap)
+                    asset.price_history = crypto_data.get('price_history', asset.price_history)
+                    chart_data.save_asset_prices(asset)
+                    print(f"✅ {symbol} synchronisé avec CoinGecko")
+                else:
+                    print(f"⚠️ Pas de données CoinGecko pour {symbol}")
+            else:
+                print(f"📈 Synchronisation Yahoo pour {symbol}")
+                yahoo_data = get_yahoo_data(symbol)
+                if yahoo_data:
+                    asset.name = yahoo_data.get('name', asset.name)
+                    asset.sector = yahoo_data.get('sector', asset.sector)
+                    asset.industry = yahoo_data.get('industry', asset.industry)
+                    asset.market_cap = yahoo_data.get('market_cap', asset.market_cap)
+                    asset.price_history = yahoo_data.get('price_history', asset.price_history)
+                    chart_data.save_asset_prices(asset)
+                    print(f"✅ {symbol} synchronisé avec Yahoo")
+                else:
+                    print(f"⚠️ Pas de données Yahoo pour {symbol}")
+            
+            return JsonResponse({
+                'success': True, 
+                'message': f'Asset {symbol} créé avec succès',
+                'asset_id': asset.id
+            })
+            
+        except json.JSONDecodeError:
+            return JsonResponse({'success': False, 'error': 'Données JSON invalides'})
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+    
+    return JsonResponse({'success': False, 'error': 'Méthode non autorisée'})
+
+
+def get_asset_price_history(request, asset_id):
+    """Récupère l'historique des prix d'un Asset"""
+    print(f"🔍 Requête historique pour asset ID: {asset_id}")
+    
+    try:
+        asset = Asset.objects.get(id=asset_id)
+        print(f"✅ Asset trouvé: {asset.symbol} - {asset.name}")
+        print(f"📊 Historique: {asset.price_history[:100]}..." if asset.price_history else "Aucun historique")
+        
+        if not asset.price_history or asset.price_history == 'xxxx':
+            print(f"⚠️ Pas d'historique pour {asset.symbol}")
+            return JsonResponse({
+                'success': False, 
+                'error': 'Aucun historique disponible pour cet asset'
+            })
+        
+        # Parser l'historique JSON
+        try:
+            price_data = json.loads(asset.price_history)
+            print(f"📊 Données parsées: {len(price_data)} bougies")
+            if price_data:
+                print(f"📊 Première bougie: {price_data[0]}")
+        except json.JSONDecodeError as e:
+            print(f"❌ Erreur JSON: {e}")
+            return JsonResponse({
+                'success': False, 
+                'error': 'Format d\'historique invalide'
+            })
+        
+        # Convertir au format TradingView
+        chart_data = []
+        for candle in price_data:
+            # TradingView attend : {time: timestamp, open: float, high: float, low: float, close: float}
+            # Nos données ont : {"date": "2023-01-01", "open": 100, ...}
+            try:
+                # Convertir la date en timestamp
+                date_obj = datetime.strptime(candle['date'], '%Y-%m-%d')
+                timestamp = int(date_obj.timestamp())
+                
+                chart_data.append({
+                    'time': timestamp,
+                    'open': float(candle['open']),
+                    'high': float(candle['high']),
+                    'low': float(candle['low']),
+                    'close': float(candle['close']),
+                    'volume': float(candle.get('volume', 0))
+                })
+            except (KeyError, ValueError) as e:
+                print(f"⚠️ Erreur parsing candle: {e}")
+                continue
+        
+        # Trier par date
+        chart_data.sort(key=lambda x: x['time'])
+        
+        return JsonResponse({
+            'success': True,
+            'data': {
+                'symbol': asset.symbol_clean or asset.symbol,
+                'name': asset.name,
+                'candles': chart_data,
+                'period': '5Y' if len(chart_data) > 200 else '1Y' if len(chart_data) > 50 else '1M'
+            }
+        })
+        
+    except Asset.DoesNotExist:
+        return JsonResponse({
+            'success': False, 
+            'error': 'Asset non trouvé'
+        })
+    except Exception as e:
+        print(f"❌ Erreur dans get_asset_price_history: {e}")
+        import traceback
+        traceback.print_exc()
+        return JsonResponse({
+            'success': False, 
+            'error': f'Erreur: {str(e)}'
+        })
+
+
+def update_all_assets_with_yahoo(request):
+    """Met à jour tous les Assets existants avec les données Yahoo Finance"""
+    if request.method == 'POST':
+        try:
+            assets = Asset.objects.all()
+            updated_count = 0
+            yahoo_assets = []
+            
+            for asset in assets:
+                try:
+                    # Nettoyer le symbole pour Yahoo Finance (enlever les extensions)
+                    # Utiliser le symbole nettoyé
+                    clean_symbol = asset.symbol_clean or asset.get_clean_symbol()
+                    clean_symbol = clean_symbol.strip()
+                    
+                    # Détecter si c'est une cryptomonnaie
+                    crypto_symbols = ["BTC", "ETH", "ETHW", "SOL", "AVAX", "BNB", "ADA", "DOT", "LINK", "UNI", "MATIC", "USDT", "USDC", "DAI", "LTC", "XRP", "DOGE", "SHIB", "TRX", "BCH", "XLM"]
+                    
+                    # Vérifier si c'est une crypto directe ou une paire EUR
+                    is_crypto = any(crypto in clean_symbol.upper() for crypto in crypto_symbols)
+                    
+                    # Ajouter la détection des paires EUR
+                    if clean_symbol.endswith('EUR'):
+                        base_symbol = clean_symbol[:-3]
+                        if base_symbol in crypto_symbols:
+                            is_crypto = True
+                            print(f"🔄 Paire EUR crypto détectée: {clean_symbol} -> {base_symbol}")
+                    
+                    if is_crypto:
+                        print(f"🪙 {asset.symbol}: cryptomonnaie, utilisation de CoinGecko")
+                        crypto_data = get_crypto_data(clean_symbol)
+                        
+                        if crypto_data:
+                            # Mettre à jour l'Asset avec les données CoinGecko
+                            asset.name = crypto_data.get('name', asset.name)
+                            asset.sector = crypto_data.get('sector', asset.sector)
+                            asset.industry = crypto_data.get('industry', asset.industry)
+                            asset.market_cap = crypto_data.get('market_cap', asset.market_cap)
+                            asset.price_history = crypto_data.get('price_history', asset.price_history)
+                            chart_data.save_asset_prices(asset, bump_version=False)
+                            
+                            updated_count += 1
+                            print(f"✅ {asset.symbol} mis à jour (CoinGecko): {asset.sector} - {asset.industry} - {asset.market_cap} - Historique: {len(json.loads(asset.price_history)) if asset.price_history != 'xxxx' else 0} jours")
+                        else:
+                            print(f"⚠️ Pas de données CoinGecko pour {asset.symbol} (symbole nettoyé: {clean_symbol})")
+                    else:
+                        # Actions/autres : téléchargement Yahoo groupé ci-dessous
+                        yahoo_assets.append(asset)
+                        
+                except Exception as e:
+                    print(f"❌ Erreur mise à jour {asset.symbol}: {e}")
+                    continue
+            
+            # Historiques Yahoo par lots de tickers (une requête par lot)
+            failed = {}
+            if yahoo_assets:
+                print(f"📈 Téléchargement groupé Yahoo pour {len(yahoo_assets)} Assets...")
+                result = refresh_assets(yahoo_assets)
+                updated_count += result['updated']
+                failed = result['failed']
+                for symbol, reason in failed.items():
+                    print(f"⚠️ Pas de données Yahoo pour {symbol}: {reason}")
+                print(f"✅ {result['updated']} Assets mis à jour via Yahoo en {result['duration']:.1f}s")
+                # Métadonnées seulement pour les Assets jamais renseignés (un Ticker.info chacun)
+                metadata = refresh_metadata(yahoo_assets)
+                if metadata['updated'] or metadata['remaining']:
+                    print(f"🏷️ Métadonnées: {metadata['updated']} Assets complétés, {metadata['remaining']} au prochain passage")
+            
+            # Invalider les réponses en cache dépendant des prix
+            if updated_count:
+                bump_price_version()
+            
+            return JsonResponse({
+                'status': 'success',
+                'message': f'{updated_count} Assets mis à jour avec succès',
+                'failed': failed,
+            })
+            
+        except Exception as e:
+            return JsonResponse({
+                'status': 'error',
+                'message': f'Erreur: {str(e)}'
+            })
+    
+    return JsonResponse({'status': 'error', 'message': 'Méthode non autorisée'})
+
+
+@login_required
+def update_asset_tradable_saxo(request, asset_tradable_id):
+    """Met à jour un AssetTradable avec les informations Saxo"""
+    if request.method == 'POST':
+        success = update_asset_tradable_from_saxo(asset_tradable_id)
+        
+        if success:
+            return JsonResponse({
+                'success': True,
+                'message': 'AssetTradable mis à jour avec succès'
+            })
+        else:
+            return JsonResponse({
+                'success': False,
+                'message': 'Erreur lors de la mise à jour'
+            })
+    
+    return JsonResponse({'success': False, 'message': 'Méthode non autorisée'})
+
+
+@login_required
+def update_all_saxo_assets(request):
+    """Met à jour tous les AssetTradable Saxo avec les informations de l'API"""
+    if request.method == 'POST':
+        from ..models import AssetTradable
+        
+        saxo_assets = AssetTradable.objects.filter(platform='saxo')
+        updated_count = 0
+        error_count = 0
+        
+        for asset in saxo_assets:
+            try:
+                if update_asset_tradable_from_saxo(asset.id):
+                    updated_count += 1
+                else:
+                    error_count += 1
+            except Exception as e:
+                print(f"❌ Erreur mise à jour asset {asset.id}: {e}")
+                error_count += 1
+        
+        return JsonResponse({
+            'success': True,
+            'message': f'{updated_count} AssetTradable Saxo mis à jour, {error_count} erreurs'
+        })
+    
+    return JsonResponse({'success': False, 'message': 'Méthode non autorisée'})
+
+
+@login_required
+def update_saxo_assets_page(request):
+    """Page pour mettre à jour les AssetTradable Saxo"""
+    return render(request, 'trading_app/update_saxo_assets.html')
+
+
+@login_required
+@csrf_exempt
+def get_asset_price(request, asset_id):
+    """Récupère le prix actuel d'un asset"""
+    try:
+        asset = Asset.objects.get(id=asset_id)
+        
+        # Extraire le prix depuis l'historique
+        current_price = 0.0
+        if asset.price_history and asset.price_history != 'xxxx':
+            try:
+                price_data = json.loads(asset.price_history)
+                if price_data:
+                    current_price = float(price_data[-1]['close'])
+            except (json.JSONDecodeError, KeyError, IndexError):
+                pass
+        
+        return JsonResponse({
+            'success': True,
+            'price': current_price,
+            'symbol': asset.symbol_clean or asset.symbol
+        })
+        
+    except Asset.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Asset non trouvé'}, status=404)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+@login_required
+def search_all_assets(request):
+    """Recherche d'actifs pour l'autocomplétion"""
+    try:
+        query = request.GET.get('q', '').strip()
+        platform = request.GET.get('platform', '').strip()
+        
+        if not query or len(query) < 2:
+            return JsonResponse({'results': []})
+        
+        query = normalize_query(query)
+        
+        def build_results():
+            # Formater les résultats pour l'autocomplétion
+            formatted_results = []
+            for asset in search_assets(query, platform=platform or None, tradable_only=True, limit=20):
+                formatted_results.append({
+                    'id': asset['symbol'],
+                    'text': f"{asset['symbol']} - {asset['name']} ({asset['platform'].upper()})",
+                    'symbol': asset['symbol'],
+                    'name': asset['name'],
+                    'platform': asset['platform'],
+                    'asset_type': asset['asset_type'],
+                    'market': asset['market']
+                })
+            return formatted_results
+        
+        formatted_results = cached_response(
+            'search_all_assets',
+            {'q': query, 'platform': platform},
+            build_results,
+        )
+        return JsonResponse({'results': formatted_results})
+        
+    except Exception as e:
+        logger.error(f"Erreur lors de la recherche d'actifs: {str(e)}")
+        return JsonResponse({'results': [], 'error': str(e)})
+
+
+@login_required
+@csrf_exempt
+def get_asset_price_for_chart(request, asset_symbol):
+    """Récupérer les données de prix d'un asset pour le graphique des trades (sous-échantillonnées)"""
+    from django.utils.cache import get_conditional_response
+    from django.utils.http import http_date, quote_etag
+    
+    try:
+        # Paramètres de rendu
+        try:
+            points = min(max(int(request.GET.get('points', chart_data.DEFAULT_POINTS)), 3), chart_data.MAX_POINTS)
+            start_time = int(request.GET['start']) if request.GET.get('start') else None
+            end_time = int(request.GET['end']) if request.GET.get('end') else None
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Paramètres points/start/end invalides'}, status=400)
+        method = request.GET.get('method', 'lttb')
+        if method not in chart_data.METHODS:
+            method = 'lttb'
+        
+        asset = chart_data.find_asset(asset_symbol)
+        if not asset:
+            return JsonResponse({
+                'success': False,
+                'error': f'Asset {asset_symbol} non trouvé'
+            })
+        
+        series = chart_data.get_series_meta(asset)
+        if not series:
+            return JsonResponse({
+                'success': False,
+                'error': 'Aucun historique de prix disponible pour cet asset'
+            })
+        
+        # Requête conditionnelle : 304 si la dernière bougie n'a pas changé
+        etag = quote_etag(chart_data.series_etag(series, points, method, start_time, end_time))
+        # Date de la dernière bougie (epoch s), comme l'ETag : une réécriture sans nouvelle bougie ne change rien
+        last_modified = series.last_candle_at
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        def build_chart_data():
+            return {
+                'success': True,
+                'data': chart_data.chart_points(series.candles, points, method, start_time, end_time),
+                'total_points': series.candle_count,
+                'method': method,
+                'symbol': asset.symbol_clean or asset.symbol,
+                'name': asset.name
+            }
+        
+        payload = cached_response(
+            'asset_price_chart',
+            {'asset': asset.id, 'etag': etag},
+            build_chart_data,
+            depends_on=(PRICES,),
+        )
+        
+        response = JsonResponse(payload)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+        return response
+        
+    except Exception as e:
+        logger.error(f"Erreur récupération données prix: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': f'Erreur lors de la récupération des données: {str(e)}'
+        })
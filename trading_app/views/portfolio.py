@@ -0,0 +1,1227 @@
+"""
+Vues du portefeuille : accueil, trades, positions, ordres en attente
+"""
+
+from django.shortcuts import render
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from django.db import transaction
+from django.db.models import Q
+from django.core.paginator import Paginator
+from decimal import Decimal
+import json
+import logging
+from datetime import datetime
+from ..services import BrokerService  # Import direct de la classe BrokerService
+from django.core.serializers.json import DjangoJSONEncoder
+from ..brokers.factory import BrokerFactory
+from ..models import Asset, Position, Trade, Strategy, BrokerCredentials, AssetType, Market, AssetTradable, PendingOrder
+from .. import trade_aggregates
+from ..pnl_engine import invalidate_checkpoints, pnl_by_base_symbol, refresh_user_pnl
+
+
+logger = logging.getLogger(__name__)
+
+
+def home(request):
+    """Page d'accueil de l'application de trading"""
+    context = {
+        'total_assets': Asset.objects.count(),
+        'total_positions': Position.objects.count(),
+        'total_trades': Trade.objects.count(),
+        'total_strategies': Strategy.objects.count(),
+        'total_brokers': BrokerCredentials.objects.count(),
+    }
+    return render(request, 'home.html', context)
+
+
+def _filtered_trades(request):
+    """Applique les filtres date/broker de la page trades à un queryset Trade"""
+    from django.utils import timezone
+    
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+    broker_filter = request.GET.get('broker_filter') or request.GET.get('broker')
+    
+    trades = Trade.objects.filter(user=request.user)
+    
+    if start_date:
+        try:
+            start_datetime = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
+            trades = trades.filter(timestamp__gte=start_datetime)
+        except ValueError:
+            logger.warning(f"Filtre start_date invalide: {start_date}")
+    
+    if end_date:
+        try:
+            # Ajouter 23:59:59 pour inclure toute la journée
+            end_datetime = timezone.make_aware(
+                datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+            )
+            trades = trades.filter(timestamp__lte=end_datetime)
+        except ValueError:
+            logger.warning(f"Filtre end_date invalide: {end_date}")
+    
+    if broker_filter:
+        trades = trades.filter(platform__iexact=broker_filter)
+    
+    return trades
+
+
+def _build_trade_group_row(base_symbol, trade_count, buy_quantity, buy_volume,
+                           sell_quantity, sell_volume, last_trade, platforms):
+    """Construit la ligne de groupe Tabulator à partir des agrégats d'un symbole"""
+    buy_quantity = Decimal(buy_quantity or 0)
+    buy_volume = Decimal(buy_volume or 0)
+    sell_quantity = Decimal(sell_quantity or 0)
+    sell_volume = Decimal(sell_volume or 0)
+    
+    net_volume = buy_volume - sell_volume
+    net_quantity = buy_quantity - sell_quantity
+    
+    # Prix moyen des achats vs ventes
+    avg_buy_price = buy_volume / buy_quantity if buy_quantity > 0 else Decimal('0')
+    avg_sell_price = sell_volume / sell_quantity if sell_quantity > 0 else Decimal('0')
+    
+    # P&L = (Prix vente moyen - Prix achat moyen) × Quantité nette
+    if net_quantity > 0:  # Position longue
+        pnl = (avg_sell_price - avg_buy_price) * net_quantity
+    else:  # Position courte
+        pnl = (avg_buy_price - avg_sell_price) * abs(net_quantity)
+    
+    return {
+        'id': f"group_{base_symbol}",
+        'symbol': base_symbol,
+        'trade_count': trade_count,
+        'buy_volume': float(buy_volume),
+        'sell_volume': float(sell_volume),
+        'avg_buy_price': float(avg_buy_price),
+        'avg_sell_price': float(avg_sell_price),
+        'net_volume': float(net_volume),
+        'net_quantity': float(net_quantity),
+        'pnl': float(pnl),
+        'last_trade': last_trade.strftime('%Y-%m-%d %H:%M:%S') if last_trade else '',
+        'platforms': ', '.join(sorted(platforms)),
+        'is_group': True,
+    }
+
+
+def _trade_group_rows(request):
+    """Lignes de groupe par symbole de base, depuis TradeAggregate ou un GROUP BY si filtré par date"""
+    if request.GET.get('start_date') or request.GET.get('end_date'):
+        rows = trade_aggregates.aggregate_trades(_filtered_trades(request))
+    else:
+        broker_filter = request.GET.get('broker_filter') or request.GET.get('broker')
+        rows = trade_aggregates.stored_aggregates(request.user, platform=broker_filter)
+    
+    group_rows = [
+        _build_trade_group_row(
+            group['base_symbol'], group['buy_count'] + group['sell_count'],
+            group['buy_quantity'], group['buy_notional'],
+            group['sell_quantity'], group['sell_notional'],
+            group['last_trade_at'], group['platforms'],
+        )
+        for group in trade_aggregates.merge_by_symbol(rows).values()
+    ]
+    
+    # P&L FIFO (réalisé + latent) quand le moteur de lots a déjà traité le symbole
+    if not (request.GET.get('start_date') or request.GET.get('end_date')):
+        fifo_pnl = pnl_by_base_symbol(request.user)
+        for row in group_rows:
+            pnl = fifo_pnl.get(row['symbol'])
+            if pnl:
+                row['realized_pnl'] = float(pnl['realized_pnl'])
+                row['unrealized_pnl'] = float(pnl['unrealized_pnl'])
+                row['pnl'] = row['realized_pnl'] + row['unrealized_pnl']
+    
+    return group_rows
+
+
+def _tabulator_page_params(request, default_size=50, max_size=500):
+    """Lit les paramètres de pagination/tri envoyés par Tabulator en mode remote"""
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    try:
+        size = min(max(int(request.GET.get('size', default_size)), 1), max_size)
+    except ValueError:
+        size = default_size
+    
+    sort_field = request.GET.get('sort[0][field]')
+    sort_dir = request.GET.get('sort[0][dir]', 'desc')
+    return page, size, sort_field, sort_dir
+
+
+@login_required
+def trade_tabulator(request):
+    """Vue pour afficher les trades dans un tableau Tabulator imbriqué (données chargées en AJAX)"""
+    return render(request, 'trading_app/trade_tabulator.html', {
+        'start_date': request.GET.get('start_date'),
+        'end_date': request.GET.get('end_date'),
+        'broker_filter': request.GET.get('broker_filter') or request.GET.get('broker'),
+    })
+
+
+@login_required
+def trade_tabulator_groups(request):
+    """API paginée (mode remote Tabulator) des groupes de trades par symbole de base"""
+    page, size, sort_field, sort_dir = _tabulator_page_params(request)
+    
+    rows = _trade_group_rows(request)
+    
+    sortable_fields = {'symbol', 'trade_count', 'net_volume', 'net_quantity', 'pnl', 'last_trade'}
+    if sort_field in sortable_fields:
+        rows.sort(key=lambda row: row[sort_field], reverse=(sort_dir == 'desc'))
+    else:
+        # Trier par volume net décroissant
+        rows.sort(key=lambda row: abs(row['net_volume']), reverse=True)
+    
+    last_page = max((len(rows) + size - 1) // size, 1)
+    start = (page - 1) * size
+    
+    return JsonResponse({
+        'last_page': last_page,
+        'data': rows[start:start + size],
+        'stats': {
+            'total_symbols': len(rows),
+            'total_trades': sum(row['trade_count'] for row in rows),
+            'total_volume': sum(abs(row['net_volume']) for row in rows),
+            'total_pnl': sum(row['pnl'] for row in rows),
+        },
+    })
+
+
+@login_required
+def trade_tabulator_children(request):
+    """API paginée des trades individuels d'un symbole de base (chargée à l'ouverture du groupe)"""
+    base_symbol = request.GET.get('symbol', '')
+    if not base_symbol:
+        return JsonResponse({'error': 'Paramètre symbol requis'}, status=400)
+    
+    page, size, sort_field, sort_dir = _tabulator_page_params(request, default_size=20)
+    
+    trades = _filtered_trades(request).filter(
+        Q(asset_tradable__symbol=base_symbol) | Q(asset_tradable__symbol__startswith=f"{base_symbol}:")
+    ).select_related('asset_tradable')
+    
+    sortable_fields = {'timestamp', 'size', 'price', 'side', 'platform'}
+    if sort_field in sortable_fields:
+        trades = trades.order_by(f"{'-' if sort_dir == 'desc' else ''}{sort_field}", '-id')
+    else:
+        trades = trades.order_by('-timestamp', '-id')
+    
+    paginator = Paginator(trades, size)
+    page_obj = paginator.get_page(page)
+    
+    data = [{
+        'id': trade.id,
+        'symbol': trade.asset_tradable.symbol,
+        'name': trade.asset_tradable.name,
+        'size': float(trade.size),
+        'price': float(trade.price),
+        'side': trade.side,
+        'volume': float(trade.size * trade.price),
+        'realized_pnl': float(trade.realized_pnl) if trade.realized_pnl is not None else None,
+        'timestamp': trade.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        'platform': trade.platform,
+        'is_group': False,
+    } for trade in page_obj.object_list]
+    
+    return JsonResponse({
+        'last_page': paginator.num_pages,
+        'data': data,
+    })
+
+
+def trade_tabulator_with_synch(request):
+    """Affiche les trades depuis les brokers"""
+    from ..brokers.factory import BrokerFactory
+    from ..models import BrokerCredentials
+    
+    all_trades = []
+    
+    # Récupérer tous les brokers configurés
+    brokers = BrokerCredentials.objects.filter(is_active=True)
+    
+    for broker in brokers:
+        try:
+            credentials = broker.get_credentials_dict()
+            broker_instance = BrokerFactory.create_broker(broker.broker_type, None, credentials)
+            
+            if hasattr(broker_instance, "get_trades"):
+                trades = broker_instance.get_trades(limit=50)
+                
+                # Ajouter les informations du broker à chaque trade
+                for trade in trades:
+                    trade['broker_name'] = broker.name
+                    trade['broker_type'] = broker.broker_type
+                    trade['environment'] = broker.environment
+                
+                all_trades.extend(trades)
+                print(f"✅ {len(trades)} trades récupérés depuis {broker.name}")
+            else:
+                print(f"⚠️ Broker {broker.name} n'a pas de méthode get_trades")
+                
+        except Exception as e:
+            print(f"❌ Erreur récupération trades pour {broker.name}: {e}")
+            continue
+    
+    print(f"📊 Total: {len(all_trades)} trades récupérés")
+    
+    return render(request, 'trading_app/trade_tabulator.html', {
+        'data_trades': json.dumps(all_trades, cls=DjangoJSONEncoder),
+    })
+
+
+@login_required
+def position_tabulator(request):
+    positions = Position.objects.filter(user=request.user).select_related('asset_tradable')
+    print(f"🔍 {positions.count()} positions trouvées pour l'utilisateur {request.user.username}")
+    
+    # Debug: afficher toutes les positions
+    for pos in positions:
+        print(f"📊 Position ID: {pos.id}, Symbol: {pos.asset_tradable.symbol if pos.asset_tradable else 'N/A'}, Size: {pos.size}")
+    
+    data_positions = []
+    
+    # Calculer les données pour les graphiques
+    sector_data = {}
+    industry_data = {}
+    
+    for position in positions:
+        print(f"📊 Traitement position ID: {position.id}, Symbol: {position.asset_tradable.symbol if position.asset_tradable else 'N/A'}, Size: {position.size}")
+        position_data = {
+            'id': position.id,
+            'user_id': position.user_id,
+            'asset_id': position.asset_tradable_id,
+            'asset_name': position.asset_tradable.name if position.asset_tradable else 'N/A',
+            'asset_symbol': position.asset_tradable.symbol if position.asset_tradable else 'N/A',
+            'underlying_asset_name': position.asset_tradable.name if position.asset_tradable else 'N/A',
+            'underlying_asset_symbol': position.asset_tradable.symbol if position.asset_tradable else 'N/A',
+            'size': str(position.size),
+            'entry_price': str(position.entry_price),
+            'current_price': str(position.current_price),
+            'side': position.side,
+            'status': position.status,
+            'pnl': str(position.pnl),
+            'created_at': position.created_at.isoformat(),
+            'updated_at': position.updated_at.isoformat(),
+        }
+        data_positions.append(position_data)
+        print(f"✅ Position ajoutée aux données: {position.asset_tradable.symbol if position.asset_tradable else 'N/A'}")
+        
+        # Agréger les données pour les graphiques
+        size = float(position.size)
+        # Récupérer sector/industry depuis l'Asset
+        sector = position.asset_tradable.all_asset.asset_type if position.asset_tradable and position.asset_tradable.all_asset else 'Non défini'
+        industry = position.asset_tradable.all_asset.market if position.asset_tradable and position.asset_tradable.all_asset else 'Non défini'
+        
+        # Agréger par secteur
+        if sector not in sector_data:
+            sector_data[sector] = 0
+        sector_data[sector] += size
+        
+        # Agréger par industrie
+        if industry not in industry_data:
+            industry_data[industry] = 0
+        industry_data[industry] += size
+    
+    # Convertir en format pour Chart.js
+    chart_sector_data = [{'label': k, 'value': v} for k, v in sector_data.items() if v > 0]
+    chart_industry_data = [{'label': k, 'value': v} for k, v in industry_data.items() if v > 0]
+    
+    # Récupérer les brokers Saxo configurés pour les boutons de synchronisation
+    saxo_brokers = BrokerCredentials.objects.filter(
+        user=request.user,
+        broker_type='saxo',
+        is_active=True
+    ).order_by('name')
+    
+    return render(request, 'trading_app/position_tabulator.html', {
+        'data_positions': json.dumps(data_positions, cls=DjangoJSONEncoder),
+        'saxo_brokers': saxo_brokers,
+        'chart_sector_data': json.dumps(chart_sector_data, cls=DjangoJSONEncoder),
+        'chart_industry_data': json.dumps(chart_industry_data, cls=DjangoJSONEncoder),
+    })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def binance_trades_ajax(request):
+    """Vue AJAX pour récupérer les trades Binance selon le mode et sauvegarder uniquement les nouvelles données"""
+    try:
+        data = json.loads(request.body)
+        mode = data.get('mode', 'auto')
+        
+        from ..brokers.factory import BrokerFactory
+        from ..models import BrokerCredentials, Trade, AssetTradable, Asset, AssetType, Market
+        
+        # Récupérer les credentials Binance
+        binance_credentials = BrokerCredentials.objects.filter(
+            broker_type='binance', 
+            is_active=True
+        ).first()
+        
+        if not binance_credentials:
+            return JsonResponse({
+                'success': False,
+                'error': 'Aucune configuration Binance active trouvée'
+            })
+        
+        # Créer l'instance Binance
+        credentials = binance_credentials.get_credentials_dict()
+        binance_broker = BrokerFactory.create_broker('binance', request.user, credentials)
+        
+        # Récupérer les trades selon le mode
+        trades_data = binance_broker.get_trades(limit=1000, mode=mode)
+        
+        print(f"🔍 {len(trades_data)} trades récupérés depuis Binance (mode: {mode})")
+        
+        # Récupérer les trades existants en base pour comparaison
+        existing_trades = Trade.objects.filter(
+            user=request.user,
+            platform='binance'
+        ).select_related('asset_tradable').values_list('timestamp', 'asset_tradable__symbol', 'side', 'size', 'price')
+        
+        print(f"📊 {len(existing_trades)} trades existants en base de données")
+        
+        # Créer un set des trades existants pour comparaison rapide
+        existing_trades_set = set()
+        for trade in existing_trades:
+            timestamp, symbol, side, size, price = trade
+            # Créer une clé unique pour chaque trade
+            trade_key = (timestamp, symbol, side, float(size), float(price))
+            existing_trades_set.add(trade_key)
+        
+        print(f"🔑 {len(existing_trades_set)} clés uniques créées pour comparaison")
+        
+        # Sauvegarder uniquement les nouveaux trades
+        saved_count = 0
+        for trade_data in trades_data:
+            try:
+                # Créer ou récupérer l'Asset si nécessaire
+                symbol = trade_data.get('symbol', 'N/A')
+                asset, created = Asset.objects.get_or_create(
+                    symbol=symbol,
+                    defaults={
+                        'name': symbol,
+                        'sector': 'Cryptocurrency',
+                        'industry': 'Digital Assets',
+                        'market_cap': 0.0,
+                        'price_history': 'xxxx'
+                    }
+                )
+                
+                # Créer ou récupérer AssetType et Market pour Binance
+                asset_type, _ = AssetType.objects.get_or_create(name='Crypto')
+                market, _ = Market.objects.get_or_create(name='Binance')
+                
+                # Trouver un AllAssets correspondant existant
+                all_asset = AssetTradable.find_matching_all_asset(symbol, 'binance')
+                
+                if not all_asset:
+                    print(f"⚠️ Aucun AllAssets trouvé pour {symbol}, trade ignoré")
+                    continue
+                
+                # Créer ou récupérer AssetTradable pour les trades
+                asset_tradable, created = AssetTradable.objects.get_or_create(
+                    symbol=symbol.upper(),
+                    platform='binance',
+                    defaults={
+                        'all_asset': all_asset,
+                        'name': symbol,
+                        'asset_type': asset_type,
+                        'market': market,
+                    }
+                )
+                
+                # Préparer les données du trade
+                trade_timestamp = datetime.strptime(trade_data.get('timestamp', ''), '%Y-%m-%d %H:%M:%S')
+                trade_size = trade_data.get('size', 0)
+                trade_price = trade_data.get('opening_price', 0)
+                trade_side = trade_data.get('direction', 'BUY')
+                
+                # Créer la clé unique pour ce trade
+                trade_key = (trade_timestamp, symbol, trade_side, float(trade_size), float(trade_price))
+                
+                # Vérifier si ce trade existe déjà
+                if trade_key not in existing_trades_set:
+                    # Créer le nouveau Trade
+                    with transaction.atomic():
+                        trade = Trade.objects.create(
+                            user=request.user,
+                            asset_tradable=asset_tradable,
+                            size=trade_size,
+                            price=trade_price,
+                            side=trade_side,
+                            timestamp=trade_timestamp,
+                            platform='binance'
+                        )
+                        trade_aggregates.record_trade(trade)
+                    saved_count += 1
+                    print(f"✅ Nouveau trade sauvegardé: {symbol} {trade_side} {trade_size} @ {trade_price}")
+                else:
+                    print(f"⏭️ Trade déjà existant: {symbol} {trade_side} {trade_size} @ {trade_price}")
+                    
+            except Exception as e:
+                print(f"❌ Erreur sauvegarde trade {trade_data.get('symbol', 'N/A')}: {e}")
+                continue
+        
+        # Mettre à jour le P&L FIFO avec les nouveaux fills
+        if saved_count:
+            refresh_user_pnl(request.user)
+        
+        # Récupérer tous les trades sauvegardés pour l'affichage (pas seulement les nouveaux)
+        saved_trades = Trade.objects.filter(user=request.user).select_related('asset_tradable').order_by('-timestamp')[:100]
+        
+        # Formater pour Tabulator
+        formatted_trades = [{
+            'id': trade.id,
+            'symbol': trade.asset_tradable.symbol if trade.asset_tradable else 'N/A',
+            'direction': trade.side,
+            'size': float(trade.size),
+            'opening_price': float(trade.price),
+            'closing_price': float(trade.price),
+            'profit_loss': 0,
+            'profit_loss_ratio': 0,
+            'opening_date': trade.timestamp.strftime('%Y-%m-%d'),
+            'timestamp': trade.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'broker_name': trade.platform,
+        } for trade in saved_trades]
+        
+        return JsonResponse({
+            'success': True,
+            'trades': formatted_trades,
+            'count': len(formatted_trades),
+            'saved_count': saved_count,
+            'mode': mode,
+            'message': f'{saved_count} nouveaux trades ajoutés à la base de données'
+        })
+        
+    except Exception as e:
+        print(f"❌ Erreur AJAX Binance: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        })
+
+
+@login_required
+@csrf_exempt
+def delete_all_trades(request):
+    """Supprimer tous les trades de tous les brokers"""
+    try:
+        # Compter les trades avant suppression
+        trades_count = Trade.objects.filter(user=request.user).count()
+        
+        # Supprimer tous les trades de l'utilisateur (et leurs agrégats)
+        with transaction.atomic():
+            Trade.objects.filter(user=request.user).delete()
+            trade_aggregates.forget_trades(request.user)
+            # Checkpoints FIFO : sinon le P&L des trades supprimés reste affiché
+            invalidate_checkpoints(request.user)
+            Strategy.objects.filter(user=request.user).update(total_pnl=0)
+        
+        return JsonResponse({
+            'success': True,
+            'message': f"✅ {trades_count} trades supprimés avec succès",
+            'deleted_count': trades_count
+        })
+            
+    except Exception as e:
+        logger.error(f"Erreur lors de la suppression des trades: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': f"Erreur lors de la suppression: {str(e)}"
+        }, status=500)
+
+
+@login_required
+@csrf_exempt
+def update_all_trades(request):
+    """Mettre à jour tous les trades de tous les brokers"""
+    try:
+        # Récupérer tous les brokers configurés
+        brokers = BrokerCredentials.objects.filter(user=request.user, is_active=True)
+        broker_service = BrokerService(request.user)
+        
+        total_updated = 0
+        results = []
+        
+        for broker in brokers:
+            try:
+                # Synchroniser les trades pour ce broker
+                result = broker_service.sync_trades_from_broker(broker)
+                if result['success']:
+                    total_updated += result.get('saved_count', 0)
+                    results.append(f"{broker.name}: {result.get('saved_count', 0)} trades")
+                else:
+                    results.append(f"{broker.name}: Erreur - {result.get('error', 'Erreur inconnue')}")
+            except Exception as e:
+                results.append(f"{broker.name}: Erreur - {str(e)}")
+        
+        return JsonResponse({
+            'success': True,
+            'message': f"✅ {total_updated} trades mis à jour au total",
+            'updated_count': total_updated,
+            'details': results
+        })
+            
+    except Exception as e:
+        logger.error(f"Erreur lors de la mise à jour des trades: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': f"Erreur lors de la mise à jour: {str(e)}"
+        }, status=500)
+
+
+@login_required
+@csrf_exempt
+def delete_all_positions(request):
+    """Supprimer toutes les positions de tous les brokers"""
+    try:
+        # Compter les positions avant suppression
+        positions_count = Position.objects.filter(user=request.user).count()
+        
+        # Supprimer toutes les positions de l'utilisateur
+        Position.objects.filter(user=request.user).delete()
+        
+        return JsonResponse({
+            'success': True,
+            'message': f"✅ {positions_count} positions supprimées avec succès",
+            'deleted_count': positions_count
+        })
+            
+    except Exception as e:
+        logger.error(f"Erreur lors de la suppression des positions: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': f"Erreur lors de la suppression: {str(e)}"
+        }, status=500)
+
+
+@login_required
+@csrf_exempt
+def update_all_positions(request):
+    """Mettre à jour toutes les positions de tous les brokers"""
+    try:
+        # Récupérer tous les brokers configurés
+        brokers = BrokerCredentials.objects.filter(user=request.user, is_active=True)
+        broker_service = BrokerService(request.user)
+        
+        total_updated = 0
+        results = []
+        
+        for broker in brokers:
+            try:
+                # Synchroniser les positions pour ce broker
+                positions = broker_service.sync_positions_from_broker(broker)
+                total_updated += len(positions)
+                results.append(f"{broker.name}: {len(positions)} positions")
+            except Exception as e:
+                results.append(f"{broker.name}: Erreur - {str(e)}")
+        
+        return JsonResponse({
+            'success': True,
+            'message': f"✅ {total_updated} positions mises à jour au total",
+            'updated_count': total_updated,
+            'details': results
+        })
+            
+    except Exception as e:
+        logger.error(f"Erreur lors de la mise à jour des positions: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': f"Erreur lors de la mise à jour: {str(e)}"
+        }, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def binance_positions_ajax(request):
+    """Vue AJAX pour synchroniser les positions Binance"""
+    try:
+        from ..brokers.factory import BrokerFactory
+        from ..models import BrokerCredentials, Position, AssetTradable, Asset, AssetType, Market
+        
+        # Récupérer les credentials Binance
+        binance_credentials = BrokerCredentials.objects.filter(
+            broker_type='binance', 
+            is_active=True
+        ).first()
+        
+        if not binance_credentials:
+            return JsonResponse({'success': False, 'error': 'Aucune configuration Binance active trouvée'})
+        
+        credentials = binance_credentials.get_credentials_dict()
+        binance_broker = BrokerFactory.create_broker('binance', request.user, credentials)
+        
+        # Récupérer les positions depuis Binance
+        positions_data = binance_broker.get_positions()
+        
+        print(f"🔍 {len(positions_data)} positions récupérées depuis Binance")
+        
+        # Récupérer les positions existantes en base pour comparaison
+        existing_positions = Position.objects.filter(
+            user=request.user
+        ).values_list('asset_tradable__symbol', 'side', 'size')
+        
+        existing_positions_set = set()
+        for position in existing_positions:
+            symbol, side, size = position
+            position_key = (symbol, side, float(size))
+            existing_positions_set.add(position_key)
+        
+        print(f"📊 {len(existing_positions)} positions existantes en base de données")
+        
+        # Sauvegarder les nouvelles positions
+        saved_count = 0
+        for position_data in positions_data:
+            try:
+                asset_symbol = position_data.get('asset', 'N/A')
+                
+                # Créer ou récupérer l'asset_tradable
+                asset_type, _ = AssetType.objects.get_or_create(name='Crypto')
+                market, _ = Market.objects.get_or_create(name='Binance')
+                
+                # Trouver un AllAssets correspondant existant
+                all_asset = AssetTradable.find_matching_all_asset(asset_symbol, 'binance')
+                
+                if not all_asset:
+                    print(f"⚠️ Aucun AllAssets trouvé pour {asset_symbol}, position ignorée")
+                    continue
+                
+                # Créer ou récupérer l'AssetTradable
+                asset_tradable, _ = AssetTradable.objects.get_or_create(
+                    symbol=asset_symbol.upper(),
+                    platform='binance',
+                    defaults={
+                        'all_asset': all_asset,
+                        'name': asset_symbol,
+                        'asset_type': asset_type,
+                        'market': market,
+                    }
+                )
+                
+                position_size = float(position_data.get('total', 0))
+                position_side = 'BUY'  # Par défaut pour les balances
+                
+                position_key = (asset_symbol, position_side, position_size)
+                
+                print("Vérification de position_key dans Position_obj...")
+                Position_obj = Position.objects.filter(user=request.user)
+                print("position_key:", position_key[0])
+                print("Nombre de positions:", Position_obj.count())
+
+         
+                #if Position_obj.filter(broker_position_id=position_key[0]).exists():  # Adaptez "id" au champ que vous voulez
+                if Position_obj.filter(asset_tradable__symbol=position_key[0]).exists():
+
+                    print(f"position_key {position_key} existe dans Position_obj")
+                else:
+                    print(f"position_key {position_key} n'existe pas dans Position_obj")
+
+                print(existing_positions_set)
+                #if position_key not in existing_positions_set and position_size > 0:
+                if not Position_obj.filter(asset_tradable__symbol=position_key[0]).exists() and position_size > 0:
+                    position = Position.objects.create(
+                        user=request.user,
+                        asset_tradable=asset_tradable,
+                        broker_position_id= f"{asset_tradable.name} ({asset_tradable.platform})",
+                        size=position_size,
+                        entry_price=0.0,  # Pas de prix d'entrée pour les balances
+                        current_price=0.0,  # À récupérer si nécessaire
+                        side=position_side,
+                        status='OPEN',
+                        pnl=0.0
+                    )
+
+                    saved_count += 1
+                    print(f"✅ Nouvelle position sauvegardée: {asset_symbol} {position_side} {position_size}")
+                else:
+                    print(f"⏭️ Position déjà existante: {asset_symbol} {position_side} {position_size}")
+                    
+            except Exception as e:
+                print(f"❌ Erreur sauvegarde position {position_data.get('asset', 'N/A')}: {e}")
+                continue
+        
+        # Récupérer toutes les positions sauvegardées pour l'affichage
+        saved_positions = Position.objects.filter(user=request.user).select_related('asset_tradable')
+        
+        formatted_positions = []
+        for position in saved_positions:
+            formatted_positions.append({
+                'id': position.id,
+                'asset_name': position.asset_tradable.name if position.asset_tradable else 'N/A',
+                'asset_symbol': position.asset_tradable.symbol if position.asset_tradable else 'N/A',
+                'underlying_asset_name': position.asset_tradable.name if position.asset_tradable else 'N/A',
+                'size': str(position.size),
+                'entry_price': str(position.entry_price),
+                'current_price': str(position.current_price),
+                'side': position.side,
+                'status': position.status,
+                'pnl': str(position.pnl),
+                'created_at': position.created_at.isoformat(),
+                'updated_at': position.updated_at.isoformat(),
+            })
+        
+        return JsonResponse({
+            'success': True,
+            'positions': formatted_positions,
+            'count': len(formatted_positions),
+            'saved_count': saved_count,
+            'message': f'{saved_count} nouvelles positions ajoutées à la base de données'
+        })
+        
+    except Exception as e:
+        print(f"❌ Erreur AJAX positions Binance: {e}")
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+def pending_orders_tabulator(request):
+    """Vue pour afficher les ordres en cours dans un tableau Tabulator"""
+    print("🔍 Vue pending_orders_tabulator appelée")
+    
+    pending_orders = PendingOrder.objects.filter(
+        user=request.user
+        ).select_related('asset_tradable', 'asset_tradable__all_asset', 'broker_credentials')
+    
+    print(f"📊 {pending_orders.count()} ordres en cours trouvés")
+    
+    # Préparer les données pour Tabulator
+    orders_data = []
+    for order in pending_orders:
+        try:
+            order_data = {
+                'id': order.id,
+                'order_id': order.order_id,
+                'symbol': order.asset_tradable.symbol,
+                'name': order.asset_tradable.name,
+                'platform': order.asset_tradable.platform,
+                'broker': order.broker_credentials.name,
+                'order_type': order.order_type,
+                'side': order.side,
+                'status': order.status,
+                'original_quantity': float(order.original_quantity),
+                'executed_quantity': float(order.executed_quantity),
+                'remaining_quantity': float(order.remaining_quantity),
+                'price': float(order.price) if order.price else None,
+                'stop_price': float(order.stop_price) if order.stop_price else None,
+                'fill_percentage': float(order.fill_percentage),
+                'created_at': order.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'expires_at': order.expires_at.strftime('%Y-%m-%d %H:%M:%S') if order.expires_at else None,
+            }
+            orders_data.append(order_data)
+            print(f"✅ Ordre ajouté: {order.order_id} - {order.asset_tradable.symbol}")
+        except Exception as e:
+            print(f"❌ Erreur traitement ordre {order.id}: {e}")
+            import traceback
+            traceback.print_exc()
+    
+    print(f"📋 {len(orders_data)} ordres formatés pour l'affichage")
+    print(f"📋 Données JSON: {orders_data}")
+    
+    # Récupérer les brokers configurés pour les boutons de synchronisation
+    user_brokers = BrokerCredentials.objects.filter(
+        user=request.user,
+        is_active=True
+    ).order_by('name')
+    
+    print(f"🏦 {user_brokers.count()} brokers configurés")
+    
+    return render(request, 'trading_app/pending_orders_tabulator.html', {
+        'orders_data': orders_data,
+        'user_brokers': user_brokers
+    })
+
+
+@login_required
+@csrf_exempt
+def sync_pending_orders(request, broker_id):
+    """Synchroniser les ordres en cours depuis un broker spécifique"""
+    logger.info(f"🔄 Début synchronisation ordres pour broker {broker_id}, utilisateur {request.user}")
+    
+    if request.method != 'POST':
+        logger.warning(f"❌ Méthode non autorisée: {request.method}")
+        return JsonResponse({'success': False, 'message': 'Méthode non autorisée'})
+    
+    try:
+        logger.info(f"🔍 Recherche broker {broker_id} pour utilisateur {request.user}")
+        broker_credentials = BrokerCredentials.objects.get(
+            id=broker_id,
+            user=request.user,
+            is_active=True
+        )
+        logger.info(f"✅ Broker trouvé: {broker_credentials.name} ({broker_credentials.broker_type})")
+        
+        # Utiliser le service pour synchroniser
+        logger.info(f"🔄 Création service BrokerService pour utilisateur {request.user}")
+        service = BrokerService(request.user)
+        
+        logger.info(f"🔄 Appel sync_pending_orders_from_broker pour {broker_credentials.name}")
+        result = service.sync_pending_orders_from_broker(broker_credentials)
+        
+        logger.info(f"📊 Résultat synchronisation: {result}")
+        return JsonResponse(result)
+        
+    except BrokerCredentials.DoesNotExist:
+        logger.error(f"❌ Broker {broker_id} non trouvé pour utilisateur {request.user}")
+        return JsonResponse({
+            'success': False, 
+            'message': 'Broker non trouvé ou non autorisé'
+        })
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de la synchronisation: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'success': False, 
+            'message': f'Erreur lors de la synchronisation: {str(e)}'
+        })
+
+
+@login_required
+@csrf_exempt
+def cancel_order(request, order_id):
+    """Annuler un ordre en cours"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Méthode non autorisée'})
+    
+    try:
+        # Récupérer l'ordre
+        pending_order = PendingOrder.objects.get(
+            order_id=order_id,
+            user=request.user
+        )
+        
+        # Vérifier que l'ordre peut être annulé
+        if pending_order.status not in ['PENDING', 'WORKING', 'PARTIALLY_FILLED']:
+            return JsonResponse({
+                'success': False, 
+                'message': 'Cet ordre ne peut plus être annulé'
+            })
+        
+        # Créer l'instance du broker
+        service = BrokerService(request.user)
+        broker = service.get_broker_instance(pending_order.broker_credentials)
+        
+        if not broker:
+            return JsonResponse({
+                'success': False, 
+                'message': 'Impossible de créer l\'instance du broker'
+            })
+        
+        # Annuler l'ordre via le broker
+        success = broker.cancel_order(
+            order_id=pending_order.order_id,
+            symbol=pending_order.all_asset.symbol  # Utiliser all_asset au lieu d'asset_tradable
+        )
+        
+        if success:
+            # Mettre à jour le statut en base
+            pending_order.status = 'CANCELLED'
+            pending_order.save()
+            
+            return JsonResponse({
+                'success': True, 
+                'message': 'Ordre annulé avec succès'
+            })
+        else:
+            return JsonResponse({
+                'success': False, 
+                'message': 'Échec de l\'annulation de l\'ordre'
+            })
+        
+    except PendingOrder.DoesNotExist:
+        return JsonResponse({
+            'success': False, 
+            'message': 'Ordre non trouvé'
+        })
+    except Exception as e:
+        return JsonResponse({
+            'success': False, 
+            'message': f'Erreur lors de l\'annulation: {str(e)}'
+        })
+
+
+def positions_overview_tabulator(request):
+    """Vue pour afficher le tableau d'aperçu des positions et ordres groupés par asset"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Utilisateur non authentifié'}, status=401)
+    
+    try:
+        # Récupérer tous les AssetTradable de l'utilisateur
+        asset_tradables = AssetTradable.objects.filter(
+            # Filtrer par les positions et pending orders de l'utilisateur
+            position__user=request.user
+        ).distinct()
+        
+        # Ajouter les AssetTradable des pending orders
+        pending_order_assets = AssetTradable.objects.filter(
+            pendingorder__user=request.user
+        ).distinct()
+        
+        # Combiner les deux querysets
+        asset_tradables = list(asset_tradables) + list(pending_order_assets)
+        # Supprimer les doublons basés sur l'ID
+        seen_ids = set()
+        unique_asset_tradables = []
+        for asset in asset_tradables:
+            if asset.id not in seen_ids:
+                seen_ids.add(asset.id)
+                unique_asset_tradables.append(asset)
+        asset_tradables = unique_asset_tradables
+        
+        strategies_data = []
+        
+        for asset_tradable in asset_tradables:
+            # Récupérer les positions pour cet asset
+            positions = Position.objects.filter(
+                user=request.user,
+                asset_tradable=asset_tradable
+            )
+            
+            # Récupérer les pending orders pour cet asset
+            pending_orders = PendingOrder.objects.filter(
+                user=request.user,
+                asset_tradable=asset_tradable
+            ).select_related('broker_credentials')
+            
+            # Calculer les totaux
+            total_position_size = sum(float(pos.size) for pos in positions)
+            total_pending_quantity = sum(float(order.original_quantity) for order in pending_orders)
+            
+            # Calculer le net (positions + pending orders)
+            # Les positions BUY et pending orders BUY sont positives
+            # Les positions SELL et pending orders SELL sont négatives
+            net_position = 0.0
+            for pos in positions:
+                if pos.side == 'BUY':
+                    net_position += float(pos.size)
+                else:  # SELL
+                    net_position -= float(pos.size)
+            
+            for order in pending_orders:
+                if order.side == 'BUY':
+                    net_position += float(order.original_quantity)
+                else:  # SELL
+                    net_position -= float(order.original_quantity)
+            
+            # Créer la ligne principale pour l'asset
+            asset_row = {
+                'id': f"asset_{asset_tradable.id}",
+                'type': 'asset',
+                'symbol': asset_tradable.symbol or 'Unknown',
+                'name': asset_tradable.name or 'Unknown',
+                'platform': asset_tradable.platform,
+                'total_position_size': total_position_size,
+                'total_pending_quantity': total_pending_quantity,
+                'net_position': net_position,
+                'positions_count': positions.count(),
+                'pending_orders_count': pending_orders.count(),
+                'created_at': asset_tradable.created_at.strftime('%d/%m/%Y %H:%M') if asset_tradable.created_at else '',
+                'children': []
+            }
+            
+            # Ajouter les positions comme enfants
+            for pos in positions:
+                position_row = {
+                    'id': f"position_{pos.id}",
+                    'type': 'position',
+                    'symbol': asset_tradable.symbol or 'Unknown',
+                    'name': asset_tradable.name or 'Unknown',
+                    'side': pos.side,
+                    'size': float(pos.size),
+                    'entry_price': float(pos.entry_price) if pos.entry_price else 0.0,
+                    'current_price': float(pos.current_price) if pos.current_price else 0.0,
+                    'pnl': float(pos.pnl) if pos.pnl else 0.0,
+                    'status': pos.status,
+                    'broker': 'Unknown',  # Position n'a pas de broker_credentials
+                    'created_at': pos.created_at.strftime('%d/%m/%Y %H:%M') if pos.created_at else '',
+                    'asset_tradable_id': asset_tradable.id
+                }
+                asset_row['children'].append(position_row)
+            
+            # Ajouter les pending orders comme enfants
+            for order in pending_orders:
+                order_row = {
+                    'id': f"order_{order.id}",
+                    'type': 'pending_order',
+                    'symbol': asset_tradable.symbol or 'Unknown',
+                    'name': asset_tradable.name or 'Unknown',
+                    'side': order.side,
+                    'quantity': float(order.original_quantity),
+                    'executed_quantity': float(order.executed_quantity) if order.executed_quantity else 0.0,
+                    'remaining_quantity': float(order.remaining_quantity) if order.remaining_quantity else 0.0,
+                    'price': float(order.price) if order.price else None,
+                    'order_type': order.order_type,
+                    'status': order.status,
+                    'broker': order.broker_credentials.name if order.broker_credentials else 'Unknown',
+                    'created_at': order.created_at.strftime('%d/%m/%Y %H:%M') if order.created_at else '',
+                    'asset_tradable_id': asset_tradable.id
+                }
+                asset_row['children'].append(order_row)
+            
+            strategies_data.append(asset_row)
+        
+        # Trier par symbole
+        strategies_data.sort(key=lambda x: x['symbol'])
+        
+        return JsonResponse({
+            'success': True,
+            'data': strategies_data
+        })
+        
+    except Exception as e:
+        logger.error(f"Erreur dans positions_overview_tabulator: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': f'Erreur lors de la récupération des données: {str(e)}'
+        })
+
+
+@login_required
+@csrf_exempt
+@require_http_methods(["POST"])
+def update_portfolio_quantities(request):
+    """Met à jour les quantités de portefeuille pour toutes les stratégies de l'utilisateur"""
+    try:
+        # ÉTAPE 1: Mettre à jour les AssetTradable.quantity d'abord
+        print("🔄 Étape 1: Mise à jour des AssetTradable.quantity...")
+        
+        # Récupérer tous les AssetTradable liés aux stratégies de l'utilisateur
+        user_strategies = Strategy.objects.filter(user=request.user)
+        user_asset_symbols = set()
+        
+        for strategy in user_strategies:
+            if strategy.asset and strategy.asset.symbol:
+                # Extraire le symbole de base (AAPL, GOOGL)
+                base_symbol = strategy.asset.symbol.split(':')[0].split('_')[0].upper()
+                user_asset_symbols.add(base_symbol)
+        
+        # Mettre à jour chaque AssetTradable correspondant
+        asset_tradables_updated = 0
+        for base_symbol in user_asset_symbols:
+            try:
+                # Chercher tous les AssetTradable correspondants (toutes plateformes)
+                asset_tradables = AssetTradable.objects.filter(
+                    symbol__startswith=base_symbol
+                )
+                
+                for asset_tradable in asset_tradables:
+                    # Calculer la quantité nette pour cet AssetTradable
+                    positions = Position.objects.filter(
+                        user=request.user,
+                        asset_tradable=asset_tradable
+                    )
+                    
+                    pending_orders = PendingOrder.objects.filter(
+                        user=request.user,
+                        asset_tradable=asset_tradable
+                    )
+                    
+                    # Calculer le net (positions + pending orders)
+                    net_position = 0.0
+                    
+                    for pos in positions:
+                        if pos.side == 'BUY':
+                            net_position += float(pos.size)
+                        else:  # SELL
+                            net_position -= float(pos.size)
+                    
+                    for order in pending_orders:
+                        if order.side == 'BUY':
+                            net_position += float(order.original_quantity)
+                        else:  # SELL
+                            net_position -= float(order.original_quantity)
+                    
+                    # Mettre à jour le champ quantity
+                    old_quantity = asset_tradable.quantity
+                    asset_tradable.quantity = net_position
+                    asset_tradable.save(update_fields=['quantity'])
+                    
+                    print(f"   ✅ {asset_tradable.symbol}: {old_quantity} → {net_position:.6f}")
+                    asset_tradables_updated += 1
+                    
+            except Exception as e:
+                print(f"   ❌ Erreur mise à jour AssetTradable {base_symbol}: {e}")
+        
+        # ÉTAPE 2: Mettre à jour les stratégies maintenant que AssetTradable sont à jour
+        print(f"🔄 Étape 2: Mise à jour des stratégies (après {asset_tradables_updated} AssetTradable)...")
+        
+        strategies = Strategy.objects.filter(user=request.user)
+        strategies_updated = 0
+        
+        for strategy in strategies:
+            try:
+                strategy.calculate_portfolio_quantity()
+                strategies_updated += 1
+                print(f"   ✅ Stratégie {strategy.name}: portfolio_quantity mis à jour")
+            except Exception as e:
+                print(f"   ❌ Erreur mise à jour stratégie {strategy.name}: {e}")
+        
+        return JsonResponse({
+            'success': True,
+            'message': f'{asset_tradables_updated} AssetTradable et {strategies_updated} stratégies mises à jour',
+            'updated_count': strategies_updated,
+            'asset_tradables_updated': asset_tradables_updated
+        })
+        
+    except Exception as e:
+        print(f"❌ Erreur générale dans update_portfolio_quantities: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        })
+
+
+def test_page(request):
+    """Page de test avec boutons de synchronisation"""
+    # Récupérer les brokers de l'utilisateur
+    user_brokers = []
+    orders_data = []
+    
+    if request.user.is_authenticated:
+        user_brokers = BrokerCredentials.objects.filter(
+            user=request.user,
+            is_active=True
+        ).order_by('name')
+        
+        # Récupérer les ordres en cours
+        pending_orders = PendingOrder.objects.filter(
+            user=request.user
+        ).select_related('broker_credentials', 'all_asset').order_by('-created_at')
+        
+        for order in pending_orders:
+            # Calculer le pourcentage de remplissage
+            if order.original_quantity and order.original_quantity > 0:
+                fill_percentage = ((order.original_quantity - order.remaining_quantity) / order.original_quantity) * 100
+            else:
+                fill_percentage = 0.0
+            
+            orders_data.append({
+                'order_id': order.order_id,
+                'symbol': order.all_asset.symbol if order.all_asset else 'Unknown',
+                'name': order.all_asset.name if order.all_asset else 'Unknown',
+                'broker': order.broker_credentials.name,
+                'platform': order.broker_credentials.broker_type,
+                'order_type': order.order_type,
+                'side': order.side,
+                'status': order.status,
+                'original_quantity': float(order.original_quantity) if order.original_quantity else 0.0,
+                'executed_quantity': float(order.executed_quantity) if order.executed_quantity else 0.0,
+                'remaining_quantity': float(order.remaining_quantity) if order.remaining_quantity else 0.0,
+                'price': float(order.price) if order.price is not None else None,
+                'stop_price': float(order.stop_price) if order.stop_price is not None else None,
+                'fill_percentage': float(fill_percentage),
+                'created_at': order.created_at.strftime('%d/%m/%Y %H:%M') if order.created_at else '',
+                'expires_at': order.expires_at.strftime('%d/%m/%Y %H:%M') if order.expires_at else '',
+                'broker_data': order.broker_data or {}
+            })
+    
+    return render(request, 'trading_app/test_page.html', {
+        'user_brokers': user_brokers,
+        'orders_data': orders_data
+    })
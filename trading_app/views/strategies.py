@@ -0,0 +1,443 @@
+"""
+Vues des stratégies de trading : création, configuration, exécution et historique
+"""
+
+from django.shortcuts import render, get_object_or_404
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from ..models import Asset, Strategy, StrategyExecution, BrokerCredentials
+from .. import trade_aggregates
+from ..strategy_runner import strategy_runner
+
+
+@login_required
+def strategy_tabulator(request):
+    """Page principale des stratégies avec tableau et interface de gestion"""
+    strategies = Strategy.objects.filter(user=request.user).select_related('asset', 'broker')
+    
+    # Agrégats de trades par symbole de base (une ligne par symbole)
+    traded_by_symbol = trade_aggregates.merge_by_symbol(trade_aggregates.stored_aggregates(request.user))
+    
+    # Préparer les données pour le tableau
+    data_strategies = []
+    for strategy in strategies:
+        # Utiliser directement le champ portfolio_quantity pré-calculé
+        portfolio_quantity = float(strategy.portfolio_quantity) if strategy.portfolio_quantity != -1 else -1
+        
+        # Si pas encore calculé, le calculer maintenant
+        if portfolio_quantity == -1:
+            try:
+                strategy.calculate_portfolio_quantity()
+                portfolio_quantity = float(strategy.portfolio_quantity) if strategy.portfolio_quantity != -1 else -1
+            except Exception as e:
+                print(f"Erreur calcul portfolio pour {strategy.name}: {e}")
+                portfolio_quantity = -1
+        
+        traded = traded_by_symbol.get(trade_aggregates.get_base_symbol(strategy.asset.symbol).upper()) if strategy.asset else None
+        
+        data_strategies.append({
+            'id': strategy.id,
+            'name': strategy.name,
+            'asset_name': strategy.asset.symbol_clean if strategy.asset else 'N/A',
+            'portfolio_quantity': portfolio_quantity,  # Nouvelle colonne
+            'target_min_quantity': float(strategy.target_min_quantity) if strategy.target_min_quantity else 0,
+            'target_max_quantity': float(strategy.target_max_quantity) if strategy.target_max_quantity else 0,
+            'algorithm_type': strategy.algorithm_type,
+            'algorithm_type_display': strategy.get_algorithm_type_display(),
+            'broker_name': strategy.broker.name if strategy.broker else 'N/A',
+            'execution_mode': strategy.execution_mode,
+            'execution_mode_display': strategy.get_execution_mode_display(),
+            'status': strategy.status,
+            'check_frequency': strategy.check_frequency,
+            'total_trades': strategy.total_trades,
+            'successful_trades': strategy.successful_trades,
+            'total_pnl': float(strategy.total_pnl),
+            'traded_count': traded['buy_count'] + traded['sell_count'] if traded else 0,
+            'traded_net_quantity': float(traded['buy_quantity'] - traded['sell_quantity']) if traded else 0,
+            'last_execution': strategy.last_execution.isoformat() if strategy.last_execution else None,
+            'created_at': strategy.created_at.isoformat(),
+        })
+    
+    # Données pour les dropdowns
+    assets_data = list(Asset.objects.all().values('id', 'symbol_clean', 'name'))
+    brokers_data = list(BrokerCredentials.objects.filter(user=request.user).values('id', 'name', 'broker_type'))
+    
+    return render(request, 'trading_app/strategy_tabulator.html', {
+        'data_strategies': json.dumps(data_strategies, cls=DjangoJSONEncoder),
+        'assets_data': json.dumps(assets_data, cls=DjangoJSONEncoder),
+        'brokers_data': json.dumps(brokers_data, cls=DjangoJSONEncoder),
+    })
+
+
+@login_required
+@csrf_exempt
+@require_http_methods(["POST"])
+def create_strategy(request):
+    """Créer une nouvelle stratégie"""
+    try:
+        data = json.loads(request.body)
+        
+        # Validation des données
+        required_fields = ['name', 'asset', 'algorithm_type', 'broker', 'execution_mode']
+        for field in required_fields:
+            if not data.get(field):
+                return JsonResponse({'success': False, 'error': f'Champ {field} requis'})
+        
+        # Récupérer les objets
+        asset = get_object_or_404(Asset, id=data['asset'])
+        broker = get_object_or_404(BrokerCredentials, id=data['broker'], user=request.user)
+        
+        # Traiter la fréquence
+        check_frequency = data.get('check_frequency', 45)
+        if isinstance(check_frequency, str):
+            try:
+                check_frequency = int(check_frequency)
+            except ValueError:
+                return JsonResponse({'success': False, 'error': 'Fréquence invalide (doit être un nombre entier)'})
+        
+        if not isinstance(check_frequency, int) or check_frequency < 1 or check_frequency > 1440:
+            return JsonResponse({'success': False, 'error': 'Fréquence invalide (doit être entre 1 et 1440 minutes)'})
+        
+        # Traiter les quantités cibles
+        target_min_quantity = data.get('target_min_quantity', 0)
+        target_max_quantity = data.get('target_max_quantity', 0)
+        
+        # Validation des quantités cibles
+        if target_min_quantity and target_max_quantity:
+            if float(target_min_quantity) > float(target_max_quantity):
+                return JsonResponse({
+                    'success': False, 
+                    'error': 'La quantité minimale ne peut pas être supérieure à la quantité maximale'
+                })
+        
+        # Créer la stratégie
+        strategy = Strategy.objects.create(
+            user=request.user,
+            name=data['name'],
+            asset=asset,
+            algorithm_type=data['algorithm_type'],
+            parameters=data.get('parameters', {}),
+            broker=broker,
+            execution_mode=data['execution_mode'],
+            check_frequency=check_frequency,
+            comments=data.get('comments', ''),
+            target_min_quantity=target_min_quantity,
+            target_max_quantity=target_max_quantity,
+            status='inactive'  # Par défaut inactive
+        )
+        
+        return JsonResponse({
+            'success': True,
+            'strategy_id': strategy.id,
+            'message': 'Stratégie créée avec succès'
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Données JSON invalides'})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+def strategy_details(request, strategy_id):
+    """Obtenir les détails d'une stratégie"""
+    try:
+        strategy = get_object_or_404(Strategy, id=strategy_id, user=request.user)
+        
+        strategy_data = {
+            'id': strategy.id,
+            'name': strategy.name,
+            'asset_id': strategy.asset.id if strategy.asset else None,
+            'asset_name': strategy.asset.symbol_clean if strategy.asset else 'N/A',
+            'algorithm_type': strategy.algorithm_type,
+            'algorithm_type_display': strategy.get_algorithm_type_display(),
+            'broker_id': strategy.broker.id if strategy.broker else None,
+            'broker_name': strategy.broker.name if strategy.broker else 'N/A',
+            'execution_mode': strategy.execution_mode,
+            'execution_mode_display': strategy.get_execution_mode_display(),
+            'status': strategy.status,
+            'check_frequency': strategy.check_frequency,
+            'total_trades': strategy.total_trades,
+            'successful_trades': strategy.successful_trades,
+            'total_pnl': float(strategy.total_pnl),
+            'last_execution': strategy.last_execution.isoformat() if strategy.last_execution else None,
+            'parameters': strategy.parameters,
+            'comments': strategy.comments,
+            'target_min_quantity': float(strategy.target_min_quantity) if strategy.target_min_quantity else 0,
+            'target_max_quantity': float(strategy.target_max_quantity) if strategy.target_max_quantity else 0,
+            'created_at': strategy.created_at.isoformat(),
+        }
+        
+        return JsonResponse({'success': True, 'strategy': strategy_data})
+        
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+@csrf_exempt
+@require_http_methods(["POST"])
+def toggle_strategy(request, strategy_id):
+    """Activer/Désactiver une stratégie"""
+    try:
+        strategy = get_object_or_404(Strategy, id=strategy_id, user=request.user)
+        
+        # Basculer le statut
+        if strategy.status == 'active':
+            strategy.status = 'inactive'
+        else:
+            strategy.status = 'active'
+        
+        strategy.save()
+        
+        return JsonResponse({
+            'success': True,
+            'new_status': strategy.status,
+            'message': f'Stratégie {strategy.status}'
+        })
+        
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+@csrf_exempt
+@require_http_methods(["POST"])
+def delete_strategy(request, strategy_id):
+    """Supprimer une stratégie"""
+    try:
+        strategy = get_object_or_404(Strategy, id=strategy_id, user=request.user)
+        strategy.delete()
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Stratégie supprimée avec succès'
+        })
+        
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+@csrf_exempt
+@require_http_methods(["POST"])
+def execute_strategy(request, strategy_id):
+    """Exécuter une stratégie manuellement"""
+    try:
+        strategy = get_object_or_404(Strategy.objects.select_related('asset', 'broker'), id=strategy_id, user=request.user)
+        # Prix, signal, StrategyExecution et intention d'ordre : service partagé avec l'automatisation
+        return JsonResponse(strategy_runner.run(strategy))
+        
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+@csrf_exempt
+@require_http_methods(["POST"])
+def update_strategy_frequency(request, strategy_id):
+    """Mettre à jour la fréquence d'une stratégie"""
+    try:
+        strategy = get_object_or_404(Strategy, id=strategy_id, user=request.user)
+        data = json.loads(request.body)
+        
+        frequency = data.get('frequency', 45)
+        
+        # Convertir en int si c'est une chaîne
+        if isinstance(frequency, str):
+            try:
+                frequency = int(frequency)
+            except ValueError:
+                return JsonResponse({
+                    'success': False, 
+                    'error': 'Fréquence invalide (doit être un nombre entier)'
+                })
+        
+        # Validation de la plage
+        if not isinstance(frequency, int) or frequency < 1 or frequency > 1440:
+            return JsonResponse({
+                'success': False, 
+                'error': 'Fréquence invalide (doit être entre 1 et 1440 minutes)'
+            })
+        
+        strategy.check_frequency = frequency
+        strategy.save()
+        
+        return JsonResponse({
+            'success': True,
+            'message': f'Fréquence mise à jour: {frequency} minutes'
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Données JSON invalides'})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+def get_strategy_executions(request, strategy_id):
+    """Récupérer l'historique des exécutions d'une stratégie"""
+    try:
+        strategy = get_object_or_404(Strategy, id=strategy_id, user=request.user)
+        
+        # Récupérer toutes les exécutions de cette stratégie
+        executions = StrategyExecution.objects.filter(
+            strategy=strategy
+        ).order_by('-execution_time')
+        
+        # Formater les données des exécutions
+        executions_data = []
+        for execution in executions:
+            executions_data.append({
+                'id': execution.id,
+                'execution_time': execution.execution_time.isoformat(),
+                'signal': execution.signal,
+                'signal_strength': float(execution.signal_strength),
+                'current_price': float(execution.current_price),
+                'order_executed': execution.order_executed,
+                'order_size': float(execution.order_size) if execution.order_size else None,
+                'order_price': float(execution.order_price) if execution.order_price else None,
+                'execution_duration': execution.execution_duration,
+                'error_message': execution.error_message
+            })
+        
+        return JsonResponse({
+            'success': True,
+            'executions': executions_data,
+            'strategy': {
+                'id': strategy.id,
+                'name': strategy.name,
+                'asset_name': strategy.asset.symbol_clean or strategy.asset.symbol
+            }
+        })
+        
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        })
+
+
+@login_required
+@csrf_exempt
+@require_http_methods(["POST"])
+def update_strategy(request, strategy_id):
+    """Mettre à jour une stratégie complète"""
+    try:
+        strategy = get_object_or_404(Strategy, id=strategy_id, user=request.user)
+        data = json.loads(request.body)
+        
+        # Validation des données
+        required_fields = ['name', 'asset', 'algorithm_type', 'broker', 'execution_mode']
+        for field in required_fields:
+            if not data.get(field):
+                return JsonResponse({'success': False, 'error': f'Champ {field} requis'})
+        
+        # Récupérer les objets
+        asset = get_object_or_404(Asset, id=data['asset'])
+        broker = get_object_or_404(BrokerCredentials, id=data['broker'], user=request.user)
+        
+        # Traiter la fréquence
+        check_frequency = data.get('check_frequency', 45)
+        if isinstance(check_frequency, str):
+            try:
+                check_frequency = int(check_frequency)
+            except ValueError:
+                return JsonResponse({'success': False, 'error': 'Fréquence invalide (doit être un nombre entier)'})
+        
+        if not isinstance(check_frequency, int) or check_frequency < 1 or check_frequency > 1440:
+            return JsonResponse({'success': False, 'error': 'Fréquence invalide (doit être entre 1 et 1440 minutes)'})
+        
+        # Traiter les quantités cibles
+        target_min_quantity = data.get('target_min_quantity', 0)
+        target_max_quantity = data.get('target_max_quantity', 0)
+        
+        # Validation des quantités cibles
+        if target_min_quantity and target_max_quantity:
+            if float(target_min_quantity) > float(target_max_quantity):
+                return JsonResponse({
+                    'success': False, 
+                    'error': 'La quantité minimale ne peut pas être supérieure à la quantité maximale'
+                })
+        
+        # Mettre à jour la stratégie
+        strategy.name = data['name']
+        strategy.asset = asset
+        strategy.algorithm_type = data['algorithm_type']
+        strategy.parameters = data.get('parameters', {})
+        strategy.broker = broker
+        strategy.execution_mode = data['execution_mode']
+        strategy.check_frequency = check_frequency
+        strategy.comments = data.get('comments', '')
+        strategy.target_min_quantity = target_min_quantity
+        strategy.target_max_quantity = target_max_quantity
+        strategy.save()
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Stratégie mise à jour avec succès'
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Données JSON invalides'})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
+@login_required
+def execution_history(request):
+    """Récupérer l'historique des exécutions avec filtres"""
+    try:
+        # Récupérer les paramètres de filtrage
+        strategy_id = request.GET.get('strategy')
+        signal = request.GET.get('signal')
+        date_from = request.GET.get('date_from')
+        date_to = request.GET.get('date_to')
+        
+        # Construire la requête
+        executions = StrategyExecution.objects.filter(strategy__user=request.user)
+        
+        if strategy_id:
+            executions = executions.filter(strategy_id=strategy_id)
+        
+        if signal:
+            executions = executions.filter(signal=signal)
+        
+        if date_from:
+            executions = executions.filter(execution_time__date__gte=date_from)
+        
+        if date_to:
+            executions = executions.filter(execution_time__date__lte=date_to)
+        
+        # Ordonner par date décroissante et limiter à 1000 résultats
+        executions = executions.select_related('strategy').order_by('-execution_time')[:1000]
+        
+        # Préparer les données
+        execution_data = []
+        for execution in executions:
+            execution_data.append({
+                'id': execution.id,
+                'strategy_name': execution.strategy.name,
+                'execution_time': execution.execution_time.isoformat(),
+                'signal': execution.signal,
+                'signal_strength': float(execution.signal_strength),
+                'current_price': float(execution.current_price),
+                'order_executed': execution.order_executed,
+                'order_size': float(execution.order_size) if execution.order_size else None,
+                'order_price': float(execution.order_price) if execution.order_price else None,
+                'execution_duration': float(execution.execution_duration),
+                'error_message': execution.error_message
+            })
+        
+        return JsonResponse({
+            'success': True,
+            'executions': execution_data,
+            'total_count': len(execution_data)
+        })
+        
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})